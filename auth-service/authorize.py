@@ -1,10 +1,12 @@
 import os
-import boto3
 from datetime import datetime
 from common import get_table
+from instrumentation import instrument
+from auth_helper import is_signed_token, verify_signed_token
 
 TOKENS_TABLE_USERS = os.environ.get("TOKENS_TABLE_USERS")
 
+@instrument
 def authorize(event, context):
     try:
         token = event.get('authorizationToken') or event.get('headers', {}).get('Authorization')
@@ -15,6 +17,15 @@ def authorize(event, context):
         if token.lower().startswith('bearer '):
             token = token[7:]
 
+        # Signed tokens are verified with CPU only, no DynamoDB read
+        if is_signed_token(token):
+            claims = verify_signed_token(token)
+            if not claims:
+                return generate_policy('user', 'Deny', event['methodArn'])
+
+            user = claims.get('sub')
+            return generate_policy(user, 'Allow', event['methodArn'], context=_context(user, claims.get('rol'), claims.get('local_id')))
+
         # Validate against DynamoDB
         table = get_table(TOKENS_TABLE_USERS)
         result = table.get_item(Key={'token': token})
@@ -40,12 +51,19 @@ def authorize(event, context):
         user = item.get('user_id')
         role = item.get('rol')
         
-        return generate_policy(user, 'Allow', event['methodArn'], context={'role': role, 'username': user})
+        return generate_policy(user, 'Allow', event['methodArn'], context=_context(user, role, item.get('local_id')))
 
     except Exception as e:
         print(f"Auth failed: {e}")
         return generate_policy('user', 'Deny', event['methodArn'])
 
+def _context(user, role, local_id=None):
+    # API Gateway rejects null context values: local_id only for employee tokens
+    context = {'role': role, 'username': user}
+    if local_id:
+        context['local_id'] = local_id
+    return context
+
 def generate_policy(principal_id, effect, resource, context=None):
     auth_response = {
         'principalId': principal_id
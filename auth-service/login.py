@@ -1,12 +1,10 @@
 import json
-import uuid
 import os
-import boto3
-from datetime import datetime, timedelta
 from common import response, get_table, hash_password, TABLE_USERS
+from instrumentation import instrument
+from tokens import issue_token
 
-TOKENS_TABLE_USERS = os.environ.get("TOKENS_TABLE_USERS")
-
+@instrument
 def login(event, context):
     try:
         body = json.loads(event.get('body', '{}'))
@@ -31,20 +29,8 @@ def login(event, context):
             if stored_password != password:
                 return response(401, {"error": "Credenciales inválidas (Password incorrecto)"})
 
-        token = str(uuid.uuid4())
         role = user.get('role', 'Cliente')
-        expires = datetime.now() + timedelta(minutes=60)
-        expires_str = expires.strftime('%Y-%m-%d %H:%M:%S')
-
-        token_record = {
-            'token': token,
-            'user_id': email,
-            'rol': role,
-            'expires': expires_str
-        }
-        
-        table_tokens = get_table(TOKENS_TABLE_USERS)
-        table_tokens.put_item(Item=token_record)
+        token, expires_str = issue_token(email, role)
 
         return response(200, {
             "token": token,
@@ -1,14 +1,13 @@
 import json
-import uuid
 import os
-import boto3
-from datetime import datetime, timedelta
 from common import response, get_table, hash_password
+from instrumentation import instrument
+from tokens import issue_token
 from boto3.dynamodb.conditions import Key
 
-TOKENS_TABLE_USERS = os.environ.get("TOKENS_TABLE_USERS")
 TABLE_EMPLEADOS = os.environ.get("TABLE_EMPLEADOS")
 
+@instrument
 def login_empleado(event, context):
     try:
         body = json.loads(event.get('body', '{}'))
@@ -39,27 +38,17 @@ def login_empleado(event, context):
             if stored_password != password:
                 return response(401, {"error": "Credenciales inválidas (Password incorrecto)"})
 
-        # Generate Token
-        token = str(uuid.uuid4())
+        # Generate Token (stored in DynamoDB only in opaque mode)
         role = user.get('role', 'Empleado')
-        expires = datetime.now() + timedelta(minutes=60)
-        expires_str = expires.strftime('%Y-%m-%d %H:%M:%S')
-
-        # Store Token in DynamoDB
-        token_record = {
-            'token': token,
-            'user_id': email,
-            'rol': role,
-            'type': 'empleado',
-            'expires': expires_str
-        }
-        
-        table_tokens = get_table(TOKENS_TABLE_USERS)
-        table_tokens.put_item(Item=token_record)
+        # The employee's local travels in the token: kitchen and delivery act on it
+        local_id = user.get('local_id')
+        extra = {'type': 'empleado', 'local_id': local_id} if local_id else {'type': 'empleado'}
+        token, expires_str = issue_token(email, role, extra)
 
         return response(200, {
             "token": token,
             "role": role,
+            "local_id": local_id,
             "expires": expires_str,
             "message": "Login empleado exitoso"
         })
@@ -0,0 +1,24 @@
+from common import response
+from instrumentation import instrument
+from tokens import revoke_token
+
+@instrument
+def logout(event, context):
+    try:
+        headers = event.get('headers') or {}
+        token = headers.get('Authorization') or headers.get('authorization')
+
+        if not token:
+            return response(400, {"error": "Falta header Authorization"})
+
+        if token.lower().startswith('bearer '):
+            token = token[7:].strip()
+
+        if not revoke_token(token):
+            return response(401, {"error": "Token inválido o expirado"})
+
+        return response(200, {"message": "Sesión cerrada"})
+
+    except Exception as e:
+        print(f"Error logout: {e}")
+        return response(500, {"error": "Error interno logout"})
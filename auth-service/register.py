@@ -1,16 +1,15 @@
 import json
-import uuid
 import os
 import re
-import boto3
-from datetime import datetime, timedelta
+from datetime import datetime
 from common import response, get_table, hash_password, TABLE_USERS
-
-TOKENS_TABLE_USERS = os.environ.get("TOKENS_TABLE_USERS")
+from instrumentation import instrument
+from tokens import issue_token
 
 ALLOWED_ROLES = {"Cliente", "Gerente", "Admin", "Cocinero", "Driver"}
 EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 
+@instrument
 def register_user(event, context):
     try:
         body = json.loads(event.get("body") or "{}")
@@ -51,20 +50,7 @@ def register_user(event, context):
         table_users.put_item(Item=new_user)
 
         # Generate Token
-        token = str(uuid.uuid4())
-        expires = datetime.now() + timedelta(minutes=60)
-        expires_str = expires.strftime('%Y-%m-%d %H:%M:%S')
-        
-        token_record = {
-            'token': token,
-            'user_id': target_username,
-            'rol': role,
-            'expires': expires_str
-        }
-        
-        # Store token
-        table_tokens = get_table(TOKENS_TABLE_USERS)
-        table_tokens.put_item(Item=token_record)
+        token, expires_str = issue_token(target_username, role)
 
         return response(201, {
             "message": "Usuario registrado",
@@ -1,28 +1,41 @@
 import time
-from common import get_table, TABLE_ORDERS
+from botocore.exceptions import ClientError
+from common import get_table, TABLE_ORDERS, DEFAULT_LOCAL_ID
+from instrumentation import instrument
+from order_shards import key_candidates, key_status
 
+@instrument
 def register_token(event, context):
     try:
         order_id = event.get('order_id')
-        local_id = event.get('local_id', 'BURGER-LOCAL-001')
+        local_id = event.get('local_id') or DEFAULT_LOCAL_ID
         token = event.get('taskToken')
         stage = event.get('stage')
+        if not local_id:
+            raise ValueError(f"Pedido {order_id} sin local_id")
         
         table = get_table(TABLE_ORDERS)
-        table.update_item(
-            Key={
-                'local_id': local_id,
-                'pedido_id': order_id
-            },
-            UpdateExpression="SET task_token = :t, #s = :s, updated_at = :u",
-            ExpressionAttributeNames={'#s': 'status'},
-            ExpressionAttributeValues={
-                ':t': token,
-                ':s': stage,
-                ':u': int(time.time())
-            }
-        )
-        return {"status": "TokenRegistered"}
+        # Sharded key first; orders created before ORDER_SHARDS keep the plain local_id until migrated
+        for key in key_candidates(local_id, order_id):
+            try:
+                table.update_item(
+                    Key=key,
+                    UpdateExpression="SET task_token = :t, #s = :s, local_status = :ls, updated_at = :u",
+                    ConditionExpression="attribute_exists(pedido_id)",
+                    ExpressionAttributeNames={'#s': 'status'},
+                    ExpressionAttributeValues={
+                        ':t': token,
+                        ':s': stage,
+                        ':ls': key_status(key, stage),
+                        # String like every other writer: updated_at is the sort key of by_local_status
+                        ':u': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+                    }
+                )
+                return {"status": "TokenRegistered"}
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+        raise ValueError(f"Pedido {order_id} no encontrado")
     except Exception as e:
         print(f"Error registering token: {e}")
         raise e
@@ -0,0 +1,79 @@
+"""
+Emisión y revocación de tokens de sesión.
+
+Dos modos, elegidos con TOKEN_MODE:
+- opaque: UUID guardado en TOKENS_TABLE_USERS (comportamiento original).
+- signed: JWT HS256 con usuario, rol y expiración; se verifica solo con CPU.
+
+La verificación y la lista de revocación (un único item de la tabla de
+tokens, cacheado por contenedor) están en auth_helper, la misma
+implementación que usan los demás servicios. El logout agrega a esa lista el
+`jti` de un JWT, o el token opaco además de borrar su registro: así la
+TokenCache de los otros servicios deja de aceptarlo en REVOCATION_CACHE_TTL
+segundos y no en TOKEN_CACHE_TTL.
+"""
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from common import get_table
+from auth_helper import (JWT_ALGORITHM, JWT_SECRET, REVOCATION_KEY, TOKEN_CACHE_TTL, TOKEN_MODE,
+                         TOKENS_TABLE_USERS, is_signed_token, parse_expires, revoke, verify_signed_token)
+
+JWT_EXPIRATION = int(os.environ.get("JWT_EXPIRATION", "3600"))
+
+
+def issue_token(user_id: str, role: str, extra: Optional[Dict] = None) -> Tuple[str, str]:
+    """Emite un token según TOKEN_MODE y retorna (token, expires_str)."""
+    expires = datetime.now() + timedelta(seconds=JWT_EXPIRATION)
+    expires_str = expires.strftime('%Y-%m-%d %H:%M:%S')
+    extra = extra or {}
+
+    if TOKEN_MODE == "signed":
+        import jwt  # only needed for signed tokens
+
+        claims = {
+            'sub': user_id,
+            'rol': role,
+            'exp': int(expires.timestamp()),
+            'iat': int(time.time()),
+            'jti': uuid.uuid4().hex,
+        }
+        claims.update(extra)
+        return jwt.encode(claims, JWT_SECRET, algorithm=JWT_ALGORITHM), expires_str
+
+    token = str(uuid.uuid4())
+    token_record = {
+        'token': token,
+        'user_id': user_id,
+        'rol': role,
+        'expires': expires_str
+    }
+    token_record.update(extra)
+
+    get_table(TOKENS_TABLE_USERS).put_item(Item=token_record)
+    return token, expires_str
+
+
+def revoke_token(token: str) -> bool:
+    """Invalida un token. Retorna False si el token no es válido o no existe."""
+    if is_signed_token(token):
+        claims = verify_signed_token(token)
+        if not claims:
+            return False
+        revoke(claims['jti'], claims['exp'])
+        return True
+
+    if token == REVOCATION_KEY:
+        return False
+    item = get_table(TOKENS_TABLE_USERS).delete_item(Key={'token': token}, ReturnValues='ALL_OLD').get('Attributes')
+    if not item:
+        return False
+
+    # Other containers may still hold it in their TokenCache, at most TOKEN_CACHE_TTL seconds
+    now = time.time()
+    expires_at = min(parse_expires(item.get('expires')), now + TOKEN_CACHE_TTL)
+    if expires_at > now:
+        revoke(token, int(expires_at) + 1)
+    return True
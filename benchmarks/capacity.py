@@ -0,0 +1,221 @@
+"""
+Benchmark: capacidad de DynamoDB (RCU/WCU) por endpoint, por pedido y por tabla.
+
+Los handlers instrumentados (runtime-layer/layer/python/instrumentation.py)
+piden ReturnConsumedCapacity en cada llamada a DynamoDB y publican el consumo
+por tabla en su registro EMF. Acá se corren sobre LocalEnvironment, cuyo
+backend calcula la capacidad como DynamoDB (4 KB por RCU, lecturas
+eventuales a la mitad, 1 KB por WCU, escrituras en los GSI), y se reporta:
+
+- endpoints: RCU/WCU por request de cada ruta con los eventos sintéticos de
+  replay.py (incluye el authorizer y lo que dispara cada handler), p. ej.
+  los Scan de /pedidos/todos o del fallback order_shards._scan_by_status
+- ciclo de vida: RCU/WCU por pedido (crear, cocina, delivery y lo que
+  corre la Step Function), por función y por tabla
+- mezcla de tráfico: --sessions sesiones de loadtest/scenarios/lunch_rush.json
+  elegidas según sus pesos; RCU/WCU por invocación de cada función, su
+  parte del costo total y el costo on-demand por millón de invocaciones,
+  de la más cara a la más barata
+
+Los Scan cuestan según el tamaño de la tabla: --background-orders carga
+pedidos previos en todas las etapas antes de medir. Contra AWS, los mismos
+datos salen de las métricas DynamoDBReadCapacity / DynamoDBWriteCapacity y
+de los metadatos `capacity` de los logs.
+
+Uso:
+    python3 benchmarks/capacity.py [--requests 10] [--orders 50] [--sessions 300] [--background-orders 500] [--json]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from load import DEFAULT_SCENARIO, load_scenarios, scale_think, url_variables  # noqa: E402
+from order_lifecycle import run_order  # noqa: E402
+from replay import SCENARIOS, Fixtures  # noqa: E402
+from localdev import LocalEnvironment  # noqa: E402
+from loadtest import LoadRunner, LocalTarget  # noqa: E402
+
+# On-demand us-east-1, USD per million request units
+READ_PRICE = 0.125
+WRITE_PRICE = 0.625
+
+
+def cost_table(report, labels, read_price, write_price, per=None):
+    """Filas por función ordenadas por costo: RCU/WCU por invocación (o por `per`) y parte del total."""
+    rows = []
+    for name, stats in report.items():
+        cost = stats["rcu"] * read_price + stats["wcu"] * write_price
+        rows.append({
+            "function": name,
+            "endpoint": labels.get(name, ""),
+            "invocations": stats["invocations"],
+            "rcu": stats["rcu"],
+            "wcu": stats["wcu"],
+            "rcu_per_invocation": round(stats["rcu"] / stats["invocations"], 3),
+            "wcu_per_invocation": round(stats["wcu"] / stats["invocations"], 3),
+            # Price is per million units: the cost of a million invocations in USD
+            "usd_per_million": round(cost / stats["invocations"], 3),
+            "cost": cost,
+            "tables": stats["capacity"],
+        })
+        if per:
+            rows[-1].update(rcu_per_unit=round(stats["rcu"] / per, 3), wcu_per_unit=round(stats["wcu"] / per, 3))
+    total = sum(row["cost"] for row in rows) or 1.0
+    for row in rows:
+        row["share"] = round(row.pop("cost") / total, 4)
+    return sorted(rows, key=lambda row: row["share"], reverse=True)
+
+
+def _totals(tables):
+    return sum(used["read"] for used in tables.values()), sum(used["write"] for used in tables.values())
+
+
+def measure_endpoints(env, fixtures, requests, read_price, write_price):
+    """RCU/WCU por request de cada ruta con escenario sintético, de la más cara a la más barata."""
+    results = {}
+    for key, (prepare, build) in SCENARIOS.items():
+        method, path = key.split(" ", 1)
+        prepared = prepare(fixtures, requests) if prepare else None
+        batch = [build(fixtures, prepared, index) for index in range(requests)]
+        env.metrics.reset()
+        for request in batch:
+            env.call(method, path, **request)
+        tables = env.metrics.capacity_by_table()
+        rcu, wcu = _totals(tables)
+        results[key] = {
+            "rcu_per_request": round(rcu / requests, 3),
+            "wcu_per_request": round(wcu / requests, 3),
+            "usd_per_million": round((rcu * read_price + wcu * write_price) / requests, 3),
+            "tables": tables,
+        }
+    return dict(sorted(results.items(), key=lambda item: item[1]["usd_per_million"], reverse=True))
+
+
+def measure_lifecycle(env, products, orders, seed):
+    env.metrics.reset()
+    for index in range(orders):
+        run_order(env, products, random.Random(seed + index), 0.0, 0.0)
+    return env.metrics.report(), env.metrics.capacity_by_table()
+
+
+async def _sessions(env, compiled, count, seed, concurrency):
+    target = LocalTarget(env, workers=concurrency)
+    runner = LoadRunner(compiled, target, url_variables(compiled, "http://local"), seed=seed)
+    try:
+        await runner.setup()
+        env.metrics.reset()
+        scenarios = compiled["scenarios"]
+        chosen = runner.rng.choices(scenarios, [scenario["weight"] for scenario in scenarios], k=count)
+        gate = asyncio.Semaphore(concurrency)
+
+        async def session(scenario):
+            async with gate:
+                return await runner.run_session(scenario)
+
+        completed = await asyncio.gather(*(session(scenario) for scenario in chosen))
+    finally:
+        await target.close()
+    return sum(completed), runner.metrics.report(1.0, 1.0, compiled["profile"])["steps"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10, help="Requests por endpoint")
+    parser.add_argument("--orders", type=int, default=50, help="Ciclos de vida de pedido a medir")
+    parser.add_argument("--sessions", type=int, default=300, help="Sesiones de la mezcla de tráfico")
+    parser.add_argument("--background-orders", type=int, default=500, help="Pedidos previos (tamaño de los Scan)")
+    parser.add_argument("--scenario", type=Path, default=DEFAULT_SCENARIO, help="Escenarios de la mezcla")
+    parser.add_argument("--concurrency", type=int, default=8, help="Sesiones en paralelo")
+    parser.add_argument("--read-price", type=float, default=READ_PRICE, help="USD por millón de RCU")
+    parser.add_argument("--write-price", type=float, default=WRITE_PRICE, help="USD por millón de WCU")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--verbose", action="store_true", help="Mostrar los print de los handlers")
+    parser.add_argument("--json", action="store_true", help="Salida JSON")
+    args = parser.parse_args()
+
+    compiled, _ = load_scenarios(args.scenario, "dev")
+    scale_think(compiled, 0.0)
+    env = LocalEnvironment(seed=args.seed, stock=10 ** 6)
+    labels = {function.name: f"{method} {path}" for method, path, function, _ in env.registry.routes()}
+
+    handler_output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with handler_output:
+        fixtures = Fixtures(env, random.Random(args.seed))
+        fixtures.background(args.background_orders)
+        endpoints = measure_endpoints(env, fixtures, args.requests, args.read_price, args.write_price)
+        lifecycle, lifecycle_tables = measure_lifecycle(env, fixtures.products, args.orders, args.seed)
+        completed, steps = asyncio.run(_sessions(env, compiled, args.sessions, args.seed, args.concurrency))
+        mix, mix_tables = env.metrics.report(), env.metrics.capacity_by_table()
+
+    report = {
+        "settings": {"orders": args.orders, "sessions": args.sessions, "background_orders": args.background_orders,
+                     "scenario": compiled["name"], "read_price": args.read_price, "write_price": args.write_price},
+        "endpoints": endpoints,
+        "lifecycle": {
+            "functions": cost_table(lifecycle, labels, args.read_price, args.write_price, per=args.orders),
+            "tables": {table: {"rcu_per_order": round(used["read"] / args.orders, 3),
+                               "wcu_per_order": round(used["write"] / args.orders, 3)}
+                       for table, used in lifecycle_tables.items()},
+        },
+        "traffic_mix": {
+            "completed_sessions": completed,
+            "functions": cost_table(mix, labels, args.read_price, args.write_price),
+            "tables": {table: {"rcu_per_session": round(used["read"] / args.sessions, 3),
+                               "wcu_per_session": round(used["write"] / args.sessions, 3)}
+                       for table, used in mix_tables.items()},
+            "failed_steps": {name: step["statuses"] for name, step in steps.items()
+                             if any(not status.startswith(("2", "3")) for status in step["statuses"])},
+        },
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    width = max(len(key) for key in endpoints) + 2
+    print(f"📋 endpoints: {args.requests} requests cada uno sobre {args.background_orders} pedidos previos")
+    print(f"{'endpoint':<{width}}{'RCU/req':>9}{'WCU/req':>9}{'US$/M req':>11}")
+    for key, used in endpoints.items():
+        print(f"{key:<{width}}{used['rcu_per_request']:>9.2f}{used['wcu_per_request']:>9.2f}"
+              f"{used['usd_per_million']:>11.2f}")
+
+    rows = report["lifecycle"]["functions"]
+    rcu = sum(row["rcu_per_unit"] for row in rows)
+    wcu = sum(row["wcu_per_unit"] for row in rows)
+    print(f"\n🍔 ciclo de vida: {args.orders} pedidos · "
+          f"{rcu:.2f} RCU + {wcu:.2f} WCU por pedido "
+          f"(US$ {(rcu * args.read_price + wcu * args.write_price):.2f} por millón de pedidos)")
+    width = max(len(row["function"]) for row in rows) + 2
+    print(f"\n{'función':<{width}}{'n':>6}{'RCU/pedido':>12}{'WCU/pedido':>12}{'costo':>8}")
+    for row in rows:
+        print(f"{row['function']:<{width}}{row['invocations']:>6}{row['rcu_per_unit']:>12.2f}"
+              f"{row['wcu_per_unit']:>12.2f}{row['share']:>8.1%}")
+    print(f"\n{'tabla':<{width}}{'':>6}{'RCU/pedido':>12}{'WCU/pedido':>12}")
+    for table, used in report["lifecycle"]["tables"].items():
+        print(f"{table:<{width}}{'':>6}{used['rcu_per_order']:>12.2f}{used['wcu_per_order']:>12.2f}")
+
+    mix_rows = report["traffic_mix"]["functions"]
+    print(f"\n🔥 mezcla {compiled['name']}: {args.sessions} sesiones ({completed} completas), "
+          f"de la más cara a la más barata")
+    width = max([len(row["function"]) for row in mix_rows] + [len(row["endpoint"]) for row in mix_rows]) + 2
+    print(f"{'función':<{width}}{'n':>6}{'RCU/inv':>9}{'WCU/inv':>9}{'US$/M inv':>11}{'costo':>8}")
+    for row in mix_rows:
+        print(f"{row['function']:<{width}}{row['invocations']:>6}{row['rcu_per_invocation']:>9.2f}"
+              f"{row['wcu_per_invocation']:>9.2f}{row['usd_per_million']:>11.2f}{row['share']:>8.1%}")
+        if row["endpoint"]:
+            print(f"  {row['endpoint']}")
+    print(f"\n{'tabla':<{width}}{'':>6}{'RCU/sesión':>11}{'WCU/sesión':>11}")
+    for table, used in report["traffic_mix"]["tables"].items():
+        print(f"{table:<{width}}{'':>6}{used['rcu_per_session']:>11.2f}{used['wcu_per_session']:>11.2f}")
+    for name, statuses in report["traffic_mix"]["failed_steps"].items():
+        print(f"⚠️ {name}: {statuses}")
+
+
+if __name__ == "__main__":
+    main()
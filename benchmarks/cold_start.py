@@ -0,0 +1,141 @@
+"""
+Benchmark: tiempo de import (cold start) de cada handler Lambda.
+
+Lee los `handler:` de los serverless.yml de cada servicio e importa cada
+módulo en un intérprete nuevo, con el servicio y runtime-layer/layer/python
+en el PYTHONPATH (igual que /var/task y /opt/python en Lambda). Con --ref
+mide además otro commit (p. ej. el anterior al layer) en un git worktree
+temporal y muestra ambos lado a lado.
+
+Uso:
+    python3 benchmarks/cold_start.py [--repeats 5] [--ref HEAD~1] [--json]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+LAYER_DIR = Path("runtime-layer") / "layer" / "python"
+
+HANDLER_RE = re.compile(r"^\s*handler:\s*([\w./-]+)", re.MULTILINE)
+
+# Runs inside the fresh interpreter; interpreter startup is not counted
+_PROBE = """
+import importlib, json, sys, time
+start = time.perf_counter()
+module = importlib.import_module(sys.argv[1])
+getattr(module, sys.argv[2])
+print(json.dumps({"import_ms": (time.perf_counter() - start) * 1000}))
+"""
+
+
+def discover_handlers(root):
+    """Retorna [(servicio, módulo, función)] de todos los serverless.yml bajo `root`."""
+    handlers = []
+    for config in sorted(Path(root).glob("*/serverless.yml")):
+        seen = set()
+        for match in HANDLER_RE.finditer(config.read_text(encoding="utf-8")):
+            path, _, function = match.group(1).rpartition(".")
+            module = path.replace("/", ".")
+            if (module, function) in seen:
+                continue
+            seen.add((module, function))
+            handlers.append((config.parent.name, module, function))
+    return handlers
+
+
+def handler_env(root, service):
+    """Entorno mínimo para importar un handler fuera de AWS."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([str(Path(root) / service), str(Path(root) / LAYER_DIR)])
+    env.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    env.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    env.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def measure_import(root, service, module, function, repeats):
+    """Mediana del tiempo de import (ms) en `repeats` intérpretes nuevos, o (None, error)."""
+    samples = []
+    for _ in range(repeats):
+        result = subprocess.run(
+            [sys.executable, "-c", _PROBE, module, function],
+            cwd=Path(root) / service, env=handler_env(root, service),
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            lines = result.stderr.strip().splitlines()
+            return None, lines[-1] if lines else f"exit {result.returncode}"
+        samples.append(json.loads(result.stdout.strip().splitlines()[-1])["import_ms"])
+    return statistics.median(samples), None
+
+
+def measure_tree(root, repeats):
+    results = {}
+    for service, module, function in discover_handlers(root):
+        key = f"{service}:{module}.{function}"
+        results[key] = measure_import(root, service, module, function, repeats)
+    return results
+
+
+def measure_ref(ref, repeats):
+    """Mide otro commit en un git worktree temporal."""
+    with tempfile.TemporaryDirectory(prefix="cold-start-") as tmp:
+        worktree = Path(tmp) / "tree"
+        subprocess.run(["git", "worktree", "add", "--detach", str(worktree), ref],
+                       cwd=ROOT, check=True, capture_output=True)
+        try:
+            return measure_tree(worktree, repeats)
+        finally:
+            subprocess.run(["git", "worktree", "remove", "--force", str(worktree)],
+                           cwd=ROOT, capture_output=True)
+
+
+def _fmt(value):
+    ms = value[0] if value else None
+    return f"{ms:>10.1f}" if ms is not None else f"{'—':>10}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=5, help="Intérpretes nuevos por handler (se usa la mediana)")
+    parser.add_argument("--ref", help="Commit/rama a comparar (se mide en un git worktree)")
+    parser.add_argument("--json", action="store_true", help="Salida JSON")
+    args = parser.parse_args()
+
+    current = measure_tree(ROOT, args.repeats)
+    before = measure_ref(args.ref, args.repeats) if args.ref else {}
+
+    if args.json:
+        print(json.dumps({"current": current, "ref": before, "ref_name": args.ref}, indent=2))
+        return
+
+    keys = list(current) + [k for k in before if k not in current]
+    width = max(len(k) for k in keys) + 2
+    header = f"{'handler':<{width}}{'actual ms':>10}"
+    if args.ref:
+        header += f"{args.ref[:10]:>12}{'delta ms':>10}"
+    print(f"Import por handler (mediana de {args.repeats})")
+    print(header)
+    for key in keys:
+        row = f"{key:<{width}}{_fmt(current.get(key))}"
+        if args.ref:
+            row += f"  {_fmt(before.get(key))}"
+            now_ms, then_ms = (current.get(key) or (None,))[0], (before.get(key) or (None,))[0]
+            row += f"{now_ms - then_ms:>+10.1f}" if now_ms is not None and then_ms is not None else f"{'':>10}"
+        print(row)
+
+    errors = {k: v[1] for k, v in current.items() if v[1]}
+    for key, error in errors.items():
+        print(f"⚠️ {key}: {error}")
+
+
+if __name__ == "__main__":
+    main()
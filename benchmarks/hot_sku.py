@@ -0,0 +1,122 @@
+"""
+Benchmark: checkouts concurrentes de un mismo producto (stock en shards).
+
+En una promoción todos los pedidos descuentan stock del mismo item de
+Burger-Productos. Cada transacción de create_order retiene ese item mientras
+confirma, así que las demás se cancelan con TransactionConflict y reintentan
+(STOCK_RETRIES). Con `stock_shards` = K (runtime-layer/layer/python/stock_shards.py)
+el stock del producto se reparte en K contadores y cada checkout empieza por
+uno al azar.
+
+Para cada valor de --shards carga el producto con ese K en un
+LocalEnvironment nuevo (LocalDynamoDB con --transaction-ms) y corre --orders
+checkouts de una unidad con --concurrency en paralelo. Reporta checkouts/s,
+latencia de create_order, transacciones por checkout (1 = sin reintentos) y
+cuántos terminaron en 409 (conflictos agotados) o 400 (stock insuficiente).
+
+Uso:
+    python3 benchmarks/hot_sku.py --shards 1,4,16 --orders 400 [--concurrency 16] [--transaction-ms 5] [--json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "runtime-layer" / "layer" / "python"))
+from localdev import LocalEnvironment  # noqa: E402
+
+
+def _pct(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def run(shards, args):
+    """Un LocalEnvironment con el primer producto de ejemplo repartido en `shards` contadores."""
+    # Checkouts only: nothing here waits for relayOutbox to start the workflows
+    env = LocalEnvironment(latency_ms=args.latency_ms, stock=10 ** 6, sync_streams=False)
+    # After LocalEnvironment: the layer's common.py reads the table names on import
+    import stock_shards
+    try:
+        env.backend.transaction_ms = args.transaction_ms
+        table_name = env.table_name("productos")
+        product = min(env.backend.resource.Table(table_name).scan()["Items"],
+                      key=lambda item: (item["local_id"], item["producto_id"]))
+        parts = stock_shards.split(args.stock, shards)
+        env.backend.seed(table_name, [{**product, "stock": parts[0], "stock_shards": shards}]
+                         + stock_shards.shard_items(product["local_id"], product["producto_id"], parts))
+        body = {
+            "local_id": product["local_id"],
+            "productos": [{"producto_id": product["producto_id"], "cantidad": 1}],
+            "direccion": "Av. Benchmark 123",
+        }
+
+        # Warm the create_order container before measuring
+        with contextlib.redirect_stdout(io.StringIO()):
+            env.call("POST", "/pedido", body=body, role="Cliente")
+        env.backend.reset_stats()
+
+        def checkout(_):
+            t0 = time.perf_counter()
+            result = env.call("POST", "/pedido", body=body, role="Cliente")
+            return result["statusCode"], (time.perf_counter() - t0) * 1000
+
+        wall = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(checkout, range(args.orders)))
+        wall = time.perf_counter() - wall
+
+        codes = Counter(code for code, _ in results)
+        latencies = [ms for _, ms in results]
+        transactions = env.backend.stats()["calls"].get("TransactWriteItems", 0)
+        return {
+            "shards": shards,
+            "checkouts_per_s": round(codes[201] / wall, 1),
+            "p50_ms": round(_pct(latencies, 0.50), 2),
+            "p95_ms": round(_pct(latencies, 0.95), 2),
+            "transactions_per_checkout": round(transactions / args.orders, 2),
+            "ok": codes[201],
+            "conflicts": codes[409],
+            "out_of_stock": codes[400],
+            "other": sum(count for code, count in codes.items() if code not in (201, 400, 409)),
+        }
+    finally:
+        env.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", default="1,4,16", help="Valores de K, separados por coma")
+    parser.add_argument("--orders", type=int, default=400, help="Checkouts por corrida")
+    parser.add_argument("--concurrency", type=int, default=16, help="Checkouts en paralelo")
+    parser.add_argument("--stock", type=int, default=10 ** 6, help="Stock total del producto")
+    parser.add_argument("--latency-ms", type=float, default=0.5, help="Latencia simulada por llamada a DynamoDB")
+    parser.add_argument("--transaction-ms", type=float, default=5.0,
+                        help="Tiempo que cada transacción retiene sus items")
+    parser.add_argument("--json", action="store_true", help="Salida JSON")
+    args = parser.parse_args()
+
+    rows = [run(int(value), args) for value in args.shards.split(",")]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"🍔 {args.orders} checkouts del mismo producto, concurrencia {args.concurrency}, "
+          f"transacciones de {args.transaction_ms} ms")
+    print(f"\n{'shards':>7}{'checkouts/s':>13}{'p50 ms':>9}{'p95 ms':>9}{'tx/checkout':>13}"
+          f"{'ok':>6}{'409':>6}{'400':>6}{'otros':>7}")
+    for row in rows:
+        print(f"{row['shards']:>7}{row['checkouts_per_s']:>13.1f}{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}"
+              f"{row['transactions_per_checkout']:>13.2f}{row['ok']:>6}{row['conflicts']:>6}"
+              f"{row['out_of_stock']:>6}{row['other']:>7}")
+
+
+if __name__ == "__main__":
+    main()
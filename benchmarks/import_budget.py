@@ -0,0 +1,138 @@
+"""
+Benchmark: presupuesto de cold start por handler Lambda.
+
+Importa cada handler listado en los serverless.yml (ver cold_start.py) en un
+intérprete nuevo con `-X importtime` y registra:
+
+- wall_ms: duración total del proceso (arranque del intérprete + import)
+- import_ms: tiempo del import del módulo del handler
+- rss_mb: memoria residente máxima del proceso
+- top: los imports de primer nivel más costosos (tiempo acumulado)
+
+Termina con código 1 si algún handler supera su presupuesto en
+benchmarks/budgets.json ("default" más overrides por handler).
+
+Uso:
+    python3 benchmarks/import_budget.py [--repeats 3] [--budgets benchmarks/budgets.json] [--json]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from cold_start import ROOT, discover_handlers, handler_env  # noqa: E402
+
+DEFAULT_BUDGETS = Path(__file__).resolve().parent / "budgets.json"
+
+_PROBE = """
+import importlib, json, resource, sys, time
+start = time.perf_counter()
+module = importlib.import_module(sys.argv[1])
+getattr(module, sys.argv[2])
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({"import_ms": elapsed, "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+"""
+
+
+def parse_importtime(stderr, top=5):
+    """Imports de primer nivel de la salida de -X importtime, ordenados por tiempo acumulado."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nesting is encoded as two spaces per level before the module name
+        if name.startswith("  "):
+            continue
+        modules.append((name.strip(), int(cumulative) / 1000))
+    modules.sort(key=lambda m: m[1], reverse=True)
+    return [{"module": name, "cumulative_ms": round(ms, 1)} for name, ms in modules[:top]]
+
+
+def profile_handler(root, service, module, function, repeats):
+    walls, imports, rss, top = [], [], [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _PROBE, module, function],
+            cwd=Path(root) / service, env=handler_env(root, service),
+            capture_output=True, text=True
+        )
+        wall_ms = (time.perf_counter() - start) * 1000
+        if result.returncode != 0:
+            errors = [l for l in result.stderr.splitlines() if not l.startswith("import time:")]
+            return {"error": errors[-1] if errors else f"exit {result.returncode}"}
+
+        probe = json.loads(result.stdout.strip().splitlines()[-1])
+        walls.append(wall_ms)
+        imports.append(probe["import_ms"])
+        rss.append(probe["rss_kb"] / 1024)
+        top = parse_importtime(result.stderr)
+
+    return {
+        "wall_ms": round(statistics.median(walls), 1),
+        "import_ms": round(statistics.median(imports), 1),
+        "rss_mb": round(max(rss), 1),
+        "top": top,
+    }
+
+
+def check_budget(key, result, budgets):
+    """Lista de violaciones del presupuesto para un handler."""
+    if "error" in result:
+        return [f"no se pudo importar: {result['error']}"]
+    budget = {**budgets.get("default", {}), **budgets.get("handlers", {}).get(key, {})}
+    return [
+        f"{metric} {result[metric]} > {limit}"
+        for metric, limit in budget.items()
+        if metric in result and result[metric] > limit
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=3, help="Intérpretes nuevos por handler")
+    parser.add_argument("--budgets", type=Path, default=DEFAULT_BUDGETS, help="Archivo de presupuestos")
+    parser.add_argument("--handler", action="append", help="Solo estos handlers (servicio:modulo.funcion)")
+    parser.add_argument("--json", action="store_true", help="Salida JSON")
+    args = parser.parse_args()
+
+    budgets = json.loads(args.budgets.read_text(encoding="utf-8"))
+
+    results, failures = {}, {}
+    for service, module, function in discover_handlers(ROOT):
+        key = f"{service}:{module}.{function}"
+        if args.handler and key not in args.handler:
+            continue
+        results[key] = profile_handler(ROOT, service, module, function, args.repeats)
+        violations = check_budget(key, results[key], budgets)
+        if violations:
+            failures[key] = violations
+
+    if args.json:
+        print(json.dumps({"results": results, "failures": failures}, indent=2))
+    else:
+        width = max((len(k) for k in results), default=10) + 2
+        print(f"{'handler':<{width}}{'wall ms':>10}{'import ms':>11}{'rss MB':>9}  import más costoso")
+        for key, result in results.items():
+            if "error" in result:
+                print(f"{key:<{width}}{'error':>10}")
+                continue
+            heaviest = result["top"][0] if result["top"] else {"module": "-", "cumulative_ms": 0}
+            print(f"{key:<{width}}{result['wall_ms']:>10.1f}{result['import_ms']:>11.1f}{result['rss_mb']:>9.1f}"
+                  f"  {heaviest['module']} ({heaviest['cumulative_ms']} ms)")
+
+        for key, violations in failures.items():
+            print(f"❌ {key}: " + "; ".join(violations))
+        if not failures:
+            print(f"✅ {len(results)} handlers dentro del presupuesto")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Pruebas de carga desde las colecciones Postman (loadtest).
+
+`compile` arma los escenarios de loadtest/scenarios/lunch_rush.json (o
+--scenario) desde las colecciones, valida las rutas contra los
+serverless.yml y muestra pasos, pesos y variables encadenadas. `run` los
+ejecuta con llegadas de Poisson según el perfil del escenario (rampa, pico
+y bajada de la hora de almuerzo) contra:
+
+- un stage desplegado o el servidor local (python3 -m localdev.server):
+  --base-url reemplaza todas las variables *_url; si cada servicio tiene
+  su propia API se fijan con --var cocina_url=...
+- el LocalEnvironment en proceso: --local (sin red ni AWS)
+
+Uso:
+    python3 benchmarks/load.py compile [--scenario archivo.json] [--out compilado.json]
+    python3 benchmarks/load.py run --base-url https://xxxx.execute-api.us-east-1.amazonaws.com/dev \\
+                                   [--duration 300] [--peak-rps 10] [--var token_cliente=...] [--json]
+    python3 benchmarks/load.py run --local --duration 30 --peak-rps 5 --think-scale 0.1
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from loadtest import HttpTarget, LoadRunner, LocalTarget, ScenarioError, compile_spec  # noqa: E402
+from loadtest.runner import StepFailed  # noqa: E402
+from loadtest.postman import SCENARIOS_DIR  # noqa: E402
+
+COMPILED_FORMAT = "loadtest/compiled-v1"
+DEFAULT_SCENARIO = SCENARIOS_DIR / "lunch_rush.json"
+
+
+def load_scenarios(path, stage):
+    """Compila un archivo de escenarios o carga uno ya compilado (`compile --out`)."""
+    document = json.loads(Path(path).read_text(encoding="utf-8"))
+    if document.get("format") == COMPILED_FORMAT:
+        return document, []
+    return compile_spec(path, stage)
+
+
+def parse_vars(pairs):
+    variables = {}
+    for pair in pairs or []:
+        name, separator, value = pair.partition("=")
+        if not separator:
+            raise SystemExit(f"❌ --var espera nombre=valor: {pair!r}")
+        variables[name] = value
+    return variables
+
+
+def url_variables(compiled, base_url):
+    """Todas las variables *_url de las colecciones apuntando a `base_url`."""
+    # The collections ship placeholder hosts (REEMPLAZAR_CON_TU_API_URL): the base URL replaces them all
+    return {name: base_url.rstrip("/") for name in compiled["variables"] if name.endswith("_url")}
+
+
+def scale_think(compiled, factor):
+    for scenario in compiled["scenarios"]:
+        scenario["think_ms"] = [value * factor for value in scenario["think_ms"]]
+        for step in scenario["steps"]:
+            if "think_ms" in step:
+                step["think_ms"] = [value * factor for value in step["think_ms"]]
+
+
+def cmd_compile(args):
+    compiled, warnings = load_scenarios(args.scenario, args.stage)
+    for warning in warnings:
+        print(f"⚠️ {warning}")
+    if args.out:
+        args.out.write_text(json.dumps({"format": COMPILED_FORMAT, **compiled}, indent=2, ensure_ascii=False) + "\n",
+                            encoding="utf-8")
+        print(f"💾 escenarios compilados en {args.out}")
+
+    total = sum(scenario["weight"] for scenario in compiled["scenarios"])
+    print(f"📋 {compiled['name']}: {len(compiled['scenarios'])} escenarios, "
+          f"setup: {', '.join(step['name'] for step in compiled['setup']) or '—'}")
+    for scenario in compiled["scenarios"]:
+        print(f"\n{scenario['name']} ({scenario['weight'] / total:.0%} de las sesiones)")
+        for step in scenario["steps"]:
+            extracted = f"  -> {', '.join(step['extract'])}" if step.get("extract") else ""
+            repeat = f" x{step['repeat']}" if step.get("repeat", 1) > 1 else ""
+            print(f"   {step['method']:<7}{step['url']}{repeat}{extracted}")
+
+
+async def _run(args, compiled, target, variables):
+    runner = LoadRunner(compiled, target, variables, seed=args.seed, bucket_s=args.bucket_s)
+    try:
+        try:
+            await runner.setup()
+        except StepFailed as error:
+            raise SystemExit(f"❌ setup: {error}") from None
+        return await runner.run(args.duration, args.peak_rps, args.max_sessions)
+    finally:
+        await target.close()
+
+
+def cmd_run(args):
+    compiled, warnings = load_scenarios(args.scenario, args.stage)
+    if not args.json:
+        for warning in warnings:
+            print(f"⚠️ {warning}")
+    scale_think(compiled, args.think_scale)
+
+    base_url = "http://local" if args.local else args.base_url
+    if not base_url:
+        raise SystemExit("❌ indicar --base-url (stage desplegado o servidor local) o --local")
+    variables = {**url_variables(compiled, base_url), **parse_vars(args.var)}
+
+    handler_output = contextlib.nullcontext()
+    if args.local:
+        from localdev import LocalEnvironment
+
+        # Stock is never the bottleneck here
+        target = LocalTarget(LocalEnvironment(latency_ms=args.latency_ms, stock=10 ** 6), workers=args.max_sessions)
+        if not args.verbose:
+            handler_output = contextlib.redirect_stdout(io.StringIO())
+    else:
+        target = HttpTarget(timeout=args.timeout)
+
+    with handler_output:
+        report = asyncio.run(_run(args, compiled, target, variables))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"🍔 {compiled['name']}: {args.duration:.0f} s, pico {args.peak_rps} sesiones/s "
+          f"({'en proceso' if args.local else base_url})")
+    print(f"   duración real {report['duration_s']} s · sesiones descartadas {report['dropped_sessions']}")
+    print(f"\n{'escenario':<18}{'inicios':>9}{'ok':>7}{'fallos':>8}{'p50 ms':>10}{'p95 ms':>10}  falló en")
+    for name, scenario in report["scenarios"].items():
+        duration = scenario["duration_ms"]
+        print(f"{name:<18}{scenario['started']:>9}{scenario['completed']:>7}{scenario['failed']:>8}"
+              f"{duration.get('p50', 0):>10.0f}{duration.get('p95', 0):>10.0f}  {scenario['failed_at'] or ''}")
+    width = max([len(name) for name in report["steps"]] + [4]) + 2
+    print(f"\n{'paso':<{width}}{'n':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'reint.':>8}  estados")
+    for name, step in report["steps"].items():
+        if not step["count"]:
+            print(f"{name:<{width}}{0:>7}  {step['errors']}")
+            continue
+        print(f"{name:<{width}}{step['count']:>7}{step['p50']:>9.1f}{step['p95']:>9.1f}{step['p99']:>9.1f}"
+              f"{step['retries']:>8}  {step['statuses']}{' ' + str(step['errors']) if step['errors'] else ''}")
+    print(f"\n{'t (s)':>7}{'objetivo/s':>12}{'sesiones/s':>12}{'req/s':>9}{'errores':>9}{'p95 ms':>9}")
+    for bucket in report["timeline"]:
+        p95 = f"{bucket['p95_ms']:.1f}" if bucket["p95_ms"] is not None else "—"
+        print(f"{bucket['start_s']:>7.0f}{bucket['target_sessions_per_s']:>12.2f}{bucket['sessions_per_s']:>12.2f}"
+              f"{bucket['requests_per_s']:>9.2f}{bucket['errors']:>9}{p95:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    compile_parser = subcommands.add_parser("compile", help="Compilar y mostrar los escenarios")
+    compile_parser.add_argument("--out", type=Path, help="Guardar los escenarios compilados")
+
+    run_parser = subcommands.add_parser("run", help="Generar carga")
+    target = run_parser.add_mutually_exclusive_group()
+    target.add_argument("--base-url", help="URL del stage desplegado o del servidor local")
+    target.add_argument("--local", action="store_true", help="LocalEnvironment en proceso")
+    run_parser.add_argument("--var", action="append", help="Variable nombre=valor (p. ej. cocina_url=https://...)")
+    run_parser.add_argument("--duration", type=float, default=60.0, help="Segundos de carga")
+    run_parser.add_argument("--peak-rps", type=float, default=5.0, help="Sesiones nuevas por segundo en el pico")
+    run_parser.add_argument("--max-sessions", type=int, default=500, help="Sesiones simultáneas (más se descartan)")
+    run_parser.add_argument("--think-scale", type=float, default=1.0, help="Factor sobre las pausas entre pasos")
+    run_parser.add_argument("--bucket-s", type=float, default=10.0, help="Ancho de cada tramo del timeline")
+    run_parser.add_argument("--timeout", type=float, default=30.0, help="Timeout por request HTTP (s)")
+    run_parser.add_argument("--latency-ms", type=float, default=2.0, help="--local: latencia simulada de DynamoDB")
+    run_parser.add_argument("--seed", type=int, default=7)
+    run_parser.add_argument("--verbose", action="store_true", help="--local: mostrar los print de los handlers")
+    run_parser.add_argument("--json", action="store_true", help="Salida JSON")
+
+    for subparser in (compile_parser, run_parser):
+        subparser.add_argument("--scenario", type=Path, default=DEFAULT_SCENARIO,
+                               help="Archivo de escenarios o compilado")
+        subparser.add_argument("--stage", default="dev", help="Stage para validar las rutas")
+
+    args = parser.parse_args()
+    try:
+        cmd_compile(args) if args.command == "compile" else cmd_run(args)
+    except ScenarioError as error:
+        raise SystemExit(f"❌ {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark: cómo escala el sistema con la cantidad de locales.
+
+Para cada valor de --locals genera los locales y sus catálogos con
+data-setup/DataGenerator.py, los carga en un LocalEnvironment nuevo y corre
+--orders pedidos de punta a punta (order_lifecycle.run_order), eligiendo el
+local de cada pedido con los pesos Zipf de DataGenerator (--zipf): unos
+pocos locales concentran la mayoría del tráfico. Cocina y delivery actúan
+con el token de un empleado de ese local.
+
+Reporta los pedidos/s medidos y, con las WCU por partición de LocalDynamoDB,
+la partición más caliente de Burger-Pedidos y de by_local_status y el techo
+de pedidos/s antes de que llegue a 1000 WCU/s. Con un solo local el techo es
+el de una partición; con más locales crece hasta que el local más
+concurrido (el primero de Zipf) se vuelve el límite. ORDER_SHARDS=N reparte
+además cada local en N particiones. by_usuario_v2 no se muestra: todos los
+pedidos son del mismo cliente de prueba.
+
+Uso:
+    python3 benchmarks/multi_local.py --locals 1,4,16,64 --orders 400 [--zipf 1.1] [--concurrency 8] [--json]
+    ORDER_SHARDS=4 python3 benchmarks/multi_local.py --locals 1,16
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "data-setup"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import DataGenerator  # noqa: E402
+from order_lifecycle import hot_partitions, run_order  # noqa: E402
+from localdev import LocalEnvironment  # noqa: E402
+
+
+def _dynamo(items):
+    # DynamoDB rejects floats: prices come in as Decimal
+    return json.loads(json.dumps(items), parse_float=Decimal)
+
+
+def run(locals_total, args):
+    """Un LocalEnvironment con `locals_total` locales y --orders pedidos repartidos con Zipf."""
+    random.seed(args.seed)
+    locales = DataGenerator.generar_locales(locals_total)
+    productos = [p for local in locales for p in DataGenerator.generar_productos(local)]
+    for producto in productos:
+        producto["stock"] = 10 ** 6  # stock is never the bottleneck here
+    by_local = {}
+    for producto in productos:
+        by_local.setdefault(producto["local_id"], []).append(producto)
+
+    env = LocalEnvironment(latency_ms=args.latency_ms, stock=10 ** 6)
+    try:
+        env.backend.seed(env.table_name("locales"), _dynamo(locales))
+        env.backend.seed(env.table_name("productos"), _dynamo(productos))
+        catalogs = {local_id: _dynamo(items) for local_id, items in by_local.items()}
+
+        rng = random.Random(args.seed)
+        weights = DataGenerator.pesos_zipf(locals_total, args.zipf)
+        plan = [rng.choices(locales, weights=weights)[0]["local_id"] for _ in range(args.orders)]
+
+        # Warm every route and token before measuring
+        with contextlib.redirect_stdout(io.StringIO()):
+            for local_id in dict.fromkeys(plan):
+                run_order(env, catalogs[local_id], random.Random(args.seed), 0.0, 0.0)
+        env.backend.reset_stats()
+
+        def worker(index):
+            return run_order(env, catalogs[plan[index]], random.Random(args.seed + index), 0.0, 0.0)
+
+        wall = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(worker, range(args.orders)))
+        wall = time.perf_counter() - wall
+
+        partitions = env.backend.stats()["partitions"]
+        table = env.table_name("pedidos")
+        hot = hot_partitions(partitions, table, args.orders)
+        status_index = hot.get(f"{table}/by_local_status", {})
+        busiest, busiest_orders = Counter(plan).most_common(1)[0]
+        return {
+            "locals": locals_total,
+            "busiest_local": busiest,
+            "busiest_share": round(busiest_orders / args.orders, 3),
+            "throughput_per_s": round(args.orders / wall, 1),
+            "end_to_end_p50_ms": round(sorted(total for total, _, _ in results)[len(results) // 2], 2),
+            "table": hot.get(table, {}),
+            "status_index": status_index,
+            "max_orders_per_s": min(hot.get(table, {}).get("max_orders_per_s", float("inf")),
+                                    status_index.get("max_orders_per_s", float("inf"))),
+        }
+    finally:
+        env.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--locals", default="1,4,16,64", help="Cantidades de locales, separadas por coma")
+    parser.add_argument("--orders", type=int, default=400, help="Pedidos por corrida")
+    parser.add_argument("--zipf", type=float, default=DataGenerator.LOCALES_ZIPF_S, help="Exponente s de Zipf")
+    parser.add_argument("--concurrency", type=int, default=8, help="Pedidos en paralelo")
+    parser.add_argument("--latency-ms", type=float, default=0.5, help="Latencia simulada por llamada a DynamoDB")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Salida JSON")
+    args = parser.parse_args()
+
+    rows = [run(int(value), args) for value in args.locals.split(",")]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"🍔 {args.orders} pedidos por corrida, Zipf s={args.zipf}, concurrencia {args.concurrency}")
+    print(f"\n{'locales':>8}{'% local top':>13}{'pedidos/s':>11}{'p50 ms':>9}"
+          f"{'% WCU tabla':>13}{'% WCU índice':>14}{'techo pedidos/s':>17}")
+    for row in rows:
+        print(f"{row['locals']:>8}{row['busiest_share']:>13.1%}{row['throughput_per_s']:>11.1f}"
+              f"{row['end_to_end_p50_ms']:>9.2f}{row['table'].get('share', 0):>13.1%}"
+              f"{row['status_index'].get('share', 0):>14.1%}{row['max_orders_per_s']:>17.1f}")
+    print("\nTecho: pedidos/s con los que la partición más caliente (tabla o by_local_status) llega a 1000 WCU/s")
+
+
+if __name__ == "__main__":
+    main()
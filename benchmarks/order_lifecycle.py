@@ -0,0 +1,215 @@
+"""
+Benchmark: ciclo de vida completo de un pedido sin AWS.
+
+Corre create_order y los callbacks de cocina y delivery en proceso sobre
+LocalDynamoDB (localdev) y el intérprete local de step-function.json:
+
+    createOrder -> ValidarStock -> EsperarConfirmacionCocina
+    confirmKitchen -> EnPreparacion
+    completeCooking -> EsperarDelivery
+    takeOrder -> EnCamino
+    completeDelivery -> PedidoEntregado
+
+Reporta la latencia de punta a punta por pedido, la de cada llamada a la API
+(incluye la parte de la Step Function que avanza en ese mismo llamado) y la
+de cada estado, además de las llamadas y RCU/WCU de DynamoDB y las métricas
+EMF de cada función (duración y llamadas por servicio, ver localdev.metrics).
+Con las trazas de cada pedido (localdev.tracing) suma el camino crítico
+promedio por salto, y --timelines N dibuja los N pedidos más lentos.
+
+Para la tabla de pedidos y sus GSI muestra la partición más caliente: su
+parte de las WCU y cuántos pedidos/s aguanta antes de llegar al límite de
+1000 WCU/s por partición de DynamoDB. Con ORDER_SHARDS=N
+(runtime-layer/layer/python/order_shards.py) el local se reparte en N
+particiones.
+
+Uso:
+    python3 benchmarks/order_lifecycle.py --orders 200 --concurrency 8 --latency-ms 2 [--reject-rate 0.1] [--json]
+    python3 benchmarks/order_lifecycle.py --orders 20 --timelines 2
+    ORDER_SHARDS=8 python3 benchmarks/order_lifecycle.py --orders 400
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from localdev import LocalEnvironment  # noqa: E402
+from localdev.metrics import print_report  # noqa: E402
+from localdev.tracing import critical_path, critical_path_by_hop, print_timeline  # noqa: E402
+
+STEPS = [
+    ("createOrder", "POST", "/pedido", "Cliente"),
+    ("confirmKitchen", "POST", "/cocina/confirmar", "Cocinero"),
+    ("completeCooking", "POST", "/cocina/terminar", "Cocinero"),
+    ("takeOrder", "POST", "/delivery/tomar", "Repartidor"),
+    ("completeDelivery", "POST", "/delivery/entregar", "Repartidor"),
+]
+# DynamoDB write throughput per partition
+PARTITION_WCU_PER_S = 1000
+
+
+def run_order(env, products, rng, reject_rate, think_ms):
+    """Un pedido de punta a punta. Retorna (ms total, {paso: ms}, status final)."""
+    local_id = products[0]["local_id"]
+    chosen = rng.sample(products, k=min(len(products), rng.randint(1, 3)))
+    timings = {}
+    start = time.perf_counter()
+
+    def call(step, method, path, role, body):
+        t0 = time.perf_counter()
+        result = env.call(method, path, body=body, role=role, local_id=local_id)
+        timings[step] = (time.perf_counter() - t0) * 1000
+        if result["statusCode"] >= 300:
+            raise RuntimeError(f"{step}: {result['statusCode']} {result['body']}")
+        if think_ms:
+            time.sleep(think_ms / 1000)
+        return json.loads(result["body"])
+
+    created = call(*STEPS[0], {
+        "local_id": local_id,
+        "productos": [{"producto_id": p["producto_id"], "cantidad": rng.randint(1, 2)} for p in chosen],
+        "direccion": "Av. Benchmark 123",
+    })
+    order = {"order_id": created["order_id"], "local_id": local_id}
+    decision = "RECHAZAR" if rng.random() < reject_rate else "ACEPTAR"
+
+    call(*STEPS[1], {**order, "decision": decision})
+    if decision == "ACEPTAR":
+        for step in STEPS[2:]:
+            call(*step, order)
+
+    status = env.sfn.describe_execution(executionArn=env.execution_arn(order["order_id"]))["status"]
+    return (time.perf_counter() - start) * 1000, timings, status
+
+
+def _summary(samples):
+    ordered = sorted(samples)
+
+    def pct(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {"count": len(ordered), "mean": round(statistics.fmean(ordered), 2), "p50": round(pct(0.50), 2),
+            "p95": round(pct(0.95), 2), "p99": round(pct(0.99), 2), "max": round(ordered[-1], 2)}
+
+
+def hot_partitions(partitions, table, orders):
+    """Partición más caliente de la tabla y de cada GSI: WCU por pedido y techo de pedidos/s."""
+    hot = {}
+    for name, units in sorted(partitions.items()):
+        if name != table and not name.startswith(f"{table}/") or not units:
+            continue
+        key, peak = max(units.items(), key=lambda item: item[1])
+        per_order = peak / orders
+        hot[name] = {
+            "partitions": len(units),
+            "hottest": key,
+            "share": round(peak / sum(units.values()), 3),
+            "wcu_per_order": round(per_order, 2),
+            "max_orders_per_s": round(PARTITION_WCU_PER_S / per_order, 1),
+        }
+    return hot
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=200, help="Pedidos a procesar")
+    parser.add_argument("--concurrency", type=int, default=4, help="Pedidos en paralelo")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="Latencia simulada por llamada a DynamoDB")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variación relativa de la latencia (0-1)")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="Fracción de pedidos que cocina rechaza")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Pausa entre pasos (personal de cocina/delivery)")
+    parser.add_argument("--timelines", type=int, default=0, help="Timelines de los N pedidos más lentos")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--verbose", action="store_true", help="Mostrar los print de los handlers")
+    parser.add_argument("--json", action="store_true", help="Salida JSON")
+    args = parser.parse_args()
+
+    # Stock is never the bottleneck here
+    env = LocalEnvironment(latency_ms=args.latency_ms, jitter=args.jitter, stock=10 ** 6)
+    products = env.backend.resource.Table(env.table_name("productos")).scan()["Items"]
+    # Warm containers: imports are measured by cold_start.py, not here
+    for _, method, path, _ in STEPS:
+        env.registry.handler(env.route(method, path)[0].name)
+    env.backend.reset_stats()
+    env.metrics.reset()
+    env.traces.reset()
+
+    def worker(index):
+        return run_order(env, products, random.Random(args.seed + index), args.reject_rate, args.think_ms)
+
+    handler_output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    wall = time.perf_counter()
+    with handler_output, ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(worker, range(args.orders)))
+    wall = time.perf_counter() - wall
+
+    steps = {}
+    for _, timings, _ in results:
+        for step, ms in timings.items():
+            steps.setdefault(step, []).append(ms)
+    statuses = {}
+    for _, _, status in results:
+        statuses[status] = statuses.get(status, 0) + 1
+
+    report = {
+        "orders": args.orders,
+        "throughput_per_s": round(args.orders / wall, 1),
+        "end_to_end_ms": _summary([total for total, _, _ in results]),
+        "api_ms": {step: _summary(samples) for step, samples in steps.items()},
+        "executions": statuses,
+        "states": env.sfn.stats()["states"],
+        "dynamodb": env.backend.stats(),
+        "functions": env.metrics.report(),
+    }
+    traces = [trace for trace in env.traces.traces().values() if trace["order_id"]]
+    totals = {}
+    for trace in traces:
+        for name, ms in critical_path_by_hop(critical_path(trace)).items():
+            totals[name] = totals.get(name, 0.0) + ms
+    report["critical_path_ms"] = {name: round(ms / len(traces), 3)
+                                  for name, ms in sorted(totals.items(), key=lambda item: item[1], reverse=True)}
+    report["hot_partitions"] = hot_partitions(report["dynamodb"]["partitions"], env.table_name("pedidos"), args.orders)
+
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+        return
+
+    e2e = report["end_to_end_ms"]
+    print(f"🍔 {args.orders} pedidos, concurrencia {args.concurrency}, DynamoDB {args.latency_ms} ms/llamada")
+    print(f"   {report['throughput_per_s']} pedidos/s · estados finales {statuses}")
+    print(f"   punta a punta: p50 {e2e['p50']} ms · p95 {e2e['p95']} ms · p99 {e2e['p99']} ms")
+    print(f"\n{'llamada API':<22}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for step, summary in report["api_ms"].items():
+        print(f"{step:<22}{summary['p50']:>9.2f}{summary['p95']:>9.2f}{summary['p99']:>9.2f}")
+    print(f"\n{'estado':<28}{'n':>6}{'lambda p50':>12}{'espera p50':>12}{'total p95':>12}")
+    for state, summary in report["states"].items():
+        print(f"{state:<28}{summary['count']:>6}{summary['invoke_ms']['p50']:>12.2f}"
+              f"{summary['wait_ms']['p50']:>12.2f}{summary['duration_ms']['p95']:>12.2f}")
+    print_report(report["functions"])
+    calls = report["dynamodb"]["calls"]
+    print(f"\nDynamoDB: {sum(calls.values())} llamadas ({', '.join(f'{k} {v}' for k, v in sorted(calls.items()))})")
+
+    print(f"\n{'partición más caliente':<34}{'n':>5}{'clave':>26}{'% WCU':>8}{'WCU/pedido':>12}{'pedidos/s':>11}")
+    for name, hot in report["hot_partitions"].items():
+        print(f"{name:<34}{hot['partitions']:>5}{hot['hottest'][-25:]:>26}{hot['share']:>8.1%}"
+              f"{hot['wcu_per_order']:>12.2f}{hot['max_orders_per_s']:>11.1f}")
+
+    critical = sum(report["critical_path_ms"].values()) or 1.0
+    print(f"\n{'camino crítico por pedido':<48}{'ms':>9}{'%':>7}")
+    for name, ms in report["critical_path_ms"].items():
+        print(f"{name:<48}{ms:>9.2f}{ms / critical:>7.1%}")
+    slowest = sorted(traces, key=lambda trace: sum(step["ms"] for step in critical_path(trace)), reverse=True)
+    for trace in slowest[:args.timelines]:
+        print_timeline(trace)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+"""
+Benchmark: replay de eventos de API Gateway contra cada endpoint, con baselines.
+
+Para cada ruta http/httpApi de los serverless.yml genera eventos sintéticos
+(o usa los grabados en --events) y los reproduce contra el handler, en
+proceso, sobre localdev (DynamoDB en memoria con latencia simulada, Lambdas
+y Step Function locales). Cada endpoint corre en su propia fase, así las
+llamadas al backend se atribuyen al handler que las hizo.
+
+Por endpoint reporta: throughput, p50/p95/p99, códigos de estado, llamadas a
+DynamoDB y RCU/WCU por request, bytes serializados por request (evento y
+respuesta del handler, peticiones/respuestas a DynamoDB) y, desde las
+métricas EMF de los handlers, llamadas por request a cada servicio de AWS
+(DynamoDB, Lambda, StepFunctions, EventBridge).
+
+Con --save-baseline guarda el resultado en benchmarks/baselines/replay.json;
+sin él compara contra ese archivo y termina con código 1 si algún endpoint
+empeoró: latencia (mediana de --rounds rondas) por encima de --tolerance y
+de --min-delta-ms (p99: el doble de ambos), llamadas a DynamoDB, RCU/WCU o
+bytes por request, o llamadas a Lambda/StepFunctions/EventBridge por
+encima de --backend-tolerance, o más errores. La latencia depende de la
+máquina: el baseline se regenera en la máquina que
+lo usa.
+
+Eventos grabados (--events): JSONL con una línea por request, en cualquiera
+de estas formas:
+    {"method": "POST", "path": "/pedido", "role": "Cliente", "body": {...}, "query": {...}}
+    {"function": "burger-order-dev-createOrder", "event": {...evento completo...}}
+
+Uso:
+    python3 benchmarks/replay.py [--requests 200] [--concurrency 8] [--latency-ms 2]
+                                 [--endpoint "GET /cocina/pendientes"] [--events eventos.jsonl]
+                                 [--save-baseline] [--json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from localdev import LocalEnvironment  # noqa: E402
+from localdev.dynamodb import wire_size  # noqa: E402
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "replay.json"
+
+LOCAL_ID = "BURGER-LOCAL-001"
+
+# Order lifecycle steps used to bring fixture orders to a given status
+LIFECYCLE = [
+    ("POST", "/cocina/confirmar", "Cocinero", {"decision": "ACEPTAR"}),   # -> COCINANDO
+    ("POST", "/cocina/terminar", "Cocinero", {}),                        # -> LISTO_PARA_RECOJO
+    ("POST", "/delivery/tomar", "Repartidor", {}),                       # -> EN_CAMINO
+    ("POST", "/delivery/entregar", "Repartidor", {}),                    # -> ENTREGADO
+]
+
+
+class Fixtures:
+    """Datos previos (no medidos) que necesitan los eventos sintéticos."""
+
+    def __init__(self, env, rng):
+        self.env = env
+        self.rng = rng
+        self.products = env.backend.resource.Table(env.table_name("productos")).scan()["Items"]
+
+    def order_body(self):
+        chosen = self.rng.sample(self.products, k=min(len(self.products), self.rng.randint(1, 3)))
+        return {
+            "local_id": LOCAL_ID,
+            "productos": [{"producto_id": p["producto_id"], "cantidad": self.rng.randint(1, 2)} for p in chosen],
+            "direccion": "Av. Replay 123",
+        }
+
+    def orders(self, count, steps=0):
+        """`count` pedidos nuevos avanzados `steps` pasos del ciclo de vida."""
+        order_ids = []
+        for _ in range(count):
+            created = self.env.call("POST", "/pedido", role="Cliente", body=self.order_body())
+            order = {"order_id": json.loads(created["body"])["order_id"], "local_id": LOCAL_ID}
+            for method, path, role, extra in LIFECYCLE[:steps]:
+                self.env.call(method, path, role=role, body={**order, **extra})
+            order_ids.append(order["order_id"])
+        return order_ids
+
+    def background(self, count):
+        """Pedidos repartidos en todas las etapas, para que los listados tengan datos."""
+        for index in range(count):
+            self.orders(1, index % (len(LIFECYCLE) + 1))
+
+    def login_tokens(self, count):
+        tokens = []
+        for _ in range(count):
+            result = self.env.call("POST", "/login", body={"correo": "cliente@test.com", "contrasena": "123456"})
+            tokens.append(json.loads(result["body"])["token"])
+        return tokens
+
+    def new_products(self, count):
+        ids = []
+        for index in range(count):
+            result = self.env.call("POST", "/productos/create", role="Gerente", body={
+                "local_id": LOCAL_ID, "nombre": f"Replay {index}", "descripcion": "fixture",
+                "categoria": "Replay", "precio": 10, "stock": 5,
+            })
+            ids.append(json.loads(result["body"])["product"]["producto_id"])
+        return ids
+
+
+def _order_step(steps, role, extra=None):
+    """Escenario que consume pedidos preparados hasta `steps` pasos."""
+    def prepare(fixtures, count):
+        return fixtures.orders(count, steps)
+
+    def build(fixtures, order_ids, index):
+        return {"role": role, "body": {"order_id": order_ids[index], "local_id": LOCAL_ID, **(extra or {})}}
+
+    return prepare, build
+
+
+def _static(**request):
+    return None, lambda fixtures, prepared, index: request
+
+
+# "<METHOD> <path>" -> (prepare(fixtures, n) | None, build(fixtures, prepared, i) -> kwargs de env.call)
+SCENARIOS = {
+    "POST /register": (None, lambda f, p, i: {"body": {
+        "nombre": "Replay", "correo": f"replay-{uuid.uuid4().hex[:12]}@test.com", "contrasena": "123456"}}),
+    "POST /login": _static(body={"correo": "cliente@test.com", "contrasena": "123456"}),
+    "POST /login/empleado": _static(body={"correo": "cocina@burger.com", "contrasena": "123456"}),
+    "POST /logout": (lambda f, n: f.login_tokens(n),
+                     lambda f, tokens, i: {"headers": {"Authorization": f"Bearer {tokens[i]}"}}),
+    "POST /pedido": (None, lambda f, p, i: {"role": "Cliente", "body": f.order_body()}),
+    "GET /pedidos/mis-pedidos": _static(role="Cliente", query={"limit": "10"}),
+    "GET /pedido/historial": _static(role="Cliente", query={"limit": "10"}),
+    "GET /pedidos/todos": _static(role="Cocinero", query={"limit": "20"}),
+    "GET /pedido/status": (lambda f, n: f.orders(min(n, 20)), lambda f, ids, i: {
+        "role": "Cliente", "query": {"local_id": LOCAL_ID, "pedido_id": ids[i % len(ids)]}}),
+    "GET /cocina/pendientes": _static(role="Cocinero", query={"local_id": LOCAL_ID}),
+    "GET /cocina/en-curso": _static(role="Cocinero", query={"local_id": LOCAL_ID}),
+    "POST /cocina/confirmar": _order_step(0, "Cocinero", {"decision": "ACEPTAR"}),
+    "POST /cocina/terminar": _order_step(1, "Cocinero"),
+    "GET /delivery/disponibles": _static(role="Repartidor", query={"local_id": LOCAL_ID}),
+    "GET /delivery/mis-pedidos": _static(role="Repartidor", query={"local_id": LOCAL_ID}),
+    "POST /delivery/tomar": _order_step(2, "Repartidor"),
+    "POST /delivery/entregar": _order_step(3, "Repartidor"),
+    "GET /productos/list": _static(query={"local_id": LOCAL_ID, "limit": "20"}),
+    "GET /productos/id": (None, lambda f, p, i: {"query": {
+        "local_id": LOCAL_ID, "producto_id": f.products[i % len(f.products)]["producto_id"]}}),
+    "POST /productos/list": _static(body={"local_id": LOCAL_ID, "limit": 20}),
+    "POST /productos/id": (None, lambda f, p, i: {"body": {
+        "local_id": LOCAL_ID, "producto_id": f.products[i % len(f.products)]["producto_id"]}}),
+    "POST /productos/create": (None, lambda f, p, i: {"role": "Gerente", "body": {
+        "local_id": LOCAL_ID, "nombre": f"Replay {i}", "descripcion": "replay", "categoria": "Replay",
+        "precio": 12, "stock": 10}}),
+    "PUT /productos/update": (None, lambda f, p, i: {"role": "Gerente", "body": {
+        "local_id": LOCAL_ID, "producto_id": f.products[i % len(f.products)]["producto_id"], "precio": 20 + i % 5}}),
+    "DELETE /productos/delete": (lambda f, n: f.new_products(n), lambda f, ids, i: {
+        "role": "Gerente", "body": {"local_id": LOCAL_ID, "producto_id": ids[i]}}),
+}
+
+
+def load_recorded(path):
+    """Eventos grabados agrupados por endpoint."""
+    recorded = {}
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        if "function" in entry:
+            key = entry["function"]
+        else:
+            key = f"{entry['method'].upper()} /{entry['path'].strip('/')}"
+        recorded.setdefault(key, []).append(entry)
+    return recorded
+
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def replay_endpoint(env, requests, concurrency, invoke):
+    """Corre `requests` (callables sin argumentos) y mide latencia, estados y backend."""
+    latencies = [0.0] * len(requests)
+    statuses = [None] * len(requests)
+    payload_bytes = [0] * len(requests)
+    errors = []
+    lock = threading.Lock()
+
+    def run(index):
+        start = time.perf_counter()
+        try:
+            event, result = invoke(requests[index])
+            statuses[index] = result.get("statusCode", 200) if isinstance(result, dict) else 200
+            payload_bytes[index] = wire_size(event) + wire_size(result)
+        except Exception as exc:
+            statuses[index] = "exception"
+            with lock:
+                errors.append(f"{type(exc).__name__}: {exc}")
+        latencies[index] = (time.perf_counter() - start) * 1000
+
+    env.backend.reset_stats()
+    env.metrics.reset()
+    wall = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(run, range(len(requests))))
+    wall = time.perf_counter() - wall
+    backend = env.backend.stats()
+    # Every instrumented invocation of the phase: the handler, the authorizer and the Step Function tasks
+    aws_calls = env.metrics.calls_by_service()
+
+    n = len(requests)
+    ordered = sorted(latencies)
+    status_counts = {}
+    for status in statuses:
+        status_counts[str(status)] = status_counts.get(str(status), 0) + 1
+    failed = sum(1 for s in statuses if s == "exception" or (isinstance(s, int) and s >= 500))
+    dynamo_bytes = sum(b["request"] + b["response"] for b in backend.get("bytes", {}).values())
+
+    return {
+        "requests": n,
+        "throughput_rps": round(n / wall, 1),
+        "p50_ms": round(_percentile(ordered, 0.50), 3),
+        "p95_ms": round(_percentile(ordered, 0.95), 3),
+        "p99_ms": round(_percentile(ordered, 0.99), 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "statuses": status_counts,
+        "error_rate": round(failed / n, 4),
+        "dynamodb_calls_per_request": round(sum(backend["calls"].values()) / n, 3),
+        "dynamodb_calls": backend["calls"],
+        "rcu_per_request": round(sum(c["read"] for c in backend["capacity"].values()) / n, 3),
+        "wcu_per_request": round(sum(c["write"] for c in backend["capacity"].values()) / n, 3),
+        "payload_bytes_per_request": round(sum(payload_bytes) / n, 1),
+        "dynamodb_bytes_per_request": round(dynamo_bytes / n, 1),
+        "aws_calls_per_request": {service: round(count / n, 3) for service, count in aws_calls.items()},
+        "sample_errors": errors[:3],
+    }
+
+
+def merge_rounds(rounds):
+    """Mediana de las métricas de latencia entre rondas; el resto, del total."""
+    merged = dict(rounds[-1])
+    for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "mean_ms"):
+        merged[metric] = round(statistics.median(r[metric] for r in rounds), 3)
+    total = sum(r["requests"] for r in rounds)
+    for metric in ("error_rate", "dynamodb_calls_per_request", "rcu_per_request", "wcu_per_request",
+                   "payload_bytes_per_request", "dynamodb_bytes_per_request"):
+        merged[metric] = round(sum(r[metric] * r["requests"] for r in rounds) / total, 3)
+    merged["aws_calls_per_request"] = {
+        service: round(sum(r["aws_calls_per_request"].get(service, 0) * r["requests"] for r in rounds) / total, 3)
+        for service in sorted({service for r in rounds for service in r["aws_calls_per_request"]})}
+    statuses, calls = {}, {}
+    for result in rounds:
+        for status, count in result["statuses"].items():
+            statuses[status] = statuses.get(status, 0) + count
+        for operation, count in result["dynamodb_calls"].items():
+            calls[operation] = calls.get(operation, 0) + count
+    merged.update(requests=total, rounds=len(rounds), statuses=statuses, dynamodb_calls=calls,
+                  sample_errors=[e for r in rounds for e in r["sample_errors"]][:3])
+    return merged
+
+
+def run_all(env, args):
+    fixtures = Fixtures(env, random.Random(args.seed))
+    fixtures.background(args.background_orders)
+    recorded = load_recorded(args.events) if args.events else {}
+
+    endpoints = {}
+    keys = list(recorded) if args.events else [
+        f"{method} {path}" for method, path, _, _ in env.registry.routes()
+    ]
+    for key in keys:
+        if args.endpoint and key not in args.endpoint:
+            continue
+
+        if key in recorded:
+            entries = recorded[key]
+
+            def build_requests():
+                return [entries[i % len(entries)] for i in range(args.requests)]
+
+            def invoke(entry):
+                if "function" in entry:
+                    return entry["event"], env.registry.invoke(entry["function"], entry["event"])
+                request = {k: entry.get(k) for k in ("body", "query", "headers", "role")}
+                return request, env.call(entry["method"], entry["path"], **request)
+        elif key in SCENARIOS:
+            prepare, build = SCENARIOS[key]
+            method, path = key.split(" ", 1)
+
+            def build_requests(prepare=prepare, build=build):
+                # Fresh fixtures every round: confirm/take/logout... consume them
+                prepared = prepare(fixtures, args.requests) if prepare else None
+                return [build(fixtures, prepared, i) for i in range(args.requests)]
+
+            def invoke(request, method=method, path=path):
+                return request, env.call(method, path, **request)
+        else:
+            endpoints[key] = {"skipped": "sin escenario sintético"}
+            continue
+
+        endpoints[key] = merge_rounds([
+            replay_endpoint(env, build_requests(), args.concurrency, invoke) for _ in range(args.rounds)
+        ])
+    return endpoints
+
+
+# -- baselines ------------------------------------------------------------------
+def compare(current, baseline, tolerance, min_delta_ms, backend_tolerance):
+    """Regresiones por endpoint respecto del baseline."""
+    regressions = {}
+    comparable_latency = baseline.get("settings") == current.get("settings")
+    for key, result in current["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(key)
+        if not base or "skipped" in result or "skipped" in base:
+            continue
+        found = []
+        if comparable_latency:
+            # Tails are noisier than the median: p99 gets twice the tolerance and the delta
+            for metric, scale in (("p50_ms", 1), ("p99_ms", 2)):
+                if (result[metric] > base[metric] * (1 + scale * tolerance)
+                        and result[metric] - base[metric] > scale * min_delta_ms):
+                    found.append(f"{metric} {base[metric]} -> {result[metric]}")
+        # Backend work barely varies between runs, but Scan pages follow the hash of
+        # the (random) order ids, so a page may cross a 4 KB read unit: half an RCU of slack
+        for metric, slack in (("dynamodb_calls_per_request", 0.01), ("rcu_per_request", 0.5),
+                              ("wcu_per_request", 0.5), ("dynamodb_bytes_per_request", 0.01),
+                              ("payload_bytes_per_request", 0.01)):
+            if result[metric] > base[metric] * (1 + backend_tolerance) + slack:
+                found.append(f"{metric} {base[metric]} -> {result[metric]}")
+        # Calls to the other services (Lambda invokes, Step Functions, EventBridge) from the EMF metrics
+        for service, count in result.get("aws_calls_per_request", {}).items():
+            before = base.get("aws_calls_per_request", {}).get(service, 0)
+            if service != "DynamoDB" and count > before * (1 + backend_tolerance) + 0.01:
+                found.append(f"{service} calls/request {before} -> {count}")
+        if result["error_rate"] > base["error_rate"]:
+            found.append(f"error_rate {base['error_rate']} -> {result['error_rate']}")
+        if found:
+            regressions[key] = found
+    return regressions, comparable_latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="Requests por endpoint")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests en paralelo")
+    parser.add_argument("--rounds", type=int, default=3, help="Rondas por endpoint (se usa la mediana)")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="Latencia simulada por llamada a DynamoDB")
+    parser.add_argument("--background-orders", type=int, default=100, help="Pedidos previos en todas las etapas")
+    parser.add_argument("--endpoint", action="append", help='Solo estos endpoints ("METODO /ruta")')
+    parser.add_argument("--events", type=Path, help="JSONL con eventos grabados")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Archivo de baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="Guardar el resultado como baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Empeoramiento relativo permitido de latencia")
+    parser.add_argument("--backend-tolerance", type=float, default=0.1,
+                        help="Empeoramiento relativo permitido de llamadas, RCU/WCU y bytes")
+    parser.add_argument("--min-delta-ms", type=float, default=3.0, help="Diferencia mínima de latencia a considerar")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--verbose", action="store_true", help="Mostrar los print de los handlers")
+    parser.add_argument("--json", action="store_true", help="Salida JSON")
+    args = parser.parse_args()
+
+    env = LocalEnvironment(latency_ms=args.latency_ms, seed=args.seed, measure_bytes=True, stock=10 ** 6)
+    handler_output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with handler_output:
+        endpoints = run_all(env, args)
+
+    current = {
+        "settings": {"requests": args.requests, "rounds": args.rounds, "concurrency": args.concurrency,
+                     "latency_ms": args.latency_ms,
+                     "background_orders": args.background_orders, "events": str(args.events or "")},
+        "endpoints": endpoints,
+    }
+
+    regressions, comparable = {}, True
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(current, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions, comparable = compare(current, baseline, args.tolerance, args.min_delta_ms,
+                                          args.backend_tolerance)
+
+    if args.json:
+        print(json.dumps({**current, "regressions": regressions}, indent=2))
+    else:
+        width = max(len(k) for k in endpoints) + 2
+        print(f"{'endpoint':<{width}}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'ddb/req':>9}"
+              f"{'ddb B/req':>11}{'resp B':>9}  estados")
+        for key, result in endpoints.items():
+            if "skipped" in result:
+                print(f"{key:<{width}}  — {result['skipped']}")
+                continue
+            print(f"{key:<{width}}{result['throughput_rps']:>8.1f}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+                  f"{result['p99_ms']:>9.2f}{result['dynamodb_calls_per_request']:>9.2f}"
+                  f"{result['dynamodb_bytes_per_request']:>11.0f}{result['payload_bytes_per_request']:>9.0f}"
+                  f"  {result['statuses']}")
+
+        if args.save_baseline:
+            print(f"💾 baseline guardado en {args.baseline}")
+        elif not args.baseline.exists():
+            print(f"ℹ️ sin baseline en {args.baseline} (usar --save-baseline)")
+        else:
+            if not comparable:
+                print("⚠️ el baseline se tomó con otros parámetros: solo se comparan llamadas, bytes y errores")
+            for key, found in regressions.items():
+                print(f"❌ {key}: " + "; ".join(found))
+            if not regressions:
+                print("✅ sin regresiones respecto del baseline")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark: latencia de validación de tokens, modo opaco vs firmado.
+
+Mide `authorize.authorize` (auth-service) y `auth_helper.validate_token_via_lambda`
+(servicios) contra una tabla de tokens en memoria con latencia simulada, para
+comparar el costo de la lectura a DynamoDB con la verificación HMAC en CPU.
+Se mide el handler sin `@instrument` (`__wrapped__`): armar e imprimir el
+registro EMF de cada invocación no entra en la comparación.
+
+Uso:
+    python3 benchmarks/token_validation.py --iterations 2000 --table-latency-ms 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("TOKENS_TABLE_USERS", "bench-tokens")
+os.environ.setdefault("JWT_SECRET", "bench-secret-0123456789abcdef0123456789")
+os.environ.setdefault("POWERTOOLS_METRICS_DISABLED", "true")
+
+
+class InMemoryTable:
+    """Tabla mínima (get/put) con latencia fija por llamada."""
+
+    def __init__(self, latency_s):
+        self.latency_s = latency_s
+        self.items = {}
+        self.calls = 0
+
+    def get_item(self, Key):
+        self.calls += 1
+        time.sleep(self.latency_s)
+        item = self.items.get(Key['token'])
+        return {'Item': dict(item)} if item else {}
+
+    def put_item(self, Item):
+        self.calls += 1
+        time.sleep(self.latency_s)
+        self.items[Item['token']] = dict(Item)
+        return {}
+
+
+class InMemoryResource:
+    def __init__(self, table):
+        self.table = table
+
+    def Table(self, name):
+        return self.table
+
+
+def _measure(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        'mean_us': statistics.fmean(samples),
+        'p50_us': samples[len(samples) // 2],
+        'p99_us': samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--table-latency-ms", type=float, default=5.0,
+                        help="Latencia simulada de cada lectura a la tabla de tokens")
+    args = parser.parse_args()
+
+    table = InMemoryTable(args.table_latency_ms / 1000.0)
+
+    sys.path.insert(0, str(ROOT / "runtime-layer" / "layer" / "python"))
+    sys.path.insert(0, str(ROOT / "auth-service"))
+    import common
+    common.dynamodb = InMemoryResource(table)
+    import tokens
+    import authorize
+    import auth_helper as helper
+    # The handler without @instrument: only the validation is timed
+    authorize_handler = authorize.authorize.__wrapped__
+
+    issued = {}
+    for mode in ("opaque", "signed"):
+        tokens.TOKEN_MODE = mode
+        issued[mode], _ = tokens.issue_token("bench@burger.com", "Cocinero")
+
+    event_arn = 'arn:aws:execute-api:*:*:*'
+    results = []
+    for mode, token in issued.items():
+        event = {'authorizationToken': f'Bearer {token}', 'methodArn': event_arn}
+
+        table.calls = 0
+        stats = _measure(lambda: authorize_handler(event, None), args.iterations)
+        results.append((f"authorize ({mode})", stats, table.calls / args.iterations))
+
+        # Cache disabled: every call pays the full validation path
+        helper._token_cache.max_size = 0
+        table.calls = 0
+        stats = _measure(lambda: helper.validate_token_via_lambda(token), args.iterations)
+        results.append((f"auth_helper ({mode}, sin caché)", stats, table.calls / args.iterations))
+
+        helper._token_cache.max_size = helper.TOKEN_CACHE_MAX_SIZE
+        helper._token_cache.clear()
+        table.calls = 0
+        stats = _measure(lambda: helper.validate_token_via_lambda(token), args.iterations)
+        results.append((f"auth_helper ({mode}, con caché)", stats, table.calls / args.iterations))
+
+    print(f"Iteraciones: {args.iterations} | latencia tabla: {args.table_latency_ms} ms")
+    print(f"{'caso':<34}{'media µs':>12}{'p50 µs':>12}{'p99 µs':>12}{'lecturas/op':>14}")
+    for name, stats, reads in results:
+        print(f"{name:<34}{stats['mean_us']:>12.1f}{stats['p50_us']:>12.1f}{stats['p99_us']:>12.1f}{reads:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
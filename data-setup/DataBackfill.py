@@ -0,0 +1,125 @@
+"""
+Backfill único de Burger-Pedidos para los GSI de consulta.
+
+- by_usuario_v2 (correo + created_at): copia `user_id` en `correo` en los
+  pedidos antiguos que solo tienen `user_id`.
+- by_local_status (local_status + updated_at): completa `local_status` y
+  convierte a texto los `updated_at` numéricos escritos por versiones
+  anteriores de register_token.
+
+Uso:
+    python3 DataBackfill.py [--dry-run] [--segments 4]
+"""
+import argparse
+import os
+import sys
+import time
+import boto3
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from dotenv import load_dotenv
+from pathlib import Path
+from threading import Lock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'runtime-layer' / 'layer' / 'python'))
+from order_shards import key_status  # noqa: E402
+
+load_dotenv()
+
+AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
+TABLE_PEDIDOS = os.getenv('TABLE_PEDIDOS')
+
+dynamodb = boto3.resource('dynamodb', region_name=AWS_REGION)
+
+
+def build_update(item):
+    """Retorna (UpdateExpression, valores) para un pedido, o None si no requiere cambios."""
+    sets = []
+    values = {}
+
+    if not item.get('correo') and item.get('user_id'):
+        sets.append('correo = :c')
+        values[':c'] = item['user_id']
+
+    if item.get('status') and not item.get('local_status'):
+        sets.append('local_status = :ls')
+        # Keeps the shard of orders already moved by ShardMigration.py
+        values[':ls'] = key_status(item, item['status'])
+
+    updated_at = item.get('updated_at')
+    if isinstance(updated_at, Decimal):
+        sets.append('updated_at = :u')
+        values[':u'] = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(int(updated_at)))
+
+    if not sets:
+        return None
+    return "SET " + ", ".join(sets), values
+
+
+def backfill_segment(table, segment, total_segments, dry_run, counters, lock):
+    scan_kwargs = {'Segment': segment, 'TotalSegments': total_segments}
+    while True:
+        response = table.scan(**scan_kwargs)
+        for item in response.get('Items', []):
+            update = build_update(item)
+            with lock:
+                counters['scanned'] += 1
+            if not update:
+                continue
+
+            expression, values = update
+            if not dry_run:
+                try:
+                    table.update_item(
+                        Key={'local_id': item['local_id'], 'pedido_id': item['pedido_id']},
+                        UpdateExpression=expression,
+                        ExpressionAttributeValues=values,
+                        ConditionExpression='attribute_exists(pedido_id)'
+                    )
+                except ClientError as e:
+                    # The order was deleted while the backfill was running
+                    if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                        raise
+                    continue
+            with lock:
+                counters['updated'] += 1
+
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill de Burger-Pedidos para los GSI")
+    parser.add_argument('--dry-run', action='store_true', help="Solo cuenta los pedidos a actualizar")
+    parser.add_argument('--segments', type=int, default=4, help="Segmentos de scan en paralelo")
+    args = parser.parse_args()
+
+    if not TABLE_PEDIDOS:
+        print("❌ Falta TABLE_PEDIDOS en .env")
+        return
+
+    print("=" * 60)
+    print(f"🔧 BACKFILL DE {TABLE_PEDIDOS}" + (" (dry-run)" if args.dry_run else ""))
+    print("=" * 60)
+
+    table = dynamodb.Table(TABLE_PEDIDOS)
+    counters = {'scanned': 0, 'updated': 0}
+    lock = Lock()
+
+    with ThreadPoolExecutor(max_workers=args.segments) as executor:
+        futures = [
+            executor.submit(backfill_segment, table, segment, args.segments, args.dry_run, counters, lock)
+            for segment in range(args.segments)
+        ]
+        for future in futures:
+            future.result()
+
+    verb = "a actualizar" if args.dry_run else "actualizados"
+    print(f"\n✅ Pedidos revisados: {counters['scanned']}")
+    print(f"✅ Pedidos {verb}: {counters['updated']}")
+
+
+if __name__ == "__main__":
+    main()
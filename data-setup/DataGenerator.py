@@ -9,7 +9,7 @@ import os
 OUTPUT_DIR = Path(__file__).parent / "example-data"
 SCHEMAS_DIR = Path(__file__).parent / "schemas-validation"
 
-# Un solo local de burgers
+# Locales de burgers: BURGER-LOCAL-001 ... BURGER-LOCAL-<LOCALES_TOTAL>
 LOCAL_ID = "BURGER-LOCAL-001"
 LOCAL_NAME = "Burger Cloud"
 
@@ -47,6 +47,11 @@ ESTADOS_PEDIDO = ["procesando", "cocinando", "enviando", "recibido"]  # Según s
 USUARIOS_TOTAL = int(os.getenv("USUARIOS_TOTAL", "15"))
 EMPLEADOS_TOTAL = int(os.getenv("EMPLEADOS_TOTAL", "10"))
 PEDIDOS_TOTAL = int(os.getenv("PEDIDOS_TOTAL", "20"))
+LOCALES_TOTAL = int(os.getenv("LOCALES_TOTAL", "1"))
+# Tráfico por local ~ 1 / rango^s (Zipf): pocos locales concentran la mayoría de los pedidos
+LOCALES_ZIPF_S = float(os.getenv("LOCALES_ZIPF_S", "1.1"))
+
+DISTRITOS = ["San Isidro", "Miraflores", "Surco", "La Molina", "Barranco", "San Borja", "Jesús María", "Lince"]
 
 
 def generar_correo(nombre, apellido):
@@ -69,8 +74,21 @@ def generar_slug(texto: str) -> str:
     return "".join(c for c in s if c.isalnum() or c in "-_")
 
 
-def generar_local():
-    """Genera un solo local de burgers."""
+def local_id_de(indice):
+    """`BURGER-LOCAL-001` para el índice 0."""
+    return f"BURGER-LOCAL-{indice + 1:03d}"
+
+
+def pesos_zipf(cantidad, s=None):
+    """Fracción del tráfico de cada local (el primero es el más concurrido)."""
+    s = LOCALES_ZIPF_S if s is None else s
+    crudos = [1 / (rango ** s) for rango in range(1, cantidad + 1)]
+    total = sum(crudos)
+    return [peso / total for peso in crudos]
+
+
+def generar_local(indice=0):
+    """Genera un local de burgers (el índice 0 es BURGER-LOCAL-001, el de los datos de prueba)."""
     nombre_gerente = f"{random.choice(NOMBRES)} {random.choice(APELLIDOS)}"
     correo_gerente = generar_correo(*nombre_gerente.split())
     gerente = {
@@ -79,9 +97,11 @@ def generar_local():
         "contrasena": f"ger_{uuid.uuid4().hex[:8]}"
     }
     
+    direccion = ("Av. Javier Prado 2050, San Isidro, Lima" if indice == 0 else
+                 f"Av. Principal {random.randint(100, 3000)}, {DISTRITOS[indice % len(DISTRITOS)]}, Lima")
     return {
-        "local_id": LOCAL_ID,
-        "direccion": "Av. Javier Prado 2050, San Isidro, Lima",
+        "local_id": local_id_de(indice),
+        "direccion": direccion,
         "telefono": generar_telefono(),
         "hora_apertura": "10:00",
         "hora_finalizacion": "23:00",
@@ -89,24 +109,32 @@ def generar_local():
     }
 
 
-def generar_usuarios(local, cantidad=None):
+def generar_locales(cantidad=None):
+    """Genera `cantidad` locales (LOCALES_TOTAL por defecto)."""
+    return [generar_local(indice) for indice in range(max(1, cantidad or LOCALES_TOTAL))]
+
+
+def generar_usuarios(locales, cantidad=None):
     """
-    Genera usuarios: Gerente y Clientes.
+    Genera usuarios: Gerentes (uno por local) y Clientes.
     Schema: correo (PK), nombre, contrasena, role (Cliente|Gerente)
     """
     cantidad = max(1, cantidad or USUARIOS_TOTAL)
     usuarios = []
     correos_usados = set()
 
-    # 1. Gerente del local (Generado dinámicamente)
-    g = local["gerente"]
-    usuarios.append({
-        "correo": g["correo"],
-        "nombre": g["nombre"],
-        "contrasena": g["contrasena"],
-        "role": "Gerente"
-    })
-    correos_usados.add(g["correo"])
+    # 1. Gerente de cada local (Generado dinámicamente)
+    for local in locales:
+        g = local["gerente"]
+        if g["correo"] in correos_usados:
+            continue
+        usuarios.append({
+            "correo": g["correo"],
+            "nombre": g["nombre"],
+            "contrasena": g["contrasena"],
+            "role": "Gerente"
+        })
+        correos_usados.add(g["correo"])
 
     # 2. Usuarios de Prueba (Hardcoded)
     usuarios_prueba = [
@@ -143,20 +171,20 @@ def generar_usuarios(local, cantidad=None):
     return usuarios
 
 
-def generar_empleados(local, cantidad=None):
+def generar_empleados(local, cantidad=None, correos_usados=None):
     """
-    Genera empleados del local de burgers.
+    Genera empleados de un local de burgers (los de prueba solo en BURGER-LOCAL-001).
     Schema: local_id (PK), correo (SK), contrasena, nombre, apellido, role (Cocinero|Repartidor)
     """
     cantidad = max(1, cantidad or EMPLEADOS_TOTAL)
     empleados = []
-    correos_usados = set()
+    correos_usados = set() if correos_usados is None else correos_usados
     
     # 1. Empleados de Prueba (Hardcoded)
     empleados_prueba = [
         {"correo": "cocina@burger.com", "nombre": "Chef", "apellido": "Ramsay", "role": "Cocinero"},
         {"correo": "delivery@burger.com", "nombre": "Flash", "apellido": "Gordon", "role": "Repartidor"}
-    ]
+    ] if local["local_id"] == LOCAL_ID else []
     
     for emp in empleados_prueba:
         empleados.append({
@@ -215,9 +243,9 @@ def generar_productos(local):
     return productos
 
 
-def generar_pedidos_y_historial(local, usuarios, productos, cantidad=None):
+def generar_pedidos_y_historial(locales, usuarios, productos, cantidad=None):
     """
-    Genera pedidos y su historial de estados.
+    Genera pedidos y su historial de estados; el local de cada pedido sigue pesos_zipf.
     Pedido Schema: local_id (PK), pedido_id (SK), correo, productos[], costo, direccion, estado, created_at
     Historial Schema: pedido_id (PK), estado_id (SK), estado, hora_inicio, hora_fin
     """
@@ -225,10 +253,12 @@ def generar_pedidos_y_historial(local, usuarios, productos, cantidad=None):
     pedidos, historial_estados = [], []
 
     clientes = [u for u in usuarios if u["role"] == "Cliente"]
-    productos_disponibles = productos
+    pesos = pesos_zipf(len(locales))
 
     for _ in range(cantidad):
         cliente = random.choice(clientes)
+        local = random.choices(locales, weights=pesos)[0]
+        productos_disponibles = [p for p in productos if p["local_id"] == local["local_id"]]
         
         # Seleccionar productos aleatorios
         num_items = random.randint(1, 3)
@@ -326,32 +356,37 @@ def main():
     print("=" * 60)
     print()
 
-    print("📊 Generando local...")
-    local = generar_local()
-    guardar_json([local], "locales.json")
+    print(f"📊 Generando {LOCALES_TOTAL} local(es)...")
+    locales = generar_locales()
+    guardar_json(locales, "locales.json")
+    if len(locales) > 1:
+        pesos = pesos_zipf(len(locales))
+        print(f"   Tráfico Zipf (s={LOCALES_ZIPF_S}): {locales[0]['local_id']} {pesos[0]:.0%}, "
+              f"{locales[-1]['local_id']} {pesos[-1]:.1%}")
     print()
 
     print("📊 Generando usuarios...")
-    usuarios = generar_usuarios(local)
+    usuarios = generar_usuarios(locales)
     validar_con_esquema(usuarios, "usuarios")
     guardar_json(usuarios, "usuarios.json")
     print()
 
     print("📊 Generando empleados...")
-    empleados = generar_empleados(local)
+    correos_empleados = set()
+    empleados = [e for local in locales for e in generar_empleados(local, correos_usados=correos_empleados)]
     validar_con_esquema(empleados, "empleados")
     guardar_json(empleados, "empleados.json")
     print()
 
     print("📊 Generando productos...")
-    productos = generar_productos(local)
+    productos = [p for local in locales for p in generar_productos(local)]
     validar_con_esquema(productos, "productos")
     guardar_json(productos, "productos.json")
     print()
 
     # DESHABILITADO: No generar pedidos ni historial en la base de datos inicial
     # print("📊 Generando pedidos e historial de estados...")
-    # pedidos, historial_estados = generar_pedidos_y_historial(local, usuarios, productos)
+    # pedidos, historial_estados = generar_pedidos_y_historial(locales, usuarios, productos)
     # validar_con_esquema(pedidos, "pedidos")
     # guardar_json(pedidos, "pedidos.json")
     # print()
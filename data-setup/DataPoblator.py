@@ -27,6 +27,8 @@ TABLE_PRODUCTOS = os.getenv('TABLE_PRODUCTOS')
 TABLE_PEDIDOS = os.getenv('TABLE_PEDIDOS')
 TABLE_HISTORIAL_ESTADOS = os.getenv('TABLE_HISTORIAL_ESTADOS')
 TABLE_TOKENS_USUARIOS = os.getenv('TABLE_TOKENS_USUARIOS')
+TABLE_RESERVAS_STOCK = os.getenv('TABLE_RESERVAS_STOCK')
+TABLE_OUTBOX = os.getenv('TABLE_OUTBOX')
 
 # Carpeta con los datos JSON
 DATA_DIR = os.path.join(os.path.dirname(__file__), "example-data")
@@ -320,6 +322,8 @@ def create_dynamodb_table(table_name, key_schema, attribute_definitions,
         print(f"\n📊 Verificando tabla: {table_name}")
         dynamodb_client.describe_table(TableName=table_name)
         print(f"   ✅ La tabla '{table_name}' ya existe")
+        if global_secondary_indexes:
+            return ensure_global_secondary_indexes(table_name, attribute_definitions, global_secondary_indexes)
         return True
     except ClientError as e:
         if e.response['Error']['Code'] == 'ResourceNotFoundException':
@@ -370,6 +374,39 @@ def create_dynamodb_table(table_name, key_schema, attribute_definitions,
             return False
 
 
+def ensure_global_secondary_indexes(table_name, attribute_definitions, global_secondary_indexes):
+    """Agrega a una tabla existente los GSI declarados que aún no tiene."""
+    try:
+        description = dynamodb_client.describe_table(TableName=table_name)['Table']
+        existing = {gsi['IndexName'] for gsi in description.get('GlobalSecondaryIndexes', [])}
+
+        for gsi in global_secondary_indexes:
+            if gsi['IndexName'] in existing:
+                continue
+
+            key_attributes = {k['AttributeName'] for k in gsi['KeySchema']}
+            print(f"   🔨 Creando GSI '{gsi['IndexName']}' en '{table_name}'...")
+            # DynamoDB solo admite crear un GSI por llamada a UpdateTable
+            dynamodb_client.update_table(
+                TableName=table_name,
+                AttributeDefinitions=[a for a in attribute_definitions if a['AttributeName'] in key_attributes],
+                GlobalSecondaryIndexUpdates=[{'Create': gsi}]
+            )
+            waiter = dynamodb_client.get_waiter('table_exists')
+            while True:
+                waiter.wait(TableName=table_name)
+                indexes = dynamodb_client.describe_table(TableName=table_name)['Table'].get('GlobalSecondaryIndexes', [])
+                status = next((i['IndexStatus'] for i in indexes if i['IndexName'] == gsi['IndexName']), 'CREATING')
+                if status == 'ACTIVE':
+                    break
+                time.sleep(5)
+            print(f"   ✅ GSI '{gsi['IndexName']}' activo")
+        return True
+    except Exception as e:
+        print(f"   ❌ Error al crear GSI en '{table_name}': {str(e)}")
+        return False
+
+
 def create_all_resources():
     """Crea tablas DynamoDB necesarias."""
     print("\n" + "=" * 60)
@@ -420,7 +457,8 @@ def create_all_resources():
     ):
         return False
     
-    # Pedidos: PK = local_id, SK = pedido_id con GSI by_usuario
+    # Pedidos: PK = local_id, SK = pedido_id con GSI by_usuario_v2 y by_local_status
+    # (by_local_status: local_status = "<local_id>#<status>", usado por los listados de cocina/delivery)
     if not create_dynamodb_table(
         table_name=TABLE_PEDIDOS,
         key_schema=[
@@ -431,16 +469,26 @@ def create_all_resources():
             {'AttributeName': 'local_id', 'AttributeType': 'S'},
             {'AttributeName': 'pedido_id', 'AttributeType': 'S'},
             {'AttributeName': 'correo', 'AttributeType': 'S'},
-            {'AttributeName': 'created_at', 'AttributeType': 'S'}
+            {'AttributeName': 'created_at', 'AttributeType': 'S'},
+            {'AttributeName': 'local_status', 'AttributeType': 'S'},
+            {'AttributeName': 'updated_at', 'AttributeType': 'S'}
         ],
         global_secondary_indexes=[
             {
-                'IndexName': 'by_usuario',
+                'IndexName': 'by_usuario_v2',
                 'KeySchema': [
                     {'AttributeName': 'correo', 'KeyType': 'HASH'},
                     {'AttributeName': 'created_at', 'KeyType': 'RANGE'}
                 ],
                 'Projection': {'ProjectionType': 'ALL'}
+            },
+            {
+                'IndexName': 'by_local_status',
+                'KeySchema': [
+                    {'AttributeName': 'local_status', 'KeyType': 'HASH'},
+                    {'AttributeName': 'updated_at', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'ALL'}
             }
         ]
     ):
@@ -470,6 +518,53 @@ def create_all_resources():
         ):
             return False
     
+    # ReservasStock: PK = pedido_id con GSI by_expiry (solo reservas abiertas: reserva_bucket + expires_at)
+    if not create_dynamodb_table(
+        table_name=TABLE_RESERVAS_STOCK,
+        key_schema=[{'AttributeName': 'pedido_id', 'KeyType': 'HASH'}],
+        attribute_definitions=[
+            {'AttributeName': 'pedido_id', 'AttributeType': 'S'},
+            {'AttributeName': 'reserva_bucket', 'AttributeType': 'S'},
+            {'AttributeName': 'expires_at', 'AttributeType': 'N'}
+        ],
+        global_secondary_indexes=[
+            {
+                'IndexName': 'by_expiry',
+                'KeySchema': [
+                    {'AttributeName': 'reserva_bucket', 'KeyType': 'HASH'},
+                    {'AttributeName': 'expires_at', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'ALL'}
+            }
+        ],
+        ttl_attribute='ttl'
+    ):
+        return False
+    
+    # Outbox: PK = evento_id con stream (lo lee relayOutbox) y GSI by_pending (solo eventos sin publicar)
+    if not create_dynamodb_table(
+        table_name=TABLE_OUTBOX,
+        key_schema=[{'AttributeName': 'evento_id', 'KeyType': 'HASH'}],
+        attribute_definitions=[
+            {'AttributeName': 'evento_id', 'AttributeType': 'S'},
+            {'AttributeName': 'outbox_bucket', 'AttributeType': 'S'},
+            {'AttributeName': 'next_attempt_at', 'AttributeType': 'N'}
+        ],
+        global_secondary_indexes=[
+            {
+                'IndexName': 'by_pending',
+                'KeySchema': [
+                    {'AttributeName': 'outbox_bucket', 'KeyType': 'HASH'},
+                    {'AttributeName': 'next_attempt_at', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'ALL'}
+            }
+        ],
+        stream_enabled=True,
+        ttl_attribute='ttl'
+    ):
+        return False
+    
     print("\n✅ Todos los recursos creados exitosamente")
     return True
 
@@ -0,0 +1,132 @@
+"""
+Migración de Burger-Pedidos a las claves con shard (ORDER_SHARDS).
+
+Mueve cada pedido a la partición `<local_id>#<shard>` que le corresponde
+(runtime-layer/layer/python/order_shards.py) y ajusta `local_status`. La
+clave de partición no se puede actualizar, así que cada pedido se mueve con
+una transacción: Put con la clave nueva (si no existe) + Delete de la
+anterior con la condición de que `updated_at` no haya cambiado. Si el
+pedido avanzó mientras tanto, la transacción se cancela y el pedido queda
+para la siguiente pasada (se puede correr varias veces).
+
+Mientras dura la migración las Lambdas encuentran los pedidos en las dos
+claves (`key_candidates`, `status_partitions`). Con --shards 1 deshace la
+migración.
+
+Uso:
+    python3 ShardMigration.py --shards 8 [--dry-run] [--segments 4]
+"""
+import argparse
+import os
+import sys
+import boto3
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from pathlib import Path
+from threading import Lock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'runtime-layer' / 'layer' / 'python'))
+from order_shards import base_local, key_status, order_key  # noqa: E402
+
+load_dotenv()
+
+AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
+TABLE_PEDIDOS = os.getenv('TABLE_PEDIDOS')
+
+dynamodb = boto3.resource('dynamodb', region_name=AWS_REGION)
+
+
+def rekey(item, shards):
+    """Retorna el pedido con su clave para `shards`, o None si ya está en ella."""
+    key = order_key(base_local(item['local_id']), item['pedido_id'], shards)
+    if key['local_id'] == item['local_id']:
+        return None
+    moved = dict(item, local_id=key['local_id'])
+    if item.get('status'):
+        moved['local_status'] = key_status(key, item['status'])
+    return moved
+
+
+def migrate_segment(table, segment, total_segments, shards, dry_run, counters, lock):
+    scan_kwargs = {'Segment': segment, 'TotalSegments': total_segments}
+    while True:
+        response = table.scan(**scan_kwargs)
+        for item in response.get('Items', []):
+            moved = rekey(item, shards)
+            with lock:
+                counters['scanned'] += 1
+            if not moved:
+                continue
+
+            if not dry_run:
+                delete = {
+                    'TableName': table.name,
+                    'Key': {'local_id': item['local_id'], 'pedido_id': item['pedido_id']},
+                    'ConditionExpression': 'attribute_exists(pedido_id)',
+                }
+                if 'updated_at' in item:
+                    delete['ConditionExpression'] += ' AND updated_at = :u'
+                    delete['ExpressionAttributeValues'] = {':u': item['updated_at']}
+                try:
+                    table.meta.client.transact_write_items(TransactItems=[
+                        {'Put': {'TableName': table.name, 'Item': moved,
+                                 'ConditionExpression': 'attribute_not_exists(pedido_id)'}},
+                        {'Delete': delete},
+                    ])
+                except ClientError as e:
+                    # The order changed (or was already moved) while the migration was running
+                    if e.response['Error']['Code'] != 'TransactionCanceledException':
+                        raise
+                    with lock:
+                        counters['skipped'] += 1
+                    continue
+            with lock:
+                counters['moved'] += 1
+
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migración de Burger-Pedidos a claves con shard")
+    parser.add_argument('--shards', type=int, default=int(os.getenv('ORDER_SHARDS') or 1),
+                        help="Shards por local (ORDER_SHARDS de las Lambdas)")
+    parser.add_argument('--dry-run', action='store_true', help="Solo cuenta los pedidos a mover")
+    parser.add_argument('--segments', type=int, default=4, help="Segmentos de scan en paralelo")
+    args = parser.parse_args()
+
+    if not TABLE_PEDIDOS:
+        print("❌ Falta TABLE_PEDIDOS en .env")
+        return
+    if args.shards < 1:
+        print("❌ --shards debe ser 1 o más")
+        return
+
+    print("=" * 60)
+    print(f"🔀 MIGRACIÓN DE {TABLE_PEDIDOS} A {args.shards} SHARDS" + (" (dry-run)" if args.dry_run else ""))
+    print("=" * 60)
+
+    table = dynamodb.Table(TABLE_PEDIDOS)
+    counters = {'scanned': 0, 'moved': 0, 'skipped': 0}
+    lock = Lock()
+
+    with ThreadPoolExecutor(max_workers=args.segments) as executor:
+        futures = [
+            executor.submit(migrate_segment, table, segment, args.segments, args.shards,
+                            args.dry_run, counters, lock)
+            for segment in range(args.segments)
+        ]
+        for future in futures:
+            future.result()
+
+    verb = "a mover" if args.dry_run else "movidos"
+    print(f"\n✅ Pedidos revisados: {counters['scanned']}")
+    print(f"✅ Pedidos {verb}: {counters['moved']}")
+    if counters['skipped']:
+        print(f"⚠️ Pedidos que cambiaron durante la migración: {counters['skipped']} (volver a correr)")
+
+
+if __name__ == "__main__":
+    main()
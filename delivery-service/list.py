@@ -1,39 +1,51 @@
-from boto3.dynamodb.conditions import Attr
-from common import response, get_table, TABLE_ORDERS
-from auth_helper import get_bearer_token, validate_token_via_lambda
-
-def _scan_by_status(status, limit=20, start_key=None):
-    table = get_table(TABLE_ORDERS)
-    scan_kwargs = {'FilterExpression': Attr('status').eq(status), 'Limit': limit}
-    if start_key: scan_kwargs['ExclusiveStartKey'] = start_key
-    response_dynamo = table.scan(**scan_kwargs)
-    return response_dynamo.get('Items', []), response_dynamo.get('LastEvaluatedKey')
+from common import response
+from instrumentation import instrument
+from order_shards import list_by_status, page_params, public
+from auth_helper import LocalError, get_bearer_token, resolve_local_id, validate_token
 
+@instrument
 def list_ready(event, context):
     token = get_bearer_token(event)
-    valido, error, rol = validate_token_via_lambda(token)
-    
+    valido, error, identity = validate_token(token)
+
     if not valido:
         return response(403, {"message": error or "Token inválido"})
-    
+
     # Require Repartidor role
-    if rol not in ("Repartidor", "Admin"):
+    if identity.role not in ("Repartidor", "Admin"):
         return response(403, {"message": "Permiso denegado: se requiere rol Repartidor"})
-    
-    items, last_key = _scan_by_status('LISTO_PARA_RECOJO')
-    return response(200, {"orders": items, "next_key": last_key})
 
+    try:
+        qs = event.get('queryStringParameters') or {}
+        local_id = resolve_local_id(identity, qs.get('local_id'))
+        limit, start_key = page_params(qs)
+        items, last_key = list_by_status(local_id, 'LISTO_PARA_RECOJO', limit, start_key)
+    except LocalError as e:
+        return response(e.status_code, {"message": e.message})
+    except ValueError:
+        return response(400, {"error": "Parámetros de paginación inválidos (limit, next_key)"})
+    return response(200, {"orders": [public(item) for item in items], "next_key": last_key})
+
+@instrument
 def list_my_orders(event, context):
     # Validate token and role - require Repartidor role
     token = get_bearer_token(event)
-    valido, error, rol = validate_token_via_lambda(token)
-    
+    valido, error, identity = validate_token(token)
+
     if not valido:
         return response(403, {"message": error or "Token inválido"})
-    
+
     # Require Repartidor role
-    if rol not in ("Repartidor", "Admin"):
+    if identity.role not in ("Repartidor", "Admin"):
         return response(403, {"message": "Permiso denegado: se requiere rol Repartidor"})
-    
-    items, last_key = _scan_by_status('EN_CAMINO')
-    return response(200, {"orders": items, "next_key": last_key})
+
+    try:
+        qs = event.get('queryStringParameters') or {}
+        local_id = resolve_local_id(identity, qs.get('local_id'))
+        limit, start_key = page_params(qs)
+        items, last_key = list_by_status(local_id, 'EN_CAMINO', limit, start_key)
+    except LocalError as e:
+        return response(e.status_code, {"message": e.message})
+    except ValueError:
+        return response(400, {"error": "Parámetros de paginación inválidos (limit, next_key)"})
+    return response(200, {"orders": [public(item) for item in items], "next_key": last_key})
@@ -1,50 +1,52 @@
-from boto3.dynamodb.conditions import Attr
-from common import response, get_table, TABLE_ORDERS
-from auth_helper import get_bearer_token, validate_token_via_lambda
-
-def _scan_by_status(status, limit=20, start_key=None):
-    table = get_table(TABLE_ORDERS)
-    
-    scan_kwargs = {
-        'FilterExpression': Attr('status').eq(status),
-        'Limit': limit
-    }
-    if start_key:
-        scan_kwargs['ExclusiveStartKey'] = start_key
-        
-    response_dynamo = table.scan(**scan_kwargs)
-    
-    items = response_dynamo.get('Items', [])
-    last_key = response_dynamo.get('LastEvaluatedKey')
-    
-    return items, last_key
+from common import response
+from instrumentation import instrument
+from order_shards import list_by_status, page_params, public
+from auth_helper import LocalError, get_bearer_token, resolve_local_id, validate_token
 
+@instrument
 def list_pending(event, context):
     # Validate token and role - require Cocinero role
     token = get_bearer_token(event)
-    valido, error, rol = validate_token_via_lambda(token)
-    
+    valido, error, identity = validate_token(token)
+
     if not valido:
         return response(403, {"message": error or "Token inválido"})
-    
+
     # Require Cocinero role
-    if rol not in ("Cocinero", "Admin"):
+    if identity.role not in ("Cocinero", "Admin"):
         return response(403, {"message": "Permiso denegado: se requiere rol Cocinero"})
-    
-    items, last_key = _scan_by_status('PENDIENTE_COCINA')
-    return response(200, {"orders": items, "next_key": last_key})
 
+    try:
+        qs = event.get('queryStringParameters') or {}
+        local_id = resolve_local_id(identity, qs.get('local_id'))
+        limit, start_key = page_params(qs)
+        items, last_key = list_by_status(local_id, 'PENDIENTE_COCINA', limit, start_key)
+    except LocalError as e:
+        return response(e.status_code, {"message": e.message})
+    except ValueError:
+        return response(400, {"error": "Parámetros de paginación inválidos (limit, next_key)"})
+    return response(200, {"orders": [public(item) for item in items], "next_key": last_key})
+
+@instrument
 def list_cooking(event, context):
     # Validate token and role - require Cocinero role
     token = get_bearer_token(event)
-    valido, error, rol = validate_token_via_lambda(token)
-    
+    valido, error, identity = validate_token(token)
+
     if not valido:
         return response(403, {"message": error or "Token inválido"})
-    
+
     # Require Cocinero role
-    if rol not in ("Cocinero", "Admin"):
+    if identity.role not in ("Cocinero", "Admin"):
         return response(403, {"message": "Permiso denegado: se requiere rol Cocinero"})
-    
-    items, last_key = _scan_by_status('COCINANDO')
-    return response(200, {"orders": items, "next_key": last_key})
+
+    try:
+        qs = event.get('queryStringParameters') or {}
+        local_id = resolve_local_id(identity, qs.get('local_id'))
+        limit, start_key = page_params(qs)
+        items, last_key = list_by_status(local_id, 'COCINANDO', limit, start_key)
+    except LocalError as e:
+        return response(e.status_code, {"message": e.message})
+    except ValueError:
+        return response(400, {"error": "Parámetros de paginación inválidos (limit, next_key)"})
+    return response(200, {"orders": [public(item) for item in items], "next_key": last_key})
@@ -0,0 +1,52 @@
+import os
+from common import get_table, TABLE_ORDERS
+from instrumentation import instrument, logger
+from order_shards import key_candidates
+import reservations
+
+# Expired reservations handled per sweeper run
+SWEEP_LIMIT = int(os.environ.get('SWEEP_LIMIT', '200'))
+
+
+@instrument
+def release_stock(event, context):
+    # Step Function failure paths: kitchen/delivery reject, stock error, timeout
+    order_id = event.get('order_id')
+    if not order_id:
+        raise ValueError("Falta order_id")
+    released = reservations.release(order_id, event.get('motivo', 'cancelado'))
+    return {"order_id": order_id, "released": released}
+
+
+@instrument
+def commit_stock(event, context):
+    # Step Function success path: the order was delivered
+    order_id = event.get('order_id')
+    if not order_id:
+        raise ValueError("Falta order_id")
+    return {"order_id": order_id, "committed": reservations.commit(order_id)}
+
+
+def _order_status(local_id, order_id):
+    for key in key_candidates(local_id, order_id):
+        item = get_table(TABLE_ORDERS).get_item(Key=key, ProjectionExpression='#s',
+                                                ExpressionAttributeNames={'#s': 'status'}).get('Item')
+        if item:
+            return item.get('status')
+    return None
+
+
+@instrument
+def sweep_reservations(event, context):
+    # Reservations the workflow never closed (execution lost, release failed, workflow never started)
+    counts = {'committed': 0, 'released': 0, 'skipped': 0}
+    for reservation in reservations.expired(limit=SWEEP_LIMIT):
+        order_id = reservation['pedido_id']
+        # A delivered order whose commit step failed keeps its stock taken
+        if _order_status(reservation['local_id'], order_id) == 'ENTREGADO':
+            done, outcome = reservations.commit(order_id, 'entregado (sweeper)'), 'committed'
+        else:
+            done, outcome = reservations.release(order_id, 'expirada'), 'released'
+        counts[outcome if done else 'skipped'] += 1
+    logger.info("Reservas vencidas procesadas", extra=counts)
+    return counts
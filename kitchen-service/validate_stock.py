@@ -1,25 +1,34 @@
-from common import get_table, TABLE_PRODUCTS
+from instrumentation import instrument
+import reservations
 
+
+class StockError(Exception):
+    """Lambda reports the class name as errorType, which ValidarStock catches."""
+    pass
+
+
+@instrument
 def validate_stock(event, context):
-    products_table = get_table(TABLE_PRODUCTS)
-    
-    # Extract local_id and items from event
-    local_id = event.get('local_id', 'BURGER-LOCAL-001')
+    # create_order already took the stock: the order only needs its open reservation
+    order_id = event.get('order_id')
     items = event.get('items', [])
-    
+    if not order_id:
+        raise ValueError("Falta order_id")
+
+    reservation = reservations.get(order_id)
+    if not reservation or reservation.get('estado') != reservations.HELD:
+        raise StockError(f"Order {order_id} has no stock reserved")
+
+    # Reserved units per product, summed across stock shards
+    reserved = {}
+    for line in reservation.get('lineas', []):
+        pid = line['producto_id']
+        reserved[pid] = reserved.get(pid, 0) + int(line['cantidad'])
+
     for item in items:
         pid = item.get('product_id')
-        qty = item.get('quantity', 1)
-        
-        # Use composite key: local_id (PK) and producto_id (SK)
-        res = products_table.get_item(Key={'local_id': local_id, 'producto_id': pid})
-        product = res.get('Item')
-        
-        if not product:
-            raise Exception(f"Product {pid} not found")
-        
-        stock = int(product.get('stock', 0))
-        if stock < qty:
-            raise Exception(f"Insufficient stock for {product.get('nombre', pid)}")
-    
+        if reserved.get(pid, 0) < int(item.get('quantity', 1)):
+            raise StockError(f"Insufficient stock reserved for {pid}")
+        reserved[pid] -= int(item.get('quantity', 1))
+
     return {"status": "OK", "message": "Stock validated"}
@@ -0,0 +1,16 @@
+"""
+Pruebas de carga de Burger Cloud a partir de las colecciones Postman.
+
+- postman: compila las colecciones y un archivo de escenarios
+  (loadtest/scenarios/*.json) en pasos con variables encadenadas.
+- runner: generador de carga asyncio con llegadas según un perfil de tráfico.
+- client: destinos HTTP (stage desplegado o servidor local) y en proceso
+  (localdev.LocalEnvironment).
+
+CLI: python3 benchmarks/load.py
+"""
+from loadtest.postman import ScenarioError, compile_spec, load_collection
+from loadtest.runner import LoadRunner
+from loadtest.client import HttpTarget, LocalTarget
+
+__all__ = ["ScenarioError", "compile_spec", "load_collection", "LoadRunner", "HttpTarget", "LocalTarget"]
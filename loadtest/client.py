@@ -0,0 +1,154 @@
+"""
+Destinos de la carga: HTTP real (stage desplegado o servidor local) o el
+LocalEnvironment en proceso.
+
+`HttpTarget` es un cliente HTTP/1.1 mínimo sobre asyncio con conexiones
+keep-alive por host: así el generador no depende de aiohttp/httpx y miles
+de requests concurrentes no abren miles de sockets TLS.
+"""
+import asyncio
+import json
+import ssl
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+
+class Response:
+    __slots__ = ("status", "headers", "body")
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        try:
+            return json.loads(self.body or b"null")
+        except ValueError:
+            return None
+
+
+class HttpTarget:
+    """Requests HTTP/1.1 con un pool de conexiones keep-alive por (esquema, host, puerto)."""
+
+    def __init__(self, timeout=30.0, pool_size=64):
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._idle = {}
+        self._ssl = ssl.create_default_context()
+
+    async def request(self, method, url, headers=None, body=None):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"URL inválida: {url!r} (¿falta --base-url o una variable *_url?)")
+        key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        payload = body.encode("utf-8") if isinstance(body, str) else (body or b"")
+
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {parts.netloc}", "Connection: keep-alive",
+                 f"Content-Length: {len(payload)}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()
+                  if name.lower() not in ("host", "connection", "content-length")]
+        raw = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + payload
+
+        # A pooled connection may have been closed by the server: retry once on a fresh one
+        for attempt in range(2):
+            reader, writer, reused = await self._connect(key)
+            try:
+                writer.write(raw)
+                await writer.drain()
+                response, keep_alive = await asyncio.wait_for(self._read_response(reader, method), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError) as error:
+                writer.close()
+                if reused and attempt == 0:
+                    continue
+                raise ConnectionError(f"{method} {url}: {error}") from error
+            except BaseException:
+                writer.close()
+                raise
+            self._release(key, reader, writer, keep_alive)
+            return response
+
+    async def _connect(self, key):
+        idle = self._idle.get(key)
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        scheme, host, port = key
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=self._ssl if scheme == "https" else None), self.timeout)
+        return reader, writer, False
+
+    def _release(self, key, reader, writer, keep_alive):
+        idle = self._idle.setdefault(key, [])
+        if keep_alive and len(idle) < self.pool_size:
+            idle.append((reader, writer))
+        else:
+            writer.close()
+
+    @staticmethod
+    async def _read_response(reader, method):
+        status_line = await reader.readuntil(b"\r\n")
+        _, status, _ = status_line.decode("latin-1").split(" ", 2)
+        headers = {}
+        while True:
+            line = await reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = headers.get("connection", "").lower() != "close"
+        if method == "HEAD" or status in ("204", "304") or status.startswith("1"):
+            body = b""
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readuntil(b"\r\n")).split(b";", 1)[0], 16)
+                if size == 0:
+                    # Trailers end with an empty line
+                    while await reader.readuntil(b"\r\n") != b"\r\n":
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            keep_alive = False
+        return Response(int(status), headers, body), keep_alive
+
+    async def close(self):
+        for idle in self._idle.values():
+            for _, writer in idle:
+                writer.close()
+        self._idle.clear()
+
+
+class LocalTarget:
+    """Requests contra LocalEnvironment.call() en threads: sin red ni AWS."""
+
+    def __init__(self, env, workers=64):
+        self.env = env
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="loadtest")
+
+    async def request(self, method, url, headers=None, body=None):
+        parts = urlsplit(url)
+        headers = dict(headers or {})
+        authorization = next((value for name, value in headers.items() if name.lower() == "authorization"), "")
+        token = authorization.split(" ", 1)[1] if authorization.lower().startswith("bearer ") else None
+        query = dict(parse_qsl(parts.query)) or None
+
+        result = await asyncio.get_running_loop().run_in_executor(
+            self._executor, lambda: self.env.call(method, parts.path or "/", body=body, query=query,
+                                                  headers=headers, token=token))
+        body = result.get("body") or ""
+        return Response(result["statusCode"], {k.lower(): v for k, v in (result.get("headers") or {}).items()},
+                        body.encode("utf-8") if isinstance(body, str) else body)
+
+    async def close(self):
+        self._executor.shutdown(wait=False)
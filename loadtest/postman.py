@@ -0,0 +1,221 @@
+"""
+Compilador de colecciones Postman a escenarios de carga.
+
+Las colecciones del repo (`taller-serverless-postman-collection.json`,
+`postman-collection-updated.json`) ya describen los flujos reales. Este
+módulo las convierte en pasos ejecutables:
+
+- cada request de la colección es un paso (método, URL, headers, body) con
+  las variables `{{...}}` sin resolver, igual que en Postman;
+- los `pm.environment.set("x", jsonData.a.b)` de los scripts de test se
+  vuelven extracciones (`{"x": "a.b"}`), así el token del login o el
+  order_id del pedido pasan al paso siguiente;
+- los textos de ejemplo (PRODUCT_UUID_HERE, ...) se reemplazan por
+  variables según `placeholders` del escenario.
+
+El archivo de escenarios (ver loadtest/scenarios/lunch_rush.json) nombra
+las colecciones, corrige o agrega requests (`requests`), define los pasos
+de preparación (`setup`), los escenarios con su peso y el perfil de tráfico.
+`compile_spec` valida además cada ruta contra los eventos http/httpApi de
+los serverless.yml y avisa de las que no existen.
+"""
+import copy
+import json
+import random
+import re
+from pathlib import Path
+
+from localdev.lambdas import ROOT, LambdaRegistry
+
+SCENARIOS_DIR = Path(__file__).resolve().parent / "scenarios"
+
+_SET_RE = re.compile(
+    r"pm\.(?:environment|collectionVariables|globals|variables)\.set\(\s*[\"'](\w+)[\"']\s*,\s*"
+    r"jsonData((?:\.\w+|\[\d+\])*)\s*\)"
+)
+_VARIABLE_RE = re.compile(r"\{\{\s*([\w$.-]+)\s*\}\}")
+_PATH_TOKEN_RE = re.compile(r"\.?(\w+)|\[(\d+|\*)\]")
+
+
+class ScenarioError(Exception):
+    """Escenario inválido (request inexistente, peso o perfil mal definidos)."""
+
+
+def load_collection(path):
+    """Requests de una colección Postman v2.x: {nombre: paso} (las carpetas se aplanan)."""
+    collection = json.loads(Path(path).read_text(encoding="utf-8"))
+    variables = {var["key"]: var.get("value", "") for var in collection.get("variable", [])}
+    requests = {}
+
+    def walk(items, folder):
+        for item in items:
+            if "item" in item:
+                walk(item["item"], item.get("name", ""))
+            elif "request" in item:
+                requests[item["name"]] = _compile_item(item, folder)
+
+    walk(collection.get("item", []), "")
+    return requests, variables
+
+
+def _compile_item(item, folder):
+    request = item["request"]
+    url = request.get("url", "")
+    if isinstance(url, dict):
+        url = url.get("raw", "")
+    headers = {header["key"]: header.get("value", "") for header in request.get("header", [])
+               if not header.get("disabled")}
+    body = request.get("body") or {}
+    raw = body.get("raw") if body.get("mode") == "raw" else None
+
+    extract = {}
+    for event in item.get("event", []):
+        if event.get("listen") != "test":
+            continue
+        script = "\n".join(event.get("script", {}).get("exec", []))
+        for name, path in _SET_RE.findall(script):
+            extract[name] = path.lstrip(".")
+
+    step = {"method": request.get("method", "GET").upper(), "url": url, "headers": headers, "body": raw,
+            "extract": extract}
+    if folder:
+        step["folder"] = folder
+    return step
+
+
+def render(template, variables, dynamic=None):
+    """Reemplaza `{{var}}` como Postman. Las variables desconocidas quedan tal cual."""
+    if template is None:
+        return None
+
+    def replace(match):
+        name = match.group(1)
+        if name.startswith("$") and dynamic is not None:
+            value = dynamic(name)
+            if value is not None:
+                return str(value)
+        if name in variables and variables[name] is not None:
+            return str(variables[name])
+        return match.group(0)
+
+    return _VARIABLE_RE.sub(replace, template)
+
+
+def missing_variables(text):
+    """Variables `{{...}}` que siguen sin resolver en `text`."""
+    return sorted(set(_VARIABLE_RE.findall(text or "")))
+
+
+def extract_value(document, path, rng=random):
+    """`a.b[0].c` sobre el JSON de la respuesta (`[*]`: un elemento al azar). None si no existe."""
+    value = document
+    for key, index in _PATH_TOKEN_RE.findall(path):
+        try:
+            if index == "*":
+                value = rng.choice(value)
+            else:
+                value = value[int(index)] if index else value[key]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return value
+
+
+def _merge_request(base, override):
+    step = copy.deepcopy(base) if base else {"method": "GET", "url": "", "headers": {}, "body": None,
+                                              "extract": {}}
+    for key, value in override.items():
+        if key in ("headers", "extract"):
+            step[key] = {**step.get(key, {}), **value}
+        elif key == "body" and not isinstance(value, str) and value is not None:
+            step[key] = json.dumps(value, ensure_ascii=False)
+        elif key == "method":
+            step[key] = value.upper()
+        else:
+            step[key] = value
+    return step
+
+
+def _replace_placeholders(step, placeholders):
+    def replace(text):
+        if not text:
+            return text
+        for literal, variable in placeholders.items():
+            text = text.replace(literal, "{{%s}}" % variable)
+        return text
+
+    step["url"] = replace(step["url"])
+    step["body"] = replace(step["body"])
+    step["headers"] = {key: replace(value) for key, value in step["headers"].items()}
+    return step
+
+
+def _route_of(url):
+    """(ruta) de una URL con host `{{x_url}}` o absoluto; sin query."""
+    path = url.split("?", 1)[0]
+    if path.startswith("{{"):
+        path = _VARIABLE_RE.sub("", path, count=1)
+    elif "://" in path:
+        path = "/" + path.split("://", 1)[1].partition("/")[2]
+    return "/" + path.strip("/")
+
+
+def compile_spec(spec_path, stage="dev"):
+    """Escenarios listos para ejecutar y la lista de advertencias de la compilación."""
+    spec_path = Path(spec_path)
+    spec = json.loads(spec_path.read_text(encoding="utf-8"))
+    warnings = []
+
+    requests, variables = {}, {}
+    for name in spec.get("collections", []):
+        path = Path(name) if Path(name).is_absolute() else ROOT / name
+        collection_requests, collection_variables = load_collection(path)
+        # Later collections win, like importing them in order into one workspace
+        requests.update(collection_requests)
+        for key, value in collection_variables.items():
+            if value or key not in variables:
+                variables[key] = value
+    variables.update(spec.get("variables", {}))
+
+    for name, override in spec.get("requests", {}).items():
+        requests[name] = _merge_request(requests.get(name), override)
+    placeholders = spec.get("placeholders", {})
+    for step in requests.values():
+        _replace_placeholders(step, placeholders)
+
+    routes = {(method, path) for method, path, _, _ in LambdaRegistry(ROOT, stage).routes()}
+
+    def resolve(entry, where):
+        entry = {"request": entry} if isinstance(entry, str) else dict(entry)
+        name = entry.pop("request", None)
+        if name not in requests:
+            raise ScenarioError(f"{where}: request '{name}' no está en las colecciones ni en 'requests'")
+        step = {"name": name, **copy.deepcopy(requests[name]), **entry}
+        route = (step["method"], _route_of(step["url"]))
+        if route not in routes:
+            warnings.append(f"{name}: {route[0]} {route[1]} no es una ruta de los serverless.yml")
+        return step
+
+    scenarios = []
+    for scenario in spec.get("scenarios", []):
+        if scenario.get("weight", 1) <= 0:
+            raise ScenarioError(f"escenario '{scenario['name']}': el peso debe ser positivo")
+        scenarios.append({
+            "name": scenario["name"],
+            "weight": scenario.get("weight", 1),
+            "think_ms": scenario.get("think_ms", [0, 0]),
+            "steps": [resolve(entry, scenario["name"]) for entry in scenario["steps"]],
+        })
+    if not scenarios:
+        raise ScenarioError(f"{spec_path.name}: no define escenarios")
+
+    profile = spec.get("profile", [[0, 1], [1, 1]])
+    if profile[0][0] != 0 or profile[-1][0] != 1 or any(a[0] > b[0] for a, b in zip(profile, profile[1:])):
+        raise ScenarioError("profile: los puntos [fracción de tiempo, fracción del pico] van de 0 a 1 en orden")
+
+    return {
+        "name": spec.get("name", spec_path.stem),
+        "variables": variables,
+        "setup": [resolve(entry, "setup") for entry in spec.get("setup", [])],
+        "scenarios": scenarios,
+        "profile": profile,
+    }, warnings
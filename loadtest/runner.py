@@ -0,0 +1,230 @@
+"""
+Generador de carga asyncio para escenarios compilados (loadtest.postman).
+
+Modelo abierto: las sesiones llegan como un proceso de Poisson cuya tasa
+sigue el perfil del escenario (fracción del pico en función de la fracción
+del tiempo), así un almuerzo se ve como rampa, meseta y bajada en vez de un
+número fijo de usuarios en loop. Cada sesión elige un escenario según su
+peso, parte de las variables globales (colección, --var y lo que dejaron
+los pasos de `setup`) y encadena las extracciones de cada paso: el token del
+login o el order_id del pedido quedan disponibles para los siguientes.
+
+Si un paso falla (status fuera de `expect` después de los reintentos) la
+sesión se corta: los pasos siguientes dependen de sus variables.
+"""
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone
+
+from loadtest.postman import extract_value, missing_variables, render
+
+DEFAULT_EXPECT = range(200, 400)
+
+
+class StepFailed(Exception):
+    """Un paso terminó con un status inesperado o sin las variables que necesita."""
+
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def summarize(samples):
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    return {"count": len(ordered), "mean": round(statistics.fmean(ordered), 2),
+            "p50": round(_percentile(ordered, 0.50), 2), "p95": round(_percentile(ordered, 0.95), 2),
+            "p99": round(_percentile(ordered, 0.99), 2), "max": round(ordered[-1], 2)}
+
+
+def profile_rate(profile, fraction):
+    """Fracción del pico en `fraction` del tiempo (interpolación lineal entre los puntos)."""
+    for (x0, y0), (x1, y1) in zip(profile, profile[1:]):
+        if fraction <= x1:
+            return y0 if x1 == x0 else y0 + (y1 - y0) * (fraction - x0) / (x1 - x0)
+    return profile[-1][1]
+
+
+class Metrics:
+    def __init__(self, bucket_s):
+        self.bucket_s = bucket_s
+        self.steps = {}
+        self.scenarios = {}
+        self.timeline = {}
+        self.dropped = 0
+
+    def step(self, name):
+        return self.steps.setdefault(name, {"latency_ms": [], "statuses": {}, "retries": 0, "errors": {}})
+
+    def scenario(self, name):
+        return self.scenarios.setdefault(name, {"started": 0, "completed": 0, "failed": 0, "duration_ms": [],
+                                                "failed_at": {}})
+
+    def bucket(self, elapsed):
+        return self.timeline.setdefault(int(elapsed // self.bucket_s),
+                                        {"arrivals": 0, "requests": 0, "errors": 0, "latency_ms": []})
+
+    def report(self, duration, peak_rps, profile):
+        timeline = []
+        for index in sorted(self.timeline):
+            bucket = self.timeline[index]
+            start = index * self.bucket_s
+            middle = min(1.0, (start + self.bucket_s / 2) / duration)
+            timeline.append({
+                "start_s": start,
+                "target_sessions_per_s": round(peak_rps * profile_rate(profile, middle), 2),
+                "sessions_per_s": round(bucket["arrivals"] / self.bucket_s, 2),
+                "requests_per_s": round(bucket["requests"] / self.bucket_s, 2),
+                "errors": bucket["errors"],
+                "p95_ms": summarize(bucket["latency_ms"]).get("p95"),
+            })
+        return {
+            "steps": {name: {**summarize(step["latency_ms"]), "statuses": step["statuses"],
+                             "retries": step["retries"], "errors": step["errors"]}
+                      for name, step in self.steps.items()},
+            "scenarios": {name: {key: value for key, value in scenario.items() if key != "duration_ms"}
+                          | {"duration_ms": summarize(scenario["duration_ms"])}
+                          for name, scenario in self.scenarios.items()},
+            "dropped_sessions": self.dropped,
+            "timeline": timeline,
+        }
+
+
+class LoadRunner:
+    """Ejecuta un escenario compilado contra un destino (loadtest.client)."""
+
+    def __init__(self, compiled, target, variables=None, seed=None, bucket_s=10.0):
+        self.compiled = compiled
+        self.target = target
+        self.variables = {**compiled["variables"], **(variables or {})}
+        self.rng = random.Random(seed)
+        self.metrics = Metrics(bucket_s)
+        self._started = None
+
+    def _dynamic(self, name):
+        # Postman dynamic variables used by the collections
+        if name in ("$guid", "$randomUUID"):
+            return str(uuid.uuid4())
+        if name == "$timestamp":
+            return int(time.time())
+        if name == "$isoTimestamp":
+            return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+        if name == "$randomInt":
+            return self.rng.randint(0, 1000)
+        return None
+
+    def _elapsed(self):
+        return time.perf_counter() - self._started if self._started else 0.0
+
+    async def run_step(self, step, variables):
+        """Ejecuta un paso (con reintentos) y guarda sus extracciones en `variables`."""
+        url = render(step["url"], variables, self._dynamic)
+        headers = {key: render(value, variables, self._dynamic) for key, value in step.get("headers", {}).items()}
+        body = render(step.get("body"), variables, self._dynamic)
+        stats = self.metrics.step(step["name"])
+        missing = missing_variables(url) + missing_variables(body) + [
+            name for value in headers.values() for name in missing_variables(value)]
+        if missing:
+            stats["errors"]["variables sin valor"] = stats["errors"].get("variables sin valor", 0) + 1
+            raise StepFailed(f"{step['name']}: variables sin valor {sorted(set(missing))}")
+
+        expect = step.get("expect") or DEFAULT_EXPECT
+        retry = step.get("retry") or {}
+        attempts = max(1, retry.get("attempts", 1))
+        for attempt in range(attempts):
+            # Setup requests run before the clock starts and stay out of the timeline
+            bucket = self.metrics.bucket(self._elapsed()) if self._started else {
+                "requests": 0, "errors": 0, "latency_ms": []}
+            start = time.perf_counter()
+            try:
+                response = await self.target.request(step["method"], url, headers, body)
+            except (ConnectionError, OSError, asyncio.TimeoutError) as error:
+                name = type(error).__name__
+                stats["errors"][name] = stats["errors"].get(name, 0) + 1
+                bucket["errors"] += 1
+                raise StepFailed(f"{step['name']}: {error}") from error
+            latency = (time.perf_counter() - start) * 1000
+
+            stats["latency_ms"].append(latency)
+            stats["statuses"][str(response.status)] = stats["statuses"].get(str(response.status), 0) + 1
+            bucket["requests"] += 1
+            bucket["latency_ms"].append(latency)
+            if response.status in expect:
+                break
+            if attempt + 1 < attempts and response.status in retry.get("on", [response.status]):
+                # E.g. the kitchen confirms before the Step Function stored the task token
+                stats["retries"] += 1
+                await asyncio.sleep(retry.get("delay_ms", 200) / 1000)
+                continue
+            bucket["errors"] += 1
+            raise StepFailed(f"{step['name']}: status {response.status}")
+
+        if step.get("extract"):
+            document = response.json()
+            for name, path in step["extract"].items():
+                value = extract_value(document, path, self.rng)
+                if value is None:
+                    raise StepFailed(f"{step['name']}: la respuesta no tiene '{path}'")
+                variables[name] = value
+        return response
+
+    async def setup(self):
+        """Pasos de preparación (logins del personal): sus variables quedan para todas las sesiones."""
+        for step in self.compiled["setup"]:
+            await self.run_step(step, self.variables)
+
+    async def run_session(self, scenario):
+        stats = self.metrics.scenario(scenario["name"])
+        stats["started"] += 1
+        variables = dict(self.variables)
+        low, high = scenario.get("think_ms", [0, 0])
+        start = time.perf_counter()
+        for index, step in enumerate(scenario["steps"]):
+            if index:
+                think = step.get("think_ms", [low, high])
+                await asyncio.sleep(self.rng.uniform(*think) / 1000)
+            try:
+                for _ in range(step.get("repeat", 1)):
+                    await self.run_step(step, variables)
+            except StepFailed:
+                stats["failed"] += 1
+                stats["failed_at"][step["name"]] = stats["failed_at"].get(step["name"], 0) + 1
+                return False
+        stats["completed"] += 1
+        stats["duration_ms"].append((time.perf_counter() - start) * 1000)
+        return True
+
+    async def run(self, duration, peak_rps, max_sessions=500):
+        """Llegadas de Poisson con la tasa del perfil durante `duration` segundos."""
+        scenarios = self.compiled["scenarios"]
+        weights = [scenario["weight"] for scenario in scenarios]
+        profile = self.compiled["profile"]
+        sessions = set()
+        self._started = time.perf_counter()
+
+        # Thinning: candidates at the peak rate, each kept with probability rate(t) / peak
+        elapsed = 0.0
+        while True:
+            elapsed += self.rng.expovariate(peak_rps)
+            if elapsed >= duration:
+                break
+            await asyncio.sleep(max(0.0, elapsed - self._elapsed()))
+            if self.rng.random() > profile_rate(profile, elapsed / duration):
+                continue
+            if len(sessions) >= max_sessions:
+                self.metrics.dropped += 1
+                continue
+            self.metrics.bucket(elapsed)["arrivals"] += 1
+            scenario = self.rng.choices(scenarios, weights)[0]
+            task = asyncio.create_task(self.run_session(scenario))
+            sessions.add(task)
+            task.add_done_callback(sessions.discard)
+
+        if sessions:
+            await asyncio.gather(*sessions)
+        wall = self._elapsed()
+        return {"duration_s": round(wall, 2), **self.metrics.report(duration, peak_rps, profile)}
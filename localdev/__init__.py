@@ -0,0 +1,23 @@
+"""
+Herramientas de desarrollo local de Burger Cloud (no se despliegan).
+
+- dynamodb: backend DynamoDB en memoria construido desde los esquemas de
+  data-setup/schemas-validation.
+- lambdas: funciones de los serverless.yml ejecutadas en proceso y un
+  cliente `lambda` local.
+- stepfunctions: intérprete ASL para workflow-service/step-function.json.
+- metrics: colector de las métricas EMF que emiten los handlers
+  instrumentados (runtime-layer/layer/python/instrumentation.py).
+- tracing: sus spans agrupados por pedido, camino crítico y timelines.
+- environment: todo lo anterior instalado, con datos de ejemplo y un
+  `call()` que hace de API Gateway.
+- server: servidor HTTP asyncio con todos los servicios en un proceso
+  (python3 -m localdev.server).
+"""
+from localdev.dynamodb import LocalDynamoDB, install
+from localdev.lambdas import LambdaRegistry, LocalLambdaClient
+from localdev.stepfunctions import LocalStepFunctions
+from localdev.environment import LocalEnvironment
+
+__all__ = ["LocalDynamoDB", "install", "LambdaRegistry", "LocalLambdaClient", "LocalStepFunctions",
+           "LocalEnvironment"]
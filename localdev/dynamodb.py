@@ -0,0 +1,1285 @@
+"""
+Backend DynamoDB en memoria para correr los handlers sin AWS.
+
+Las tablas se crean a partir de los bloques `x-dynamodb` de
+data-setup/schemas-validation/*.json (clave de partición, clave de orden y
+GSI) y los nombres salen de las mismas variables de entorno que usa
+DataPoblator (`TABLE_<ARCHIVO>`, p. ej. TABLE_PEDIDOS).
+
+Soporta la API de `boto3.resource('dynamodb')` que usa el repo:
+get/put/update/delete_item con condiciones, query sobre la tabla y sus GSI,
+scan con segmentos, batch get/write y transacciones (vía `meta.client`). Los
+errores son `ClientError` con los mismos códigos que DynamoDB y cada
+operación puede tener una latencia configurable. Con `transaction_ms`, cada
+transacción retiene sus items durante ese tiempo y otra transacción que toque
+alguno se cancela con `TransactionConflict`, como en DynamoDB. La capacidad consumida
+(RCU/WCU) se calcula con las reglas de DynamoDB y se acumula en `stats()`.
+
+Las tablas con `stream` en su bloque `x-dynamodb` (el StreamViewType) emiten
+registros de DynamoDB Streams (INSERT / MODIFY / REMOVE con Keys y las
+imágenes) para los suscriptores de `subscribe`. Hilos aparte los entregan en
+lotes, fuera de la llamada que escribió, como el poller de Lambda (en orden
+por item); `flush_streams()` espera a que se entreguen los que escribió el
+hilo actual.
+
+Uso:
+    from localdev import LocalDynamoDB, install
+    backend = LocalDynamoDB.from_schemas(latency_ms=2)
+    install(backend)  # boto3.resource('dynamodb') -> backend
+"""
+import bisect
+import copy
+import functools
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter, defaultdict, deque
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+
+from botocore.exceptions import ClientError, ParamValidationError
+
+from localdev import expressions, hooks
+from localdev.expressions import ExpressionError, Expressions, MISSING, dynamo_type, normalize
+from localdev.lambdas import ACCOUNT_ID, REGION
+
+ROOT = Path(__file__).resolve().parent.parent
+SCHEMAS_DIR = ROOT / "data-setup" / "schemas-validation"
+
+PAGE_SIZE_LIMIT = 1024 * 1024
+MAX_BATCH_GET = 100
+MAX_BATCH_WRITE = 25
+MAX_TRANSACT_ITEMS = 100
+STREAM_BATCH_SIZE = 100
+STREAM_FLUSH_TIMEOUT = 30.0
+
+_SCHEMA_TYPES = {'string': 'S', 'number': 'N', 'integer': 'N'}
+
+_OPERATIONS = {
+    'GetItem': {'TableName', 'Key', 'ConsistentRead', 'ProjectionExpression', 'ExpressionAttributeNames',
+                'ReturnConsumedCapacity', 'AttributesToGet'},
+    'PutItem': {'TableName', 'Item', 'ConditionExpression', 'ExpressionAttributeNames',
+                'ExpressionAttributeValues', 'ReturnValues', 'ReturnConsumedCapacity',
+                'ReturnValuesOnConditionCheckFailure', 'ReturnItemCollectionMetrics'},
+    'UpdateItem': {'TableName', 'Key', 'UpdateExpression', 'ConditionExpression', 'ExpressionAttributeNames',
+                   'ExpressionAttributeValues', 'ReturnValues', 'ReturnConsumedCapacity',
+                   'ReturnValuesOnConditionCheckFailure', 'ReturnItemCollectionMetrics'},
+    'DeleteItem': {'TableName', 'Key', 'ConditionExpression', 'ExpressionAttributeNames',
+                   'ExpressionAttributeValues', 'ReturnValues', 'ReturnConsumedCapacity',
+                   'ReturnValuesOnConditionCheckFailure', 'ReturnItemCollectionMetrics'},
+    'Query': {'TableName', 'IndexName', 'KeyConditionExpression', 'FilterExpression', 'ProjectionExpression',
+              'ExpressionAttributeNames', 'ExpressionAttributeValues', 'Limit', 'ExclusiveStartKey',
+              'ScanIndexForward', 'ConsistentRead', 'Select', 'ReturnConsumedCapacity'},
+    'Scan': {'TableName', 'IndexName', 'FilterExpression', 'ProjectionExpression', 'ExpressionAttributeNames',
+             'ExpressionAttributeValues', 'Limit', 'ExclusiveStartKey', 'Segment', 'TotalSegments',
+             'ConsistentRead', 'Select', 'ReturnConsumedCapacity'},
+    'BatchGetItem': {'RequestItems', 'ReturnConsumedCapacity'},
+    'BatchWriteItem': {'RequestItems', 'ReturnConsumedCapacity', 'ReturnItemCollectionMetrics'},
+    'TransactWriteItems': {'TransactItems', 'ClientRequestToken', 'ReturnConsumedCapacity',
+                           'ReturnItemCollectionMetrics'},
+    'TransactGetItems': {'TransactItems', 'ReturnConsumedCapacity'},
+}
+
+
+# -- errors -------------------------------------------------------------------
+
+class _Exceptions:
+    """Equivalente a `client.exceptions`: una subclase de ClientError por código."""
+
+    def __init__(self):
+        self._classes = {}
+
+    def for_code(self, code):
+        if code not in self._classes:
+            self._classes[code] = type(code, (ClientError,), {})
+        return self._classes[code]
+
+    def __getattr__(self, code):
+        if code.startswith('_'):
+            raise AttributeError(code)
+        return self.for_code(code)
+
+
+exceptions = _Exceptions()
+
+
+def client_error(code, message, operation, **extra):
+    error = {'Error': {'Code': code, 'Message': message},
+             'ResponseMetadata': {'HTTPStatusCode': 400}}
+    error.update(extra)
+    return exceptions.for_code(code)(error, operation)
+
+
+def _validation(message, operation):
+    return client_error('ValidationException', message, operation)
+
+
+# -- sizes and capacity -------------------------------------------------------
+
+def _value_size(value):
+    kind = dynamo_type(value)
+    if kind == 'S':
+        return len(value.encode('utf-8'))
+    if kind == 'N':
+        digits = len(Decimal(value).normalize().as_tuple().digits)
+        return (digits + 1) // 2 + 1
+    if kind == 'B':
+        return len(expressions._raw(value))
+    if kind in ('BOOL', 'NULL'):
+        return 1
+    if kind in ('SS', 'NS', 'BS'):
+        return sum(_value_size(element) for element in value)
+    if kind == 'L':
+        return 3 + sum(1 + _value_size(element) for element in value)
+    return 3 + sum(1 + len(name.encode('utf-8')) + _value_size(element) for name, element in value.items())
+
+
+def item_size(item):
+    """Tamaño aproximado de un item según las reglas de DynamoDB (bytes)."""
+    if not item:
+        return 0
+    return sum(len(name.encode('utf-8')) + _value_size(value) for name, value in item.items())
+
+
+def _wire_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    return str(value)
+
+
+def wire_size(payload):
+    """Bytes aproximados de una petición/respuesta serializada a JSON."""
+    return len(json.dumps(payload, default=_wire_default, separators=(',', ':')).encode('utf-8'))
+
+
+def read_units(size, consistent=False):
+    units = max(1, math.ceil(size / 4096))
+    return float(units) if consistent else units / 2
+
+
+def write_units(size):
+    return float(max(1, math.ceil(size / 1024)))
+
+
+# -- tables -------------------------------------------------------------------
+
+def _sort_value(value):
+    return expressions._raw(value)
+
+
+class _Index:
+    """GSI con proyección ALL: partición -> lista ordenada de (sk, pk_tabla, sk_tabla)."""
+
+    def __init__(self, name, partition_key, sort_key=None):
+        self.name = name
+        self.partition_key = partition_key
+        self.sort_key = sort_key
+        self.partitions = defaultdict(list)
+
+    def entry(self, item, table_key):
+        pk = item.get(self.partition_key, MISSING)
+        sk = item.get(self.sort_key, MISSING) if self.sort_key else None
+        if pk is MISSING or sk is MISSING:
+            return None
+        return _sort_value(pk), (_sort_value(sk), table_key[0], table_key[1])
+
+    def add(self, entry):
+        if entry:
+            bisect.insort(self.partitions[entry[0]], entry[1])
+
+    def remove(self, entry):
+        if not entry:
+            return
+        entries = self.partitions.get(entry[0], [])
+        position = bisect.bisect_left(entries, entry[1])
+        if position < len(entries) and entries[position] == entry[1]:
+            del entries[position]
+            if not entries:
+                del self.partitions[entry[0]]
+
+
+class _Table:
+    def __init__(self, name, partition_key, sort_key=None, indexes=(), attribute_types=None):
+        self.name = name
+        self.partition_key = partition_key
+        self.sort_key = sort_key
+        self.attribute_types = dict(attribute_types or {})
+        self.indexes = {}
+        for index in indexes:
+            self.indexes[index['name']] = _Index(index['name'], index['partition_key'], index.get('sort_key'))
+        # partition value -> {'keys': sorted sort-key values, 'items': {sort value: item}}
+        self.partitions = {}
+        self.item_count = 0
+        self.version = 0
+        self._scan_order = None
+        # Called with (old, new) on every write when the table has a stream
+        self.on_change = None
+
+    @property
+    def key_attributes(self):
+        names = [self.partition_key, self.sort_key]
+        for index in self.indexes.values():
+            names.extend([index.partition_key, index.sort_key])
+        return {name for name in names if name}
+
+    def key_schema(self):
+        schema = [{'AttributeName': self.partition_key, 'KeyType': 'HASH'}]
+        if self.sort_key:
+            schema.append({'AttributeName': self.sort_key, 'KeyType': 'RANGE'})
+        return schema
+
+    def check_key_types(self, item, operation):
+        for name in self.key_attributes:
+            value = item.get(name, MISSING)
+            if value is MISSING:
+                continue
+            expected = self.attribute_types.get(name, 'S')
+            if dynamo_type(value) != expected:
+                raise _validation(
+                    f"One or more parameter values were invalid: Type mismatch for key {name} "
+                    f"expected: {expected} actual: {dynamo_type(value)}", operation)
+            if expected == 'S' and value == '':
+                raise _validation(
+                    f"One or more parameter values are not valid. The AttributeValue for a key attribute "
+                    f"cannot contain an empty string value. Key: {name}", operation)
+
+    def key_of(self, key, operation):
+        names = [self.partition_key] + ([self.sort_key] if self.sort_key else [])
+        if any(name not in key for name in names) or len(key) != len(names):
+            raise _validation("The provided key element does not match the schema", operation)
+        self.check_key_types({name: key[name] for name in names}, operation)
+        return _sort_value(key[self.partition_key]), (_sort_value(key[self.sort_key]) if self.sort_key else None)
+
+    def item_key(self, item, operation):
+        for name in (self.partition_key, self.sort_key):
+            if name and name not in item:
+                raise _validation(f"One or more parameter values were invalid: Missing the key {name} in the item", operation)
+        return self.key_of(self.key_dict(item), operation)
+
+    def key_dict(self, item):
+        key = {self.partition_key: item[self.partition_key]}
+        if self.sort_key:
+            key[self.sort_key] = item[self.sort_key]
+        return key
+
+    def get(self, table_key):
+        partition = self.partitions.get(table_key[0])
+        return partition['items'].get(table_key[1]) if partition else None
+
+    def put(self, table_key, item):
+        old = self.delete(table_key, _bump=False)
+        partition = self.partitions.setdefault(table_key[0], {'keys': [], 'items': {}})
+        if self.sort_key:
+            bisect.insort(partition['keys'], table_key[1])
+        else:
+            partition['keys'] = [None]
+        partition['items'][table_key[1]] = item
+        self.item_count += 1
+        for index in self.indexes.values():
+            index.add(index.entry(item, table_key))
+        self._changed()
+        if self.on_change:
+            self.on_change(old, item)
+        return old
+
+    def delete(self, table_key, _bump=True):
+        partition = self.partitions.get(table_key[0])
+        if not partition or table_key[1] not in partition['items']:
+            return None
+        old = partition['items'].pop(table_key[1])
+        if self.sort_key:
+            keys = partition['keys']
+            del keys[bisect.bisect_left(keys, table_key[1])]
+        if not partition['items']:
+            del self.partitions[table_key[0]]
+        self.item_count -= 1
+        for index in self.indexes.values():
+            index.remove(index.entry(old, table_key))
+        if _bump:
+            self._changed()
+            if self.on_change:
+                self.on_change(old, None)
+        return old
+
+    def _changed(self):
+        self.version += 1
+        self._scan_order = None
+
+    def scan_order(self):
+        """Orden estable de scan: particiones por hash (como DynamoDB), luego clave de orden."""
+        if self._scan_order is None:
+            order = []
+            for pk in sorted(self.partitions, key=lambda v: (zlib.crc32(repr(v).encode()), repr(v))):
+                order.extend((pk, sk) for sk in self.partitions[pk]['keys'])
+            self._scan_order = (order, {key: position for position, key in enumerate(order)})
+        return self._scan_order
+
+
+def segment_of(partition_value, total_segments):
+    return zlib.crc32(repr(partition_value).encode()) % total_segments
+
+
+def stream_arn(table_name):
+    """ARN local del stream de una tabla (el mismo en cada corrida)."""
+    return f"arn:aws:dynamodb:{REGION}:{ACCOUNT_ID}:table/{table_name}/stream/local"
+
+
+class _StreamLane:
+    """Cola de registros de un stream que entrega un hilo, en orden de emisión."""
+
+    def __init__(self):
+        self.queue = deque()    # (sequence, record)
+        self.delivering = None  # first sequence of the batch being delivered
+        self.thread = None
+
+    def oldest(self):
+        """Secuencia más antigua sin entregar (infinito si no hay)."""
+        if self.delivering is not None:
+            return self.delivering
+        return self.queue[0][0] if self.queue else math.inf
+
+
+# -- backend ------------------------------------------------------------------
+
+class LocalDynamoDB:
+    """Conjunto de tablas en memoria con la semántica de DynamoDB que usa el repo."""
+
+    def __init__(self, latency_ms=0.0, op_latency_ms=None, jitter=0.0, seed=None, measure_bytes=False,
+                 transaction_ms=0.0):
+        self.latency_ms = latency_ms
+        self.transaction_ms = transaction_ms
+        self.op_latency_ms = dict(op_latency_ms or {})
+        self.jitter = jitter
+        self.measure_bytes = measure_bytes
+        self._random = random.Random(seed)
+        self._tables = {}
+        self._lock = threading.RLock()
+        self._calls = Counter()
+        self._capacity = defaultdict(lambda: {'read': 0.0, 'write': 0.0})
+        # WCU per partition key value: {'<tabla>' | '<tabla>/<gsi>': {partición: unidades}}
+        self._partitions = defaultdict(lambda: defaultdict(float))
+        # Items held by a transaction still inside its transaction_ms window
+        self._in_flight = Counter()
+        self._bytes = defaultdict(lambda: {'request': 0, 'response': 0})
+        # DynamoDB Streams: table -> (stream ARN, view type); records wait in the lanes of their stream
+        self._streams = {}
+        self._subscribers = defaultdict(list)  # stream ARN -> [(listener, batch size)]
+        self._lanes = {}                       # stream ARN -> [_StreamLane]
+        self._stream_cond = threading.Condition()
+        self._stream_sequence = 0              # last record queued
+        self._stream_writer = threading.local()
+        self._closing = False
+        self.client = LocalClient(self)
+        self.resource = LocalResource(self)
+
+    # -- setup ------------------------------------------------------------
+    @classmethod
+    def from_schemas(cls, schemas_dir=SCHEMAS_DIR, table_names=None, **kwargs):
+        """Crea una tabla por cada esquema con bloque `x-dynamodb`.
+
+        El nombre de la tabla es `table_names[<archivo>]`, la variable de
+        entorno `TABLE_<ARCHIVO>` o el nombre del archivo, en ese orden.
+        """
+        backend = cls(**kwargs)
+        for path in sorted(Path(schemas_dir).glob("*.json")):
+            schema = json.loads(path.read_text(encoding="utf-8"))
+            spec = schema.get("x-dynamodb")
+            if not spec:
+                continue
+            name = (table_names or {}).get(path.stem) or os.environ.get(f"TABLE_{path.stem.upper()}") or path.stem
+            attribute_types = {
+                attr: _SCHEMA_TYPES[prop['type']]
+                for attr, prop in schema.get('properties', {}).items()
+                if isinstance(prop.get('type'), str) and prop['type'] in _SCHEMA_TYPES
+            }
+            backend.create_table(name, spec['partition_key'], spec.get('sort_key'),
+                                 indexes=spec.get('global_secondary_indexes', []),
+                                 attribute_types=attribute_types, stream=spec.get('stream'))
+        return backend
+
+    def create_table(self, name, partition_key, sort_key=None, indexes=(), attribute_types=None, stream=None):
+        """Crea la tabla; `stream` es el StreamViewType si tiene DynamoDB Streams."""
+        table = _Table(name, partition_key, sort_key, indexes, attribute_types)
+        with self._lock:
+            self._tables[name] = table
+            if stream:
+                self._streams[name] = (stream_arn(name), stream)
+                table.on_change = functools.partial(self._emit, table)
+        return self.resource.Table(name)
+
+    def table_names(self):
+        return list(self._tables)
+
+    def seed(self, table_name, items):
+        """Carga items sin latencia ni contabilidad de capacidad (datos iniciales)."""
+        table = self._table(table_name, 'BatchWriteItem')
+        with self._lock:
+            for item in items:
+                item = normalize_item(item)
+                table.check_key_types(item, 'BatchWriteItem')
+                table.put(table.item_key(item, 'BatchWriteItem'), item)
+
+    # -- streams ----------------------------------------------------------
+    def stream_arn(self, table_name):
+        """ARN del stream de la tabla o None si no tiene."""
+        return self._streams.get(table_name, (None, None))[0]
+
+    def subscribe(self, arn, listener, batch_size=STREAM_BATCH_SIZE, parallelization=1):
+        """Entrega a `listener` los registros del stream `arn` en lotes (como una event source mapping).
+
+        Con `parallelization` (ParallelizationFactor) hay tantos hilos de
+        entrega, cada uno con las claves que le tocan por hash: los registros
+        de un mismo item siguen en orden. Solo se emiten registros mientras
+        el stream tiene suscriptores; un lote que falla se descarta con un
+        aviso. Retorna una función que cancela la suscripción.
+        """
+        if arn not in {stream for stream, _ in self._streams.values()}:
+            raise client_error('ResourceNotFoundException', f'Requested resource not found: Stream: {arn} not found',
+                               'DescribeStream')
+        subscription = (listener, batch_size)
+        with self._stream_cond:
+            self._closing = False
+            self._subscribers[arn].append(subscription)
+            lanes = self._lanes.setdefault(arn, [])
+            while len(lanes) < parallelization:
+                lane = _StreamLane()
+                lane.thread = threading.Thread(target=self._dispatch, args=(arn, lane), daemon=True,
+                                               name=f'dynamodb-streams-{len(lanes)}')
+                lanes.append(lane)
+                lane.thread.start()
+
+        def unsubscribe():
+            with self._stream_cond:
+                if subscription in self._subscribers.get(arn, []):
+                    self._subscribers[arn].remove(subscription)
+
+        return unsubscribe
+
+    def flush_streams(self, all_threads=False, timeout=STREAM_FLUSH_TIMEOUT):
+        """Espera la entrega de los registros que emitió este hilo (o todos). False si vence el plazo."""
+        with self._stream_cond:
+            lanes = [lane for lanes in self._lanes.values() for lane in lanes]
+            if any(lane.thread is threading.current_thread() for lane in lanes):
+                return True  # a listener writing to a stream cannot wait for itself
+            target = self._stream_sequence if all_threads else getattr(self._stream_writer, 'sequence', 0)
+            return self._stream_cond.wait_for(
+                lambda: self._closing or all(lane.oldest() > target for lane in lanes), timeout)
+
+    def close_streams(self):
+        """Detiene los hilos que entregan los registros y descarta los pendientes."""
+        with self._stream_cond:
+            lanes = [lane for lanes in self._lanes.values() for lane in lanes]
+            self._closing = True
+            self._subscribers.clear()
+            self._lanes.clear()
+            self._stream_cond.notify_all()
+        for lane in lanes:
+            if lane.thread is not threading.current_thread():
+                lane.thread.join(timeout=STREAM_FLUSH_TIMEOUT)
+
+    def _emit(self, table, old, new):
+        arn, view = self._streams[table.name]
+        lanes = self._lanes.get(arn)
+        # DynamoDB skips writes that leave the item unchanged
+        if not lanes or old == new:
+            return
+        item = new if new is not None else old
+        event_name = 'INSERT' if old is None else 'REMOVE' if new is None else 'MODIFY'
+        data = {
+            'ApproximateCreationDateTime': int(time.time()),
+            'Keys': {name: expressions.serialize(value) for name, value in table.key_dict(item).items()},
+            'SizeBytes': item_size(item),
+            'StreamViewType': view,
+        }
+        if new is not None and view in ('NEW_IMAGE', 'NEW_AND_OLD_IMAGES'):
+            data['NewImage'] = {name: expressions.serialize(value) for name, value in new.items()}
+        if old is not None and view in ('OLD_IMAGE', 'NEW_AND_OLD_IMAGES'):
+            data['OldImage'] = {name: expressions.serialize(value) for name, value in old.items()}
+        lane = lanes[segment_of(_sort_value(item[table.partition_key]), len(lanes))]
+        with self._stream_cond:
+            self._stream_sequence += 1
+            data['SequenceNumber'] = str(self._stream_sequence)
+            lane.queue.append((self._stream_sequence, {
+                'eventID': uuid.uuid4().hex,
+                'eventName': event_name,
+                'eventVersion': '1.1',
+                'eventSource': 'aws:dynamodb',
+                'awsRegion': REGION,
+                'dynamodb': data,
+                'eventSourceARN': arn,
+            }))
+            self._stream_writer.sequence = self._stream_sequence
+            self._stream_cond.notify_all()
+
+    def _dispatch(self, arn, lane):
+        while True:
+            with self._stream_cond:
+                self._stream_cond.wait_for(lambda: lane.queue or self._closing)
+                if self._closing:
+                    return
+                subscribers = list(self._subscribers.get(arn, []))
+                limit = min((size for _, size in subscribers), default=STREAM_BATCH_SIZE)
+                batch = [lane.queue.popleft() for _ in range(min(limit, len(lane.queue)))]
+                lane.delivering = batch[0][0]
+            records = [record for _, record in batch]
+            for listener, _ in subscribers:
+                try:
+                    listener(copy.deepcopy(records))
+                except Exception as exc:
+                    print(f"⚠️ lote de {len(records)} registros de {arn} falló: {exc!r}")
+            with self._stream_cond:
+                lane.delivering = None
+                self._stream_cond.notify_all()
+
+    # -- stats ------------------------------------------------------------
+    def stats(self):
+        """Llamadas por operación y RCU/WCU consumidas por tabla desde el último reset.
+
+        `partitions` reparte las WCU por valor de clave de partición, de la
+        tabla (`<tabla>`) y de cada GSI (`<tabla>/<gsi>`): muestra las
+        particiones calientes. Con `measure_bytes`, incluye además los bytes (aproximados, en JSON)
+        de cada petición y respuesta por operación.
+        """
+        with self._lock:
+            stats = {
+                'calls': dict(self._calls),
+                'capacity': {name: dict(units) for name, units in self._capacity.items()},
+                'partitions': {name: dict(units) for name, units in self._partitions.items()},
+            }
+            if self.measure_bytes:
+                stats['bytes'] = {operation: dict(sizes) for operation, sizes in self._bytes.items()}
+            return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self._calls.clear()
+            self._capacity.clear()
+            self._partitions.clear()
+            self._bytes.clear()
+
+    def _call(self, operation, **params):
+        """Punto de entrada de las fachadas (cliente, recurso y tabla)."""
+        meta = self.client.meta
+        result = meta.events.call(meta.service_model, hooks.operation_name(operation),
+                                  lambda: getattr(self, operation)(**params), params)
+        if self.measure_bytes:
+            request, response = wire_size(params), wire_size(result)
+            with self._lock:
+                sizes = self._bytes[operation]
+                sizes['request'] += request
+                sizes['response'] += response
+        return result
+
+    # -- internals --------------------------------------------------------
+    def _begin(self, operation, params):
+        unknown = set(params) - _OPERATIONS[operation]
+        if unknown:
+            raise ParamValidationError(report=f"Unknown parameter in input: \"{sorted(unknown)[0]}\", "
+                                              f"must be one of: {', '.join(sorted(_OPERATIONS[operation]))}")
+        delay = self.op_latency_ms.get(operation, self.latency_ms)
+        if delay:
+            if self.jitter:
+                delay *= self._random.uniform(1 - self.jitter, 1 + self.jitter)
+            time.sleep(delay / 1000.0)
+        with self._lock:
+            self._calls[operation] += 1
+
+    def _table(self, name, operation):
+        table = self._tables.get(name)
+        if table is None:
+            raise client_error('ResourceNotFoundException', 'Requested resource not found', operation)
+        return table
+
+    def _charge(self, table_name, read=0.0, write=0.0):
+        self._capacity[table_name]['read'] += read
+        self._capacity[table_name]['write'] += write
+
+    @staticmethod
+    def _consumed(mode, table_name, units, kind, index_units=None):
+        if mode not in ('TOTAL', 'INDEXES'):
+            return None
+        total = units + sum((index_units or {}).values())
+        consumed = {'TableName': table_name, 'CapacityUnits': total,
+                    f'{kind}CapacityUnits': total}
+        if mode == 'INDEXES':
+            consumed['Table'] = {'CapacityUnits': units}
+            if index_units:
+                consumed['GlobalSecondaryIndexes'] = {name: {'CapacityUnits': u} for name, u in index_units.items()}
+        return consumed
+
+    def _write_units(self, table, table_key, old, new, factor=1):
+        """(unidades de tabla, {gsi: unidades}) de escribir `new` sobre `old`.
+
+        Anota además las unidades en cada partición tocada (`factor` = 2 en transacciones).
+        """
+        size = max(item_size(old), item_size(new))
+        index_units = {}
+        for index in table.indexes.values():
+            before = index.entry(old, table_key) if old else None
+            after = index.entry(new, table_key) if new else None
+            if before is None and after is None:
+                continue
+            writes = 2 if before and after and before[0] != after[0] else 1
+            index_units[index.name] = write_units(size) * writes
+            for entry in {before[0] if before else None, after[0] if after else None} - {None}:
+                self._partitions[f"{table.name}/{index.name}"][str(entry)] += factor * write_units(size)
+        self._partitions[table.name][str(table_key[0])] += factor * write_units(size)
+        return write_units(size), index_units
+
+    def _check(self, ctx, condition, item, operation, on_failure=None):
+        if condition is None:
+            return
+        node = ctx.condition(condition)
+        if not expressions.evaluate(node, item or {}):
+            extra = {}
+            if on_failure == 'ALL_OLD' and item:
+                extra['Item'] = {name: expressions.serialize(value) for name, value in item.items()}
+            raise client_error('ConditionalCheckFailedException', 'The conditional request failed', operation, **extra)
+
+    # -- single item operations --------------------------------------------
+    def get_item(self, **params):
+        self._begin('GetItem', params)
+        with self._lock:
+            table = self._table(params.get('TableName'), 'GetItem')
+            try:
+                ctx = Expressions(params.get('ExpressionAttributeNames'))
+                projection = ctx.projection(params['ProjectionExpression']) if params.get('ProjectionExpression') else None
+                ctx.check_unused()
+            except ExpressionError as e:
+                raise _validation(str(e), 'GetItem')
+            table_key = table.key_of(normalize_item(params.get('Key') or {}), 'GetItem')
+            item = table.get(table_key)
+            units = read_units(item_size(item), params.get('ConsistentRead', False))
+            self._charge(table.name, read=units)
+            result = {}
+            if item is not None:
+                result['Item'] = expressions.project(item, projection) if projection else copy.deepcopy(item)
+            consumed = self._consumed(params.get('ReturnConsumedCapacity'), table.name, units, 'Read')
+            if consumed:
+                result['ConsumedCapacity'] = consumed
+            return result
+
+    def put_item(self, **params):
+        self._begin('PutItem', params)
+        with self._lock:
+            table = self._table(params.get('TableName'), 'PutItem')
+            item = normalize_item(params.get('Item') or {})
+            table.check_key_types(item, 'PutItem')
+            table_key = table.item_key(item, 'PutItem')
+            old = table.get(table_key)
+            try:
+                ctx = Expressions(params.get('ExpressionAttributeNames'), params.get('ExpressionAttributeValues'))
+                self._check(ctx, params.get('ConditionExpression'), old, 'PutItem',
+                            params.get('ReturnValuesOnConditionCheckFailure'))
+                ctx.check_unused()
+            except ExpressionError as e:
+                raise _validation(str(e), 'PutItem')
+            table.put(table_key, item)
+            units, index_units = self._write_units(table, table_key, old, item)
+            self._charge(table.name, write=units + sum(index_units.values()))
+            result = {}
+            if params.get('ReturnValues') == 'ALL_OLD' and old:
+                result['Attributes'] = copy.deepcopy(old)
+            consumed = self._consumed(params.get('ReturnConsumedCapacity'), table.name, units, 'Write', index_units)
+            if consumed:
+                result['ConsumedCapacity'] = consumed
+            return result
+
+    def update_item(self, **params):
+        self._begin('UpdateItem', params)
+        with self._lock:
+            table = self._table(params.get('TableName'), 'UpdateItem')
+            key = normalize_item(params.get('Key') or {})
+            table_key = table.key_of(key, 'UpdateItem')
+            old = table.get(table_key)
+            try:
+                ctx = Expressions(params.get('ExpressionAttributeNames'), params.get('ExpressionAttributeValues'))
+                clauses = ctx.update(params['UpdateExpression']) if params.get('UpdateExpression') else {}
+                self._check(ctx, params.get('ConditionExpression'), old, 'UpdateItem',
+                            params.get('ReturnValuesOnConditionCheckFailure'))
+                ctx.check_unused()
+                base = old if old is not None else copy.deepcopy(key)
+                new, touched = expressions.apply_update(base, clauses)
+            except ExpressionError as e:
+                raise _validation(str(e), 'UpdateItem')
+            for name in touched & set(table.key_dict(key)):
+                raise _validation(f"One or more parameter values were invalid: Cannot update attribute {name}. "
+                                  f"This attribute is part of the key", 'UpdateItem')
+            table.check_key_types(new, 'UpdateItem')
+            table.put(table_key, new)
+            units, index_units = self._write_units(table, table_key, old, new)
+            self._charge(table.name, write=units + sum(index_units.values()))
+
+            result = {}
+            mode = params.get('ReturnValues', 'NONE')
+            if mode == 'ALL_NEW':
+                result['Attributes'] = copy.deepcopy(new)
+            elif mode == 'ALL_OLD' and old:
+                result['Attributes'] = copy.deepcopy(old)
+            elif mode == 'UPDATED_NEW':
+                result['Attributes'] = {name: copy.deepcopy(new[name]) for name in touched if name in new}
+            elif mode == 'UPDATED_OLD' and old:
+                result['Attributes'] = {name: copy.deepcopy(old[name]) for name in touched if name in old}
+            consumed = self._consumed(params.get('ReturnConsumedCapacity'), table.name, units, 'Write', index_units)
+            if consumed:
+                result['ConsumedCapacity'] = consumed
+            return result
+
+    def delete_item(self, **params):
+        self._begin('DeleteItem', params)
+        with self._lock:
+            table = self._table(params.get('TableName'), 'DeleteItem')
+            table_key = table.key_of(normalize_item(params.get('Key') or {}), 'DeleteItem')
+            old = table.get(table_key)
+            try:
+                ctx = Expressions(params.get('ExpressionAttributeNames'), params.get('ExpressionAttributeValues'))
+                self._check(ctx, params.get('ConditionExpression'), old, 'DeleteItem',
+                            params.get('ReturnValuesOnConditionCheckFailure'))
+                ctx.check_unused()
+            except ExpressionError as e:
+                raise _validation(str(e), 'DeleteItem')
+            table.delete(table_key)
+            units, index_units = self._write_units(table, table_key, old, None)
+            self._charge(table.name, write=units + sum(index_units.values()))
+            result = {}
+            if params.get('ReturnValues') == 'ALL_OLD' and old:
+                result['Attributes'] = copy.deepcopy(old)
+            consumed = self._consumed(params.get('ReturnConsumedCapacity'), table.name, units, 'Write', index_units)
+            if consumed:
+                result['ConsumedCapacity'] = consumed
+            return result
+
+    # -- query / scan -----------------------------------------------------
+    def query(self, **params):
+        self._begin('Query', params)
+        with self._lock:
+            table = self._table(params.get('TableName'), 'Query')
+            index = self._index(table, params, 'Query')
+            pk_name = index.partition_key if index else table.partition_key
+            sk_name = index.sort_key if index else table.sort_key
+            try:
+                ctx = Expressions(params.get('ExpressionAttributeNames'), params.get('ExpressionAttributeValues'))
+                if params.get('KeyConditionExpression') is None:
+                    raise ExpressionError("Either the KeyConditions or KeyConditionExpression parameter must be specified in the request.")
+                key_node = ctx.condition(params['KeyConditionExpression'], is_key_condition=True)
+                filter_node = ctx.condition(params['FilterExpression']) if params.get('FilterExpression') is not None else None
+                projection = ctx.projection(params['ProjectionExpression']) if params.get('ProjectionExpression') else None
+                ctx.check_unused()
+            except ExpressionError as e:
+                raise _validation(str(e), 'Query')
+
+            used = {path[0] for path in expressions.paths_in(key_node)}
+            if not used <= {pk_name, sk_name} or len(used) > 2:
+                raise _validation("Query key condition not supported", 'Query')
+            pk_value = _partition_value(key_node, pk_name)
+            if pk_value is MISSING:
+                raise _validation("Query condition missed key schema element: " + pk_name, 'Query')
+
+            forward = params.get('ScanIndexForward', True)
+            start = params.get('ExclusiveStartKey')
+            if index:
+                candidates = self._index_candidates(table, index, _sort_value(pk_value), forward, start)
+            else:
+                candidates = self._table_candidates(table, _sort_value(pk_value), forward, start)
+
+            matched = (item for item in candidates if expressions.evaluate(key_node, item))
+            return self._page(table, index, matched, filter_node, projection, params, 'Query')
+
+    def scan(self, **params):
+        self._begin('Scan', params)
+        with self._lock:
+            table = self._table(params.get('TableName'), 'Scan')
+            index = self._index(table, params, 'Scan')
+            try:
+                ctx = Expressions(params.get('ExpressionAttributeNames'), params.get('ExpressionAttributeValues'))
+                filter_node = ctx.condition(params['FilterExpression']) if params.get('FilterExpression') is not None else None
+                projection = ctx.projection(params['ProjectionExpression']) if params.get('ProjectionExpression') else None
+                ctx.check_unused()
+            except ExpressionError as e:
+                raise _validation(str(e), 'Scan')
+
+            segment, total = params.get('Segment'), params.get('TotalSegments')
+            if (segment is None) != (total is None) or (total is not None and not 0 <= segment < total):
+                raise _validation("The Segment parameter is required but was not present in the request when parameter TotalSegments is present", 'Scan')
+
+            return self._page(table, index, self._scan_candidates(table, index, params.get('ExclusiveStartKey'), segment, total),
+                              filter_node, projection, params, 'Scan')
+
+    def _index(self, table, params, operation):
+        name = params.get('IndexName')
+        if not name:
+            return None
+        index = table.indexes.get(name)
+        if index is None:
+            raise _validation(f"The table does not have the specified index: {name}", operation)
+        if params.get('ConsistentRead'):
+            raise _validation("Consistent reads are not supported on global secondary indexes", operation)
+        return index
+
+    def _table_candidates(self, table, pk, forward, start):
+        partition = table.partitions.get(pk)
+        if not partition:
+            return
+        keys = partition['keys']
+        if start:
+            sk = table.key_of(normalize_item(start), 'Query')[1]
+            position = bisect.bisect_right(keys, sk) if forward else bisect.bisect_left(keys, sk)
+        else:
+            position = 0 if forward else len(keys)
+        ordered = keys[position:] if forward else reversed(keys[:position])
+        for sk in list(ordered):
+            yield partition['items'][sk]
+
+    def _index_candidates(self, table, index, pk, forward, start):
+        entries = index.partitions.get(pk, [])
+        if start:
+            start = normalize_item(start)
+            table_key = table.key_of(table.key_dict(start), 'Query')
+            marker = (_sort_value(start[index.sort_key]) if index.sort_key else None, table_key[0], table_key[1])
+            position = bisect.bisect_right(entries, marker) if forward else bisect.bisect_left(entries, marker)
+        else:
+            position = 0 if forward else len(entries)
+        ordered = entries[position:] if forward else reversed(entries[:position])
+        for _, tpk, tsk in list(ordered):
+            yield table.get((tpk, tsk))
+
+    def _scan_candidates(self, table, index, start, segment, total):
+        if index:
+            for pk in sorted(index.partitions, key=lambda v: (zlib.crc32(repr(v).encode()), repr(v))):
+                if total and segment_of(pk, total) != segment:
+                    continue
+                for _, tpk, tsk in list(index.partitions[pk]):
+                    yield table.get((tpk, tsk))
+            return
+
+        order, positions = table.scan_order()
+        position = 0
+        if start:
+            position = positions.get(table.key_of(normalize_item(start), 'Scan'), -1) + 1
+        for pk, sk in order[position:]:
+            if total and segment_of(pk, total) != segment:
+                continue
+            yield table.partitions[pk]['items'][sk]
+
+    def _page(self, table, index, candidates, filter_node, projection, params, operation):
+        limit = params.get('Limit')
+        if limit is not None and limit < 1:
+            raise _validation("Limit must be greater than or equal to 1", operation)
+
+        items, evaluated, scanned_bytes, last = [], 0, 0, None
+        exhausted = True
+        for item in candidates:
+            if limit is not None and evaluated >= limit or scanned_bytes >= PAGE_SIZE_LIMIT:
+                exhausted = False
+                break
+            evaluated += 1
+            scanned_bytes += item_size(item)
+            last = item
+            if filter_node is None or expressions.evaluate(filter_node, item):
+                items.append(item)
+
+        units = read_units(scanned_bytes, params.get('ConsistentRead', False))
+        self._charge(table.name, read=units)
+
+        result = {'Count': len(items), 'ScannedCount': evaluated}
+        if params.get('Select') != 'COUNT':
+            result['Items'] = [expressions.project(i, projection) if projection else copy.deepcopy(i) for i in items]
+        if not exhausted and last is not None:
+            key = table.key_dict(last)
+            if index:
+                key[index.partition_key] = last[index.partition_key]
+                if index.sort_key:
+                    key[index.sort_key] = last[index.sort_key]
+            result['LastEvaluatedKey'] = copy.deepcopy(key)
+        if index:
+            consumed = self._consumed(params.get('ReturnConsumedCapacity'), table.name, 0.0, 'Read', {index.name: units})
+        else:
+            consumed = self._consumed(params.get('ReturnConsumedCapacity'), table.name, units, 'Read')
+        if consumed:
+            result['ConsumedCapacity'] = consumed
+        return result
+
+    # -- batch ------------------------------------------------------------
+    def batch_get_item(self, **params):
+        self._begin('BatchGetItem', params)
+        request = params.get('RequestItems') or {}
+        if sum(len(spec.get('Keys', [])) for spec in request.values()) > MAX_BATCH_GET:
+            raise _validation("Too many items requested for the BatchGetItem call", 'BatchGetItem')
+        with self._lock:
+            responses, consumed = {}, []
+            for table_name, spec in request.items():
+                table = self._table(table_name, 'BatchGetItem')
+                try:
+                    ctx = Expressions(spec.get('ExpressionAttributeNames'))
+                    projection = ctx.projection(spec['ProjectionExpression']) if spec.get('ProjectionExpression') else None
+                    ctx.check_unused()
+                except ExpressionError as e:
+                    raise _validation(str(e), 'BatchGetItem')
+                seen, found, units = set(), [], 0.0
+                for key in spec.get('Keys', []):
+                    table_key = table.key_of(normalize_item(key), 'BatchGetItem')
+                    if table_key in seen:
+                        raise _validation("Provided list of item keys contains duplicates", 'BatchGetItem')
+                    seen.add(table_key)
+                    item = table.get(table_key)
+                    units += read_units(item_size(item), spec.get('ConsistentRead', False))
+                    if item is not None:
+                        found.append(expressions.project(item, projection) if projection else copy.deepcopy(item))
+                self._charge(table.name, read=units)
+                responses[table_name] = found
+                entry = self._consumed(params.get('ReturnConsumedCapacity'), table.name, units, 'Read')
+                if entry:
+                    consumed.append(entry)
+            result = {'Responses': responses, 'UnprocessedKeys': {}}
+            if consumed:
+                result['ConsumedCapacity'] = consumed
+            return result
+
+    def batch_write_item(self, **params):
+        self._begin('BatchWriteItem', params)
+        request = params.get('RequestItems') or {}
+        if sum(len(ops) for ops in request.values()) > MAX_BATCH_WRITE:
+            raise _validation("Too many items requested for the BatchWriteItem call", 'BatchWriteItem')
+        with self._lock:
+            planned, consumed = [], []
+            for table_name, operations in request.items():
+                table = self._table(table_name, 'BatchWriteItem')
+                seen = set()
+                for operation in operations:
+                    if 'PutRequest' in operation:
+                        item = normalize_item(operation['PutRequest']['Item'])
+                        table.check_key_types(item, 'BatchWriteItem')
+                        table_key = table.item_key(item, 'BatchWriteItem')
+                    else:
+                        item = None
+                        table_key = table.key_of(normalize_item(operation['DeleteRequest']['Key']), 'BatchWriteItem')
+                    if table_key in seen:
+                        raise _validation("Provided list of item keys contains duplicates", 'BatchWriteItem')
+                    seen.add(table_key)
+                    planned.append((table, table_key, item))
+
+            totals = defaultdict(float)
+            for table, table_key, item in planned:
+                old = table.get(table_key)
+                if item is None:
+                    table.delete(table_key)
+                else:
+                    table.put(table_key, item)
+                units, index_units = self._write_units(table, table_key, old, item)
+                totals[table.name] += units + sum(index_units.values())
+            for table_name, units in totals.items():
+                self._charge(table_name, write=units)
+                entry = self._consumed(params.get('ReturnConsumedCapacity'), table_name, units, 'Write')
+                if entry:
+                    consumed.append(entry)
+            result = {'UnprocessedItems': {}}
+            if consumed:
+                result['ConsumedCapacity'] = consumed
+            return result
+
+    # -- transactions -----------------------------------------------------
+    def transact_write_items(self, **params):
+        self._begin('TransactWriteItems', params)
+        operations = params.get('TransactItems') or []
+        if not operations or len(operations) > MAX_TRANSACT_ITEMS:
+            raise _validation(f"Member must have length less than or equal to {MAX_TRANSACT_ITEMS}", 'TransactWriteItems')
+
+        with self._lock:
+            planned, reasons, failed, targets = [], [], False, set()
+            for operation in operations:
+                (kind, spec), = operation.items()
+                table = self._table(spec.get('TableName'), 'TransactWriteItems')
+                try:
+                    ctx = Expressions(spec.get('ExpressionAttributeNames'), spec.get('ExpressionAttributeValues'))
+                    if kind == 'Put':
+                        new = normalize_item(spec['Item'])
+                        table.check_key_types(new, 'TransactWriteItems')
+                        table_key = table.item_key(new, 'TransactWriteItems')
+                    else:
+                        key = normalize_item(spec['Key'])
+                        table_key = table.key_of(key, 'TransactWriteItems')
+                    if (table.name, table_key) in targets:
+                        raise _validation("Transaction request cannot include multiple operations on one item", 'TransactWriteItems')
+                    targets.add((table.name, table_key))
+                    if self._in_flight[(table.name, table_key)]:
+                        failed = True
+                        reasons.append({'Code': 'TransactionConflict',
+                                        'Message': 'Transaction is ongoing for the item'})
+                        planned.append(None)
+                        continue
+
+                    old = table.get(table_key)
+                    condition = spec.get('ConditionExpression')
+                    ok = condition is None or expressions.evaluate(ctx.condition(condition), old or {})
+                    if kind == 'Update':
+                        clauses = ctx.update(spec['UpdateExpression'])
+                        new, touched = expressions.apply_update(old if old is not None else copy.deepcopy(key), clauses)
+                        if touched & set(table.key_dict(key)):
+                            raise ExpressionError("Cannot update attribute. This attribute is part of the key")
+                        table.check_key_types(new, 'TransactWriteItems')
+                    elif kind == 'Delete':
+                        new = None
+                    elif kind == 'ConditionCheck':
+                        new = old
+                    ctx.check_unused()
+                except ExpressionError as e:
+                    raise _validation(str(e), 'TransactWriteItems')
+
+                if ok:
+                    reasons.append({'Code': 'None'})
+                else:
+                    failed = True
+                    reason = {'Code': 'ConditionalCheckFailed', 'Message': 'The conditional request failed'}
+                    if spec.get('ReturnValuesOnConditionCheckFailure') == 'ALL_OLD' and old:
+                        reason['Item'] = {name: expressions.serialize(value) for name, value in old.items()}
+                    reasons.append(reason)
+                planned.append((kind, table, table_key, old, new))
+
+            if failed:
+                codes = ', '.join(reason['Code'] for reason in reasons)
+                raise client_error('TransactionCanceledException',
+                                   f"Transaction cancelled, please refer cancellation reasons for specific reasons [{codes}]",
+                                   'TransactWriteItems', CancellationReasons=reasons)
+
+            totals = defaultdict(float)
+            for kind, table, table_key, old, new in planned:
+                if self.transaction_ms:
+                    self._in_flight[(table.name, table_key)] += 1
+                if kind == 'ConditionCheck':
+                    totals[table.name] += 2 * read_units(item_size(old), consistent=True)
+                    continue
+                if new is None:
+                    table.delete(table_key)
+                else:
+                    table.put(table_key, new)
+                units, index_units = self._write_units(table, table_key, old, new, factor=2)
+                # Transactional writes cost two write units per unit
+                totals[table.name] += 2 * (units + sum(index_units.values()))
+
+            consumed = []
+            for table_name, units in totals.items():
+                self._charge(table_name, write=units)
+                entry = self._consumed(params.get('ReturnConsumedCapacity'), table_name, units, 'Write')
+                if entry:
+                    consumed.append(entry)
+
+        if self.transaction_ms:
+            # The items stay locked until the transaction finishes committing
+            time.sleep(self.transaction_ms / 1000.0)
+            with self._lock:
+                for _, table, table_key, _, _ in planned:
+                    self._in_flight[(table.name, table_key)] -= 1
+                self._in_flight += Counter()  # drop zero counts
+        return {'ConsumedCapacity': consumed} if consumed else {}
+
+    def transact_get_items(self, **params):
+        self._begin('TransactGetItems', params)
+        operations = params.get('TransactItems') or []
+        if not operations or len(operations) > MAX_TRANSACT_ITEMS:
+            raise _validation(f"Member must have length less than or equal to {MAX_TRANSACT_ITEMS}", 'TransactGetItems')
+        with self._lock:
+            responses, totals = [], defaultdict(float)
+            for operation in operations:
+                spec = operation['Get']
+                table = self._table(spec.get('TableName'), 'TransactGetItems')
+                try:
+                    ctx = Expressions(spec.get('ExpressionAttributeNames'))
+                    projection = ctx.projection(spec['ProjectionExpression']) if spec.get('ProjectionExpression') else None
+                    ctx.check_unused()
+                except ExpressionError as e:
+                    raise _validation(str(e), 'TransactGetItems')
+                item = table.get(table.key_of(normalize_item(spec['Key']), 'TransactGetItems'))
+                totals[table.name] += 2 * read_units(item_size(item), consistent=True)
+                if item is None:
+                    responses.append({})
+                else:
+                    responses.append({'Item': expressions.project(item, projection) if projection else copy.deepcopy(item)})
+            consumed = []
+            for table_name, units in totals.items():
+                self._charge(table_name, read=units)
+                entry = self._consumed(params.get('ReturnConsumedCapacity'), table_name, units, 'Read')
+                if entry:
+                    consumed.append(entry)
+            result = {'Responses': responses}
+            if consumed:
+                result['ConsumedCapacity'] = consumed
+            return result
+
+
+def normalize_item(item):
+    """Copia de `item` con los tipos de boto3; los tipos no soportados (float) lanzan TypeError como en boto3."""
+    return {name: normalize(value) for name, value in item.items()}
+
+
+def _partition_value(node, name):
+    """Valor de `name = :v` en una KeyConditionExpression parseada."""
+    if node[0] == 'and':
+        found = _partition_value(node[1], name)
+        return found if found is not MISSING else _partition_value(node[2], name)
+    if node[0] == 'cmp' and node[1] == '=':
+        left, right = node[2], node[3]
+        if left[0] == 'path' and left[1] == (name,) and right[0] == 'value':
+            return right[1]
+        if right[0] == 'path' and right[1] == (name,) and left[0] == 'value':
+            return left[1]
+    return MISSING
+
+
+# -- boto3-shaped facades -----------------------------------------------------
+
+class LocalClient:
+    """Equivalente a `boto3.resource('dynamodb').meta.client` (acepta tipos de Python)."""
+
+    def __init__(self, backend):
+        self._backend = backend
+        self.exceptions = exceptions
+        self.meta = hooks.client_meta('DynamoDB', region_name=os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'))
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name not in _CLIENT_METHODS:
+            raise AttributeError(name)
+        return functools.partial(self._backend._call, name)
+
+
+_CLIENT_METHODS = {'get_item', 'put_item', 'update_item', 'delete_item', 'query', 'scan',
+                   'batch_get_item', 'batch_write_item', 'transact_write_items', 'transact_get_items'}
+
+
+class LocalTable:
+    """Equivalente a `dynamodb.Table(nombre)`."""
+
+    def __init__(self, backend, name):
+        self._backend = backend
+        self.name = name
+        self.table_name = name
+        self.meta = SimpleNamespace(client=backend.client)
+
+    @property
+    def key_schema(self):
+        return self._backend._table(self.name, 'DescribeTable').key_schema()
+
+    @property
+    def item_count(self):
+        return self._backend._table(self.name, 'DescribeTable').item_count
+
+    def load(self):
+        self._backend._table(self.name, 'DescribeTable')
+
+    def get_item(self, **params):
+        return self._backend._call('get_item', TableName=self.name, **params)
+
+    def put_item(self, **params):
+        return self._backend._call('put_item', TableName=self.name, **params)
+
+    def update_item(self, **params):
+        return self._backend._call('update_item', TableName=self.name, **params)
+
+    def delete_item(self, **params):
+        return self._backend._call('delete_item', TableName=self.name, **params)
+
+    def query(self, **params):
+        return self._backend._call('query', TableName=self.name, **params)
+
+    def scan(self, **params):
+        return self._backend._call('scan', TableName=self.name, **params)
+
+    def batch_writer(self, overwrite_by_pkeys=None):
+        return _BatchWriter(self._backend, self.name)
+
+
+class _BatchWriter:
+    def __init__(self, backend, table_name):
+        self._backend = backend
+        self._table_name = table_name
+        self._pending = []
+
+    def put_item(self, Item):
+        self._pending.append({'PutRequest': {'Item': Item}})
+        self._flush_if_full()
+
+    def delete_item(self, Key):
+        self._pending.append({'DeleteRequest': {'Key': Key}})
+        self._flush_if_full()
+
+    def _flush_if_full(self):
+        if len(self._pending) >= MAX_BATCH_WRITE:
+            self.flush()
+
+    def flush(self):
+        while self._pending:
+            chunk, self._pending = self._pending[:MAX_BATCH_WRITE], self._pending[MAX_BATCH_WRITE:]
+            self._backend._call('batch_write_item', RequestItems={self._table_name: chunk})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+
+class LocalResource:
+    """Equivalente a `boto3.resource('dynamodb')`."""
+
+    def __init__(self, backend):
+        self._backend = backend
+        self.meta = SimpleNamespace(client=backend.client)
+
+    def Table(self, name):
+        return LocalTable(self._backend, name)
+
+    def batch_get_item(self, **params):
+        return self._backend._call('batch_get_item', **params)
+
+    def batch_write_item(self, **params):
+        return self._backend._call('batch_write_item', **params)
+
+
+# -- installation -------------------------------------------------------------
+
+def install(backend):
+    """Hace que `boto3.resource('dynamodb')` devuelva el backend local.
+
+    Debe llamarse antes de importar los handlers que crean el recurso al
+    importarse. También reinicia los clientes perezosos y las tablas
+    memoizadas del runtime layer (`common`) si ya estaba importado.
+    Retorna una función que deshace el cambio.
+    """
+    import boto3
+
+    original = boto3.resource
+
+    def resource(service_name, *args, **kwargs):
+        if service_name == 'dynamodb':
+            return backend.resource
+        return original(service_name, *args, **kwargs)
+
+    boto3.resource = resource
+    _reset_runtime_layer()
+
+    def uninstall():
+        boto3.resource = original
+        _reset_runtime_layer()
+
+    return uninstall
+
+
+def _reset_runtime_layer():
+    common = sys.modules.get('common')
+    if common is None:
+        return
+    if hasattr(common, '_tables'):
+        common._tables.clear()
+    lazy = getattr(common, 'dynamodb', None)
+    if hasattr(lazy, '_instance'):
+        lazy._instance = None
@@ -0,0 +1,294 @@
+"""
+Entorno local completo: DynamoDB, Lambdas y Step Function en un proceso.
+
+Fija los nombres de tabla (TABLE_<ARCHIVO>), crea las tablas desde los
+esquemas, carga data-setup/example-data, emite un token opaco por rol (los
+de empleado llevan su local, `token(role, local_id)` emite uno para otro
+local) e instala los backends locales en boto3. `call()` hace de API Gateway: busca la
+ruta en los eventos http/httpApi de los serverless.yml, corre el
+authorizer TOKEN (`burger-auth-<stage>-auth`) con caché como API Gateway y
+arma el evento REST (v1) o HTTP API (v2) que espera cada handler.
+`metrics` junta los registros EMF de cada invocación (localdev.metrics) y
+`traces` sus spans por pedido (localdev.tracing). Las funciones con eventos
+`stream` (relayOutbox) reciben los registros de las tablas locales con
+stream; con `sync_streams` (por defecto) `call()` primero espera a que se
+entreguen los que escribieron las llamadas anteriores del mismo hilo, así el
+paso siguiente de un cliente ve, p. ej., el workflow que inició el outbox de
+su pedido.
+
+Uso:
+    from localdev.environment import LocalEnvironment
+    env = LocalEnvironment(latency_ms=2)
+    env.call('POST', '/pedido', role='Cliente', body={...})
+"""
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from decimal import Decimal
+from pathlib import Path
+
+from localdev import dynamodb, lambdas, stepfunctions
+from localdev.dynamodb import SCHEMAS_DIR, LocalDynamoDB
+from localdev.lambdas import ROOT, LambdaRegistry
+from localdev.metrics import MetricsCollector
+from localdev.stepfunctions import LocalStepFunctions
+from localdev.tracing import TraceCollector
+
+EXAMPLE_DATA_DIR = ROOT / "data-setup" / "example-data"
+STATE_MACHINE_NAME = "BurgerFlow-dev"
+ROLES = ("Cliente", "Cocinero", "Repartidor", "Gerente", "Admin")
+# Roles whose tokens carry the employee's local_id (login_empleado)
+EMPLOYEE_ROLES = ("Cocinero", "Repartidor")
+BACKENDS = ("dynamodb", "stepfunctions")
+AUTHORIZER_CACHE_TTL = 300  # API Gateway default for TOKEN authorizers
+
+
+def configure_environment(prefix="local", stage="dev", backends=None):
+    """Variables que los handlers leen al importarse (tablas, Step Function, región).
+
+    Solo se fijan las de los backends locales; las credenciales de mentira
+    solo si nada sale a AWS.
+    """
+    backends = BACKENDS if backends is None else backends
+    if "dynamodb" in backends:
+        for schema in sorted(SCHEMAS_DIR.glob("*.json")):
+            name = os.environ.setdefault(f"TABLE_{schema.stem.upper()}", f"{prefix}-{schema.stem}")
+            if json.loads(schema.read_text(encoding="utf-8")).get("x-dynamodb", {}).get("stream"):
+                os.environ.setdefault(f"TABLE_{schema.stem.upper()}_STREAM_ARN", dynamodb.stream_arn(name))
+    if "stepfunctions" in backends:
+        os.environ.setdefault("STATE_MACHINE_ARN",
+                              f"arn:aws:states:{lambdas.REGION}:{lambdas.ACCOUNT_ID}:stateMachine:{STATE_MACHINE_NAME}")
+    os.environ.setdefault("JWT_SECRET", "")
+    os.environ.setdefault("AWS_DEFAULT_REGION", lambdas.REGION)
+    if set(BACKENDS) <= set(backends):
+        os.environ.setdefault("AWS_ACCESS_KEY_ID", "local")
+        os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "local")
+
+
+def load_json(path):
+    # DynamoDB rejects floats: prices come in as Decimal
+    return json.loads(Path(path).read_text(encoding="utf-8"), parse_float=Decimal)
+
+
+class LocalEnvironment:
+    """Backends locales instalados y datos de ejemplo cargados.
+
+    Las Lambdas siempre corren en proceso; `backends` elige qué más es local
+    (BACKENDS). Lo que quede afuera usa AWS con las credenciales y TABLE_*
+    del entorno, p. ej. backends=("stepfunctions",) para probar contra las
+    tablas reales.
+    """
+
+    def __init__(self, latency_ms=0.0, jitter=0.0, seed=None, measure_bytes=False, stage="dev",
+                 example_data=True, stock=None, backends=BACKENDS, sync_streams=True):
+        unknown = set(backends) - set(BACKENDS)
+        if unknown:
+            raise ValueError(f"Backends desconocidos: {sorted(unknown)} (disponibles: {', '.join(BACKENDS)})")
+        configure_environment(stage=stage, backends=backends)
+        self.stage = stage
+        self.backends = tuple(backends)
+        self.sync_streams = sync_streams
+        self.registry = LambdaRegistry(ROOT, stage)
+        self.registry.apply_environment()
+        self._uninstall = [lambdas.install(self.registry)]
+
+        self.backend = self.sfn = self.state_machine_arn = None
+        if "dynamodb" in backends:
+            self.backend = LocalDynamoDB.from_schemas(latency_ms=latency_ms, jitter=jitter, seed=seed,
+                                                      measure_bytes=measure_bytes)
+        if "stepfunctions" in backends:
+            self.sfn = LocalStepFunctions(self.registry)
+            self.state_machine_arn = self.sfn.create_state_machine(
+                name=os.environ["STATE_MACHINE_ARN"].rsplit(":", 1)[-1],
+                definition=stepfunctions.DEFINITION.read_text(encoding="utf-8")
+            )["stateMachineArn"]
+
+        self.tokens = {}
+        self._local_tokens = {}
+        self._authorizer_cache = {}
+        self._lock = threading.Lock()
+        if example_data and self.backend:
+            self.seed_example_data(stock)
+
+        if self.backend:
+            self._uninstall.append(dynamodb.install(self.backend))
+        if self.sfn:
+            self._uninstall.append(stepfunctions.install(self.sfn))
+        # EMF records of the instrumented handlers (runtime layer), aggregated per function
+        self.metrics = MetricsCollector()
+        self._uninstall.append(self.metrics.install())
+        # Their spans, grouped per order (localdev.tracing)
+        self.traces = TraceCollector()
+        self._uninstall.append(self.traces.install())
+        if self.backend:
+            self.subscribe_streams()
+
+    def subscribe_streams(self):
+        """Suscribe las funciones con eventos `stream` a los streams de las tablas locales."""
+        local = {self.backend.stream_arn(name) for name in self.backend.table_names()} - {None}
+        for arn, function, batch_size, parallelization in self.registry.streams():
+            if arn in local:
+                self.backend.subscribe(arn, functools.partial(self._deliver_records, function.name), batch_size,
+                                       parallelization)
+        # Runs first on close(): no batch may be in flight once the other backends are gone
+        self._uninstall.append(self.backend.close_streams)
+
+    def _deliver_records(self, function_name, records):
+        self.registry.invoke(function_name, {"Records": records})
+
+    def table_name(self, stem):
+        return os.environ[f"TABLE_{stem.upper()}"]
+
+    def seed_example_data(self, stock=None):
+        """Carga data-setup/example-data y un token opaco por rol (ROLES)."""
+        users = {}
+        locals_by_role = {}
+        for path in sorted(EXAMPLE_DATA_DIR.glob("*.json")):
+            items = load_json(path)
+            if path.stem == "productos" and stock is not None:
+                for item in items:
+                    item["stock"] = stock
+            self.backend.seed(self.table_name(path.stem), items)
+            for item in items:
+                role = item.get("role")
+                if role and item.get("correo"):
+                    users.setdefault(role, item["correo"])
+                    if role in EMPLOYEE_ROLES and item.get("local_id"):
+                        locals_by_role.setdefault(role, item["local_id"])
+
+        self.tokens = {role: f"local-{role.lower()}" for role in ROLES}
+        self._local_tokens = {}
+        self.backend.seed(self.table_name("tokens_usuarios"), [
+            self._token_record(token, users.get(role, f"{role.lower()}@local"), role, locals_by_role.get(role))
+            for role, token in self.tokens.items()
+        ])
+
+    @staticmethod
+    def _token_record(token, user, role, local_id=None):
+        record = {"token": token, "user_id": user, "rol": role, "expires": "2999-12-31 23:59:59"}
+        if local_id:
+            record["local_id"] = local_id
+        return record
+
+    def token(self, role, local_id=None):
+        """Token de `role`; para empleados con `local_id`, uno de ese local (se crea en el primer uso)."""
+        if not local_id or role not in EMPLOYEE_ROLES:
+            return self.tokens.get(role)
+        with self._lock:
+            token = self._local_tokens.get((role, local_id))
+            if token is None:
+                token = f"local-{role.lower()}-{local_id.lower()}"
+                self.backend.seed(self.table_name("tokens_usuarios"), [
+                    self._token_record(token, f"{role.lower()}@{local_id.lower()}", role, local_id)])
+                self._local_tokens[(role, local_id)] = token
+        return token
+
+    def execution_arn(self, order_id):
+        return self.state_machine_arn.replace(":stateMachine:", ":execution:") + f":{order_id}"
+
+    def close(self):
+        while self._uninstall:
+            self._uninstall.pop()()
+
+    # -- API Gateway ---------------------------------------------------------
+    def route(self, method, path):
+        """(función, evento del serverless.yml) de la ruta, o None."""
+        path = "/" + path.split("?", 1)[0].strip("/")
+        for route_method, route_path, function, event in self.registry.routes():
+            if route_path == path and route_method in (method.upper(), "ANY", "*"):
+                return function, event
+        return None
+
+    def authorize(self, authorizer, token):
+        """Contexto del authorizer TOKEN para `token` o None si lo rechaza (cacheado como API Gateway)."""
+        key = (authorizer, token)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._authorizer_cache.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        policy = self.registry.invoke(authorizer, {
+            "type": "TOKEN",
+            "authorizationToken": f"Bearer {token}",
+            "methodArn": f"arn:aws:execute-api:{lambdas.REGION}:{lambdas.ACCOUNT_ID}:local/{self.stage}/*",
+        })
+        statements = policy.get("policyDocument", {}).get("Statement", [])
+        context = None
+        if any(statement.get("Effect") == "Allow" for statement in statements):
+            context = {"principalId": policy.get("principalId"), **(policy.get("context") or {})}
+        with self._lock:
+            self._authorizer_cache[key] = (now + AUTHORIZER_CACHE_TTL, context)
+        return context
+
+    def http_event(self, method, path, body=None, query=None, headers=None, token=None, role=None,
+                   authorizer_context=None, local_id=None):
+        """Evento de API Gateway para la ruta (v1 para `http`, v2 para `httpApi`)."""
+        function, event = self.route(method, path) or (None, {"type": "http"})
+        token = token or (self.token(role, local_id) if role else None)
+        headers = dict(headers or {})
+        present = {name.lower() for name in headers}
+        if "content-type" not in present:
+            headers["Content-Type"] = "application/json"
+        if token and "authorization" not in present:
+            headers["Authorization"] = f"Bearer {token}"
+        if body is not None and not isinstance(body, str):
+            body = json.dumps(body, default=str)
+        request_id = str(uuid.uuid4())
+        path = "/" + path.split("?", 1)[0].strip("/")
+
+        if event["type"] == "httpApi":
+            return {
+                "version": "2.0",
+                "routeKey": f"{method.upper()} {path}",
+                "rawPath": path,
+                "rawQueryString": "&".join(f"{k}={v}" for k, v in (query or {}).items()),
+                "headers": {k.lower(): v for k, v in headers.items()},
+                "queryStringParameters": query or None,
+                "requestContext": {"http": {"method": method.upper(), "path": path}, "requestId": request_id,
+                                   "stage": "$default"},
+                "body": body,
+                "isBase64Encoded": False,
+            }
+
+        request_context = {"httpMethod": method.upper(), "path": f"/{self.stage}{path}", "stage": self.stage,
+                           "requestId": request_id, "resourcePath": path}
+        if authorizer_context:
+            request_context["authorizer"] = authorizer_context
+        return {
+            "resource": path,
+            "path": path,
+            "httpMethod": method.upper(),
+            "headers": headers,
+            "queryStringParameters": query or None,
+            "pathParameters": None,
+            "requestContext": request_context,
+            "body": body,
+            "isBase64Encoded": False,
+        }
+
+    def call(self, method, path, body=None, query=None, headers=None, token=None, role=None, local_id=None):
+        """Invoca el handler de la ruta como lo haría API Gateway. Retorna la respuesta del handler.
+
+        Con `role`, usa su token; `local_id` elige el token del empleado de ese local.
+        """
+        if self.backend and self.sync_streams:
+            self.backend.flush_streams()
+        found = self.route(method, path)
+        if found is None:
+            return {"statusCode": 404, "headers": {}, "body": json.dumps({"message": "Not Found"})}
+        function, event = found
+
+        token = token or (self.token(role, local_id) if role else None)
+        context = None
+        if event.get("authorizer"):
+            context = self.authorize(event["authorizer"], token) if token else None
+            if context is None:
+                status = 401 if not token else 403
+                return {"statusCode": status, "headers": {}, "body": json.dumps({"message": "Unauthorized"})}
+
+        request = self.http_event(method, path, body, query, headers, token, authorizer_context=context)
+        return self.registry.invoke(function.name, request)
@@ -0,0 +1,599 @@
+"""
+Parser y evaluador de expresiones de DynamoDB para el backend local.
+
+Cubre condiciones (ConditionExpression, FilterExpression,
+KeyConditionExpression), UpdateExpression (SET/REMOVE/ADD/DELETE) y
+ProjectionExpression, con ExpressionAttributeNames/Values. Las condiciones de
+boto3 (`Key`/`Attr`) se convierten antes a texto con el
+ConditionExpressionBuilder de boto3, así ambas formas pasan por el mismo
+evaluador.
+"""
+import copy
+import re
+from decimal import Decimal
+
+from boto3.dynamodb.conditions import ConditionBase, ConditionExpressionBuilder
+from boto3.dynamodb.types import DYNAMODB_CONTEXT, Binary, TypeDeserializer, TypeSerializer
+
+
+class ExpressionError(ValueError):
+    """Expresión inválida; el backend la reporta como ValidationException."""
+
+
+MISSING = object()
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<name>\#[A-Za-z0-9_]+)
+      | (?P<value>:[A-Za-z0-9_]+)
+      | (?P<number>\d+)
+      | (?P<op><>|<=|>=|=|<|>|\(|\)|,|\.|\[|\]|\+|-)
+      | (?P<ident>[A-Za-z_][A-Za-z0-9_]*)
+    )""", re.VERBOSE)
+
+_COMPARATORS = ('=', '<>', '<', '<=', '>', '>=')
+_CONDITION_FUNCTIONS = ('attribute_exists', 'attribute_not_exists', 'attribute_type', 'begins_with', 'contains')
+_UPDATE_CLAUSES = ('SET', 'REMOVE', 'ADD', 'DELETE')
+
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise ExpressionError(f"Invalid expression: syntax error near '{text[pos:pos + 10]}'")
+        tokens.append((match.lastgroup, match.group(match.lastgroup)))
+        pos = match.end()
+    return tokens
+
+
+def dynamo_type(value):
+    """Tipo DynamoDB ('S', 'N', 'B', 'BOOL', 'NULL', 'SS', 'NS', 'BS', 'L', 'M') de un valor de boto3."""
+    if isinstance(value, bool):
+        return 'BOOL'
+    if value is None:
+        return 'NULL'
+    if isinstance(value, str):
+        return 'S'
+    if isinstance(value, (Decimal, int)):
+        return 'N'
+    if isinstance(value, (bytes, bytearray, Binary)):
+        return 'B'
+    if isinstance(value, (set, frozenset)):
+        element = next(iter(value), '')
+        return dynamo_type(element) + 'S'
+    if isinstance(value, list):
+        return 'L'
+    if isinstance(value, dict):
+        return 'M'
+    raise ExpressionError(f"Unsupported type: {type(value).__name__}")
+
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+def normalize(value):
+    """Valor tal como lo devolvería boto3 (int -> Decimal, etc.).
+
+    Pasa por el TypeSerializer de boto3, así los tipos que boto3 rechaza
+    (por ejemplo float) fallan aquí con el mismo TypeError.
+    """
+    return _deserializer.deserialize(_serializer.serialize(value))
+
+
+def serialize(value):
+    """Formato de bajo nivel ({'S': ...}) de un valor, como en las respuestas de error."""
+    return _serializer.serialize(value)
+
+
+def _raw(value):
+    return bytes(value.value) if isinstance(value, Binary) else value
+
+
+class Expressions:
+    """Resuelve nombres y valores de una petición y lleva registro de los usados.
+
+    DynamoDB rechaza ExpressionAttributeNames/Values que ninguna expresión
+    utiliza; `check_unused()` reproduce esa validación al final de la petición.
+    """
+
+    def __init__(self, names=None, values=None):
+        self.names = dict(names or {})
+        self.values = {key: normalize(value) for key, value in (values or {}).items()}
+        self.used_names = set()
+        self.used_values = set()
+
+    # -- boto3 conditions -------------------------------------------------
+    def text(self, expression, is_key_condition=False):
+        """Texto de la expresión; convierte objetos Key/Attr de boto3."""
+        if not isinstance(expression, ConditionBase):
+            return expression
+        built = ConditionExpressionBuilder().build_expression(expression, is_key_condition=is_key_condition)
+        # The builder numbers its placeholders from zero on every call
+        suffix = f"_{len(self.names) + len(self.values)}"
+        renamed = {}
+        for placeholder, name in built.attribute_name_placeholders.items():
+            renamed[placeholder] = placeholder + suffix
+            self.names[placeholder + suffix] = name
+        for placeholder, value in built.attribute_value_placeholders.items():
+            renamed[placeholder] = placeholder + suffix
+            self.values[placeholder + suffix] = normalize(value)
+        text = re.sub(r'[#:][A-Za-z0-9_]+', lambda m: renamed.get(m.group(0), m.group(0)), built.condition_expression)
+        return text
+
+    def name(self, placeholder):
+        if placeholder not in self.names:
+            raise ExpressionError(f"An expression attribute name used in the document path is not defined; attribute name: {placeholder}")
+        self.used_names.add(placeholder)
+        return self.names[placeholder]
+
+    def value(self, placeholder):
+        if placeholder not in self.values:
+            raise ExpressionError(f"An expression attribute value used in expression is not defined; attribute value: {placeholder}")
+        self.used_values.add(placeholder)
+        return self.values[placeholder]
+
+    def check_unused(self):
+        unused_names = set(self.names) - self.used_names
+        if unused_names:
+            raise ExpressionError(f"Value provided in ExpressionAttributeNames unused in expressions: keys: {{{', '.join(sorted(unused_names))}}}")
+        unused_values = set(self.values) - self.used_values
+        if unused_values:
+            raise ExpressionError(f"Value provided in ExpressionAttributeValues unused in expressions: keys: {{{', '.join(sorted(unused_values))}}}")
+
+    # -- parsing ----------------------------------------------------------
+    def condition(self, expression, is_key_condition=False):
+        parser = _Parser(self.text(expression, is_key_condition), self)
+        node = parser.parse_or()
+        parser.expect_end()
+        return node
+
+    def update(self, expression):
+        parser = _Parser(expression, self)
+        clauses = parser.parse_update()
+        parser.expect_end()
+        return clauses
+
+    def projection(self, expression):
+        parser = _Parser(expression, self)
+        paths = [parser.parse_path()]
+        while parser.accept(','):
+            paths.append(parser.parse_path())
+        parser.expect_end()
+        return paths
+
+
+class _Parser:
+    def __init__(self, text, context):
+        if not text or not text.strip():
+            raise ExpressionError("Invalid expression: The expression can not be empty")
+        self.tokens = _tokenize(text)
+        self.pos = 0
+        self.context = context
+
+    def peek(self, offset=0):
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def advance(self):
+        token = self.peek()
+        if token[0] is None:
+            raise ExpressionError("Invalid expression: unexpected end of expression")
+        self.pos += 1
+        return token
+
+    def accept(self, op):
+        kind, text = self.peek()
+        if kind == 'op' and text == op:
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, op):
+        if not self.accept(op):
+            raise ExpressionError(f"Invalid expression: expected '{op}' near '{self.peek()[1]}'")
+
+    def accept_keyword(self, word):
+        kind, text = self.peek()
+        if kind == 'ident' and text.upper() == word:
+            self.pos += 1
+            return True
+        return False
+
+    def expect_end(self):
+        if self.peek()[0] is not None:
+            raise ExpressionError(f"Invalid expression: syntax error near '{self.peek()[1]}'")
+
+    def _is_call(self, names):
+        kind, text = self.peek()
+        return kind == 'ident' and text.lower() in names and self.peek(1) == ('op', '(')
+
+    # -- paths and operands -----------------------------------------------
+    def _path_element(self):
+        kind, text = self.advance()
+        if kind == 'name':
+            return self.context.name(text)
+        if kind == 'ident':
+            return text
+        raise ExpressionError(f"Invalid expression: expected attribute name near '{text}'")
+
+    def parse_path(self):
+        path = [self._path_element()]
+        while True:
+            if self.accept('.'):
+                path.append(self._path_element())
+            elif self.accept('['):
+                kind, text = self.advance()
+                if kind != 'number':
+                    raise ExpressionError("Invalid expression: list index must be a number")
+                path.append(int(text))
+                self.expect(']')
+            else:
+                return tuple(path)
+
+    def parse_operand(self):
+        kind, text = self.peek()
+        if kind == 'value':
+            self.pos += 1
+            return ('value', self.context.value(text))
+        if self._is_call(('size',)):
+            self.pos += 2
+            path = self.parse_path()
+            self.expect(')')
+            return ('size', path)
+        return ('path', self.parse_path())
+
+    # -- conditions -------------------------------------------------------
+    def parse_or(self):
+        node = self.parse_and()
+        while self.accept_keyword('OR'):
+            node = ('or', node, self.parse_and())
+        return node
+
+    def parse_and(self):
+        node = self.parse_not()
+        while self.accept_keyword('AND'):
+            node = ('and', node, self.parse_not())
+        return node
+
+    def parse_not(self):
+        if self.accept_keyword('NOT'):
+            return ('not', self.parse_not())
+        return self.parse_primary()
+
+    def parse_primary(self):
+        if self.accept('('):
+            node = self.parse_or()
+            self.expect(')')
+            return node
+
+        if self._is_call(_CONDITION_FUNCTIONS):
+            function = self.advance()[1].lower()
+            self.expect('(')
+            args = [('path', self.parse_path())]
+            while self.accept(','):
+                args.append(self.parse_operand())
+            self.expect(')')
+            expected = 1 if function in ('attribute_exists', 'attribute_not_exists') else 2
+            if len(args) != expected:
+                raise ExpressionError(f"Invalid function: {function} takes {expected} arguments")
+            return ('func', function, args)
+
+        left = self.parse_operand()
+        kind, text = self.peek()
+        if kind == 'op' and text in _COMPARATORS:
+            self.pos += 1
+            return ('cmp', text, left, self.parse_operand())
+        if self.accept_keyword('BETWEEN'):
+            low = self.parse_operand()
+            if not self.accept_keyword('AND'):
+                raise ExpressionError("Invalid expression: BETWEEN requires AND")
+            return ('between', left, low, self.parse_operand())
+        if self.accept_keyword('IN'):
+            self.expect('(')
+            options = [self.parse_operand()]
+            while self.accept(','):
+                options.append(self.parse_operand())
+            self.expect(')')
+            return ('in', left, options)
+        raise ExpressionError(f"Invalid expression: syntax error near '{text}'")
+
+    # -- updates ----------------------------------------------------------
+    def parse_update(self):
+        clauses = {}
+        while self.peek()[0] is not None:
+            kind, text = self.advance()
+            clause = text.upper() if kind == 'ident' else None
+            if clause not in _UPDATE_CLAUSES:
+                raise ExpressionError(f"Invalid UpdateExpression: syntax error near '{text}'")
+            if clause in clauses:
+                raise ExpressionError(f"Invalid UpdateExpression: The \"{clause}\" section can only be used once in an update expression")
+            actions = clauses[clause] = []
+            while True:
+                if clause == 'SET':
+                    path = self.parse_path()
+                    self.expect('=')
+                    actions.append((path, self.parse_set_value()))
+                elif clause == 'REMOVE':
+                    actions.append(self.parse_path())
+                else:
+                    path = self.parse_path()
+                    kind, text = self.advance()
+                    if kind != 'value':
+                        raise ExpressionError(f"Invalid UpdateExpression: {clause} requires a value placeholder")
+                    actions.append((path, self.context.value(text)))
+                if not self.accept(','):
+                    break
+        if not clauses:
+            raise ExpressionError("Invalid UpdateExpression: The expression can not be empty")
+        return clauses
+
+    def parse_set_value(self):
+        node = self.parse_set_operand()
+        kind, text = self.peek()
+        if kind == 'op' and text in ('+', '-'):
+            self.pos += 1
+            node = (text, node, self.parse_set_operand())
+        return node
+
+    def parse_set_operand(self):
+        if self._is_call(('if_not_exists', 'list_append')):
+            function = self.advance()[1].lower()
+            self.expect('(')
+            first = ('path', self.parse_path()) if function == 'if_not_exists' else self.parse_set_operand()
+            self.expect(',')
+            second = self.parse_set_operand()
+            self.expect(')')
+            return (function, first, second)
+        kind, text = self.peek()
+        if kind == 'value':
+            self.pos += 1
+            return ('value', self.context.value(text))
+        return ('path', self.parse_path())
+
+
+# -- evaluation ---------------------------------------------------------------
+
+def resolve(item, path):
+    """Valor en `path` dentro de `item`, o MISSING."""
+    current = item
+    for element in path:
+        if isinstance(element, int):
+            if not isinstance(current, list) or element >= len(current):
+                return MISSING
+        elif not isinstance(current, dict) or element not in current:
+            return MISSING
+        current = current[element]
+    return current
+
+
+def _operand(item, node):
+    kind = node[0]
+    if kind == 'value':
+        return node[1]
+    if kind == 'path':
+        return resolve(item, node[1])
+    if kind == 'size':
+        value = resolve(item, node[1])
+        if value is MISSING:
+            return MISSING
+        if isinstance(value, Binary):
+            return Decimal(len(value.value))
+        if isinstance(value, (str, bytes, bytearray, set, frozenset, list, dict)):
+            return Decimal(len(value))
+        return MISSING
+    raise ExpressionError(f"Invalid operand: {kind}")
+
+
+def _equal(a, b):
+    return dynamo_type(a) == dynamo_type(b) and _raw(a) == _raw(b)
+
+
+def _ordered(a, b):
+    kind = dynamo_type(a)
+    return kind == dynamo_type(b) and kind in ('S', 'N', 'B')
+
+
+def _compare(op, a, b):
+    if a is MISSING or b is MISSING:
+        return False
+    if op == '=':
+        return _equal(a, b)
+    if op == '<>':
+        return not _equal(a, b)
+    if not _ordered(a, b):
+        return False
+    a, b = _raw(a), _raw(b)
+    return {'<': a < b, '<=': a <= b, '>': a > b, '>=': a >= b}[op]
+
+
+def evaluate(node, item):
+    """Evalúa una condición ya parseada sobre `item` (dict de boto3)."""
+    kind = node[0]
+    if kind == 'and':
+        return evaluate(node[1], item) and evaluate(node[2], item)
+    if kind == 'or':
+        return evaluate(node[1], item) or evaluate(node[2], item)
+    if kind == 'not':
+        return not evaluate(node[1], item)
+    if kind == 'cmp':
+        return _compare(node[1], _operand(item, node[2]), _operand(item, node[3]))
+    if kind == 'between':
+        value = _operand(item, node[1])
+        return _compare('>=', value, _operand(item, node[2])) and _compare('<=', value, _operand(item, node[3]))
+    if kind == 'in':
+        value = _operand(item, node[1])
+        return value is not MISSING and any(_compare('=', value, _operand(item, option)) for option in node[2])
+    if kind == 'func':
+        return _function(node[1], [_operand(item, arg) for arg in node[2]])
+    raise ExpressionError(f"Invalid condition node: {kind}")
+
+
+def _function(name, args):
+    value = args[0]
+    if name == 'attribute_exists':
+        return value is not MISSING
+    if name == 'attribute_not_exists':
+        return value is MISSING
+    if value is MISSING or args[1] is MISSING:
+        return False
+    operand = args[1]
+    if name == 'attribute_type':
+        return dynamo_type(value) == operand
+    if name == 'begins_with':
+        if dynamo_type(value) != dynamo_type(operand) or dynamo_type(value) not in ('S', 'B'):
+            return False
+        return _raw(value).startswith(_raw(operand))
+    if name == 'contains':
+        if isinstance(value, str):
+            return isinstance(operand, str) and operand in value
+        if isinstance(value, (set, frozenset, list)):
+            return any(_equal(element, operand) for element in value)
+        return False
+    raise ExpressionError(f"Invalid function name: {name}")
+
+
+def paths_in(node):
+    """Rutas de atributo referenciadas por una condición parseada."""
+    if not isinstance(node, tuple):
+        return []
+    if node[0] in ('path', 'size'):
+        return [node[1]]
+    found = []
+    for child in node[1:]:
+        if isinstance(child, list):
+            for element in child:
+                found.extend(paths_in(element))
+        else:
+            found.extend(paths_in(child))
+    return found
+
+
+def _set_value(item, node):
+    kind = node[0]
+    if kind in ('+', '-'):
+        left, right = _set_value(item, node[1]), _set_value(item, node[2])
+        if dynamo_type(left) != 'N' or dynamo_type(right) != 'N':
+            raise ExpressionError("An operand in the update expression has an incorrect data type")
+        left, right = Decimal(left), Decimal(right)
+        return DYNAMODB_CONTEXT.add(left, right) if kind == '+' else DYNAMODB_CONTEXT.subtract(left, right)
+    if kind == 'if_not_exists':
+        value = resolve(item, node[1][1])
+        return _set_value(item, node[2]) if value is MISSING else value
+    if kind == 'list_append':
+        left, right = _set_value(item, node[1]), _set_value(item, node[2])
+        if not isinstance(left, list) or not isinstance(right, list):
+            raise ExpressionError("An operand in the update expression has an incorrect data type")
+        return left + right
+    value = _operand(item, node)
+    if value is MISSING:
+        raise ExpressionError("The provided expression refers to an attribute that does not exist in the item")
+    return value
+
+
+def _assign(item, path, value):
+    parent = resolve(item, path[:-1]) if len(path) > 1 else item
+    last = path[-1]
+    if isinstance(last, int):
+        if not isinstance(parent, list):
+            raise ExpressionError("The document path provided in the update expression is invalid for update")
+        if last >= len(parent):
+            parent.append(value)
+        else:
+            parent[last] = value
+        return
+    if not isinstance(parent, dict):
+        raise ExpressionError("The document path provided in the update expression is invalid for update")
+    parent[last] = value
+
+
+def _remove(item, path):
+    parent = resolve(item, path[:-1]) if len(path) > 1 else item
+    last = path[-1]
+    if isinstance(last, int) and isinstance(parent, list) and last < len(parent):
+        del parent[last]
+    elif isinstance(parent, dict):
+        parent.pop(last, None)
+
+
+def apply_update(item, clauses):
+    """Aplica un UpdateExpression parseado. Retorna (nuevo_item, atributos_de_primer_nivel_tocados).
+
+    Como en DynamoDB, todos los operandos se evalúan contra el item original.
+    """
+    original = item
+    updated = copy.deepcopy(item)
+    touched = set()
+
+    for path, node in clauses.get('SET', []):
+        _assign(updated, path, copy.deepcopy(_set_value(original, node)))
+        touched.add(path[0])
+
+    for path in clauses.get('REMOVE', []):
+        _remove(updated, path)
+        touched.add(path[0])
+
+    for path, value in clauses.get('ADD', []):
+        current = resolve(original, path)
+        kind = dynamo_type(value)
+        if kind == 'N':
+            if current is MISSING:
+                result = value
+            elif dynamo_type(current) == 'N':
+                result = DYNAMODB_CONTEXT.add(Decimal(current), Decimal(value))
+            else:
+                raise ExpressionError("An operand in the update expression has an incorrect data type")
+        elif kind in ('SS', 'NS', 'BS'):
+            if current is MISSING:
+                result = set(value)
+            elif dynamo_type(current) == kind:
+                result = set(current) | set(value)
+            else:
+                raise ExpressionError("An operand in the update expression has an incorrect data type")
+        else:
+            raise ExpressionError("Incorrect operand type for operator or function; operator: ADD")
+        _assign(updated, path, result)
+        touched.add(path[0])
+
+    for path, value in clauses.get('DELETE', []):
+        kind = dynamo_type(value)
+        if kind not in ('SS', 'NS', 'BS'):
+            raise ExpressionError("Incorrect operand type for operator or function; operator: DELETE")
+        current = resolve(original, path)
+        if current is MISSING:
+            continue
+        if dynamo_type(current) != kind:
+            raise ExpressionError("An operand in the update expression has an incorrect data type")
+        remaining = set(current) - set(value)
+        if remaining:
+            _assign(updated, path, remaining)
+        else:
+            _remove(updated, path)
+        touched.add(path[0])
+
+    return updated, touched
+
+
+def project(item, paths):
+    """Copia de `item` con solo los atributos de `paths` (ProjectionExpression)."""
+    result = {}
+    for path in paths:
+        value = resolve(item, path)
+        if value is MISSING:
+            continue
+        target = result
+        for element, following in zip(path[:-1], path[1:]):
+            default = [] if isinstance(following, int) else {}
+            if isinstance(target, list):
+                target.append(default)
+                target = target[-1]
+            else:
+                target = target.setdefault(element, default)
+        if isinstance(target, list):
+            target.append(copy.deepcopy(value))
+        else:
+            target[path[-1]] = copy.deepcopy(value)
+    return result
@@ -0,0 +1,94 @@
+"""
+Eventos estilo botocore para los backends locales.
+
+Los clientes de boto3 emiten `before-parameter-build.<servicio>.<Operación>`,
+`before-call...` y `after-call...` / `after-call-error...` en
+`client.meta.events`; la instrumentación del runtime layer se engancha ahí
+para contar y medir las llamadas. Los backends de localdev exponen el mismo `meta.events` y
+`meta.service_model`, así las métricas salen iguales en local y en AWS.
+"""
+import functools
+import threading
+from types import SimpleNamespace
+
+
+class ServiceModel:
+    def __init__(self, service_id):
+        self.service_id = service_id
+        self.service_name = service_id.lower()
+
+
+class OperationModel:
+    def __init__(self, name, service_model):
+        self.name = name
+        self.service_model = service_model
+
+
+def operation_name(method):
+    """`get_item` -> `GetItem`, como los nombres de operación de botocore."""
+    return "".join(part.title() for part in method.split("_"))
+
+
+class LocalEvents:
+    """Subconjunto de botocore.hooks.HierarchicalEmitter: register/unregister/emit por prefijo."""
+
+    def __init__(self):
+        self._handlers = []     # [(event prefix, handler, unique_id)]
+        self._lock = threading.Lock()
+
+    def register(self, event_name, handler, unique_id=None, **kwargs):
+        with self._lock:
+            if unique_id is not None and any(uid == unique_id for _, _, uid in self._handlers):
+                return
+            self._handlers.append((event_name, handler, unique_id))
+
+    def unregister(self, event_name, handler=None, unique_id=None, **kwargs):
+        with self._lock:
+            self._handlers = [
+                entry for entry in self._handlers
+                if not (entry[0] == event_name and (entry[1] == handler or (unique_id and entry[2] == unique_id)))
+            ]
+
+    def emit(self, event_name, **kwargs):
+        parts = event_name.split(".")
+        prefixes = {".".join(parts[:i]) for i in range(1, len(parts) + 1)}
+        responses = []
+        for prefix, handler, _ in list(self._handlers):
+            if prefix in prefixes:
+                responses.append((handler, handler(event_name=event_name, **kwargs)))
+        return responses
+
+    def call(self, service_model, operation, function, params):
+        """Ejecuta `function()` entre before-call y after-call como _make_api_call de botocore.
+
+        before-parameter-build recibe los parámetros de la API y puede modificarlos
+        (p. ej. agregar ReturnConsumedCapacity) antes de que `function` los lea.
+        """
+        model = OperationModel(operation, service_model)
+        suffix = f"{service_model.service_id.lower().replace(' ', '-')}.{operation}"
+        context = {}
+        self.emit(f"before-parameter-build.{suffix}", params=params, model=model, context=context)
+        self.emit(f"before-call.{suffix}", model=model, params=params, request_signer=None, context=context)
+        try:
+            result = function()
+        except Exception as error:
+            self.emit(f"after-call-error.{suffix}", exception=error, model=model, context=context)
+            raise
+        self.emit(f"after-call.{suffix}", http_response=None, parsed=result, model=model, context=context)
+        return result
+
+
+def client_meta(service_id, events=None, **extra):
+    """`meta` de un cliente local: events, service_model y lo que agregue el backend."""
+    return SimpleNamespace(events=events or LocalEvents(), service_model=ServiceModel(service_id), **extra)
+
+
+def api_method(method):
+    """Decora un método público de un cliente local para que emita los eventos de llamada."""
+    operation = operation_name(method.__name__)
+
+    @functools.wraps(method)
+    def wrapper(self, **params):
+        return self.meta.events.call(self.meta.service_model, operation, lambda: method(self, **params), params)
+
+    return wrapper
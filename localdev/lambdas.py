@@ -0,0 +1,445 @@
+"""
+Registro local de las funciones Lambda declaradas en los serverless.yml.
+
+Cada función se identifica igual que en AWS (`<service>-<stage>-<función>`,
+p. ej. `burger-kitchen-dev-validateStock`, o su ARN) y se ejecuta dentro del
+proceso. Los módulos de cada servicio se importan aislados: kitchen-service
+y delivery-service tienen ambos `complete.py` y `list.py`, así que los
+módulos de un servicio nunca quedan visibles para otro.
+
+`LocalLambdaClient` implementa `invoke` para los handlers que llaman a otras
+Lambdas (p. ej. auth_helper con VALIDAR_TOKEN_LAMBDA_NAME).
+
+Uso:
+    from localdev.lambdas import LambdaRegistry, install
+    registry = LambdaRegistry()
+    registry.apply_environment()     # variables de provider/función
+    install(registry)                # boto3.client('lambda') -> local
+    registry.invoke('burger-kitchen-dev-validateStock', {...})
+"""
+import importlib
+import io
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from decimal import Decimal
+from pathlib import Path
+
+from botocore.exceptions import ClientError
+
+from localdev import hooks
+
+ROOT = Path(__file__).resolve().parent.parent
+LAYER_DIR = ROOT / "runtime-layer" / "layer" / "python"
+
+REGION = "us-east-1"
+ACCOUNT_ID = "000000000000"
+
+_VARIABLE_RE = re.compile(r"\$\{([^}]+)\}")
+_KEY_RE = re.compile(r"^(\s*)([\w-]+):\s*(.*?)\s*$")
+_EVENT_RE = re.compile(r"^(\s*)-\s*(\w+):\s*$")
+
+
+def _decimal_default(value):
+    # Same fallback the Lambda Python runtime uses when serializing results
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _strip_quotes(value):
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+        return value[1:-1]
+    return value
+
+
+class LambdaFunction:
+    """Una función de un serverless.yml: servicio, handler y entorno."""
+
+    def __init__(self, name, key, service_dir, handler, environment, events=()):
+        self.name = name
+        self.key = key
+        self.service_dir = Path(service_dir)
+        path, _, self.function = handler.rpartition(".")
+        self.module = path.replace("/", ".")
+        self.environment = environment
+        self.events = list(events)  # [{'type': 'http'|'httpApi'|'stream', 'method', 'path', 'authorizer'}]
+
+    @property
+    def arn(self):
+        return f"arn:aws:lambda:{REGION}:{ACCOUNT_ID}:function:{self.name}"
+
+    def __repr__(self):
+        return f"LambdaFunction({self.name!r}, {self.service_dir.name}:{self.module}.{self.function})"
+
+
+class LambdaContext:
+    """Subconjunto del objeto context que reciben los handlers."""
+
+    def __init__(self, function, timeout_s=20):
+        self.function_name = function.name
+        self.invoked_function_arn = function.arn
+        self.aws_request_id = str(uuid.uuid4())
+        self.memory_limit_in_mb = 256
+        self._deadline = time.monotonic() + timeout_s
+
+    def get_remaining_time_in_millis(self):
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+
+def parse_serverless(path, stage="dev"):
+    """Lee `service`, el entorno del provider y las funciones de un serverless.yml.
+
+    Parser por indentación (el archivo usa tags de CloudFormation que un
+    cargador YAML estricto rechaza). Retorna (service, env_provider,
+    {función: {'handler': ..., 'environment': {...}, 'events': [...]}}),
+    donde events son los eventos http/httpApi con método, ruta y el ARN
+    del authorizer si tiene, y los `stream` con su ARN, batchSize y
+    parallelizationFactor.
+    """
+    service = None
+    provider_env, functions = {}, {}
+    section = None
+    current = None
+    in_env = None
+    event = None
+
+    for raw in Path(path).read_text(encoding="utf-8").splitlines():
+        line = raw.split(" #")[0].rstrip() if not raw.lstrip().startswith("#") else ""
+        event_match = _EVENT_RE.match(line)
+        if event_match and section == "functions" and current:
+            event = None
+            if event_match.group(2) in ("http", "httpApi", "stream"):
+                event = {"type": event_match.group(2), "method": None, "path": None, "authorizer": None}
+                functions[current]["events"].append(event)
+            continue
+        match = _KEY_RE.match(line)
+        if not match:
+            continue
+        indent, key, value = len(match.group(1)), match.group(2), match.group(3)
+
+        if indent == 0:
+            section, current, in_env = key, None, None
+            if key == "service":
+                service = _strip_quotes(value)
+        elif section == "provider":
+            if indent == 2:
+                in_env = "provider" if key == "environment" else None
+            elif indent == 4 and in_env == "provider":
+                provider_env[key] = _strip_quotes(value)
+        elif section == "functions":
+            if indent == 2:
+                current, in_env, event = key, None, None
+                functions[key] = {"handler": None, "environment": {}, "events": []}
+            elif indent == 4 and current:
+                in_env, event = ("function" if key == "environment" else None), None
+                if key == "handler":
+                    functions[current]["handler"] = _strip_quotes(value)
+            elif indent == 6 and current and in_env == "function":
+                functions[current]["environment"][key] = _strip_quotes(value)
+            elif event is not None and indent > 6:
+                if key in ("method", "path") and event[key] is None:
+                    event[key] = _strip_quotes(value)
+                elif event["type"] == "stream" and key in ("arn", "batchSize", "parallelizationFactor"):
+                    event[key] = _strip_quotes(value)
+                elif key == "arn" and ":function:" in value:
+                    event["authorizer"] = _strip_quotes(value)
+
+    return service, provider_env, {k: v for k, v in functions.items() if v["handler"]}
+
+
+def read_compose(root=ROOT):
+    """Directorios de los servicios de serverless-compose.yml, en orden de `dependsOn`.
+
+    Sin serverless-compose.yml usa todos los `*/serverless.yml` bajo `root`.
+    """
+    root = Path(root)
+    compose = root / "serverless-compose.yml"
+    if not compose.exists():
+        return [config.parent for config in sorted(root.glob("*/serverless.yml"))]
+
+    services, current, in_depends = {}, None, False
+    section = None
+    for raw in compose.read_text(encoding="utf-8").splitlines():
+        line = raw.split(" #")[0].rstrip() if not raw.lstrip().startswith("#") else ""
+        if not line.strip():
+            continue
+        indent = len(line) - len(line.lstrip())
+        item = line.strip()
+        if indent == 0:
+            section = item.split(":", 1)[0]
+            continue
+        if section != "services":
+            continue
+        match = _KEY_RE.match(line)
+        if indent == 2 and match:
+            current, in_depends = match.group(2), False
+            services[current] = {"path": current, "depends": []}
+        elif current and match and match.group(2) == "path":
+            services[current]["path"] = _strip_quotes(match.group(3))
+        elif current and match and match.group(2) == "dependsOn":
+            in_depends = True
+            inline = match.group(3).strip("[]")
+            if inline:
+                services[current]["depends"] += [_strip_quotes(name.strip()) for name in inline.split(",")]
+        elif current and in_depends and item.startswith("- "):
+            services[current]["depends"].append(_strip_quotes(item[2:].strip()))
+
+    ordered = []
+
+    def visit(key, seen=()):
+        if key in ordered or key not in services:
+            return
+        if key in seen:
+            raise ValueError(f"dependsOn circular en serverless-compose.yml: {' -> '.join(seen + (key,))}")
+        for dependency in services[key]["depends"]:
+            visit(dependency, seen + (key,))
+        ordered.append(key)
+
+    for key in services:
+        visit(key)
+    return [root / services[key]["path"] for key in ordered]
+
+
+def resolve_variables(value, stage="dev", environ=None):
+    """Resuelve ${env:X}, ${env:X, 'def'}, ${opt:stage, ...} y ${sls:stage}.
+
+    Retorna None si queda alguna variable sin valor (p. ej. ${cf:...}).
+    """
+    environ = os.environ if environ is None else environ
+    unresolved = False
+
+    def replace(match):
+        nonlocal unresolved
+        source, _, default = match.group(1).partition(",")
+        kind, _, name = source.strip().partition(":")
+        default = _strip_quotes(default.strip()) if default else None
+        if kind == "env" and name in environ:
+            return environ[name]
+        if (kind, name) in (("sls", "stage"), ("opt", "stage")):
+            return stage
+        if kind == "aws" and name == "region":
+            return REGION
+        if kind == "aws" and name == "accountId":
+            return ACCOUNT_ID
+        if default is not None:
+            return default
+        unresolved = True
+        return ""
+
+    resolved = _VARIABLE_RE.sub(replace, value)
+    return None if unresolved else resolved
+
+
+class LambdaRegistry:
+    """Funciones de los servicios de serverless-compose.yml bajo `root`, ejecutables en proceso."""
+
+    def __init__(self, root=ROOT, stage="dev"):
+        self.root = Path(root)
+        self.stage = stage
+        self.functions = {}
+        self._modules = {}      # service dir -> {module name: module}
+        self._handlers = {}
+        self._lock = threading.RLock()
+        self.invocations = {}   # function name -> [ms, ...]
+
+        for service_dir in read_compose(self.root):
+            config = service_dir / "serverless.yml"
+            if not config.exists():
+                continue
+            service, provider_env, functions = parse_serverless(config, stage)
+            if not service:
+                continue
+            for key, spec in functions.items():
+                name = f"{service}-{stage}-{key}"
+                environment = {**provider_env, **spec["environment"]}
+                events = []
+                for event in spec["events"]:
+                    authorizer = event["authorizer"] and resolve_variables(event["authorizer"], stage)
+                    events.append({**event, "authorizer": authorizer and authorizer.split(":function:")[-1]})
+                self.functions[name] = LambdaFunction(name, key, config.parent, spec["handler"], environment, events)
+
+    def resolve(self, name_or_arn):
+        """Acepta nombre, ARN o ARN con alias/versión."""
+        name = name_or_arn
+        if name.startswith("arn:"):
+            name = name.split(":function:", 1)[-1]
+        name = name.split(":", 1)[0]
+        try:
+            return self.functions[name]
+        except KeyError:
+            raise ClientError(
+                {"Error": {"Code": "ResourceNotFoundException", "Message": f"Function not found: {name_or_arn}"}},
+                "Invoke"
+            ) from None
+
+    def routes(self):
+        """[(método, ruta, función, evento)] de los eventos http/httpApi."""
+        routes = []
+        for function in self.functions.values():
+            for event in function.events:
+                if event["method"] and event["path"]:
+                    path = "/" + event["path"].strip("/")
+                    routes.append((event["method"].upper(), path, function, event))
+        return routes
+
+    def streams(self, environ=None):
+        """[(ARN del stream, función, batchSize, parallelizationFactor)] de los eventos `stream` con ARN resoluble."""
+        streams = []
+        for function in self.functions.values():
+            for event in function.events:
+                arn = event["type"] == "stream" and resolve_variables(event.get("arn") or "", self.stage, environ)
+                if arn:
+                    streams.append((arn, function, int(event.get("batchSize") or 100),
+                                    int(event.get("parallelizationFactor") or 1)))
+        return streams
+
+    def environment(self, environ=None):
+        """Variables de entorno de todas las funciones (las que se pueden resolver)."""
+        merged = {}
+        for function in self.functions.values():
+            for key, value in function.environment.items():
+                resolved = resolve_variables(value, self.stage, environ)
+                if resolved is not None:
+                    merged.setdefault(key, resolved)
+        return merged
+
+    def apply_environment(self, overrides=None):
+        """Exporta el entorno a os.environ (sin pisar lo ya definido).
+
+        Debe llamarse antes de importar handlers: `common` y `auth_helper`
+        leen sus variables al importarse y se comparten entre servicios.
+        """
+        for key, value in {**self.environment(), **(overrides or {})}.items():
+            os.environ.setdefault(key, value)
+        os.environ.setdefault("AWS_DEFAULT_REGION", REGION)
+
+    # -- carga aislada -----------------------------------------------------
+    def _owned_by(self, module, service_dir):
+        path = getattr(module, "__file__", None) or ""
+        return path.startswith(str(service_dir) + os.sep)
+
+    def _load(self, function):
+        service_dir = function.service_dir
+        other_dirs = {f.service_dir for f in self.functions.values()} - {service_dir}
+
+        with self._lock:
+            # Hide sibling services' modules, expose this service's cached ones
+            hidden = {
+                name: module for name, module in list(sys.modules.items())
+                if any(self._owned_by(module, d) for d in other_dirs)
+            }
+            for name in hidden:
+                del sys.modules[name]
+            own = self._modules.setdefault(service_dir, {})
+            sys.modules.update(own)
+
+            sys.path[:0] = [str(service_dir), str(LAYER_DIR)]
+            try:
+                module = importlib.import_module(function.module)
+            finally:
+                del sys.path[:2]
+                for name, loaded in list(sys.modules.items()):
+                    if self._owned_by(loaded, service_dir):
+                        own[name] = loaded
+                        del sys.modules[name]
+                sys.modules.update(hidden)
+
+        return getattr(module, function.function)
+
+    def handler(self, name_or_arn):
+        function = self.resolve(name_or_arn)
+        handler = self._handlers.get(function.name)
+        if handler is None:
+            handler = self._handlers[function.name] = self._load(function)
+        return handler
+
+    def invoke(self, name_or_arn, event, context=None):
+        """Ejecuta el handler con el evento serializado como en Lambda.
+
+        Las excepciones del handler se propagan tal cual (su nombre de clase
+        es el `errorType` que ven Step Functions y los clientes).
+        """
+        function = self.resolve(name_or_arn)
+        handler = self.handler(function.name)
+        event = json.loads(json.dumps(event, default=_decimal_default))
+        start = time.perf_counter()
+        try:
+            result = handler(event, context or LambdaContext(function))
+        finally:
+            self.invocations.setdefault(function.name, []).append((time.perf_counter() - start) * 1000)
+        return json.loads(json.dumps(result, default=_decimal_default))
+
+
+class LocalLambdaClient:
+    """`boto3.client('lambda')` con `invoke` sobre un LambdaRegistry."""
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.exceptions = type("exceptions", (), {"ClientError": ClientError})
+        self.meta = hooks.client_meta("Lambda", region_name=REGION)
+
+    @hooks.api_method
+    def invoke(self, FunctionName, Payload=b"{}", InvocationType="RequestResponse", **kwargs):
+        if isinstance(Payload, (bytes, bytearray)):
+            Payload = Payload.decode("utf-8")
+        event = json.loads(Payload or "{}")
+
+        if InvocationType == "Event":
+            threading.Thread(target=self._invoke_quietly, args=(FunctionName, event), daemon=True).start()
+            return {"StatusCode": 202, "Payload": io.BytesIO(b"")}
+
+        try:
+            result = self.registry.invoke(FunctionName, event)
+        except ClientError:
+            raise
+        except Exception as exc:
+            error = {"errorType": type(exc).__name__, "errorMessage": str(exc)}
+            return {"StatusCode": 200, "FunctionError": "Unhandled",
+                    "Payload": io.BytesIO(json.dumps(error).encode("utf-8"))}
+        return {"StatusCode": 200, "Payload": io.BytesIO(json.dumps(result).encode("utf-8"))}
+
+    def _invoke_quietly(self, name, event):
+        try:
+            self.registry.invoke(name, event)
+        except Exception as exc:
+            print(f"⚠️ invocación asíncrona de {name} falló: {exc}")
+
+
+def patch_client(service_name, client, lazy_name):
+    """Hace que `boto3.client(service_name)` devuelva `client`.
+
+    Reinicia el cliente perezoso `common.<lazy_name>` del runtime layer si ya
+    estaba importado. Retorna una función que deshace el cambio.
+    """
+    import boto3
+
+    original = boto3.client
+
+    def factory(name, *args, **kwargs):
+        if name == service_name:
+            return client
+        return original(name, *args, **kwargs)
+
+    def reset():
+        lazy = getattr(sys.modules.get("common"), lazy_name, None)
+        if hasattr(lazy, "_instance"):
+            lazy._instance = None
+
+    boto3.client = factory
+    reset()
+
+    def uninstall():
+        boto3.client = original
+        reset()
+
+    return uninstall
+
+
+def install(registry):
+    """`boto3.client('lambda')` -> LocalLambdaClient(registry). Retorna el uninstall."""
+    return patch_client("lambda", LocalLambdaClient(registry), "lambda_client")
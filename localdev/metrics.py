@@ -0,0 +1,197 @@
+"""
+Colector local de las métricas EMF de runtime-layer/layer/python/instrumentation.py.
+
+Cada handler decorado con `@instrument` publica un registro EMF por
+invocación; en AWS va a CloudWatch por stdout y acá se recibe con un
+listener en el mismo proceso (o con `ingest()` desde líneas de log). Se
+agrega por función: invocaciones, cold starts, errores, duración p50/p95 y
+llamadas por servicio (DynamoDB, Lambda, StepFunctions, EventBridge) con su
+latencia, el detalle por operación y las RCU/WCU consumidas por tabla
+(ReturnConsumedCapacity; con el backend local salen de su modelo de
+capacidad).
+
+Uso:
+    from localdev.metrics import MetricsCollector
+    collector = MetricsCollector()
+    uninstall = collector.install()   # sin líneas EMF en stdout
+    ...
+    collector.report()
+"""
+import importlib
+import json
+import os
+import statistics
+import sys
+import threading
+
+from localdev.lambdas import LAYER_DIR
+
+_BASE_METRICS = ("Duration", "ColdStart", "Errors", "DynamoDBReadCapacity", "DynamoDBWriteCapacity")
+
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def _summary(samples):
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    return {"count": len(ordered), "p50": round(statistics.median(ordered), 3),
+            "p95": round(_percentile(ordered, 0.95), 3), "total": round(sum(ordered), 3)}
+
+
+def _values(record, name):
+    value = record.get(name, [])
+    return value if isinstance(value, list) else [value]
+
+
+def _rounded(used):
+    rounded = {"read": round(used["read"], 3), "write": round(used["write"], 3)}
+    if used.get("indexes"):
+        rounded["indexes"] = {index: round(units, 3) for index, units in sorted(used["indexes"].items())}
+    return rounded
+
+
+def instrumentation():
+    """Módulo `instrumentation` del runtime layer (el mismo que importan los handlers)."""
+    if "instrumentation" not in sys.modules:
+        sys.path.insert(0, str(LAYER_DIR))
+        try:
+            importlib.import_module("instrumentation")
+        finally:
+            sys.path.remove(str(LAYER_DIR))
+    return sys.modules["instrumentation"]
+
+
+class MetricsCollector:
+    """Agrega los registros EMF por función."""
+
+    def __init__(self):
+        self._functions = {}
+        self._lock = threading.Lock()
+
+    def install(self, quiet=True):
+        """Escucha las invocaciones en proceso; `quiet` apaga las líneas EMF en stdout.
+
+        Retorna una función que deshace el cambio.
+        """
+        module = instrumentation()
+        previous = os.environ.get("POWERTOOLS_METRICS_DISABLED")
+        if quiet:
+            os.environ["POWERTOOLS_METRICS_DISABLED"] = "true"
+        module.add_listener(self.ingest)
+
+        def uninstall():
+            module.remove_listener(self.ingest)
+            if quiet:
+                if previous is None:
+                    os.environ.pop("POWERTOOLS_METRICS_DISABLED", None)
+                else:
+                    os.environ["POWERTOOLS_METRICS_DISABLED"] = previous
+
+        return uninstall
+
+    def ingest(self, record):
+        """Agrega un registro EMF (dict o línea JSON de log); ignora lo que no sea EMF."""
+        if isinstance(record, str):
+            try:
+                record = json.loads(record)
+            except ValueError:
+                return False
+        if not isinstance(record, dict) or "_aws" not in record or "function_name" not in record:
+            return False
+
+        names = [metric["Name"] for directive in record["_aws"].get("CloudWatchMetrics", [])
+                 for metric in directive.get("Metrics", [])]
+        with self._lock:
+            stats = self._functions.setdefault(record["function_name"], {
+                "invocations": 0, "cold_starts": 0, "errors": 0, "duration_ms": [], "services": {},
+                "operations": {}, "capacity": {}})
+            stats["invocations"] += 1
+            stats["cold_starts"] += int(sum(_values(record, "ColdStart")))
+            stats["errors"] += int(sum(_values(record, "Errors")))
+            stats["duration_ms"].extend(_values(record, "Duration"))
+            for name in names:
+                if name.endswith("Calls") and name not in _BASE_METRICS:
+                    service = stats["services"].setdefault(name[:-len("Calls")], {"calls": 0, "latency_ms": []})
+                    service["calls"] += int(sum(_values(record, name)))
+                elif name.endswith("Latency") and name not in _BASE_METRICS:
+                    service = stats["services"].setdefault(name[:-len("Latency")], {"calls": 0, "latency_ms": []})
+                    service["latency_ms"].extend(_values(record, name))
+            for operation, call in (record.get("calls") or {}).items():
+                total = stats["operations"].setdefault(operation, {"count": 0, "ms": 0.0, "errors": 0})
+                total["count"] += call["count"]
+                total["ms"] = round(total["ms"] + call["ms"], 3)
+                total["errors"] += call["errors"]
+            for table, used in (record.get("capacity") or {}).items():
+                total = stats["capacity"].setdefault(table, {"read": 0.0, "write": 0.0})
+                total["read"] += used.get("read", 0)
+                total["write"] += used.get("write", 0)
+                for index, units in (used.get("indexes") or {}).items():
+                    total.setdefault("indexes", {})
+                    total["indexes"][index] = total["indexes"].get(index, 0.0) + units
+        return True
+
+    def reset(self):
+        with self._lock:
+            self._functions.clear()
+
+    def report(self):
+        """{función: invocaciones, cold starts, errores, duración y llamadas por servicio}."""
+        with self._lock:
+            return {
+                name: {
+                    "invocations": stats["invocations"],
+                    "cold_starts": stats["cold_starts"],
+                    "errors": stats["errors"],
+                    "duration_ms": _summary(stats["duration_ms"]),
+                    "services": {service: {"calls": data["calls"], "latency_ms": _summary(data["latency_ms"])}
+                                 for service, data in sorted(stats["services"].items())},
+                    "operations": dict(sorted(stats["operations"].items())),
+                    "capacity": {table: _rounded(used) for table, used in sorted(stats["capacity"].items())},
+                    "rcu": round(sum(used["read"] for used in stats["capacity"].values()), 3),
+                    "wcu": round(sum(used["write"] for used in stats["capacity"].values()), 3),
+                }
+                for name, stats in sorted(self._functions.items())
+            }
+
+    def capacity_by_table(self):
+        """RCU/WCU por tabla, sumando todas las funciones."""
+        totals = {}
+        with self._lock:
+            for stats in self._functions.values():
+                for table, used in stats["capacity"].items():
+                    total = totals.setdefault(table, {"read": 0.0, "write": 0.0})
+                    total["read"] += used["read"]
+                    total["write"] += used["write"]
+        return {table: _rounded(used) for table, used in sorted(totals.items())}
+
+    def calls_by_service(self):
+        """Llamadas totales por servicio, sumando todas las funciones."""
+        totals = {}
+        with self._lock:
+            for stats in self._functions.values():
+                for service, data in stats["services"].items():
+                    totals[service] = totals.get(service, 0) + data["calls"]
+        return dict(sorted(totals.items()))
+
+
+def print_report(report):
+    """Tabla por función: invocaciones, cold starts, errores, duración y llamadas por invocación."""
+    if not report:
+        return
+    columns = {service: max(len(service) + 6, 9)
+               for service in sorted({service for stats in report.values() for service in stats["services"]})}
+    width = max(len(name) for name in report) + 2
+    print(f"\n{'función':<{width}}{'n':>6}{'cold':>6}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}"
+          + "".join(f"{service + '/inv':>{size}}" for service, size in columns.items())
+          + f"{'RCU/inv':>9}{'WCU/inv':>9}")
+    for name, stats in report.items():
+        duration = stats["duration_ms"]
+        per_invocation = "".join(
+            f"{stats['services'].get(service, {}).get('calls', 0) / stats['invocations']:>{size}.2f}"
+            for service, size in columns.items())
+        print(f"{name:<{width}}{stats['invocations']:>6}{stats['cold_starts']:>6}{stats['errors']:>5}"
+              f"{duration.get('p50', 0):>9.2f}{duration.get('p95', 0):>9.2f}{per_invocation}"
+              f"{stats['rcu'] / stats['invocations']:>9.2f}{stats['wcu'] / stats['invocations']:>9.2f}")
@@ -0,0 +1,309 @@
+"""
+Servidor de desarrollo local: todos los servicios en un solo proceso.
+
+Lee serverless-compose.yml y el serverless.yml de cada servicio, monta las
+rutas de los eventos http/httpApi (con el authorizer TOKEN
+`burger-auth-<stage>-auth` cacheado como API Gateway) y atiende HTTP/1.1
+desde un loop asyncio. Cada request corre en un pool de threads (--workers)
+con LocalEnvironment.call(), así un handler lento no frena el loop y las
+llamadas Lambda a Lambda (auth_helper, validateStock desde la Step Function)
+se resuelven dentro del mismo proceso.
+
+Backends (--backends): por defecto DynamoDB y Step Functions en memoria con
+los datos de ejemplo; los que se excluyan van a AWS con las credenciales y
+TABLE_* del entorno.
+
+Al salir muestra p50/p95 por ruta y, con las métricas EMF de los handlers
+(localdev.metrics), invocaciones, cold starts y llamadas por servicio de
+cada función.
+
+Perfilado: todo el sistema vive en este proceso, así que
+`py-spy record -o perfil.svg -- python3 -m localdev.server` funciona tal
+cual; con --profile salida.prof cada worker corre bajo cProfile y al salir
+se escriben las estadísticas combinadas (ver con `python3 -m pstats`).
+
+Uso (desde la raíz del repo):
+    python3 -m localdev.server [--port 3000] [--workers 8] [--latency-ms 0]
+                               [--backends dynamodb,stepfunctions] [--profile salida.prof] [--quiet]
+"""
+import argparse
+import asyncio
+import base64
+import cProfile
+import pstats
+import signal
+import statistics
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
+
+from localdev.environment import BACKENDS, LocalEnvironment
+from localdev.metrics import print_report
+
+CORS_HEADERS = "Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token"
+MAX_BODY = 10 * 1024 * 1024  # API Gateway payload limit
+
+
+class _BadRequest(Exception):
+    pass
+
+
+class LocalServer:
+    """HTTP/1.1 keep-alive sobre asyncio; los handlers corren en un pool de threads."""
+
+    def __init__(self, env, host="127.0.0.1", port=3000, workers=8, access_log=True, profile=False):
+        self.env = env
+        self.host = host
+        self.port = port
+        self.access_log = access_log
+        self.latencies = {}     # "METHOD /ruta" -> [ms, ...]
+        self._profiles = []
+        self._local = threading.local()
+        self._profile = profile
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="lambda",
+                                            initializer=self._init_worker)
+        self._server = None
+
+    def _init_worker(self):
+        if self._profile:
+            self._local.profile = cProfile.Profile()
+            self._profiles.append(self._local.profile)
+
+    # -- dispatch (worker threads) -------------------------------------------
+    def _route(self, method, path):
+        """Ruta tal cual o sin el prefijo de stage (/dev/pedido), como en la URL de API Gateway."""
+        if self.env.route(method, path) is None and path.startswith(f"/{self.env.stage}/"):
+            return path[len(self.env.stage) + 1:]
+        return path
+
+    def dispatch(self, method, target, headers, body):
+        """(status, headers, body) de la respuesta para un request HTTP."""
+        parts = urlsplit(target)
+        path = self._route(method, parts.path or "/")
+        if method == "OPTIONS":
+            return self._preflight(path)
+
+        authorization = next((value for name, value in headers.items() if name.lower() == "authorization"), "")
+        token = authorization[7:] if authorization.lower().startswith("bearer ") else authorization or None
+        query = dict(parse_qsl(parts.query, keep_blank_values=True)) or None
+        text = body.decode("utf-8", errors="replace") if body else None
+
+        profile = getattr(self._local, "profile", None)
+        if profile:
+            profile.enable()
+        try:
+            result = self.env.call(method, path, body=text, query=query, headers=headers, token=token)
+        except Exception:
+            # API Gateway answers 502 when the integration fails
+            traceback.print_exc()
+            return 502, {"Content-Type": "application/json"}, b'{"message": "Internal server error"}'
+        finally:
+            if profile:
+                profile.disable()
+
+        response_headers = dict(result.get("headers") or {})
+        for name, values in (result.get("multiValueHeaders") or {}).items():
+            response_headers[name] = ", ".join(str(value) for value in values)
+        payload = result.get("body") or ""
+        if result.get("isBase64Encoded"):
+            payload = base64.b64decode(payload)
+        elif not isinstance(payload, bytes):
+            payload = payload.encode("utf-8")
+        return int(result.get("statusCode", 200)), response_headers, payload
+
+    def _preflight(self, path):
+        methods = sorted({method for method, route_path, _, _ in self.env.registry.routes() if route_path == path})
+        if not methods:
+            return 404, {"Content-Type": "application/json"}, b'{"message": "Not Found"}'
+        return 204, {"Access-Control-Allow-Origin": "*", "Access-Control-Allow-Headers": CORS_HEADERS,
+                     "Access-Control-Allow-Methods": ",".join(methods + ["OPTIONS"])}, b""
+
+    # -- HTTP ----------------------------------------------------------------
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=True)
+
+    async def _handle(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except _BadRequest as error:
+                    await self._write(writer, 400, {"Content-Type": "text/plain"}, str(error).encode(), False)
+                    return
+                if request is None:
+                    return
+                method, target, version, headers, body = request
+                connection = next((value for name, value in headers.items() if name.lower() == "connection"),
+                                  "").lower()
+                keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+
+                start = time.perf_counter()
+                status, response_headers, payload = await loop.run_in_executor(
+                    self._executor, self.dispatch, method, target, headers, body)
+                elapsed = (time.perf_counter() - start) * 1000
+                self._record(method, target, status, elapsed)
+
+                await self._write(writer, status, response_headers, b"" if method == "HEAD" else payload, keep_alive,
+                                  len(payload))
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader):
+        try:
+            request_line = await reader.readuntil(b"\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        try:
+            method, target, version = request_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+        except ValueError:
+            raise _BadRequest("Request line inválida") from None
+
+        headers = {}
+        while True:
+            line = await reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, separator, value = line.decode("latin-1").partition(":")
+            if not separator:
+                raise _BadRequest("Header inválido")
+            # Client casing is kept, as API Gateway does in REST events
+            headers[name.strip()] = value.strip()
+        lower = {name.lower(): value for name, value in headers.items()}
+
+        if lower.get("transfer-encoding", "").lower() == "chunked":
+            chunks, size = [], 0
+            while True:
+                length = int((await reader.readuntil(b"\r\n")).split(b";", 1)[0], 16)
+                if length == 0:
+                    while await reader.readuntil(b"\r\n") != b"\r\n":
+                        pass
+                    break
+                size += length
+                if size > MAX_BODY:
+                    raise _BadRequest("Body demasiado grande")
+                chunks.append(await reader.readexactly(length))
+                await reader.readexactly(2)
+            body = b"".join(chunks)
+        else:
+            length = int(lower.get("content-length") or 0)
+            if length > MAX_BODY:
+                raise _BadRequest("Body demasiado grande")
+            body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, version, headers, body
+
+    @staticmethod
+    async def _write(writer, status, headers, payload, keep_alive, length=None):
+        try:
+            reason = HTTPStatus(status).phrase
+        except ValueError:
+            reason = ""
+        lines = [f"HTTP/1.1 {status} {reason}", f"Content-Length: {len(payload) if length is None else length}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()
+                  if name.lower() not in ("content-length", "connection", "transfer-encoding")]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + payload)
+        await writer.drain()
+
+    def _record(self, method, target, status, elapsed):
+        path = self._route(method, urlsplit(target).path or "/")
+        self.latencies.setdefault(f"{method} {path}", []).append(elapsed)
+        if self.access_log:
+            print(f"{method} {target} {status} {elapsed:.1f} ms", flush=True)
+
+    # -- reports -------------------------------------------------------------
+    def summary(self):
+        report = {}
+        for key, samples in sorted(self.latencies.items()):
+            ordered = sorted(samples)
+            report[key] = {"count": len(ordered), "p50": round(statistics.median(ordered), 2),
+                           "p95": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 2)}
+        return report
+
+    def dump_profile(self, path):
+        profiles = [profile for profile in self._profiles if profile.getstats()]
+        if not profiles:
+            return False
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(path)
+        return True
+
+
+async def serve(args):
+    env = LocalEnvironment(latency_ms=args.latency_ms, stage=args.stage,
+                           backends=[name for name in args.backends.split(",") if name])
+    if not args.no_warm:
+        # Imports happen once per container: load every handler before serving so the
+        # first requests, the profile and load tests see warm containers
+        for name in env.registry.functions:
+            env.registry.handler(name)
+    server = await LocalServer(env, args.host, args.port, args.workers, access_log=not args.quiet,
+                               profile=bool(args.profile)).start()
+
+    routes = env.registry.routes()
+    print(f"🍔 {len(env.registry.functions)} funciones, {len(routes)} rutas en http://{server.host}:{server.port} "
+          f"(workers {args.workers}, backends locales: {', '.join(env.backends) or 'ninguno'})")
+    if env.tokens:
+        print("🔑 tokens: " + ", ".join(f"{role}={token}" for role, token in env.tokens.items()))
+    if args.routes:
+        for method, path, function, event in sorted(routes, key=lambda route: (route[1], route[0])):
+            lock = " 🔒" if event.get("authorizer") else ""
+            print(f"   {method:<7}{path:<28}{function.name}{lock}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    await server.close()
+    env.close()
+    summary = server.summary()
+    if summary:
+        print(f"\n{'ruta':<36}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}")
+        for key, stats in summary.items():
+            print(f"{key:<36}{stats['count']:>7}{stats['p50']:>10.2f}{stats['p95']:>10.2f}")
+    print_report(env.metrics.report())
+    if args.profile and server.dump_profile(args.profile):
+        print(f"💾 perfil en {args.profile} (python3 -m pstats {args.profile})")
+    if env.backend:
+        calls = env.backend.stats()["calls"]
+        print(f"DynamoDB: {sum(calls.values())} llamadas ({', '.join(f'{k} {v}' for k, v in sorted(calls.items()))})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--workers", type=int, default=8, help="Threads que ejecutan handlers")
+    parser.add_argument("--stage", default="dev")
+    parser.add_argument("--backends", default=",".join(BACKENDS),
+                        help=f"Backends locales separados por coma ({', '.join(BACKENDS)}); el resto va a AWS")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latencia simulada por llamada a DynamoDB")
+    parser.add_argument("--profile", help="Archivo .prof con cProfile de los workers")
+    parser.add_argument("--routes", action="store_true", help="Listar las rutas al iniciar")
+    parser.add_argument("--no-warm", action="store_true", help="No importar los handlers al iniciar (cold start)")
+    parser.add_argument("--quiet", action="store_true", help="Sin log de accesos")
+    asyncio.run(serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,678 @@
+"""
+Intérprete local de Step Functions (subconjunto de ASL) sobre LambdaRegistry.
+
+Soporta lo que usa workflow-service/step-function.json y poco más:
+
+- Task con ARN de Lambda directo, `arn:aws:states:::lambda:invoke` y
+  `...lambda:invoke.waitForTaskToken` (TimeoutSeconds, Retry, Catch)
+- Choice (String*/Numeric*/Boolean*, Is*, And/Or/Not), Pass, Wait,
+  Succeed y Fail
+- InputPath, Parameters / ResultSelector con claves `.$` (incluido
+  `$$.Task.Token`), ResultPath y OutputPath
+
+Los handlers corren en el mismo proceso. Un estado waitForTaskToken deja la
+ejecución en pausa hasta que alguien llama `send_task_success` /
+`send_task_failure` (p. ej. kitchen-service/confirm.py vía
+`common.stepfunctions`), y la ejecución continúa en el hilo de ese
+llamado. Los tokens vencidos se resuelven con `States.Timeout` en la
+siguiente llamada a la API o con `check_timeouts()`.
+
+Cada estado registra su duración (`duration_ms`), el tiempo dentro de la
+Lambda (`invoke_ms`) y la espera del callback (`wait_ms`); `stats()` los
+agrega por estado.
+
+Uso:
+    from localdev.stepfunctions import LocalStepFunctions, install
+    sfn = LocalStepFunctions(registry)
+    arn = sfn.create_state_machine(name='BurgerFlow-dev',
+                                   definition=open(...).read())['stateMachineArn']
+    install(sfn)  # boto3.client('stepfunctions') -> sfn
+"""
+import copy
+import fnmatch
+import json
+import statistics
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from botocore.exceptions import ClientError
+
+from localdev import hooks
+from localdev.lambdas import ACCOUNT_ID, REGION, patch_client
+
+DEFINITION = Path(__file__).resolve().parent.parent / "workflow-service" / "step-function.json"
+
+SUPPORTED_TYPES = {"Task", "Choice", "Pass", "Wait", "Succeed", "Fail"}
+LAMBDA_INVOKE = "arn:aws:states:::lambda:invoke"
+WAIT_FOR_TOKEN = ".waitForTaskToken"
+
+_ERROR_CODES = (
+    "ExecutionAlreadyExists", "ExecutionDoesNotExist", "StateMachineDoesNotExist",
+    "InvalidDefinition", "InvalidToken", "InvalidOutput", "TaskDoesNotExist", "TaskTimedOut",
+)
+
+
+class StatesError(Exception):
+    """Error dentro de la ejecución (lo que Retry/Catch comparan con ErrorEquals)."""
+
+    def __init__(self, error, cause=""):
+        super().__init__(f"{error}: {cause}")
+        self.error = error
+        self.cause = cause
+
+
+def _client_error(code, message, operation):
+    return getattr(_Exceptions, code)({"Error": {"Code": code, "Message": message}}, operation)
+
+
+_Exceptions = type("exceptions", (), {
+    "ClientError": ClientError,
+    **{code: type(code, (ClientError,), {}) for code in _ERROR_CODES},
+})
+
+
+# -- JSONPath (subconjunto de ASL) ---------------------------------------------
+def _split_path(path):
+    parts = []
+    for segment in path.replace("[", ".[").split(".")[1:]:
+        if not segment:
+            continue
+        if segment.startswith("[") and segment.endswith("]"):
+            parts.append(int(segment[1:-1]))
+        else:
+            parts.append(segment)
+    return parts
+
+
+def read_path(data, path, context=None):
+    """Valor en `path` ($... sobre el input, $$... sobre el contexto)."""
+    if path.startswith("$$"):
+        data, path = context or {}, path[1:]
+    if not path.startswith("$"):
+        raise StatesError("States.Runtime", f"Ruta inválida: {path}")
+    value = data
+    for part in _split_path(path):
+        try:
+            value = value[part]
+        except (KeyError, IndexError, TypeError):
+            raise StatesError("States.Runtime", f"La ruta {path} no existe en el input") from None
+    return value
+
+
+def _has_path(data, path):
+    try:
+        read_path(data, path)
+        return True
+    except StatesError:
+        return False
+
+
+def write_path(data, path, value):
+    """Copia de `data` con `value` en `path` (ResultPath)."""
+    if path is None:
+        return data
+    parts = _split_path(path)
+    if not parts:
+        return value
+    if not isinstance(data, dict):
+        raise StatesError("States.Runtime", f"ResultPath {path} requiere un input objeto")
+    result = copy.deepcopy(data)
+    target = result
+    for part in parts[:-1]:
+        target = target.setdefault(part, {})
+        if not isinstance(target, dict):
+            raise StatesError("States.Runtime", f"ResultPath {path} atraviesa un valor que no es objeto")
+    target[parts[-1]] = value
+    return result
+
+
+def render(template, data, context):
+    """Parameters / ResultSelector: claves `x.$` toman su valor de una ruta."""
+    if isinstance(template, dict):
+        rendered = {}
+        for key, value in template.items():
+            if key.endswith(".$"):
+                if not isinstance(value, str) or value.startswith("States."):
+                    raise StatesError("States.Runtime", f"Funciones intrínsecas no soportadas: {value}")
+                rendered[key[:-2]] = copy.deepcopy(read_path(data, value, context))
+            else:
+                rendered[key] = render(value, data, context)
+        return rendered
+    if isinstance(template, list):
+        return [render(value, data, context) for value in template]
+    return template
+
+
+# -- Choice ----------------------------------------------------------------------
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_string(value):
+    return isinstance(value, str)
+
+
+def _is_boolean(value):
+    return isinstance(value, bool)
+
+
+# Comparator -> (type check on the variable, comparison)
+_COMPARATORS = {
+    "StringEquals": (_is_string, lambda a, b: a == b),
+    "StringLessThan": (_is_string, lambda a, b: a < b),
+    "StringGreaterThan": (_is_string, lambda a, b: a > b),
+    "StringLessThanEquals": (_is_string, lambda a, b: a <= b),
+    "StringGreaterThanEquals": (_is_string, lambda a, b: a >= b),
+    "StringMatches": (_is_string, lambda a, b: fnmatch.fnmatchcase(a, b)),
+    "NumericEquals": (_is_number, lambda a, b: a == b),
+    "NumericLessThan": (_is_number, lambda a, b: a < b),
+    "NumericGreaterThan": (_is_number, lambda a, b: a > b),
+    "NumericLessThanEquals": (_is_number, lambda a, b: a <= b),
+    "NumericGreaterThanEquals": (_is_number, lambda a, b: a >= b),
+    "BooleanEquals": (_is_boolean, lambda a, b: a == b),
+}
+
+
+def choice_matches(rule, data):
+    if "And" in rule:
+        return all(choice_matches(r, data) for r in rule["And"])
+    if "Or" in rule:
+        return any(choice_matches(r, data) for r in rule["Or"])
+    if "Not" in rule:
+        return not choice_matches(rule["Not"], data)
+
+    variable = rule["Variable"]
+    if "IsPresent" in rule:
+        return _has_path(data, variable) == rule["IsPresent"]
+
+    value = read_path(data, variable)
+    type_checks = {
+        "IsNull": value is None, "IsString": _is_string(value),
+        "IsNumeric": _is_number(value), "IsBoolean": _is_boolean(value),
+    }
+    for check, result in type_checks.items():
+        if check in rule:
+            return result == rule[check]
+
+    for name, (is_kind, compare) in _COMPARATORS.items():
+        for key in (name, name + "Path"):
+            if key not in rule:
+                continue
+            expected = read_path(data, rule[key]) if key.endswith("Path") else rule[key]
+            return is_kind(value) and compare(value, expected)
+
+    raise StatesError("States.Runtime", f"Regla de Choice no soportada: {sorted(rule)}")
+
+
+def _error_matches(error_equals, error):
+    if "States.ALL" in error_equals or error in error_equals:
+        return True
+    # States.TaskFailed covers every task error except a timeout
+    return "States.TaskFailed" in error_equals and error != "States.Timeout"
+
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class Execution:
+    """Una ejecución: estado actual, historial por estado y resultado."""
+
+    def __init__(self, arn, name, machine_arn, machine_name, input_data, clock):
+        self.arn = arn
+        self.name = name
+        self.state_machine_arn = machine_arn
+        self.state_machine_name = machine_name
+        self.input = input_data
+        self.status = "RUNNING"
+        self.output = None
+        self.error = None
+        self.cause = None
+        self.start_date = datetime.now(timezone.utc)
+        self.stop_date = None
+        self.started = clock()
+        self.stopped = None
+        self.history = []          # [{state, type, duration_ms, invoke_ms, wait_ms, error}]
+        self.current_state = None
+        self.lock = threading.RLock()
+        self.finished = threading.Event()
+
+    @property
+    def duration_ms(self):
+        return None if self.stopped is None else (self.stopped - self.started) * 1000
+
+
+class _Waiting:
+    """Un task waitForTaskToken en espera de callback."""
+
+    def __init__(self, execution, definition, state_name, data, entered, attempts, deadline):
+        self.execution = execution
+        self.definition = definition
+        self.state_name = state_name
+        self.data = data
+        self.entered = entered
+        self.attempts = attempts
+        self.deadline = deadline
+        self.invoke_ms = 0.0
+        self.paused = False         # False while the registering Lambda is still running
+        self.outcome = None         # ('success', output) | ('failure', error, cause)
+
+
+class LocalStepFunctions:
+    """Cliente `stepfunctions` en memoria.
+
+    `clock` permite tiempo virtual para probar timeouts y `wait_scale`
+    escala los estados Wait y los intervalos de Retry (0 = sin dormir).
+    """
+
+    exceptions = _Exceptions
+
+    def __init__(self, registry, clock=time.monotonic, wait_scale=0.0):
+        self.registry = registry
+        self.clock = clock
+        self.wait_scale = wait_scale
+        self.state_machines = {}    # arn -> (name, definition)
+        self.executions = {}        # arn -> Execution
+        self._waiting = {}          # token -> _Waiting
+        self._closed_tokens = set()
+        self._lock = threading.Lock()
+        self.meta = hooks.client_meta("SFN", region_name=REGION)
+
+    # -- API ----------------------------------------------------------------
+    @hooks.api_method
+    def create_state_machine(self, name, definition, roleArn=None, **kwargs):
+        if isinstance(definition, str):
+            definition = json.loads(definition)
+        self._validate(definition)
+        arn = f"arn:aws:states:{REGION}:{ACCOUNT_ID}:stateMachine:{name}"
+        self.state_machines[arn] = (name, definition)
+        return {"stateMachineArn": arn, "creationDate": datetime.now(timezone.utc)}
+
+    @hooks.api_method
+    def start_execution(self, stateMachineArn, input="{}", name=None, **kwargs):
+        self.check_timeouts()
+        if stateMachineArn not in self.state_machines:
+            raise _client_error("StateMachineDoesNotExist", f"State Machine Does Not Exist: '{stateMachineArn}'",
+                                "StartExecution")
+        machine_name, definition = self.state_machines[stateMachineArn]
+        name = name or str(uuid.uuid4())
+        arn = f"arn:aws:states:{REGION}:{ACCOUNT_ID}:execution:{machine_name}:{name}"
+
+        with self._lock:
+            if arn in self.executions:
+                raise _client_error("ExecutionAlreadyExists", f"Execution Already Exists: '{arn}'", "StartExecution")
+            execution = self.executions[arn] = Execution(
+                arn, name, stateMachineArn, machine_name, json.loads(input or "{}"), self.clock
+            )
+
+        with execution.lock:
+            self._run(execution, definition, definition["StartAt"], copy.deepcopy(execution.input))
+        return {"executionArn": arn, "startDate": execution.start_date}
+
+    @hooks.api_method
+    def send_task_success(self, taskToken, output):
+        try:
+            result = json.loads(output)
+        except (TypeError, ValueError):
+            raise _client_error("InvalidOutput", "Invalid Output: output is not valid JSON", "SendTaskSuccess")
+        self._resolve_token(taskToken, ("success", result), "SendTaskSuccess")
+        return {}
+
+    @hooks.api_method
+    def send_task_failure(self, taskToken, error="", cause=""):
+        self._resolve_token(taskToken, ("failure", error, cause), "SendTaskFailure")
+        return {}
+
+    @hooks.api_method
+    def send_task_heartbeat(self, taskToken):
+        self._pending(taskToken, "SendTaskHeartbeat")
+        return {}
+
+    @hooks.api_method
+    def describe_execution(self, executionArn):
+        self.check_timeouts()
+        execution = self.executions.get(executionArn)
+        if execution is None:
+            raise _client_error("ExecutionDoesNotExist", f"Execution Does Not Exist: '{executionArn}'",
+                                "DescribeExecution")
+        described = {
+            "executionArn": execution.arn,
+            "stateMachineArn": execution.state_machine_arn,
+            "name": execution.name,
+            "status": execution.status,
+            "startDate": execution.start_date,
+            "input": json.dumps(execution.input),
+        }
+        if execution.stop_date:
+            described["stopDate"] = execution.stop_date
+        if execution.output is not None:
+            described["output"] = json.dumps(execution.output)
+        if execution.error is not None:
+            described.update(error=execution.error, cause=execution.cause)
+        return described
+
+    def check_timeouts(self):
+        """Resuelve con States.Timeout los tokens cuyo TimeoutSeconds venció."""
+        now = self.clock()
+        with self._lock:
+            expired = [token for token, w in self._waiting.items() if w.paused and w.deadline <= now]
+        for token in expired:
+            try:
+                self._resolve_token(token, ("failure", "States.Timeout", "Task timed out"), "CheckTimeouts")
+            except ClientError:
+                pass  # resolved concurrently
+
+    # -- métricas -----------------------------------------------------------
+    def stats(self):
+        """Latencia por estado (ms) y ejecuciones por status."""
+        per_state = {}
+        statuses = {}
+        for execution in list(self.executions.values()):
+            statuses[execution.status] = statuses.get(execution.status, 0) + 1
+            for record in execution.history:
+                per_state.setdefault(record["state"], []).append(record)
+
+        states = {}
+        for state, records in per_state.items():
+            summary = {"count": len(records), "errors": sum(1 for r in records if r["error"])}
+            for metric in ("duration_ms", "invoke_ms", "wait_ms"):
+                samples = [r[metric] for r in records]
+                summary[metric] = {
+                    "mean": round(statistics.fmean(samples), 3),
+                    "p50": round(_percentile(samples, 0.50), 3),
+                    "p95": round(_percentile(samples, 0.95), 3),
+                    "max": round(max(samples), 3),
+                }
+            states[state] = summary
+        return {"executions": statuses, "states": states}
+
+    def reset_stats(self):
+        """Olvida las ejecuciones terminadas (las que están en curso siguen)."""
+        with self._lock:
+            self.executions = {arn: e for arn, e in self.executions.items() if e.status == "RUNNING"}
+
+    # -- intérprete ---------------------------------------------------------
+    def _validate(self, definition):
+        states = definition.get("States") or {}
+        if definition.get("StartAt") not in states:
+            raise _client_error("InvalidDefinition", "StartAt no apunta a un estado", "CreateStateMachine")
+        for name, state in states.items():
+            if state.get("Type") not in SUPPORTED_TYPES:
+                raise _client_error("InvalidDefinition", f"{name}: tipo {state.get('Type')} no soportado",
+                                    "CreateStateMachine")
+            targets = [state.get("Next"), state.get("Default")]
+            targets += [c.get("Next") for c in state.get("Choices", []) + state.get("Catch", [])]
+            for target in filter(None, targets):
+                if target not in states:
+                    raise _client_error("InvalidDefinition", f"{name}: Next '{target}' no existe",
+                                        "CreateStateMachine")
+
+    def _context(self, execution, state_name, entered, retry_count=0, token=None):
+        context = {
+            "Execution": {
+                "Id": execution.arn, "Name": execution.name, "Input": execution.input,
+                "StartTime": execution.start_date.isoformat(),
+            },
+            "State": {"Name": state_name, "EnteredTime": entered, "RetryCount": retry_count},
+            "StateMachine": {"Id": execution.state_machine_arn, "Name": execution.state_machine_name},
+        }
+        if token:
+            context["Task"] = {"Token": token}
+        return context
+
+    def _record(self, execution, state_name, state, entered, invoke_ms=0.0, wait_ms=0.0, error=None):
+        execution.history.append({
+            "state": state_name,
+            "type": state["Type"],
+            "duration_ms": (self.clock() - entered) * 1000,
+            "invoke_ms": invoke_ms,
+            "wait_ms": wait_ms,
+            "error": error,
+        })
+
+    def _finish(self, execution, status, output=None, error=None, cause=None):
+        execution.status = status
+        execution.output = output
+        execution.error = error
+        execution.cause = cause
+        execution.stopped = self.clock()
+        execution.stop_date = datetime.now(timezone.utc)
+        execution.current_state = None
+        execution.finished.set()
+
+    def _run(self, execution, definition, state_name, data, attempts=None):
+        """Avanza la ejecución hasta terminar o quedar esperando un token."""
+        attempts = attempts if attempts is not None else {}
+        states = definition["States"]
+
+        while state_name is not None:
+            state = states[state_name]
+            execution.current_state = state_name
+            entered = self.clock()
+            kind = state["Type"]
+            invoke_ms = 0.0
+
+            if kind == "Succeed":
+                self._record(execution, state_name, state, entered)
+                self._finish(execution, "SUCCEEDED", output=self._output(state, self._input(state, data)))
+                return
+            if kind == "Fail":
+                self._record(execution, state_name, state, entered)
+                self._finish(execution, "FAILED", error=state.get("Error"), cause=state.get("Cause"))
+                return
+
+            try:
+                effective = self._input(state, data)
+                if kind == "Choice":
+                    next_state = next(
+                        (rule["Next"] for rule in state["Choices"] if choice_matches(rule, effective)),
+                        state.get("Default")
+                    )
+                    if next_state is None:
+                        raise StatesError("States.NoChoiceMatched", "Ninguna regla de Choice coincide")
+                    self._record(execution, state_name, state, entered)
+                    data, state_name = self._output(state, effective), next_state
+                    continue
+
+                if kind == "Pass":
+                    if "Parameters" in state:
+                        result = render(state["Parameters"], effective, self._context(execution, state_name, entered))
+                    else:
+                        result = state.get("Result", effective)
+                    data = self._apply_result(state, data, result)
+                elif kind == "Wait":
+                    seconds = state.get("Seconds")
+                    if "SecondsPath" in state:
+                        seconds = read_path(effective, state["SecondsPath"])
+                    time.sleep(float(seconds or 0) * self.wait_scale)
+                    data = self._output(state, effective)
+                else:
+                    outcome = self._task(execution, definition, state_name, state, data, effective, entered, attempts)
+                    if outcome is None:
+                        return  # paused until the task token is resolved
+                    data, invoke_ms = outcome
+
+            except StatesError as exc:
+                self._record(execution, state_name, state, entered, error=exc.error)
+                handled = self._handle_error(execution, state_name, state, data, exc, attempts)
+                if handled is None:
+                    return
+                state_name, data = handled
+                continue
+
+            self._record(execution, state_name, state, entered, invoke_ms=invoke_ms)
+            state_name = self._next(execution, state_name, state, data, attempts)
+
+    def _next(self, execution, state_name, state, data, attempts):
+        # Retry counters only live while the execution stays in the same state
+        for key in [k for k in attempts if k[0] == state_name]:
+            del attempts[key]
+        if state.get("End"):
+            self._finish(execution, "SUCCEEDED", output=data)
+            return None
+        return state["Next"]
+
+    def _input(self, state, data):
+        path = state.get("InputPath", "$")
+        return {} if path is None else read_path(data, path)
+
+    def _output(self, state, data):
+        path = state.get("OutputPath", "$")
+        return {} if path is None else read_path(data, path)
+
+    def _apply_result(self, state, data, result):
+        return self._output(state, write_path(data, state.get("ResultPath", "$"), result))
+
+    def _invoke(self, function_name, payload):
+        """Invoca la Lambda en proceso. Retorna (resultado, ms)."""
+        start = self.clock()
+        try:
+            result = self.registry.invoke(function_name, payload)
+        except ClientError as exc:
+            raise StatesError("Lambda.ResourceNotFoundException", str(exc)) from None
+        except Exception as exc:
+            # Same error name Lambda reports: the exception class (errorType)
+            cause = json.dumps({"errorMessage": str(exc), "errorType": type(exc).__name__})
+            raise StatesError(type(exc).__name__, cause) from None
+        return result, (self.clock() - start) * 1000
+
+    def _task(self, execution, definition, state_name, state, data, effective, entered, attempts):
+        """Ejecuta un Task. Retorna (data, invoke_ms) o None si queda esperando un token."""
+        resource = state["Resource"]
+        waits = resource.endswith(WAIT_FOR_TOKEN)
+        token = uuid.uuid4().hex + uuid.uuid4().hex if waits else None
+        retry_count = sum(n for (name, _), n in attempts.items() if name == state_name)
+        context = self._context(execution, state_name, entered, retry_count, token)
+        parameters = render(state["Parameters"], effective, context) if "Parameters" in state else effective
+
+        if resource.startswith("arn:aws:lambda:"):
+            result, invoke_ms = self._invoke(resource, parameters)
+        elif resource.removesuffix(WAIT_FOR_TOKEN) == LAMBDA_INVOKE:
+            if not isinstance(parameters, dict) or "FunctionName" not in parameters:
+                raise StatesError("States.Runtime", "lambda:invoke requiere Parameters.FunctionName")
+            if waits:
+                return self._wait_for_token(execution, definition, state_name, state, data, entered,
+                                            attempts, token, parameters)
+            payload, invoke_ms = self._invoke(parameters["FunctionName"], parameters.get("Payload", {}))
+            result = {"ExecutedVersion": "$LATEST", "Payload": payload, "StatusCode": 200}
+        else:
+            raise StatesError("States.Runtime", f"Resource no soportado: {resource}")
+
+        timeout = state.get("TimeoutSeconds")
+        if timeout and self.clock() - entered > timeout:
+            raise StatesError("States.Timeout", "Task timed out")
+        if "ResultSelector" in state:
+            result = render(state["ResultSelector"], result, context)
+        return self._apply_result(state, data, result), invoke_ms
+
+    def _wait_for_token(self, execution, definition, state_name, state, data, entered, attempts, token, parameters):
+        timeout = state.get("TimeoutSeconds")
+        waiting = _Waiting(execution, definition, state_name, data, entered, attempts,
+                           entered + timeout if timeout else float("inf"))
+        # Registered before the invoke: the Lambda itself may already answer
+        with self._lock:
+            self._waiting[token] = waiting
+        try:
+            _, waiting.invoke_ms = self._invoke(parameters["FunctionName"], parameters.get("Payload", {}))
+        except StatesError:
+            with self._lock:
+                self._waiting.pop(token, None)
+            raise
+
+        with self._lock:
+            early = waiting.outcome
+            if early is None:
+                waiting.paused = True
+                return None
+            self._waiting.pop(token, None)
+            self._closed_tokens.add(token)
+
+        if early[0] == "failure":
+            raise StatesError(early[1] or "States.TaskFailed", early[2])
+        return self._apply_result(state, data, early[1]), waiting.invoke_ms
+
+    def _pending(self, token, operation):
+        with self._lock:
+            waiting = self._waiting.get(token)
+        if waiting is None:
+            if token in self._closed_tokens:
+                raise _client_error("TaskTimedOut", "Task Timed Out: the task is no longer running", operation)
+            raise _client_error("InvalidToken", "Invalid Token", operation)
+        return waiting
+
+    def _resolve_token(self, token, outcome, operation):
+        waiting = self._pending(token, operation)
+        if outcome[1] != "States.Timeout" and self.clock() >= waiting.deadline:
+            self.check_timeouts()
+            raise _client_error("TaskTimedOut", "Task Timed Out", operation)
+
+        with self._lock:
+            if self._waiting.get(token) is not waiting or waiting.outcome is not None:
+                raise _client_error("TaskTimedOut", "Task Timed Out: the task is no longer running", operation)
+            waiting.outcome = outcome
+            if not waiting.paused:
+                return  # _wait_for_token picks it up when the registering Lambda returns
+            del self._waiting[token]
+            self._closed_tokens.add(token)
+
+        self._resume(waiting, outcome)
+
+    def _resume(self, waiting, outcome):
+        """Completa el task en espera y sigue la ejecución hasta la próxima pausa."""
+        execution, definition = waiting.execution, waiting.definition
+        state_name = waiting.state_name
+        state = definition["States"][state_name]
+
+        with execution.lock:
+            wait_ms = (self.clock() - waiting.entered) * 1000 - waiting.invoke_ms
+            error = None
+            if outcome[0] == "success":
+                try:
+                    data = self._apply_result(state, waiting.data, outcome[1])
+                except StatesError as exc:
+                    error = exc
+            else:
+                error = StatesError(outcome[1] or "States.TaskFailed", outcome[2])
+
+            self._record(execution, state_name, state, waiting.entered, waiting.invoke_ms, wait_ms,
+                         error.error if error else None)
+            if error:
+                handled = self._handle_error(execution, state_name, state, waiting.data, error, waiting.attempts)
+                if handled is None:
+                    return
+                next_state, data = handled
+            else:
+                next_state = self._next(execution, state_name, state, data, waiting.attempts)
+            if next_state is not None:
+                self._run(execution, definition, next_state, data, waiting.attempts)
+
+    def _handle_error(self, execution, state_name, state, data, exc, attempts):
+        """Aplica Retry y luego Catch. Retorna (siguiente estado, data) o None si la ejecución terminó."""
+        for index, retrier in enumerate(state.get("Retry", [])):
+            if not _error_matches(retrier.get("ErrorEquals", []), exc.error):
+                continue
+            key = (state_name, index)
+            attempt = attempts.get(key, 0)
+            if attempt < retrier.get("MaxAttempts", 3):
+                attempts[key] = attempt + 1
+                interval = retrier.get("IntervalSeconds", 1) * retrier.get("BackoffRate", 2.0) ** attempt
+                time.sleep(interval * self.wait_scale)
+                return state_name, data
+            break
+
+        for catcher in state.get("Catch", []):
+            if _error_matches(catcher.get("ErrorEquals", []), exc.error):
+                result = {"Error": exc.error, "Cause": exc.cause}
+                return catcher["Next"], write_path(data, catcher.get("ResultPath", "$"), result)
+
+        self._finish(execution, "FAILED", error=exc.error, cause=exc.cause)
+        return None
+
+
+def install(client):
+    """`boto3.client('stepfunctions')` -> `client`. Retorna el uninstall."""
+    return patch_client("stepfunctions", client, "stepfunctions")
@@ -0,0 +1,197 @@
+"""
+Colector local de las trazas de runtime-layer/layer/python/instrumentation.py.
+
+Cada invocación instrumentada publica en su registro EMF los metadatos
+`trace`: correlation_id, order_id y sus spans (la invocación y cada llamada
+a AWS). Acá se juntan por pedido: los spans con el mismo correlation_id
+forman un árbol (API Gateway -> handler -> authorizer / Step Function) y
+los que llegan sin `trace` (registerToken, los callbacks de cocina y
+delivery, que empiezan en otro request) se unen por order_id.
+
+`critical_path()` recorre la traza hacia atrás desde el último fin: en cada
+span baja al hijo que termina último, y lo que no cubre ningún hijo es
+tiempo propio; los huecos entre raíces (el pedido esperando a cocina o a
+delivery) cuentan como `(espera)`. `print_timeline()` la dibuja estilo
+flame graph, una fila por span con su barra en la escala del pedido.
+
+Uso:
+    from localdev.tracing import TraceCollector, print_timeline
+    collector = TraceCollector()
+    uninstall = collector.install()
+    ...
+    print_timeline(collector.trace(order_id))
+"""
+import json
+import threading
+
+from localdev.metrics import instrumentation
+
+WAIT = "(espera)"
+
+
+def _end(span):
+    return span["start"] + span["duration_ms"]
+
+
+class TraceCollector:
+    """Spans por correlation_id, agrupados por pedido."""
+
+    def __init__(self):
+        self._spans = {}       # correlation_id -> [span]
+        self._orders = {}      # correlation_id -> order_id
+        self._lock = threading.Lock()
+
+    def install(self):
+        """Escucha las invocaciones en proceso. Retorna una función que deshace el cambio."""
+        module = instrumentation()
+        module.add_listener(self.ingest)
+        return lambda: module.remove_listener(self.ingest)
+
+    def ingest(self, record):
+        """Agrega los spans de un registro EMF (dict o línea JSON de log); ignora lo que no tenga `trace`."""
+        if isinstance(record, str):
+            try:
+                record = json.loads(record)
+            except ValueError:
+                return False
+        trace = record.get("trace") if isinstance(record, dict) else None
+        if not isinstance(trace, dict) or not trace.get("spans"):
+            return False
+        correlation_id = trace["correlation_id"]
+        spans = [{**span, "function": record.get("function_name"), "correlation_id": correlation_id}
+                 for span in trace["spans"]]
+        with self._lock:
+            self._spans.setdefault(correlation_id, []).extend(spans)
+            if trace.get("order_id"):
+                self._orders[correlation_id] = trace["order_id"]
+        return True
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._orders.clear()
+
+    def traces(self):
+        """{order_id (o correlation_id si no hay pedido): {order_id, correlation_ids, spans}}."""
+        with self._lock:
+            spans = {correlation_id: list(items) for correlation_id, items in self._spans.items()}
+            orders = dict(self._orders)
+        groups = {}
+        for correlation_id, items in spans.items():
+            key = orders.get(correlation_id, correlation_id)
+            group = groups.setdefault(key, {"order_id": orders.get(correlation_id), "correlation_ids": [],
+                                            "spans": []})
+            group["correlation_ids"].append(correlation_id)
+            group["spans"].extend(items)
+        for group in groups.values():
+            group["spans"].sort(key=lambda span: span["start"])
+        return groups
+
+    def trace(self, order_id):
+        return self.traces().get(order_id)
+
+
+def _tree(spans):
+    """(raíces, {span_id: hijos}) ordenados por inicio; un padre que no llegó deja al span como raíz."""
+    ids = {span["span_id"] for span in spans}
+    children = {}
+    roots = []
+    for span in sorted(spans, key=lambda span: span["start"]):
+        if span.get("parent_id") in ids:
+            children.setdefault(span["parent_id"], []).append(span)
+        else:
+            roots.append(span)
+    return roots, children
+
+
+def _walk(span, children, until, segments):
+    """Agrega a `segments` (de atrás hacia adelante) el camino crítico de `span` hasta `until`."""
+    cursor = min(_end(span), until)
+    for child in sorted(children.get(span["span_id"], []), key=_end, reverse=True):
+        if child["start"] >= cursor:
+            continue
+        child_end = min(_end(child), cursor)
+        segments.append((span, cursor - child_end))
+        _walk(child, children, child_end, segments)
+        cursor = max(child["start"], span["start"])
+        if cursor <= span["start"]:
+            break
+    segments.append((span, cursor - span["start"]))
+
+
+def _path(trace):
+    roots, children = _tree(trace["spans"])
+    if not roots:
+        return []
+    start = min(span["start"] for span in roots)
+    end = max(_end(span) for span in roots)
+    # A virtual root spanning the whole order: the gaps between roots are waiting time
+    whole = {"span_id": None, "name": WAIT, "kind": "wait", "function": None, "start": start,
+             "duration_ms": end - start}
+    segments = []
+    _walk(whole, {None: roots, **children}, end, segments)
+
+    path = []
+    for span, ms in reversed(segments):
+        if ms <= 0:
+            continue
+        if path and path[-1]["span"] is span:
+            path[-1]["ms"] += ms
+        else:
+            path.append({"span": span, "ms": ms})
+    return path
+
+
+def critical_path(trace):
+    """[{name, kind, function, ms}] en orden cronológico: qué estuvo frenando al pedido en cada tramo."""
+    return [{"name": step["span"]["name"], "kind": step["span"]["kind"], "function": step["span"]["function"],
+             "ms": round(step["ms"], 3)} for step in _path(trace)]
+
+
+def hop(step):
+    """`createOrder` para una invocación, `createOrder DynamoDB.GetItem` para una de sus llamadas."""
+    function = (step["function"] or "").rsplit("-", 1)[-1]
+    if step["kind"] == "call":
+        return f"{function} {step['name']}"
+    return function if step["kind"] == "invocation" else step["name"]
+
+
+def critical_path_by_hop(path):
+    """Milisegundos del camino crítico por salto (función o llamada de una función), de mayor a menor."""
+    totals = {}
+    for step in path:
+        totals[hop(step)] = totals.get(hop(step), 0.0) + step["ms"]
+    return {name: round(ms, 3) for name, ms in sorted(totals.items(), key=lambda item: item[1], reverse=True)}
+
+
+def print_timeline(trace, width=60, calls=True):
+    """Timeline estilo flame graph: una fila por span, indentada por profundidad; * marca el camino crítico."""
+    if not trace or not trace["spans"]:
+        return
+    roots, children = _tree(trace["spans"])
+    start = min(span["start"] for span in trace["spans"])
+    total = max(_end(span) for span in trace["spans"]) - start or 1.0
+    critical = {step["span"]["span_id"] for step in _path(trace)}
+
+    rows = []
+
+    def visit(span, depth):
+        if span["kind"] == "invocation" or calls:
+            rows.append((span, depth))
+        for child in children.get(span["span_id"], []):
+            visit(child, depth + 1)
+
+    for root in roots:
+        visit(root, 0)
+
+    label = max(len("  " * depth + span["name"]) for span, depth in rows) + 2
+    title = trace["order_id"] or trace["correlation_ids"][0]
+    print(f"\n🔎 {title}: {total:.2f} ms, {len(trace['correlation_ids'])} correlation id(s), "
+          f"{len(trace['spans'])} spans")
+    for span, depth in rows:
+        offset = int((span["start"] - start) / total * width)
+        length = max(1, int(round(span["duration_ms"] / total * width)))
+        bar = " " * offset + ("█" if span["kind"] == "invocation" else "▒") * min(length, width - offset or 1)
+        marker = "*" if span["span_id"] in critical else " "
+        error = " ❌" if span.get("status") == "error" else ""
+        print(f"{marker} {'  ' * depth + span['name']:<{label}}|{bar:<{width}}| {span['duration_ms']:>9.2f} ms{error}")
@@ -2,13 +2,32 @@ import json
 import uuid
 import time
 import os
+import random
 import boto3
-from common import response, get_table, TABLE_ORDERS, STATE_MACHINE_ARN, stepfunctions
+from botocore.exceptions import ClientError
+from common import response, batch_get_items, dynamodb, TABLE_ORDERS
+from instrumentation import current_trace, instrument
+from order_shards import partition_key, status_key
+import outbox
+import reservations
+import stock_shards
 from auth_helper import get_bearer_token, validate_token_via_lambda
 
 # Env vars
 TABLE_PRODUCTS = os.environ.get('TABLE_PRODUCTS')
 
+# TransactWriteItems admite 100 operaciones: N productos + la reserva + el pedido + el evento del outbox
+MAX_PRODUCTS_PER_ORDER = 97
+MAX_TRANSACT_ITEMS = 100
+# Attempts after a stock shard ran dry or another checkout held it (TransactionConflict)
+STOCK_RETRIES = int(os.environ.get('STOCK_RETRIES', '3'))
+
+def _read_products(local_id, product_ids):
+    keys = [{'local_id': local_id, 'producto_id': pid} for pid in product_ids]
+    products = {p['producto_id']: p for p in batch_get_items(TABLE_PRODUCTS, keys)}
+    return products, stock_shards.read(TABLE_PRODUCTS, products)
+
+@instrument
 def create_order(event, context):
     # Handle OPTIONS preflight request
     method = event.get("httpMethod") or event.get("requestContext", {}).get("http", {}).get("method")
@@ -45,55 +64,45 @@ def create_order(event, context):
              return response(400, {"error": "Faltan datos requeridos (local_id, productos)"})
 
         # 1. Validate Stock and Calculate Total
-        table_products = get_table(TABLE_PRODUCTS)
         total_price = 0.0
         
         items_internal = [] # Standardize for internal use
+        quantities = {} # Repeated lines merged: batch reads and transactions reject duplicate keys
         for p in productos:
             pid = p.get('producto_id')
             qty = int(p.get('cantidad', 1))
             items_internal.append({'product_id': pid, 'quantity': qty})
+            quantities[pid] = quantities.get(pid, 0) + qty
+
+        if len(quantities) > MAX_PRODUCTS_PER_ORDER:
+            return response(400, {"error": f"Máximo {MAX_PRODUCTS_PER_ORDER} productos distintos por pedido"})
         
-        # Verification pass
-        for item in items_internal:
-            product_id = item['product_id']
-            quantity = item['quantity']
-            
-            p_res = table_products.get_item(Key={'local_id': local_id, 'producto_id': product_id})
-            if 'Item' not in p_res:
+        # Verification pass (single BatchGetItem, plus one for the stock shards of sharded products)
+        products, stocks = _read_products(local_id, quantities)
+
+        for product_id, quantity in quantities.items():
+            product = products.get(product_id)
+            if not product or stock_shards.is_shard(product_id):
                  return response(400, {"error": f"Producto {product_id} no existe en {local_id}"})
             
-            product = p_res['Item']
-            stock = int(product.get('stock', 0))
+            stock = sum(stocks[product_id])
             if stock < quantity:
                 return response(400, {"error": f"Stock insuficiente para {product.get('nombre')}"})
             
             total_price += float(product.get('precio', 0)) * quantity
 
-        # Update Stock pass (Decrement)
-        for item in items_internal:
-            product_id = item['product_id']
-            quantity = item['quantity']
-            
-            table_products.update_item(
-                Key={'local_id': local_id, 'producto_id': product_id},
-                UpdateExpression="set stock = stock - :val",
-                ExpressionAttributeValues={':val': quantity},
-                ReturnValues="UPDATED_NEW"
-            )
-
         # 2. Create Order
         order_id = str(uuid.uuid4())
         timestamp = int(time.time())
         iso_time = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(timestamp))
         
-        table_orders = get_table(TABLE_ORDERS)
         item_order = {
-            'local_id': local_id,      # PK
+            'local_id': partition_key(local_id, order_id),  # PK (<local_id>#<shard> with ORDER_SHARDS)
             'pedido_id': order_id,     # SK
             'correo': username,        # GSI Key
             'user_id': username,       # Legacy
             'status': estado_inicial,
+            'local_status': status_key(local_id, estado_inicial, order_id),  # GSI by_local_status
             'items': items_internal,
             'productos': productos,    # Store original format too
             'total_price': str(costo_user if costo_user else total_price), 
@@ -101,26 +110,53 @@ def create_order(event, context):
             'created_at': iso_time,
             'updated_at': iso_time
         }
-        table_orders.put_item(Item=item_order)
 
-        # 3. Start Workflow (optional - only if Step Function exists)
-        try:
-            sf_input = json.dumps({
-                "order_id": order_id,
-                "local_id": local_id,
-                "items": items_internal
-            })
-            
-            stepfunctions.start_execution(
-                stateMachineArn=STATE_MACHINE_ARN,
-                name=order_id,
-                input=sf_input
-            )
-            print(f"Workflow started for order {order_id}")
-        except Exception as sf_error:
-            # Log the error but don't fail the order creation
-            print(f"Warning: Could not start workflow for order {order_id}: {sf_error}")
-            # Order is still created successfully even if workflow fails
+        # The workflow starts from the outbox (relayOutbox), never without its order
+        workflow_start = outbox.workflow_start(order_id, {
+            "order_id": order_id,
+            "local_id": local_id,
+            "items": items_internal,
+            "trace": current_trace()
+        }, timestamp)
+
+        # Stock decrement (conditional, one Update per stock shard used) + its reservation + order put
+        # + outbox event in one transaction: the workflow commits or releases exactly what was taken here
+        for attempt in range(STOCK_RETRIES + 1):
+            transact_items, owners, lines = [], [], []
+            for product_id, quantity in quantities.items():
+                # Random starting shard: concurrent checkouts of a hot product land on different counters
+                plan = stock_shards.allocate(stocks[product_id], quantity, random.randrange(len(stocks[product_id])))
+                if plan is None:
+                    return response(400, {"error": f"Stock insuficiente para {products[product_id].get('nombre')}"})
+                transact_items += stock_shards.decrements(TABLE_PRODUCTS, local_id, product_id, plan)
+                owners += [product_id] * len(plan)
+                lines += [(product_id, shard, take) for shard, take in plan]
+            if len(transact_items) + 3 > MAX_TRANSACT_ITEMS:
+                return response(400, {"error": "Pedido demasiado grande para el stock disponible"})
+            transact_items.append(reservations.hold(order_id, local_id, lines, timestamp))
+            transact_items.append({'Put': {'TableName': TABLE_ORDERS, 'Item': item_order}})
+            transact_items.append(workflow_start)
+
+            try:
+                dynamodb.meta.client.transact_write_items(TransactItems=transact_items)
+                break
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'TransactionCanceledException':
+                    raise
+                # Another checkout emptied or held a shard between the read and the write
+                reasons = e.response.get('CancellationReasons', [])
+                contended = [(owners[index], reason.get('Code')) for index, reason in enumerate(reasons[:len(owners)])
+                             if reason.get('Code') in ('ConditionalCheckFailed', 'TransactionConflict')]
+                if not contended:
+                    raise
+                if attempt == STOCK_RETRIES:
+                    product_id, code = contended[0]
+                    nombre = products[product_id].get('nombre')
+                    if code == 'ConditionalCheckFailed':
+                        return response(400, {"error": f"Stock insuficiente para {nombre}"})
+                    return response(409, {"error": f"Demasiados pedidos simultáneos de {nombre}, intenta de nuevo"})
+                time.sleep(random.uniform(0, 0.01 * 2 ** attempt))
+                products, stocks = _read_products(local_id, quantities)
 
         return response(201, {"message": "Pedido creado", "order_id": order_id})
 
@@ -2,10 +2,13 @@ import json
 import os
 import boto3
 from common import response, get_table
+from instrumentation import instrument
+from order_shards import key_candidates
 from auth_helper import get_bearer_token, validate_token_via_lambda
 
 TABLE_ORDERS = os.environ.get('TABLE_ORDERS')
 
+@instrument
 def handler(event, context):
     try:
         # Validate token (any authenticated user can check status)
@@ -24,9 +27,13 @@ def handler(event, context):
              return response(400, {"error": "Faltan parametros (local_id, pedido_id)"})
 
         table = get_table(TABLE_ORDERS)
-        res = table.get_item(Key={'local_id': local_id, 'pedido_id': pedido_id})
-        
-        item = res.get('Item')
+        item = None
+        # Sharded key first, then the plain local_id of orders not migrated yet
+        for key in key_candidates(local_id, pedido_id):
+            item = table.get_item(Key=key).get('Item')
+            if item:
+                break
+
         if not item:
             return response(404, {"error": "Pedido no encontrado"})
             
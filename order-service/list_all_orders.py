@@ -1,8 +1,8 @@
 import json
 import os
-import boto3
-
-dynamodb = boto3.resource('dynamodb')
+from common import get_table
+from instrumentation import instrument
+from order_shards import public
 
 CORS_HEADERS = {"Access-Control-Allow-Origin": "*", "Content-Type": "application/json"}
 
@@ -13,9 +13,10 @@ def _resp(code, body):
         "body": json.dumps(body, ensure_ascii=False, default=str)
     }
 
+@instrument
 def handler(event, context):
     table_name = os.environ.get('TABLE_ORDERS')
-    table = dynamodb.Table(table_name)
+    table = get_table(table_name)
     
     # Verificar Rol - Fix authorizer context path
     authorizer_context = event.get('requestContext', {}).get('authorizer', {})
@@ -46,7 +47,7 @@ def handler(event, context):
         last_evaluated_key = response.get('LastEvaluatedKey')
         
         return _resp(200, {
-            'items': items,
+            'items': [public(item) for item in items],
             'lastKey': json.dumps(last_evaluated_key) if last_evaluated_key else None
         })
     except Exception as e:
@@ -0,0 +1,210 @@
+"""
+Caché del catálogo de productos por contenedor (read-through).
+
+El catálogo de un local se carga con un único Query paginado sobre su
+partición y se sirve desde memoria a product_list y product_id.
+
+- CATALOG_CACHE_TTL: segundos máximos que vive un catálogo cargado. También
+  acota cuánto puede atrasarse el `stock` mostrado, ya que create_order lo
+  descuenta sin tocar la versión.
+- CATALOG_VERSION_CHECK: cada cuántos segundos se compara la versión del
+  catálogo con `catalog_version` del local en Burger-Locales;
+  product_create/update/delete la incrementan, así los contenedores tibios
+  se refrescan en segundos. La versión no vive en Burger-Productos: ahí
+  sería una fila más para los scans y para create_order.
+- CATALOG_CACHE_MAX_ITEMS: total de productos en memoria (un local sin
+  productos cuenta como uno); al superarlo se descartan los locales usados
+  menos recientemente.
+- MENU_LOCAL_ID: local del menú público cuando el request no trae
+  `local_id` (BURGER-LOCAL-001 al desplegar, como antes de los locales);
+  vacío usa DEFAULT_LOCAL_ID.
+- CATALOG_RENDERED_MAX: respuestas ya serializadas (JSON + ETag) que se
+  guardan por catálogo cargado (`rendered`); cada página se serializa y
+  hashea una vez por versión, no en cada request.
+
+Solo se cargan y guardan locales que existen en Burger-Locales: para un
+`local_id` desconocido `get_catalog` lanza LocalError(404) después de un
+único GetItem, sin consultar los productos ni ocupar la caché.
+
+Los shards de stock (stock_shards.py) viven en la misma partición: el
+`stock` de cada producto es la suma de sus shards.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+from common import get_table, render, DEFAULT_LOCAL_ID, TABLE_LOCALS
+from auth_helper import LocalError
+from instrumentation import logger
+import stock_shards
+
+PRODUCTS_TABLE = os.environ.get('PRODUCTS_TABLE')
+CATALOG_CACHE_TTL = int(os.environ.get('CATALOG_CACHE_TTL', '60'))
+CATALOG_VERSION_CHECK = int(os.environ.get('CATALOG_VERSION_CHECK', '5'))
+CATALOG_CACHE_MAX_ITEMS = int(os.environ.get('CATALOG_CACHE_MAX_ITEMS', '5000'))
+CATALOG_RENDERED_MAX = int(os.environ.get('CATALOG_RENDERED_MAX', '64'))
+# Local of the public menu when the request names none (menu clients from before local_id)
+MENU_LOCAL_ID = os.environ.get('MENU_LOCAL_ID') or DEFAULT_LOCAL_ID
+
+# Marker row left in the products partition by earlier versions of this module
+LEGACY_VERSION_ITEM_ID = '#CATALOG_VERSION'
+
+stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+_entries = OrderedDict()  # local_id -> catálogo cargado
+_lock = threading.Lock()
+
+
+def _load(local_id):
+    table = get_table(PRODUCTS_TABLE)
+    items = []
+    shard_stock = {}
+    # Read before the products: a bump in between only causes an extra reload
+    version = _current_version(local_id)
+    if version is None:
+        raise LocalError(404, "Local no encontrado")
+
+    query_kwargs = {'KeyConditionExpression': Key('local_id').eq(local_id)}
+    while True:
+        response = table.query(**query_kwargs)
+        for item in response.get('Items', []):
+            if item['producto_id'] == LEGACY_VERSION_ITEM_ID:
+                continue
+            if stock_shards.is_shard(item['producto_id']):
+                pid = stock_shards.base_id(item['producto_id'])
+                shard_stock[pid] = shard_stock.get(pid, 0) + int(item.get('stock', 0))
+            else:
+                items.append(item)
+        if 'LastEvaluatedKey' not in response:
+            break
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    for item in items:
+        if item['producto_id'] in shard_stock:
+            item['stock'] = int(item.get('stock', 0)) + shard_stock[item['producto_id']]
+
+    now = time.time()
+    return {
+        'items': items,  # ordered by producto_id (sort key)
+        'by_id': {item['producto_id']: item for item in items},
+        'version': version,
+        'rendered': {},  # response key -> (payload, etag)
+        'loaded_at': now,
+        'checked_at': now,
+    }
+
+
+def _current_version(local_id):
+    """`catalog_version` del local, o None si no está en Burger-Locales."""
+    table = get_table(TABLE_LOCALS)
+    item = table.get_item(
+        Key={'local_id': local_id},
+        # local_id too: a local never bumped has no catalog_version and would come back empty
+        ProjectionExpression='local_id, catalog_version'
+    ).get('Item')
+    return int(item.get('catalog_version', 0)) if item else None
+
+
+def _weight(entry):
+    # An empty catalog still takes a slot: unknown or empty locals cannot pile up uncounted
+    return max(1, len(entry['items']))
+
+
+def _store(local_id, entry):
+    with _lock:
+        _entries[local_id] = entry
+        _entries.move_to_end(local_id)
+        total = sum(_weight(e) for e in _entries.values())
+        while total > CATALOG_CACHE_MAX_ITEMS and len(_entries) > 1:
+            _, evicted = _entries.popitem(last=False)
+            total -= _weight(evicted)
+            stats['evictions'] += 1
+
+
+def get_catalog(local_id):
+    """Retorna el catálogo del local, desde memoria si sigue vigente; LocalError(404) si el local no existe."""
+    now = time.time()
+    with _lock:
+        entry = _entries.get(local_id)
+
+    if entry and now - entry['loaded_at'] >= CATALOG_CACHE_TTL:
+        entry = None
+
+    if entry and now - entry['checked_at'] >= CATALOG_VERSION_CHECK:
+        if _current_version(local_id) != entry['version']:
+            entry = None
+        else:
+            entry['checked_at'] = now
+
+    if entry:
+        stats['hits'] += 1
+        with _lock:
+            if local_id in _entries:
+                _entries.move_to_end(local_id)
+        return entry
+
+    stats['misses'] += 1
+    try:
+        entry = _load(local_id)
+    except LocalError:
+        # The local was deleted from Burger-Locales: drop what is still cached
+        with _lock:
+            _entries.pop(local_id, None)
+        raise
+    _store(local_id, entry)
+    return entry
+
+
+def list_products(local_id):
+    return get_catalog(local_id)['items']
+
+
+def get_product(local_id, product_id):
+    return get_catalog(local_id)['by_id'].get(product_id)
+
+
+def rendered(catalog, key, build):
+    """(payload, etag) de `build(catalog)`, calculado una vez por catálogo cargado y `key`."""
+    pages = catalog['rendered']
+    page = pages.get(key)
+    if page is None:
+        if len(pages) >= CATALOG_RENDERED_MAX:
+            pages.clear()
+        page = pages[key] = render(build(catalog))
+    return page
+
+
+def max_age(local_id):
+    """Segundos durante los que el catálogo en memoria no se revalidará (para Cache-Control)."""
+    with _lock:
+        entry = _entries.get(local_id)
+    if not entry:
+        return 0
+    now = time.time()
+    remaining = min(CATALOG_VERSION_CHECK - (now - entry['checked_at']),
+                    CATALOG_CACHE_TTL - (now - entry['loaded_at']))
+    return max(0, int(remaining))
+
+
+def bump_version(local_id):
+    """Marca el catálogo del local como modificado (llamar tras cada escritura)."""
+    try:
+        get_table(TABLE_LOCALS).update_item(
+            Key={'local_id': local_id},
+            UpdateExpression="ADD catalog_version :one",
+            # Never create a bare row for a local that is not in Burger-Locales
+            ConditionExpression="attribute_exists(local_id)",
+            ExpressionAttributeValues={':one': 1}
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        # Unknown local: other containers refresh after CATALOG_CACHE_TTL
+    with _lock:
+        _entries.pop(local_id, None)
+
+
+def log_stats(handler):
+    logger.debug("Catalog cache", extra={'catalog_cache': handler, 'locals': len(_entries), **stats})
@@ -1,10 +1,11 @@
 import json
 import os
-import boto3
 import uuid
-from auth_helper import get_bearer_token, validate_token_via_lambda
-
-dynamodb = boto3.resource('dynamodb')
+import catalog_cache
+import stock_shards
+from auth_helper import LocalError, get_bearer_token, resolve_local_id, validate_token
+from common import get_table
+from instrumentation import instrument
 
 CORS_HEADERS = {
     "Access-Control-Allow-Origin": "*",
@@ -20,35 +21,41 @@ def _resp(code, body):
         "body": json.dumps(body, ensure_ascii=False)
     }
 
+@instrument
 def lambda_handler(event, context):
     # Validate token and role
     token = get_bearer_token(event)
-    valido, error, rol = validate_token_via_lambda(token)
+    valido, error, identity = validate_token(token)
     
     if not valido:
         return _resp(403, {"message": error or "Token inválido"})
     
     # Require Gerente role
-    if rol not in ("Admin", "Gerente"):
+    if identity.role not in ("Admin", "Gerente"):
         return _resp(403, {"message": "Permiso denegado: se requiere rol Gerente"})
     
     table_name = os.environ.get('PRODUCTS_TABLE')
-    table = dynamodb.Table(table_name)
+    table = get_table(table_name)
     
     try:
         body = json.loads(event.get('body', '{}'))
         
-        local_id = body.get('local_id', 'BURGER-LOCAL-001')
+        try:
+            local_id = resolve_local_id(identity, body.get('local_id'))
+        except LocalError as e:
+            return _resp(e.status_code, {"message": e.message})
         nombre = body.get('nombre')
         descripcion = body.get('descripcion')
         categoria = body.get('categoria')
         precio = body.get('precio')
         stock = body.get('stock', 0)
+        shards = max(1, int(body.get('stock_shards', stock_shards.STOCK_SHARDS)))
         
         if not nombre or not precio:
             return _resp(400, {'error': 'Nombre y precio son requeridos'})
             
         product_id = f"prod-{str(uuid.uuid4())[:8]}"
+        parts = stock_shards.split(stock, shards)
         
         item = {
             'local_id': local_id,
@@ -57,13 +64,19 @@ def lambda_handler(event, context):
             'descripcion': descripcion,
             'categoria': categoria,
             'precio': str(precio),
-            'stock': int(stock),
+            'stock': parts[0],
             'imagen': body.get('imagen', '')
         }
+        if shards > 1:
+            item['stock_shards'] = shards
         
         table.put_item(Item=item)
+        with table.batch_writer() as batch:
+            for shard_item in stock_shards.shard_items(local_id, product_id, parts):
+                batch.put_item(Item=shard_item)
+        catalog_cache.bump_version(local_id)
         
-        return _resp(201, {'message': 'Producto creado', 'product': item})
+        return _resp(201, {'message': 'Producto creado', 'product': {**item, 'stock': int(stock)}})
     except Exception as e:
         return _resp(500, {'error': str(e)})
 
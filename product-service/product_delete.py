@@ -1,9 +1,10 @@
 import json
 import os
-import boto3
-from auth_helper import get_bearer_token, validate_token_via_lambda
-
-dynamodb = boto3.resource('dynamodb')
+import catalog_cache
+import stock_shards
+from auth_helper import LocalError, get_bearer_token, resolve_local_id, validate_token
+from common import get_table
+from instrumentation import instrument
 
 CORS_HEADERS = {
     "Access-Control-Allow-Origin": "*",
@@ -19,20 +20,21 @@ def _resp(code, body):
         "body": json.dumps(body, ensure_ascii=False)
     }
 
+@instrument
 def lambda_handler(event, context):
     # Validate token and role
     token = get_bearer_token(event)
-    valido, error, rol = validate_token_via_lambda(token)
+    valido, error, identity = validate_token(token)
     
     if not valido:
         return _resp(403, {"message": error or "Token inválido"})
     
     # Require Gerente role
-    if rol not in ("Admin", "Gerente"):
+    if identity.role not in ("Admin", "Gerente"):
         return _resp(403, {"message": "Permiso denegado: se requiere rol Gerente"})
     
     table_name = os.environ.get('PRODUCTS_TABLE')
-    table = dynamodb.Table(table_name)
+    table = get_table(table_name)
     
     # Try Body first
     body = {}
@@ -43,13 +45,20 @@ def lambda_handler(event, context):
             pass
 
     product_id = body.get('producto_id') 
-    local_id = body.get('local_id') or 'BURGER-LOCAL-001'
+    try:
+        local_id = resolve_local_id(identity, body.get('local_id'))
+    except LocalError as e:
+        return _resp(e.status_code, {"message": e.message})
     
     if not product_id:
         return _resp(400, {'error': 'Falta producto_id en el body'})
 
     try:
-        table.delete_item(Key={'local_id': local_id, 'producto_id': product_id})
+        product = table.get_item(Key={'local_id': local_id, 'producto_id': product_id}).get('Item') or {}
+        with table.batch_writer() as batch:
+            for shard in range(stock_shards.shard_count(product)):
+                batch.delete_item(Key=stock_shards.shard_key(local_id, product_id, shard))
+        catalog_cache.bump_version(local_id)
         
         return _resp(200, {'message': 'Producto eliminado'})
     except Exception as e:
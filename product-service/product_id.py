@@ -1,51 +1,41 @@
 import json
-import os
-import boto3
-
-dynamodb = boto3.resource('dynamodb')
-
-CORS_HEADERS = {
-    "Access-Control-Allow-Origin": "*",
-    "Access-Control-Allow-Headers": "Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token",
-    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS",
-    "Content-Type": "application/json"
-}
-
-def _resp(code, body):
-    return {
-        "statusCode": code,
-        "headers": CORS_HEADERS,
-        "body": json.dumps(body, ensure_ascii=False, default=str)
-    }
+import catalog_cache
+from common import response
+from auth_helper import LocalError
+from instrumentation import instrument
 
+@instrument
 def lambda_handler(event, context):
     # Public endpoint - no authentication required
-    table_name = os.environ.get('PRODUCTS_TABLE')
-    table = dynamodb.Table(table_name)
-    
-    # Try Body (method is POST per user template)
+    # GET sends producto_id / local_id in the query string; POST (older clients) in the body
     body = {}
     if event.get('body'):
         try:
             body = json.loads(event.get('body'))
         except:
             pass
-            
-    product_id = body.get('producto_id')
-    local_id = body.get('local_id') or 'BURGER-LOCAL-001'
-    
+
+    query_params = event.get('queryStringParameters') or {}
+    product_id = body.get('producto_id') or query_params.get('producto_id')
+    local_id = body.get('local_id') or query_params.get('local_id') or catalog_cache.MENU_LOCAL_ID
+
     if not product_id:
-        return _resp(400, {'error': 'Falta producto_id en el body'})
+        return response(400, {'error': 'Falta producto_id'})
+    if not local_id:
+        return response(400, {'error': 'Falta local_id'})
 
     try:
-        response = table.get_item(Key={'local_id': local_id, 'producto_id': product_id})
-        item = response.get('Item')
-        
-        if not item:
-            return _resp(404, {'error': 'Producto no encontrado'})
-            
-        return _resp(200, item)
+        # Served from the per-container catalog cache, rendered once per version
+        catalog = catalog_cache.get_catalog(local_id)
+        catalog_cache.log_stats('product_id')
+
+        if product_id not in catalog['by_id']:
+            return response(404, {'error': 'Producto no encontrado'})
+
+        item = catalog_cache.rendered(catalog, ('id', product_id), lambda c: c['by_id'][product_id])
+        return response(200, None, event=event, max_age=catalog_cache.max_age(local_id), rendered=item)
+    except LocalError as e:
+        return response(e.status_code, {'error': e.message})
     except Exception as e:
         print(f"Error getting product: {e}")
-        return _resp(500, {'error': str(e)})
-
+        return response(500, {'error': str(e)})
@@ -1,30 +1,27 @@
+import bisect
 import json
-import os
-import boto3
+import catalog_cache
+from common import response
+from auth_helper import LocalError
+from instrumentation import instrument
 
-dynamodb = boto3.resource('dynamodb')
 
-CORS_HEADERS = {
-    "Access-Control-Allow-Origin": "*",
-    "Access-Control-Allow-Headers": "Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token",
-    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS",
-    "Content-Type": "application/json"
-}
+def _page(catalog, local_id, after, limit):
+    items = catalog['items']
+    start = bisect.bisect_right([i['producto_id'] for i in items], after) if after else 0
 
-def _resp(code, body):
-    return {
-        "statusCode": code,
-        "headers": CORS_HEADERS,
-        "body": json.dumps(body, ensure_ascii=False, default=str)
-    }
+    page = items[start:start + limit]
+    last_evaluated_key = None
+    if start + limit < len(items) and page:
+        last_evaluated_key = {'local_id': local_id, 'producto_id': page[-1]['producto_id']}
 
+    return {'items': page, 'lastKey': last_evaluated_key}
+
+@instrument
 def lambda_handler(event, context):
     # Public endpoint - no authentication required
-    table_name = os.environ.get('PRODUCTS_TABLE')
-    table = dynamodb.Table(table_name)
-    
     try:
-        # Method is POST per user request, so limit/lastKey might come in Body
+        # GET sends everything in the query string (lastKey as JSON); POST (older clients) in the body
         body = {}
         if event.get('body'):
             try:
@@ -32,27 +29,30 @@ def lambda_handler(event, context):
             except:
                 pass
 
-        limit = int(body.get('limit', event.get('queryStringParameters', {}).get('limit', 20)))
-        last_key = body.get('lastKey')
-        
-        scan_kwargs = {
-            'Limit': limit
-        }
-        
-        if last_key:
-            scan_kwargs['ExclusiveStartKey'] = last_key
-            
-        response = table.scan(**scan_kwargs)
-        
-        items = response.get('Items', [])
-        last_evaluated_key = response.get('LastEvaluatedKey')
-        
-        return _resp(200, {
-            'items': items,
-            'lastKey': last_evaluated_key
-        })
-        
+        query_params = event.get('queryStringParameters') or {}
+        local_id = body.get('local_id') or query_params.get('local_id') or catalog_cache.MENU_LOCAL_ID
+        if not local_id:
+            return response(400, {'error': 'Falta local_id'})
+        try:
+            limit = int(body.get('limit', query_params.get('limit', 20)))
+            last_key = body.get('lastKey') or (json.loads(query_params['lastKey']) if query_params.get('lastKey') else None)
+        except ValueError:
+            return response(400, {'error': 'Parámetros de paginación inválidos (limit, lastKey)'})
+        if limit <= 0 or (last_key is not None and not isinstance(last_key, dict)):
+            return response(400, {'error': 'Parámetros de paginación inválidos (limit, lastKey)'})
+        after = str(last_key.get('producto_id', '')) if last_key else ''
+
+        # Served from the per-container catalog cache; paginated in memory and rendered once per version
+        catalog = catalog_cache.get_catalog(local_id)
+        page = catalog_cache.rendered(catalog, ('list', after, limit), lambda c: _page(c, local_id, after, limit))
+
+        catalog_cache.log_stats('product_list')
+
+        # GET: polling frontends send If-None-Match and get a 304 while the page is unchanged
+        return response(200, None, event=event, max_age=catalog_cache.max_age(local_id), rendered=page)
+
+    except LocalError as e:
+        return response(e.status_code, {'error': e.message})
     except Exception as e:
         print(f"Error listing products: {e}")
-        return _resp(500, {'error': str(e)})
-
+        return response(500, {'error': str(e)})
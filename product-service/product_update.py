@@ -1,9 +1,10 @@
 import json
 import os
-import boto3
-from auth_helper import get_bearer_token, validate_token_via_lambda
-
-dynamodb = boto3.resource('dynamodb')
+import catalog_cache
+import stock_shards
+from auth_helper import LocalError, get_bearer_token, resolve_local_id, validate_token
+from common import get_table
+from instrumentation import instrument
 
 CORS_HEADERS = {
     "Access-Control-Allow-Origin": "*",
@@ -19,24 +20,28 @@ def _resp(code, body):
         "body": json.dumps(body, ensure_ascii=False)
     }
 
+@instrument
 def lambda_handler(event, context):
     # Validate token and role
     token = get_bearer_token(event)
-    valido, error, rol = validate_token_via_lambda(token)
+    valido, error, identity = validate_token(token)
     
     if not valido:
         return _resp(403, {"message": error or "Token inválido"})
     
     # Require Gerente role
-    if rol not in ("Admin", "Gerente"):
+    if identity.role not in ("Admin", "Gerente"):
         return _resp(403, {"message": "Permiso denegado: se requiere rol Gerente"})
     
     table_name = os.environ.get('PRODUCTS_TABLE')
-    table = dynamodb.Table(table_name)
+    table = get_table(table_name)
     
     try:
         body = json.loads(event.get('body', '{}'))
-        local_id = body.get('local_id', 'BURGER-LOCAL-001')
+        try:
+            local_id = resolve_local_id(identity, body.get('local_id'))
+        except LocalError as e:
+            return _resp(e.status_code, {"message": e.message})
         product_id = body.get('producto_id')
         
         if not product_id:
@@ -55,9 +60,21 @@ def lambda_handler(event, context):
         if 'precio' in body:
             update_expr += "precio = :p, "
             expr_attr_values[':p'] = str(body['precio'])
-        if 'stock' in body:
-            update_expr += "stock = :s, "
-            expr_attr_values[':s'] = int(body['stock'])
+        # Restocking (or changing stock_shards) spreads the total over the product's shards
+        parts, stale_shards = None, range(0)
+        if 'stock' in body or 'stock_shards' in body:
+            current = table.get_item(Key={'local_id': local_id, 'producto_id': product_id}).get('Item') or {}
+            old_shards = stock_shards.shard_count(current)
+            shards = max(1, int(body.get('stock_shards', current.get('stock_shards', stock_shards.STOCK_SHARDS))))
+            if 'stock' in body:
+                total = int(body['stock'])
+            else:
+                total = sum(stock_shards.read(table_name, {product_id: current})[product_id]) if current else 0
+            parts = stock_shards.split(total, shards)
+            stale_shards = range(shards, old_shards)
+            update_expr += "stock = :s, stock_shards = :k, "
+            expr_attr_values[':s'] = parts[0]
+            expr_attr_values[':k'] = shards
             
         update_expr = update_expr.rstrip(", ")
         
@@ -70,8 +87,17 @@ def lambda_handler(event, context):
             ExpressionAttributeValues=expr_attr_values,
             ReturnValues="ALL_NEW"
         )
+        product = response.get('Attributes')
+        if parts is not None:
+            with table.batch_writer() as batch:
+                for shard_item in stock_shards.shard_items(local_id, product_id, parts):
+                    batch.put_item(Item=shard_item)
+                for shard in stale_shards:
+                    batch.delete_item(Key=stock_shards.shard_key(local_id, product_id, shard))
+            product = {**product, 'stock': sum(parts)}
+        catalog_cache.bump_version(local_id)
         
-        return _resp(200, {'message': 'Producto actualizado', 'product': response.get('Attributes')})
+        return _resp(200, {'message': 'Producto actualizado', 'product': product})
     except Exception as e:
         return _resp(500, {'error': str(e)})
 
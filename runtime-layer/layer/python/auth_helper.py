@@ -0,0 +1,295 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional, Tuple
+from common import get_table, lambda_client, DEFAULT_LOCAL_ID
+
+TOKENS_TABLE_USERS = os.environ.get('TOKENS_TABLE_USERS')
+TOKEN_CACHE_MAX_SIZE = int(os.environ.get('TOKEN_CACHE_MAX_SIZE', '1024'))
+TOKEN_CACHE_TTL = int(os.environ.get('TOKEN_CACHE_TTL', '300'))
+TOKEN_MODE = os.environ.get('TOKEN_MODE', 'opaque')
+JWT_SECRET = os.environ.get('JWT_SECRET', '')
+JWT_ALGORITHM = 'HS256'
+REVOCATION_CACHE_TTL = int(os.environ.get('REVOCATION_CACHE_TTL', '30'))
+
+# Item of the tokens table with the revoked tokens as "<jti or opaque token>|<exp>"
+REVOCATION_KEY = '__revoked__'
+
+if TOKEN_MODE == 'signed' and not JWT_SECRET:
+    # Otherwise PyJWT fails on every issue/verify with InvalidKeyError (a 500, not a 401)
+    raise RuntimeError("TOKEN_MODE=signed requiere JWT_SECRET")
+
+
+class Identity(NamedTuple):
+    user: str
+    role: str
+    local_id: str  # local of an employee token ('' for clients and managers)
+
+
+ANONYMOUS = Identity('', '', '')
+
+
+class LocalError(Exception):
+    """El local del request no se pudo resolver o el token no tiene acceso a él."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+class TokenCache:
+    """Caché LRU por contenedor: token -> (identidad, expiración).
+
+    Cada entrada vive como máximo `ttl` segundos y nunca más allá del
+    `expires` del propio token.
+    """
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[Tuple[Identity, float]]:
+        now = time.time()
+        with self._lock:
+            entry = self._items.get(token)
+            if entry is None:
+                return None
+            identity, expires_at, cached_until = entry
+            if now >= expires_at or now >= cached_until:
+                del self._items[token]
+                return None
+            self._items.move_to_end(token)
+            return identity, expires_at
+
+    def put(self, token: str, identity: Identity, expires_at: float) -> None:
+        now = time.time()
+        if expires_at <= now or self.max_size <= 0:
+            return
+        with self._lock:
+            self._items[token] = (identity, expires_at, min(expires_at, now + self.ttl))
+            self._items.move_to_end(token)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def discard(self, token: str) -> None:
+        with self._lock:
+            self._items.pop(token, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+_token_cache = TokenCache(TOKEN_CACHE_MAX_SIZE, TOKEN_CACHE_TTL)
+_revoked = {'jtis': frozenset(), 'loaded_at': 0.0}
+
+
+def get_bearer_token(event: dict) -> str:
+    auth_header = event.get('headers', {}).get('Authorization') or event.get('headers', {}).get('authorization')
+
+    if not auth_header:
+        return ""
+
+    # Remove 'Bearer ' prefix if present
+    if auth_header.lower().startswith('bearer '):
+        return auth_header[7:].strip()
+
+    return auth_header.strip()
+
+
+def is_signed_token(token: str) -> bool:
+    """Un JWT tiene tres segmentos; un token opaco (UUID) ninguno."""
+    return token.count('.') == 2
+
+
+def parse_expires(expires_str) -> float:
+    # Same format written by login/register ('%Y-%m-%d %H:%M:%S', local time)
+    if not expires_str:
+        return float('inf')
+    try:
+        return datetime.strptime(expires_str, "%Y-%m-%d %H:%M:%S").timestamp()
+    except ValueError:
+        return float('inf')
+
+
+def _revoked_ids() -> frozenset:
+    # Loaded lazily and cached per container for REVOCATION_CACHE_TTL seconds
+    now = time.time()
+    if not TOKENS_TABLE_USERS or now - _revoked['loaded_at'] < REVOCATION_CACHE_TTL:
+        return _revoked['jtis']
+
+    item = get_table(TOKENS_TABLE_USERS).get_item(Key={'token': REVOCATION_KEY}).get('Item') or {}
+    jtis = set()
+    for entry in item.get('jtis', set()):
+        jti, _, exp = entry.partition('|')
+        if not exp or int(exp) > now:
+            jtis.add(jti)
+
+    _revoked['jtis'] = frozenset(jtis)
+    _revoked['loaded_at'] = now
+    return _revoked['jtis']
+
+
+def is_revoked(token_id: Optional[str]) -> bool:
+    """True si el logout revocó el token (`jti` de un JWT o el token opaco)."""
+    return bool(token_id) and token_id in _revoked_ids()
+
+
+def revoke(token_id: str, expires_at: int) -> None:
+    """Agrega el token a la lista de revocación hasta `expires_at` (epoch) y poda las entradas vencidas."""
+    table = get_table(TOKENS_TABLE_USERS)
+    table.update_item(
+        Key={'token': REVOCATION_KEY},
+        UpdateExpression="ADD jtis :j",
+        ExpressionAttributeValues={':j': {f"{token_id}|{int(expires_at)}"}}
+    )
+
+    # Prune entries whose tokens already expired so the item stays small
+    now = time.time()
+    item = table.get_item(Key={'token': REVOCATION_KEY}).get('Item') or {}
+    expired = {e for e in item.get('jtis', set()) if int(e.partition('|')[2] or 0) <= now}
+    if expired:
+        table.update_item(
+            Key={'token': REVOCATION_KEY},
+            UpdateExpression="DELETE jtis :j",
+            ExpressionAttributeValues={':j': expired}
+        )
+
+    _revoked['loaded_at'] = 0.0
+    _token_cache.discard(token_id)
+
+
+def verify_signed_token(token: str) -> Optional[Dict]:
+    """Claims de un JWT con firma y expiración válidas y no revocado; None si no."""
+    import jwt  # only needed for signed tokens
+
+    try:
+        claims = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM], options={'require': ['exp', 'sub']})
+    except jwt.InvalidTokenError:
+        return None
+
+    if is_revoked(claims.get('jti')):
+        return None
+
+    return claims
+
+
+def _validate_token_signed(token: str) -> Tuple[bool, str, Identity]:
+    claims = verify_signed_token(token)
+    if not claims:
+        return (False, "Token inválido o expirado", ANONYMOUS)
+
+    return (True, "", Identity(claims.get('sub', ''), claims.get('rol', ''), claims.get('local_id', '')))
+
+
+def _validate_token_direct(token: str) -> Tuple[bool, str, Identity]:
+    item = get_table(TOKENS_TABLE_USERS).get_item(Key={'token': token}).get('Item')
+
+    if not item:
+        return (False, "Token inválido o expirado", ANONYMOUS)
+
+    expires_at = parse_expires(item.get('expires'))
+    if time.time() >= expires_at:
+        return (False, "Token inválido o expirado", ANONYMOUS)
+
+    identity = Identity(item.get('user_id', ''), item.get('rol', ''), item.get('local_id', ''))
+    _token_cache.put(token, identity, expires_at)
+
+    return (True, "", identity)
+
+
+def _validate_token_remote(token: str) -> Tuple[bool, str, Identity]:
+    lambda_name = os.environ.get('VALIDAR_TOKEN_LAMBDA_NAME')
+
+    if not lambda_name:
+        print("⚠️ VALIDAR_TOKEN_LAMBDA_NAME not configured")
+        return (False, "Configuración de validación no disponible", ANONYMOUS)
+
+    # Invoke the validation Lambda
+    response = lambda_client.invoke(
+        FunctionName=lambda_name,
+        InvocationType='RequestResponse',
+        Payload=json.dumps({
+            'authorizationToken': f'Bearer {token}',
+            'methodArn': 'arn:aws:execute-api:*:*:*'  # Dummy ARN for validation
+        })
+    )
+
+    payload = json.loads(response['Payload'].read())
+
+    # Check if the policy allows access
+    policy_document = payload.get('policyDocument', {})
+    statements = policy_document.get('Statement', [])
+
+    # If any statement has Effect=Allow, token is valid
+    is_valid = any(stmt.get('Effect') == 'Allow' for stmt in statements)
+
+    if not is_valid:
+        return (False, "Token inválido o expirado", ANONYMOUS)
+
+    # Extract identity from context
+    context = payload.get('context', {})
+    identity = Identity(context.get('username', ''), context.get('role', ''), context.get('local_id', ''))
+
+    # The authorizer does not return the expiry, so only the cache TTL bounds it
+    _token_cache.put(token, identity, float('inf'))
+
+    return (True, "", identity)
+
+
+def validate_token(token: str) -> Tuple[bool, str, Identity]:
+    """(válido, error, identidad): usuario, rol y, en tokens de empleado, su local."""
+    if not token:
+        return (False, "Token no proporcionado", ANONYMOUS)
+    if token == REVOCATION_KEY:
+        return (False, "Token inválido o expirado", ANONYMOUS)
+
+    try:
+        # Signed tokens (JWT) are verified with CPU only
+        if is_signed_token(token):
+            return _validate_token_signed(token)
+
+        cached = _token_cache.get(token)
+        if cached:
+            # Logged out in another container: its row is gone, only the revocation list knows
+            if is_revoked(token):
+                _token_cache.discard(token)
+                return (False, "Token inválido o expirado", ANONYMOUS)
+            return (True, "", cached[0])
+
+        # Read the tokens table directly when available; the auth Lambda is the fallback
+        if TOKENS_TABLE_USERS:
+            return _validate_token_direct(token)
+        return _validate_token_remote(token)
+
+    except Exception as e:
+        print(f"Error validating token: {e}")
+        return (False, f"Error al validar token: {str(e)}", ANONYMOUS)
+
+
+def validate_token_via_lambda(token: str) -> Tuple[bool, str, str]:
+    valido, error, identity = validate_token(token)
+    return (valido, error, identity.role)
+
+
+def resolve_local_id(identity: Identity, requested: Optional[str] = None) -> str:
+    """Local sobre el que actúa el request.
+
+    Un token de empleado trae su local: el request no puede pedir otro (403),
+    salvo Admin. Los demás usan el `local_id` del request o DEFAULT_LOCAL_ID;
+    sin ninguno de los dos, 400.
+    """
+    if identity.local_id:
+        if requested and requested != identity.local_id and identity.role != 'Admin':
+            raise LocalError(403, f"Permiso denegado: el empleado no pertenece a {requested}")
+        return requested or identity.local_id
+    local_id = requested or DEFAULT_LOCAL_ID
+    if not local_id:
+        raise LocalError(400, "Falta local_id")
+    return local_id
@@ -0,0 +1,177 @@
+"""
+Utilidades comunes compartidas entre todos los servicios serverless.
+
+Se publica como Lambda Layer (runtime-layer) y queda en /opt/python. Los
+clientes de AWS se crean en el primer uso y se reutilizan entre
+invocaciones, así cada Lambda solo paga por los clientes que realmente usa.
+"""
+import json
+import os
+import decimal
+import hashlib
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from datetime import datetime
+
+
+class _LazyClient:
+    """Cliente o recurso boto3 que se construye en el primer acceso."""
+
+    _all: List['_LazyClient'] = []
+    _hooks: List[Callable[[Any], None]] = []
+
+    def __init__(self, kind: str, service_name: str):
+        self._kind = kind  # 'client' | 'resource'
+        self._service_name = service_name
+        self._instance = None
+        self._lock = threading.Lock()
+        _LazyClient._all.append(self)
+
+    def _get(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    import boto3
+                    factory = boto3.resource if self._kind == 'resource' else boto3.client
+                    instance = factory(self._service_name)
+                    for hook in self._hooks:
+                        hook(instance)
+                    self._instance = instance
+        return self._instance
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+
+# Recursos AWS (perezosos, reutilizables entre invocaciones)
+dynamodb = _LazyClient('resource', 'dynamodb')
+stepfunctions = _LazyClient('client', 'stepfunctions')
+lambda_client = _LazyClient('client', 'lambda')
+events = _LazyClient('client', 'events')
+
+
+def on_client_created(hook: Callable[[Any], None]) -> None:
+    """Aplica `hook(instancia)` a cada cliente perezoso: los ya creados y los que se creen después."""
+    _LazyClient._hooks.append(hook)
+    for lazy in _LazyClient._all:
+        if lazy._instance is not None:
+            hook(lazy._instance)
+
+# Variables de entorno comunes
+TABLE_USERS = os.environ.get('TABLE_USERS')
+TABLE_EMPLOYEES = os.environ.get('TABLE_EMPLOYEES')
+TABLE_LOCALS = os.environ.get('TABLE_LOCALS')
+TABLE_ORDERS = os.environ.get('TABLE_ORDERS')
+TABLE_PRODUCTS = os.environ.get('TABLE_PRODUCTS')
+TABLE_ORDER_HISTORY = os.environ.get('TABLE_ORDER_HISTORY')
+TABLE_TOKENS = os.environ.get('TABLE_TOKENS')
+STATE_MACHINE_ARN = os.environ.get('STATE_MACHINE_ARN')
+# Local used when neither the token nor the request names one ('' = local_id required)
+DEFAULT_LOCAL_ID = os.environ.get('DEFAULT_LOCAL_ID', '')
+
+_tables: Dict[str, Any] = {}
+
+
+class DecimalEncoder(json.JSONEncoder):
+    """Serializa tipos Decimal de DynamoDB a JSON."""
+    def default(self, obj):
+        if isinstance(obj, decimal.Decimal):
+            if obj % 1 == 0:
+                return int(obj)
+            return float(obj)
+        return super(DecimalEncoder, self).default(obj)
+
+
+def _if_none_match(event: Dict) -> List[str]:
+    headers = event.get("headers") or {}
+    value = next((v for k, v in headers.items() if k.lower() == "if-none-match"), None) or ""
+    return [tag.strip().removeprefix("W/") for tag in value.split(",") if tag.strip()]
+
+
+def _method(event: Dict) -> str:
+    # HTTP API (payload 2.0) or REST API (1.0)
+    http = (event.get("requestContext") or {}).get("http") or {}
+    return str(http.get("method") or event.get("httpMethod") or "").upper()
+
+
+def render(body: Any) -> Tuple[str, str]:
+    """Serializa `body` para una respuesta condicional: (payload, etag)."""
+    # sort_keys: same content -> same ETag in every container
+    payload = json.dumps(body, cls=DecimalEncoder, sort_keys=True)
+    return payload, '"' + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def response(status_code: int, body: Any, event: Optional[Dict] = None, max_age: Optional[int] = None,
+             rendered: Optional[Tuple[str, str]] = None) -> Dict:
+    """Genera una respuesta estándar para API Gateway.
+
+    Con el `event` de un GET o HEAD, las respuestas 200 llevan un ETag (hash
+    del cuerpo), `max_age` agrega Cache-Control y un If-None-Match
+    coincidente se responde con 304 sin cuerpo. Los demás métodos no se
+    cachean ni se revalidan (RFC 7232 pide 412 en vez de 304), así que van
+    sin ETag. `rendered` es el render(body) ya calculado: el caller puede
+    guardarlo y no serializar ni hashear en cada request.
+    """
+    headers = {
+        "Content-Type": "application/json",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Headers": "Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token",
+        "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS",
+        "Access-Control-Allow-Credentials": "false",
+    }
+
+    if event is None or status_code != 200 or _method(event) not in ("GET", "HEAD"):
+        payload = rendered[0] if rendered else json.dumps(body, cls=DecimalEncoder)
+        return {"statusCode": status_code, "headers": headers, "body": payload}
+
+    if max_age is not None:
+        headers["Cache-Control"] = f"public, max-age={max_age}"
+    payload, etag = rendered or render(body)
+    headers["ETag"] = etag
+
+    tags = _if_none_match(event)
+    if etag in tags or "*" in tags:
+        return {"statusCode": 304, "headers": headers, "body": ""}
+
+    return {"statusCode": status_code, "headers": headers, "body": payload}
+
+
+def get_table(table_name: str):
+    """Obtiene una referencia (memoizada) a una tabla DynamoDB."""
+    table = _tables.get(table_name)
+    if table is None:
+        table = _tables[table_name] = dynamodb.Table(table_name)
+    return table
+
+
+def batch_get_items(table_name: str, keys: List[Dict], max_retries: int = 5) -> List[Dict]:
+    """BatchGetItem en bloques de 100 claves, reintentando UnprocessedKeys con backoff."""
+    items = []
+    for i in range(0, len(keys), 100):
+        request = {table_name: {'Keys': keys[i:i + 100]}}
+        for attempt in range(max_retries + 1):
+            result = dynamodb.batch_get_item(RequestItems=request)
+            items.extend(result.get('Responses', {}).get(table_name, []))
+            request = result.get('UnprocessedKeys') or {}
+            if not request or attempt == max_retries:
+                break
+            time.sleep(min(0.05 * (2 ** attempt), 1.0))
+        if request:
+            raise RuntimeError(f"BatchGetItem: claves sin procesar en {table_name} tras {max_retries} reintentos")
+    return items
+
+
+def hash_password(password: str) -> str:
+    """Hashea una contraseña usando SHA-256."""
+    return hashlib.sha256(password.encode("utf-8")).hexdigest()
+
+
+def now_iso() -> str:
+    """Retorna la fecha/hora actual en formato ISO."""
+    return datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def now_timestamp() -> int:
+    """Retorna timestamp Unix actual."""
+    return int(datetime.utcnow().timestamp())
@@ -0,0 +1,77 @@
+"""
+Llamadas independientes a AWS en paralelo desde un handler.
+
+`run({'nombre': función, ...})` ejecuta las funciones en un pool de hilos
+del contenedor (se crea en el primer uso y se reutiliza entre invocaciones,
+como los clientes de `common`) y espera a todas con un único plazo: la
+latencia pasa a ser la de la llamada más lenta y no la suma. Cada función
+corre con una copia del contexto del handler (contextvars), así la
+instrumentación y las claves de log siguen asociadas a la invocación.
+
+Los errores se juntan: si alguna falla o no termina a tiempo se lanza
+FanoutError con `errors` ({nombre: excepción}) y `results` (lo que sí
+terminó). Un hilo vencido no se puede cancelar: sigue hasta que su llamada
+vuelva, por eso el plazo debe quedar por debajo del timeout de la Lambda.
+
+FANOUT_WORKERS fija los hilos del pool (8 por defecto) y FANOUT_TIMEOUT_S
+el plazo por defecto de cada `run` (5 s).
+"""
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional
+
+FANOUT_WORKERS = int(os.environ.get('FANOUT_WORKERS', '8'))
+FANOUT_TIMEOUT_S = float(os.environ.get('FANOUT_TIMEOUT_S', '5'))
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+class FanoutError(Exception):
+    """Fallaron una o más llamadas de `run`."""
+
+    def __init__(self, errors: Dict[str, BaseException], results: Dict[str, Any]):
+        super().__init__("; ".join(f"{name}: {error!r}" for name, error in errors.items()))
+        self.errors = errors
+        self.results = results
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix='fanout')
+    return _pool
+
+
+def run(calls: Dict[str, Callable[[], Any]], timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Ejecuta `calls` en paralelo y retorna {nombre: resultado}; lanza FanoutError si alguna falla."""
+    timeout = FANOUT_TIMEOUT_S if timeout is None else timeout
+    results: Dict[str, Any] = {}
+    errors: Dict[str, BaseException] = {}
+    if len(calls) == 1:
+        # Nothing to overlap: skip the thread hop
+        (name, call), = calls.items()
+        try:
+            results[name] = call()
+        except Exception as e:
+            errors[name] = e
+    else:
+        pool = _executor()
+        futures = {name: pool.submit(contextvars.copy_context().run, call) for name, call in calls.items()}
+        deadline = time.monotonic() + timeout
+        for name, future in futures.items():
+            try:
+                results[name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeout:
+                future.cancel()
+                errors[name] = TimeoutError(f"{name}: sin respuesta en {timeout} s")
+            except Exception as e:
+                errors[name] = e
+    if errors:
+        raise FanoutError(errors, results)
+    return results
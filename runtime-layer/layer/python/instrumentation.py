@@ -0,0 +1,392 @@
+"""
+Instrumentación de los handlers con aws-lambda-powertools.
+
+`@instrument` envuelve un handler y por cada invocación emite un registro
+EMF (embedded metric format: CloudWatch lo convierte en métricas sin
+llamadas a PutMetricData) con:
+
+- Duration (ms) y ColdStart (1 en la primera invocación del contenedor)
+- Errors: 1 si el handler lanzó una excepción o respondió 5xx
+- <Servicio>Calls y <Servicio>Latency por cada llamada a DynamoDB, Lambda,
+  StepFunctions o EventBridge, y en los metadatos `calls` el detalle por
+  operación (DynamoDB.GetItem: count, ms, errors)
+- DynamoDBReadCapacity / DynamoDBWriteCapacity: RCU y WCU consumidas, con el
+  detalle por tabla (e índice) en los metadatos `capacity`. Toda llamada a
+  DynamoDB pide ReturnConsumedCapacity (DYNAMODB_RETURN_CONSUMED_CAPACITY:
+  INDEXES por defecto, TOTAL o NONE)
+- trace (metadatos): correlation_id, order_id y los spans de la invocación
+  y de cada llamada a AWS (inicio en ms epoch, duración, padre), para
+  reconstruir el camino crítico de un pedido entre funciones
+
+El correlation_id nace en el borde (header X-Correlation-Id del cliente o el
+requestId de API Gateway), vuelve en el header X-Correlation-Id de la
+respuesta, se agrega a los logs y viaja en la clave `trace` del Payload de
+lambda.Invoke, del input de StartExecution y del Detail de PutEvents, con
+el span de esa llamada como padre del handler que la recibe. Los estados de
+la Step Function que arman su propio Payload (registerToken) no la llevan:
+sus spans se unen al pedido por order_id. Un documento que ya trae `trace`
+la conserva: el outbox guarda `current_trace()` de create_order y el relay
+inicia el workflow con el correlation_id del pedido, no con el suyo.
+
+Las llamadas se miden con los eventos before-call / after-call de botocore
+en los clientes perezosos de `common`, así los handlers no cambian su código.
+Los backends de localdev exponen los mismos eventos, y `add_listener`
+permite que las herramientas locales reciban cada registro sin parsear
+stdout (POWERTOOLS_METRICS_DISABLED=true deja de imprimirlos).
+
+`logger` es un Logger de Powertools con muestreo por invocación
+(POWERTOOLS_LOGGER_SAMPLE_RATE, 0.1 por defecto): `logger.debug` solo sale
+en las invocaciones muestreadas, el resto usa el nivel configurado.
+
+Powertools (vendorizado en la capa, ver runtime-layer/requirements.txt) se
+importa en el primer uso y no al cargar el handler: es el import más caro de
+la mayoría de las funciones. `logger` se construye en el primer log y recién
+entonces recibe las claves de la invocación en curso; el registro EMF carga
+el módulo de métricas al final de la primera invocación, cuando boto3 ya
+cargó casi todo lo que comparten.
+"""
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+import common
+
+NAMESPACE = os.environ.get('POWERTOOLS_METRICS_NAMESPACE', 'BurgerCloud')
+SAMPLE_RATE = float(os.environ.get('POWERTOOLS_LOGGER_SAMPLE_RATE') or 0.1)
+
+RETURN_CONSUMED_CAPACITY = os.environ.get('DYNAMODB_RETURN_CONSUMED_CAPACITY', 'INDEXES').upper()
+TRACE_MAX_SPANS = int(os.environ.get('TRACE_MAX_SPANS', '50'))
+
+CORRELATION_HEADER = 'X-Correlation-Id'
+TRACE_KEY = 'trace'
+
+# botocore service ids -> metric prefix
+_SERVICE_NAMES = {'SFN': 'StepFunctions'}
+# DynamoDB operations that accept ReturnConsumedCapacity
+_CAPACITY_OPERATIONS = {'GetItem', 'PutItem', 'UpdateItem', 'DeleteItem', 'Query', 'Scan', 'BatchGetItem',
+                        'BatchWriteItem', 'TransactGetItems', 'TransactWriteItems', 'ExecuteStatement',
+                        'BatchExecuteStatement', 'ExecuteTransaction'}
+_WRITE_OPERATIONS = {'PutItem', 'UpdateItem', 'DeleteItem', 'BatchWriteItem', 'TransactWriteItems'}
+# Where an order id shows up in events and response bodies
+_ORDER_KEYS = ('order_id', 'pedido_id')
+
+_current: contextvars.ContextVar[Optional['_Invocation']] = contextvars.ContextVar('invocation', default=None)
+# Invocation whose keys the logger holds in this context (fanout threads run on copies)
+_log_owner: contextvars.ContextVar[Optional['_Invocation']] = contextvars.ContextVar('log_owner', default=None)
+_listeners: List[Callable[[Dict[str, Any]], None]] = []
+_warm = set()
+_warm_lock = threading.Lock()
+
+
+def service_of(function_name: str) -> str:
+    """`burger-order-dev-createOrder` -> `burger-order`."""
+    parts = function_name.rsplit('-', 2)
+    return parts[0] if len(parts) == 3 else function_name
+
+
+def new_span_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def incoming_trace(event) -> Dict[str, Any]:
+    """{correlation_id, parent_id} que trae el evento: clave `trace`, header o requestId de API Gateway."""
+    if not isinstance(event, dict):
+        return {}
+    for carrier in (event, event.get('detail')):
+        if isinstance(carrier, dict) and isinstance(carrier.get(TRACE_KEY), dict):
+            return carrier[TRACE_KEY]
+    headers = {str(name).lower(): value for name, value in (event.get('headers') or {}).items()}
+    correlation_id = (headers.get(CORRELATION_HEADER.lower())
+                      or (event.get('requestContext') or {}).get('requestId'))
+    return {'correlation_id': correlation_id} if correlation_id else {}
+
+
+def order_of(document) -> Optional[str]:
+    """order_id de un evento (raíz, detail, path, query o body JSON) o de una respuesta HTTP."""
+    if not isinstance(document, dict):
+        return None
+    body = document.get('body')
+    if isinstance(body, str):
+        try:
+            body = json.loads(body)
+        except ValueError:
+            body = None
+    for source in (document, document.get('detail'), document.get('pathParameters'),
+                   document.get('queryStringParameters'), body):
+        if isinstance(source, dict):
+            for key in _ORDER_KEYS:
+                if source.get(key):
+                    return str(source[key])
+    return None
+
+
+class _Invocation:
+    def __init__(self, function_name: str, cold_start: bool, trace: Optional[Dict[str, Any]] = None):
+        trace = trace or {}
+        self.function_name = function_name
+        self.cold_start = cold_start
+        self.correlation_id = trace.get('correlation_id') or uuid.uuid4().hex
+        self.parent_id = trace.get('parent_id')
+        self.span_id = new_span_id()
+        self.order_id: Optional[str] = None
+        self.start_ms = time.time() * 1000
+        self.calls: Dict[str, Dict[str, Any]] = {}     # "DynamoDB.GetItem" -> count / ms / errors
+        self.latencies: Dict[str, List[float]] = {}    # "DynamoDB" -> [ms, ...]
+        self.capacity: Dict[str, Dict[str, Any]] = {}  # table -> read / write (/ indexes)
+        self.spans: List[Dict[str, Any]] = []          # one per AWS call (up to TRACE_MAX_SPANS)
+        self.dropped_spans = 0
+        self.log_keys: Dict[str, Any] = {'function_name': function_name, 'service': service_of(function_name),
+                                         'cold_start': cold_start, 'correlation_id': self.correlation_id}
+        self.previous_log_keys: Dict[str, Any] = {}
+        self.previous_log_owner: Optional['_Invocation'] = None
+        # fanout.run issues calls of the same invocation from pool threads
+        self._lock = threading.Lock()
+
+    def record_call(self, service: str, operation: str, elapsed_ms: float, failed: bool,
+                    span_id: Optional[str] = None) -> None:
+        with self._lock:
+            call = self.calls.setdefault(f"{service}.{operation}", {'count': 0, 'ms': 0.0, 'errors': 0})
+            call['count'] += 1
+            call['ms'] = round(call['ms'] + elapsed_ms, 3)
+            call['errors'] += int(failed)
+            self.latencies.setdefault(service, []).append(round(elapsed_ms, 3))
+            if len(self.spans) >= TRACE_MAX_SPANS:
+                self.dropped_spans += 1
+                return
+            self.spans.append({'span_id': span_id or new_span_id(), 'parent_id': self.span_id,
+                               'name': f"{service}.{operation}", 'kind': 'call',
+                               'start': round(time.time() * 1000 - elapsed_ms, 3),
+                               'duration_ms': round(elapsed_ms, 3), 'status': 'error' if failed else 'ok'})
+
+    def trace(self, duration_ms: float, failed: bool) -> Dict[str, Any]:
+        root = {'span_id': self.span_id, 'parent_id': self.parent_id, 'name': self.function_name,
+                'kind': 'invocation', 'start': round(self.start_ms, 3), 'duration_ms': round(duration_ms, 3),
+                'status': 'error' if failed else 'ok'}
+        trace = {'correlation_id': self.correlation_id, 'order_id': self.order_id, 'spans': [root] + self.spans}
+        if self.dropped_spans:
+            trace['dropped_spans'] = self.dropped_spans
+        return trace
+
+    def record_capacity(self, operation: str, consumed) -> None:
+        # BatchGetItem / BatchWriteItem / transactions return one entry per table
+        with self._lock:
+            for entry in consumed if isinstance(consumed, list) else [consumed]:
+                table = self.capacity.setdefault(entry.get('TableName', '?'), {'read': 0.0, 'write': 0.0})
+                units = float(entry.get('CapacityUnits') or 0)
+                read, write = entry.get('ReadCapacityUnits'), entry.get('WriteCapacityUnits')
+                if read is None and write is None:
+                    read, write = (0, units) if operation in _WRITE_OPERATIONS else (units, 0)
+                table['read'] += float(read or 0)
+                table['write'] += float(write or 0)
+                for index, used in (entry.get('GlobalSecondaryIndexes') or {}).items():
+                    indexes = table.setdefault('indexes', {})
+                    indexes[index] = indexes.get(index, 0.0) + float(used.get('CapacityUnits') or 0)
+
+    def emf(self, duration_ms: float, failed: bool) -> Dict[str, Any]:
+        from aws_lambda_powertools.metrics import MetricUnit
+        from aws_lambda_powertools.metrics.provider.cloudwatch_emf.cloudwatch import AmazonCloudWatchEMFProvider
+
+        # A provider per invocation: the local server runs handlers concurrently in threads
+        provider = AmazonCloudWatchEMFProvider(metric_set={}, dimension_set={}, metadata_set={},
+                                               namespace=NAMESPACE, service=service_of(self.function_name))
+        provider.add_dimension('function_name', self.function_name)
+        provider.add_metric('Duration', MetricUnit.Milliseconds, round(duration_ms, 3))
+        provider.add_metric('ColdStart', MetricUnit.Count, int(self.cold_start))
+        provider.add_metric('Errors', MetricUnit.Count, int(failed))
+        for service, samples in self.latencies.items():
+            provider.add_metric(f"{service}Calls", MetricUnit.Count, len(samples))
+            for elapsed in samples:
+                provider.add_metric(f"{service}Latency", MetricUnit.Milliseconds, elapsed)
+        if self.capacity:
+            provider.add_metric('DynamoDBReadCapacity', MetricUnit.Count,
+                                round(sum(table['read'] for table in self.capacity.values()), 3))
+            provider.add_metric('DynamoDBWriteCapacity', MetricUnit.Count,
+                                round(sum(table['write'] for table in self.capacity.values()), 3))
+            provider.add_metadata('capacity', self.capacity)
+        if self.calls:
+            provider.add_metadata('calls', self.calls)
+        provider.add_metadata(TRACE_KEY, self.trace(duration_ms, failed))
+        return provider.serialize_metric_set()
+
+
+class _LazyLogger:
+    """Logger de Powertools que se construye en el primer uso y toma las claves de la invocación en curso."""
+
+    def __init__(self):
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def _get(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    from aws_lambda_powertools.logging import Logger
+                    self._instance = Logger(service=os.environ.get('POWERTOOLS_SERVICE_NAME', 'burger'),
+                                            sampling_rate=SAMPLE_RATE)
+        invocation = _current.get()
+        if invocation is not None and _log_owner.get() is not invocation:
+            # Nested in-process invocations (local auth invoke) get their own keys and restore the caller's
+            invocation.previous_log_keys = self._instance.thread_safe_get_current_keys()
+            invocation.previous_log_owner = _log_owner.get()
+            self._instance.thread_safe_append_keys(**invocation.log_keys)
+            self._instance.refresh_sample_rate_calculation()
+            _log_owner.set(invocation)
+        return self._instance
+
+    def release(self, invocation: '_Invocation') -> None:
+        """Quita las claves de `invocation` si llegó a loguear, restaurando las de quien la invocó."""
+        if self._instance is None or _log_owner.get() is not invocation:
+            return
+        self._instance.thread_safe_clear_keys()
+        if invocation.previous_log_keys:
+            self._instance.thread_safe_append_keys(**invocation.previous_log_keys)
+        _log_owner.set(invocation.previous_log_owner)
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+
+logger = _LazyLogger()
+
+
+# -- botocore hooks -----------------------------------------------------------
+def _service(model) -> str:
+    service_id = model.service_model.service_id
+    return _SERVICE_NAMES.get(service_id, str(service_id).replace(' ', ''))
+
+
+def _request_capacity(params, model, **kwargs):
+    if RETURN_CONSUMED_CAPACITY != 'NONE' and model.name in _CAPACITY_OPERATIONS:
+        params.setdefault('ReturnConsumedCapacity', RETURN_CONSUMED_CAPACITY)
+
+
+def _with_trace(document, trace: Dict[str, Any]):
+    """`document` (JSON en str/bytes) con la clave `trace` si no la trae; lo que no sea un objeto JSON queda igual."""
+    try:
+        data = json.loads(document) if document else {}
+    except (TypeError, ValueError):
+        return document
+    if not isinstance(data, dict) or data.get(TRACE_KEY):
+        return document
+    data[TRACE_KEY] = trace
+    return json.dumps(data, default=str)
+
+
+def current_trace() -> Dict[str, Any]:
+    """{correlation_id} de la invocación en curso ({} fuera de un handler), para mensajes diferidos."""
+    invocation = _current.get()
+    return {'correlation_id': invocation.correlation_id} if invocation is not None else {}
+
+
+def _propagate(params, model, context, **kwargs):
+    invocation = _current.get()
+    if invocation is None:
+        return
+    # The call span is the parent of whatever handles the payload on the other side
+    span_id = context['instrumentation_span'] = new_span_id()
+    trace = {'correlation_id': invocation.correlation_id, 'parent_id': span_id}
+    if model.name == 'PutEvents':
+        for entry in params.get('Entries') or []:
+            entry['Detail'] = _with_trace(entry.get('Detail'), trace)
+    else:
+        carrier = 'Payload' if model.name == 'Invoke' else 'input'
+        params[carrier] = _with_trace(params.get(carrier), trace)
+
+
+def _before_call(model, context, **kwargs):
+    context['instrumentation_start'] = time.perf_counter()
+
+
+def _after_call(model, context, parsed=None, **kwargs):
+    invocation = _current.get()
+    start = context.get('instrumentation_start')
+    if invocation is not None and start is not None:
+        service = _service(model)
+        invocation.record_call(service, model.name, (time.perf_counter() - start) * 1000, False,
+                               context.get('instrumentation_span'))
+        if service == 'DynamoDB' and isinstance(parsed, dict) and parsed.get('ConsumedCapacity'):
+            invocation.record_capacity(model.name, parsed['ConsumedCapacity'])
+
+
+def _after_call_error(model, context, **kwargs):
+    invocation = _current.get()
+    start = context.get('instrumentation_start')
+    if invocation is not None and start is not None:
+        invocation.record_call(_service(model), model.name, (time.perf_counter() - start) * 1000, True,
+                               context.get('instrumentation_span'))
+
+
+def attach(client) -> None:
+    """Registra los hooks de medición en un cliente o recurso boto3 (idempotente)."""
+    # Resources expose their client's emitter at resource.meta.client
+    events = getattr(client.meta, 'client', client).meta.events
+    events.register('before-parameter-build.dynamodb', _request_capacity, unique_id='instrumentation-capacity')
+    events.register('before-parameter-build.lambda.Invoke', _propagate, unique_id='instrumentation-trace-invoke')
+    events.register('before-parameter-build.sfn.StartExecution', _propagate,
+                    unique_id='instrumentation-trace-start-execution')
+    events.register('before-parameter-build.eventbridge.PutEvents', _propagate,
+                    unique_id='instrumentation-trace-put-events')
+    events.register('before-call', _before_call, unique_id='instrumentation-before-call')
+    events.register('after-call', _after_call, unique_id='instrumentation-after-call')
+    events.register('after-call-error', _after_call_error, unique_id='instrumentation-after-call-error')
+
+
+common.on_client_created(attach)
+
+
+# -- listeners ----------------------------------------------------------------
+def add_listener(listener: Callable[[Dict[str, Any]], None]) -> None:
+    """Recibe el registro EMF (dict) de cada invocación, p. ej. localdev.metrics."""
+    _listeners.append(listener)
+
+
+def remove_listener(listener: Callable[[Dict[str, Any]], None]) -> None:
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def _publish(record: Dict[str, Any]) -> None:
+    if os.environ.get('POWERTOOLS_METRICS_DISABLED', 'false').lower() != 'true':
+        print(json.dumps(record, separators=(',', ':'), default=str), flush=True)
+    for listener in list(_listeners):
+        listener(record)
+
+
+# -- decorator ----------------------------------------------------------------
+def instrument(handler: Callable) -> Callable:
+    """Mide el handler y sus llamadas a AWS; agrega function_name/request_id/correlation_id a los logs."""
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        function_name = (getattr(context, 'function_name', None) or os.environ.get('AWS_LAMBDA_FUNCTION_NAME')
+                         or handler.__name__)
+        with _warm_lock:
+            cold_start = function_name not in _warm
+            _warm.add(function_name)
+
+        invocation = _Invocation(function_name, cold_start, incoming_trace(event))
+        invocation.order_id = order_of(event)
+        invocation.log_keys['request_id'] = getattr(context, 'aws_request_id', None)
+        token = _current.set(invocation)
+        failed = True
+        start = time.perf_counter()
+        try:
+            result = handler(event, context)
+            failed = isinstance(result, dict) and int(result.get('statusCode') or 0) >= 500
+            if isinstance(result, dict) and 'statusCode' in result:
+                # create_order only knows its order id once it answers
+                invocation.order_id = invocation.order_id or order_of(result)
+                result['headers'] = {**(result.get('headers') or {}), CORRELATION_HEADER: invocation.correlation_id}
+            return result
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            logger.release(invocation)
+            _current.reset(token)
+            _publish(invocation.emf(duration, failed))
+
+    return wrapper
@@ -0,0 +1,247 @@
+"""
+Claves de Burger-Pedidos repartidas en shards (opcional).
+
+Con ORDER_SHARDS=1 (default) la clave de partición de un pedido es su
+`local_id`, como siempre: todos los pedidos de un local, sus transiciones y
+registerToken caen en la misma partición. Con ORDER_SHARDS=N la partición
+es `<local_id>#<shard>`, con el shard derivado del pedido_id (md5, siempre
+el mismo para un pedido), y el GSI by_local_status usa
+`<local_id>#<status>#<shard>`, así las escrituras se reparten en N
+particiones de la tabla y del índice.
+
+- `order_key` / `key_candidates` arman la Key de un pedido a partir del
+  local_id que mandan los clientes (con o sin shard); mientras la migración
+  (data-setup/ShardMigration.py) no termine, `key_candidates` incluye
+  también la clave sin shard
+- `status_partitions` + `gather` hacen scatter-gather de los listados:
+  una Query por shard en paralelo (fanout) y merge por updated_at, con un
+  next_key por shard; `check_next_key` valida el next_key que manda el
+  cliente antes de usarlo como ExclusiveStartKey
+- `list_by_status` es el listado de las colas de cocina y delivery: Query
+  a by_local_status con `gather`, o Scan si la tabla no tiene el índice;
+  `page_params` lee `limit` / `next_key` del query string. Los dos lanzan
+  ValueError si el cliente manda parámetros inválidos (un 400)
+- `public` devuelve un pedido con `local_id` / `local_status` sin shard,
+  como los ven los clientes
+"""
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+import fanout
+from common import get_table, TABLE_ORDERS
+
+ORDER_SHARDS = max(1, int(os.environ.get('ORDER_SHARDS') or 1))
+SEPARATOR = '#'
+# ExclusiveStartKey of by_local_status: index keys + table keys
+STATUS_INDEX_KEYS = ('local_status', 'updated_at', 'local_id', 'pedido_id')
+# ExclusiveStartKey of a scan over the table
+TABLE_KEYS = ('local_id', 'pedido_id')
+
+# GSI: local_status ("<local_id>#<status>") + updated_at
+STATUS_INDEX = 'by_local_status'
+# Message of the ValidationException DynamoDB raises when the index does not exist
+MISSING_INDEX = 'does not have the specified index'
+DEFAULT_PAGE_LIMIT = 20
+
+# Set to False the first time the table reports the index is missing
+_status_index_available = True
+
+Page = Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+
+def shard_of(order_id: str, shards: int = ORDER_SHARDS) -> int:
+    return int(hashlib.md5(str(order_id).encode('utf-8')).hexdigest()[:8], 16) % shards
+
+
+def base_local(local_id: str) -> str:
+    """`BURGER-LOCAL-001#3` -> `BURGER-LOCAL-001`."""
+    return str(local_id).split(SEPARATOR, 1)[0]
+
+
+def partition_key(local_id: str, order_id: str, shards: int = ORDER_SHARDS) -> str:
+    local_id = base_local(local_id)
+    return local_id if shards <= 1 else f"{local_id}{SEPARATOR}{shard_of(order_id, shards)}"
+
+
+def order_key(local_id: str, order_id: str, shards: int = ORDER_SHARDS) -> Dict[str, str]:
+    return {'local_id': partition_key(local_id, order_id, shards), 'pedido_id': order_id}
+
+
+def key_candidates(local_id: str, order_id: str, shards: int = ORDER_SHARDS) -> List[Dict[str, str]]:
+    """Keys donde puede estar el pedido: la actual y, con shards, la de antes de migrar."""
+    keys = [order_key(local_id, order_id, shards)]
+    if shards > 1:
+        keys.append(order_key(local_id, order_id, 1))
+    return keys
+
+
+def key_status(key: Dict[str, str], status: str) -> str:
+    """Valor de `local_status` (partición de by_local_status) para el pedido guardado en `key`."""
+    local_id, _, shard = str(key['local_id']).partition(SEPARATOR)
+    return f"{local_id}{SEPARATOR}{status}" + (f"{SEPARATOR}{shard}" if shard else "")
+
+
+def status_key(local_id: str, status: str, order_id: str, shards: int = ORDER_SHARDS) -> str:
+    return key_status(order_key(local_id, order_id, shards), status)
+
+
+def status_partitions(local_id: str, status: str, shards: int = ORDER_SHARDS) -> List[str]:
+    """Particiones de by_local_status a consultar para un estado (con shards, también la de antes de migrar)."""
+    value = f"{base_local(local_id)}{SEPARATOR}{status}"
+    if shards <= 1:
+        return [value]
+    return [f"{value}{SEPARATOR}{shard}" for shard in range(shards)] + [value]
+
+
+def public(item: Dict[str, Any]) -> Dict[str, Any]:
+    """El pedido como lo ven los clientes: sin el shard en local_id / local_status."""
+    if SEPARATOR not in str(item.get('local_id', '')) and str(item.get('local_status', '')).count(SEPARATOR) < 2:
+        return item
+    item = dict(item)
+    item['local_id'] = base_local(item['local_id'])
+    if item.get('local_status'):
+        item['local_status'] = SEPARATOR.join(str(item['local_status']).split(SEPARATOR)[:2])
+    return item
+
+
+def gather(query: Callable[[str, int, Optional[Dict[str, Any]]], Page], partitions: List[str], limit: int,
+           next_key: Optional[Dict[str, Any]] = None, order_by: str = 'updated_at',
+           key_names: Tuple[str, ...] = STATUS_INDEX_KEYS) -> Page:
+    """Scatter-gather: `query(partición, limit, start_key)` en cada partición y merge por `order_by`.
+
+    Con una sola partición es la Query de siempre (next_key = LastEvaluatedKey).
+    Con varias, next_key es {partición: clave desde donde seguir o None si
+    ya terminó}; cada partición avanza solo hasta el último pedido que entró
+    en la página, así no se pierde ninguno entre páginas.
+    """
+    if len(partitions) == 1:
+        return query(partitions[0], limit, next_key)
+    if next_key is not None and not set(next_key) <= set(partitions):
+        # A next_key from before sharding (or from another local): start over
+        next_key = None
+
+    cursors = next_key if next_key is not None else {partition: {} for partition in partitions}
+    pending = {partition: cursor for partition, cursor in cursors.items() if cursor is not None}
+    pages = fanout.run({partition: (lambda p=partition, c=cursor: query(p, limit, c or None))
+                        for partition, cursor in pending.items()})
+
+    merged = sorted(((str(item.get(order_by, '')), partition, index, item)
+                     for partition, (items, _) in pages.items() for index, item in enumerate(items)),
+                    key=lambda entry: entry[:3])
+    taken = merged[:limit]
+    consumed = {}
+    for _, partition, index, _ in taken:
+        consumed[partition] = max(consumed.get(partition, -1), index)
+
+    cursors = dict(cursors)
+    for partition, (items, last_key) in pages.items():
+        if consumed.get(partition, -1) == len(items) - 1:
+            # Every item returned by this partition made it into the page
+            cursors[partition] = last_key
+        else:
+            last = items[consumed[partition]] if partition in consumed else None
+            cursors[partition] = {name: last[name] for name in key_names if name in last} if last else cursors[partition]
+    more = any(cursor is not None for cursor in cursors.values())
+    return [item for _, _, _, item in taken], (cursors if more else None)
+
+
+def _is_start_key(key: Any, key_names: Tuple[str, ...]) -> bool:
+    return (isinstance(key, dict) and set(key) in (set(key_names), set(TABLE_KEYS))
+            and all(isinstance(value, str) and value for value in key.values()))
+
+
+def check_next_key(next_key: Any, key_names: Tuple[str, ...] = STATUS_INDEX_KEYS) -> Optional[Dict[str, Any]]:
+    """Valida el next_key de un cliente (LastEvaluatedKey o el de `gather`); ValueError si no tiene esa forma."""
+    if next_key is None or _is_start_key(next_key, key_names):
+        return next_key
+    if not isinstance(next_key, dict) or not next_key:
+        raise ValueError("next_key inválido")
+    # gather: {partition: start key, {} (not started yet) or None (finished)}
+    for cursor in next_key.values():
+        if cursor is not None and cursor != {} and not _is_start_key(cursor, key_names):
+            raise ValueError("next_key inválido")
+    return next_key
+
+
+def page_params(query_params: Optional[Dict[str, str]]) -> Tuple[int, Optional[Dict[str, Any]]]:
+    """(limit, next_key) del query string de un listado; ValueError si alguno es inválido."""
+    query_params = query_params or {}
+    limit = int(query_params.get('limit', DEFAULT_PAGE_LIMIT))
+    if limit <= 0:
+        raise ValueError("limit inválido")
+    next_key = query_params.get('next_key')
+    start_key = check_next_key(json.loads(next_key)) if next_key else None
+    return limit, start_key
+
+
+def _query_partition(local_status: str, limit: int, start_key: Optional[Dict[str, Any]] = None) -> Page:
+    from boto3.dynamodb.conditions import Key  # only the listings query; transitions stay light at import
+
+    query_kwargs = {
+        'IndexName': STATUS_INDEX,
+        'KeyConditionExpression': Key('local_status').eq(local_status),
+        'Limit': limit
+    }
+    if start_key:
+        query_kwargs['ExclusiveStartKey'] = start_key
+
+    response = get_table(TABLE_ORDERS).query(**query_kwargs)
+    return response.get('Items', []), response.get('LastEvaluatedKey')
+
+
+def _scan_by_status(local_id: str, status: str, limit: int, start_key: Optional[Dict[str, Any]] = None) -> Page:
+    # Fallback for tables created before by_local_status existed
+    from boto3.dynamodb.conditions import Attr
+
+    local_filter = Attr('local_id').eq(local_id) | Attr('local_id').begins_with(f"{local_id}{SEPARATOR}")
+    scan_kwargs = {
+        'FilterExpression': Attr('status').eq(status) & local_filter,
+        'Limit': limit
+    }
+    if start_key:
+        scan_kwargs['ExclusiveStartKey'] = start_key
+
+    response = get_table(TABLE_ORDERS).scan(**scan_kwargs)
+    return response.get('Items', []), response.get('LastEvaluatedKey')
+
+
+def _validation_messages(error: BaseException) -> List[str]:
+    # ValidationException messages, also from the per-shard queries of gather
+    errors = error.errors.values() if isinstance(error, fanout.FanoutError) else [error]
+    return [e.response['Error'].get('Message', '') for e in errors
+            if isinstance(e, ClientError) and e.response['Error']['Code'] == 'ValidationException']
+
+
+def _reject_start_key(error: BaseException, messages: List[str], start_key: Optional[Dict[str, Any]]) -> None:
+    # DynamoDB refused the client's next_key (tampered, or from another listing): a 400, not a 500
+    if start_key and messages:
+        raise ValueError("next_key inválido") from error
+
+
+def list_by_status(local_id: str, status: str, limit: int = DEFAULT_PAGE_LIMIT,
+                   start_key: Optional[Dict[str, Any]] = None) -> Page:
+    """Pedidos de un local en `status`, ordenados por updated_at; Scan solo si falta by_local_status."""
+    global _status_index_available
+
+    if _status_index_available:
+        try:
+            # One partition per shard with ORDER_SHARDS: query them all and merge by updated_at
+            return gather(_query_partition, status_partitions(local_id, status), limit, start_key)
+        except (ClientError, fanout.FanoutError) as e:
+            messages = _validation_messages(e)
+            # Only a missing index switches the container to scans
+            if not any(MISSING_INDEX in message for message in messages):
+                _reject_start_key(e, messages, start_key)
+                raise
+            print(f"⚠️ Index {STATUS_INDEX} not available, falling back to scan: {e}")
+            _status_index_available = False
+
+    try:
+        return _scan_by_status(base_local(local_id), status, limit, start_key)
+    except ClientError as e:
+        _reject_start_key(e, _validation_messages(e), start_key)
+        raise
@@ -0,0 +1,147 @@
+"""
+Outbox transaccional (Burger-Outbox): eventos que se publican después de
+confirmar la escritura que los origina.
+
+create_order no llama a StartExecution: agrega a la transacción del pedido
+(stock + reserva + pedido) el item `IniciarWorkflow` con el input del
+workflow. O se escriben todos o ninguno, así no queda un pedido sin su
+evento ni un evento sin su pedido, y el checkout no espera a Step Functions.
+
+relayOutbox (workflow-service) publica los eventos:
+
+- desde el stream de la tabla (INSERT), en lotes y apenas se confirman
+- desde el GSI by_pending (`outbox_bucket` + `next_attempt_at`), que solo
+  tiene eventos sin publicar: reintentos con backoff (`mark_failed`) y red
+  de seguridad si el stream se atrasa o un lote falla. `due` usa una Query
+  por bucket, sin scan; los OUTBOX_BUCKETS reparten las escrituras del índice
+
+Un evento recién escrito aparece en el índice recién OUTBOX_GRACE segundos
+después: antes de eso es trabajo del stream. `mark_sent` lo saca del índice
+(condición `estado = PENDIENTE`) y `ttl` lo borra después de
+OUTBOX_RETENTION segundos. Tras OUTBOX_MAX_ATTEMPTS intentos fallidos queda
+FALLIDO, fuera del índice, para revisarlo a mano.
+
+El evento_id es el order_id y la ejecución se llama igual: publicar dos
+veces el mismo evento (stream y polling a la vez) termina en
+ExecutionAlreadyExists, que cuenta como publicado.
+"""
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+from common import dynamodb, get_table
+
+TABLE_OUTBOX = os.environ.get('TABLE_OUTBOX')
+OUTBOX_GRACE = int(os.environ.get('OUTBOX_GRACE', '60'))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', '8'))
+OUTBOX_RETENTION = int(os.environ.get('OUTBOX_RETENTION', str(7 * 24 * 3600)))
+PENDING_INDEX = 'by_pending'
+OUTBOX_BUCKETS = 4
+# Backoff between failed attempts: 30 s, 60 s, 120 s ... up to 1 h
+RETRY_BASE_S = 30
+RETRY_MAX_S = 3600
+
+START_WORKFLOW = 'IniciarWorkflow'
+PENDING, SENT, FAILED = 'PENDIENTE', 'ENVIADO', 'FALLIDO'
+
+
+def _now() -> str:
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+
+
+def _bucket(event_id: str) -> str:
+    return f"{PENDING}#{int(hashlib.md5(event_id.encode('utf-8')).hexdigest()[:8], 16) % OUTBOX_BUCKETS}"
+
+
+def workflow_start(order_id: str, payload: Dict[str, Any], now: Optional[int] = None) -> Dict[str, Any]:
+    """Put del evento IniciarWorkflow para la transacción de create_order."""
+    now = int(time.time()) if now is None else now
+    return {
+        'Put': {
+            'TableName': TABLE_OUTBOX,
+            'Item': {
+                'evento_id': order_id,
+                'tipo': START_WORKFLOW,
+                'payload': json.dumps(payload, default=str),
+                'estado': PENDING,
+                'outbox_bucket': _bucket(order_id),
+                'next_attempt_at': now + OUTBOX_GRACE,
+                'intentos': 0,
+                'created_at': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(now)),
+            },
+            'ConditionExpression': 'attribute_not_exists(evento_id)',
+        }
+    }
+
+
+def mark_sent(event_id: str) -> bool:
+    """Saca el evento del índice de pendientes; False si ya estaba publicado (o no existe)."""
+    try:
+        dynamodb.meta.client.update_item(
+            TableName=TABLE_OUTBOX,
+            Key={'evento_id': event_id},
+            UpdateExpression="SET estado = :sent, sent_at = :t, #ttl = :ttl REMOVE outbox_bucket",
+            ConditionExpression="estado = :pending",
+            ExpressionAttributeNames={'#ttl': 'ttl'},
+            ExpressionAttributeValues={':sent': SENT, ':pending': PENDING, ':t': _now(),
+                                       ':ttl': int(time.time()) + OUTBOX_RETENTION},
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return False
+
+
+def mark_failed(event_id: str, error: str, attempts: int) -> Optional[str]:
+    """Registra un intento fallido y retorna el estado que queda; None si otro relay ya lo cerró.
+
+    Reprograma `next_attempt_at` con backoff o, agotados los intentos, lo deja FALLIDO.
+    """
+    attempts += 1
+    values = {':pending': PENDING, ':n': attempts, ':error': error[:500]}
+    if attempts >= OUTBOX_MAX_ATTEMPTS:
+        update = "SET estado = :failed, intentos = :n, ultimo_error = :error REMOVE outbox_bucket"
+        values[':failed'] = status = FAILED
+    else:
+        update = "SET intentos = :n, ultimo_error = :error, next_attempt_at = :next"
+        values[':next'] = int(time.time()) + min(RETRY_MAX_S, RETRY_BASE_S * 2 ** (attempts - 1))
+        status = PENDING
+    try:
+        dynamodb.meta.client.update_item(
+            TableName=TABLE_OUTBOX,
+            Key={'evento_id': event_id},
+            UpdateExpression=update,
+            ConditionExpression="estado = :pending",
+            ExpressionAttributeValues=values,
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return None
+    return status
+
+
+def due(now: Optional[int] = None, limit: int = 100) -> List[Dict[str, Any]]:
+    """Eventos pendientes con `next_attempt_at` vencido (hasta `limit`), desde by_pending."""
+    now = int(time.time()) if now is None else now
+    table = get_table(TABLE_OUTBOX)
+    found: List[Dict[str, Any]] = []
+    for bucket in range(OUTBOX_BUCKETS):
+        query_kwargs = {
+            'IndexName': PENDING_INDEX,
+            'KeyConditionExpression': Key('outbox_bucket').eq(f"{PENDING}#{bucket}") & Key('next_attempt_at').lte(now),
+        }
+        while len(found) < limit:
+            query_kwargs['Limit'] = limit - len(found)
+            response = table.query(**query_kwargs)
+            found += response.get('Items', [])
+            if 'LastEvaluatedKey' not in response:
+                break
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return found
@@ -0,0 +1,168 @@
+"""
+Reservas de stock por pedido (Burger-Reservas-Stock).
+
+create_order descuenta el stock y, en la misma transacción, escribe la
+reserva del pedido: qué descontó de cada contador (`lineas`: producto_id,
+shard de stock_shards y cantidad) y hasta cuándo vale (`expires_at` = ahora
++ RESERVATION_TTL). validate_stock solo comprueba que la reserva siga
+abierta (`get`): el stock ya está descontado. La reserva se cierra una sola vez:
+
+- `commit`: el pedido se entregó y el stock queda descontado
+- `release`: cocina o delivery rechazaron el pedido, o una etapa venció o
+  falló; el stock vuelve a los mismos contadores en la misma transacción
+  que cierra la reserva (condición `estado = RESERVADA`), así nunca se
+  devuelve dos veces
+
+Mientras está abierta, la reserva tiene `reserva_bucket` y aparece en el GSI
+by_expiry (`reserva_bucket` + `expires_at`). Cerrarla borra ese atributo: el
+índice solo tiene reservas abiertas y `expired` encuentra las vencidas con
+una Query por bucket, sin scan. Los EXPIRY_BUCKETS reparten las escrituras
+del índice. `ttl` borra las reservas cerradas después de
+RESERVATION_RETENTION segundos.
+
+RESERVATION_TTL tiene que superar el camino más largo de la Step Function
+(la suma de los TimeoutSeconds de sus esperas): antes de eso cerrarla es
+trabajo del workflow, no del sweeper.
+"""
+import hashlib
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from common import dynamodb, get_table, TABLE_PRODUCTS
+from stock_shards import shard_key
+
+TABLE_RESERVATIONS = os.environ.get('TABLE_RESERVATIONS')
+RESERVATION_TTL = int(os.environ.get('RESERVATION_TTL', '7200'))
+RESERVATION_RETENTION = int(os.environ.get('RESERVATION_RETENTION', str(7 * 24 * 3600)))
+EXPIRY_INDEX = 'by_expiry'
+EXPIRY_BUCKETS = 4
+# Attempts when a released counter is held by a checkout (TransactionConflict)
+RELEASE_RETRIES = 3
+
+HELD, COMMITTED, RELEASED = 'RESERVADA', 'CONFIRMADA', 'LIBERADA'
+
+Line = Tuple[str, int, int]  # (producto_id, shard, cantidad)
+
+
+def _now() -> str:
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+
+
+def _bucket(order_id: str) -> str:
+    return f"{HELD}#{int(hashlib.md5(order_id.encode('utf-8')).hexdigest()[:8], 16) % EXPIRY_BUCKETS}"
+
+
+def hold(order_id: str, local_id: str, lines: List[Line], now: Optional[int] = None) -> Dict[str, Any]:
+    """Put de la reserva para la transacción de create_order."""
+    now = int(time.time()) if now is None else now
+    return {
+        'Put': {
+            'TableName': TABLE_RESERVATIONS,
+            'Item': {
+                'pedido_id': order_id,
+                'local_id': local_id,
+                'lineas': [{'producto_id': pid, 'shard': shard, 'cantidad': quantity} for pid, shard, quantity in lines],
+                'estado': HELD,
+                'reserva_bucket': _bucket(order_id),
+                'expires_at': now + RESERVATION_TTL,
+                'created_at': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(now)),
+            },
+            'ConditionExpression': 'attribute_not_exists(pedido_id)',
+        }
+    }
+
+
+def _close(order_id: str, status: str, motivo: str) -> Dict[str, Any]:
+    return {
+        'TableName': TABLE_RESERVATIONS,
+        'Key': {'pedido_id': order_id},
+        'UpdateExpression': "SET estado = :status, motivo = :motivo, closed_at = :t, #ttl = :ttl REMOVE reserva_bucket",
+        'ConditionExpression': "estado = :held",
+        'ExpressionAttributeNames': {'#ttl': 'ttl'},
+        'ExpressionAttributeValues': {':status': status, ':motivo': motivo, ':t': _now(), ':held': HELD,
+                                      ':ttl': int(time.time()) + RESERVATION_RETENTION},
+    }
+
+
+def get(order_id: str) -> Optional[Dict[str, Any]]:
+    """Reserva del pedido (lectura consistente); None si no existe."""
+    return get_table(TABLE_RESERVATIONS).get_item(Key={'pedido_id': order_id}, ConsistentRead=True).get('Item')
+
+
+def commit(order_id: str, motivo: str = 'entregado') -> bool:
+    """Cierra la reserva dejando el stock descontado; False si ya estaba cerrada (o no existe)."""
+    try:
+        dynamodb.meta.client.update_item(**_close(order_id, COMMITTED, motivo))
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return False
+
+
+def release(order_id: str, motivo: str) -> bool:
+    """Devuelve el stock reservado y cierra la reserva; False si ya estaba cerrada (o no existe)."""
+    reservation = get(order_id)
+    if not reservation or reservation.get('estado') != HELD:
+        return False
+
+    lines = list(reservation.get('lineas', []))
+    for attempt in range(RELEASE_RETRIES + 1):
+        transact_items = [{'Update': _close(order_id, RELEASED, motivo)}]
+        transact_items += [
+            {
+                'Update': {
+                    'TableName': TABLE_PRODUCTS,
+                    'Key': shard_key(reservation['local_id'], line['producto_id'], int(line['shard'])),
+                    'UpdateExpression': "SET stock = stock + :val",
+                    # A deleted product must not come back as a bare stock counter
+                    'ConditionExpression': "attribute_exists(producto_id)",
+                    'ExpressionAttributeValues': {':val': int(line['cantidad'])},
+                }
+            }
+            for line in lines
+        ]
+        try:
+            dynamodb.meta.client.transact_write_items(TransactItems=transact_items)
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'TransactionCanceledException':
+                raise
+            reasons = e.response.get('CancellationReasons', [])
+            codes = [reason.get('Code') for reason in reasons]
+            if codes and codes[0] == 'ConditionalCheckFailed':
+                return False  # closed by someone else in the meantime
+            gone = {index - 1 for index, code in enumerate(codes) if index and code == 'ConditionalCheckFailed'}
+            if gone:
+                lines = [line for index, line in enumerate(lines) if index not in gone]
+            elif 'TransactionConflict' not in codes or attempt == RELEASE_RETRIES:
+                raise
+            else:
+                time.sleep(random.uniform(0, 0.01 * 2 ** attempt))
+    return False
+
+
+def expired(now: Optional[int] = None, limit: int = 100) -> List[Dict[str, Any]]:
+    """Reservas abiertas con `expires_at` vencido (hasta `limit`), desde by_expiry."""
+    from boto3.dynamodb.conditions import Key  # only the sweep queries; validateStock stays light at import
+
+    now = int(time.time()) if now is None else now
+    table = get_table(TABLE_RESERVATIONS)
+    found: List[Dict[str, Any]] = []
+    for bucket in range(EXPIRY_BUCKETS):
+        query_kwargs = {
+            'IndexName': EXPIRY_INDEX,
+            'KeyConditionExpression': Key('reserva_bucket').eq(f"{HELD}#{bucket}") & Key('expires_at').lte(now),
+        }
+        while len(found) < limit:
+            query_kwargs['Limit'] = limit - len(found)
+            response = table.query(**query_kwargs)
+            found += response.get('Items', [])
+            if 'LastEvaluatedKey' not in response:
+                break
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return found
@@ -0,0 +1,100 @@
+"""
+Stock de un producto repartido en K contadores (opcional).
+
+En una promoción todos los checkouts descuentan stock del mismo item de
+Burger-Productos: las transacciones de create_order chocan entre sí
+(TransactionConflict) y ese item concentra las escrituras. Un producto con
+`stock_shards` = K (STOCK_SHARDS por defecto al crearlo o reponer stock)
+reparte su stock en K contadores: el shard 0 es el propio producto
+(`stock`) y los shards 1..K-1 son items `<producto_id>#STOCK#<k>` en la
+partición del local. Con K=1 todo queda como antes.
+
+- `read` trae el stock de cada shard (una BatchGetItem para los extra)
+- `allocate` reparte la cantidad pedida desde un shard al azar y sigue con
+  los siguientes cuando uno no alcanza
+- `decrements` arma los Update condicionales (`stock >= :val`) que van en
+  la transacción del pedido
+- `split` / `shard_items` reparten el stock al crear o reponer un producto
+- `is_shard` / `base_id` para los lectores que suman los shards
+  (catalog_cache)
+"""
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from common import batch_get_items
+
+STOCK_SHARDS = max(1, int(os.environ.get('STOCK_SHARDS') or 1))
+SHARD_MARKER = '#STOCK#'
+
+Plan = List[Tuple[int, int]]  # (shard, unidades a descontar)
+
+
+def is_shard(product_id: str) -> bool:
+    return SHARD_MARKER in str(product_id)
+
+
+def base_id(product_id: str) -> str:
+    """`prod-1#STOCK#3` -> `prod-1`."""
+    return str(product_id).split(SHARD_MARKER, 1)[0]
+
+
+def shard_count(product: Dict[str, Any]) -> int:
+    return max(1, int(product.get('stock_shards', 1)))
+
+
+def shard_key(local_id: str, product_id: str, shard: int) -> Dict[str, str]:
+    return {'local_id': local_id, 'producto_id': product_id if shard == 0 else f"{product_id}{SHARD_MARKER}{shard}"}
+
+
+def read(table_name: str, products: Dict[str, Dict[str, Any]]) -> Dict[str, List[int]]:
+    """Stock de cada shard por producto; el shard 0 sale del producto ya leído."""
+    stocks = {pid: [int(p.get('stock', 0))] + [0] * (shard_count(p) - 1) for pid, p in products.items()}
+    keys = [shard_key(p['local_id'], pid, shard)
+            for pid, p in products.items() for shard in range(1, shard_count(p))]
+    if keys:
+        for item in batch_get_items(table_name, keys):
+            pid, _, shard = item['producto_id'].partition(SHARD_MARKER)
+            stocks[pid][int(shard)] = int(item.get('stock', 0))
+    return stocks
+
+
+def allocate(stocks: List[int], quantity: int, start: int = 0) -> Optional[Plan]:
+    """Toma `quantity` unidades desde el shard `start`; None si entre todos no alcanza."""
+    plan, remaining = [], quantity
+    for offset in range(len(stocks)):
+        shard = (start + offset) % len(stocks)
+        take = min(stocks[shard], remaining)
+        if take > 0:
+            plan.append((shard, take))
+            remaining -= take
+        if not remaining:
+            return plan
+    return None
+
+
+def decrements(table_name: str, local_id: str, product_id: str, plan: Plan) -> List[Dict[str, Any]]:
+    """Operaciones de TransactWriteItems que descuentan `plan`."""
+    return [
+        {
+            'Update': {
+                'TableName': table_name,
+                'Key': shard_key(local_id, product_id, shard),
+                'UpdateExpression': "set stock = stock - :val",
+                'ConditionExpression': "stock >= :val",
+                'ExpressionAttributeValues': {':val': take}
+            }
+        }
+        for shard, take in plan
+    ]
+
+
+def split(stock: int, shards: int) -> List[int]:
+    """Reparte `stock` en `shards` partes casi iguales (la primera es la del producto)."""
+    share, extra = divmod(int(stock), shards)
+    return [share + (1 if shard < extra else 0) for shard in range(shards)]
+
+
+def shard_items(local_id: str, product_id: str, parts: List[int]) -> List[Dict[str, Any]]:
+    """Items de los shards 1..K-1 con su parte del stock."""
+    return [{**shard_key(local_id, product_id, shard), 'stock': stock}
+            for shard, stock in enumerate(parts) if shard > 0]
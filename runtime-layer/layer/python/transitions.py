@@ -0,0 +1,146 @@
+"""
+Transiciones de estado de un pedido para las acciones de cocina y delivery.
+
+Cada acción es una fila de TRANSITIONS: el estado en que tiene que estar el
+pedido, el que deja y la salida que recibe la Step Function. `advance`
+aplica la transición con un solo UpdateItem condicional
+(`status = :esperado AND attribute_exists(task_token)`) que borra el
+task_token y lo devuelve con ReturnValues=UPDATED_OLD: no hace falta leer
+el pedido antes, y si dos cocineros o repartidores actúan sobre el mismo
+pedido solo uno se lleva el token; el otro falla en la condición y recibe
+409. Con ReturnValuesOnConditionCheckFailure=ALL_OLD el error trae el
+pedido, así se distingue 404 (no existe) de 409 (otro estado o token todavía
+sin registrar) sin otra lectura.
+
+Después llama a send_task_success (registerToken deja el siguiente estado
+y un token nuevo) y escribe el historial en paralelo (fanout): no dependen
+una de la otra. Si send_task_success falla, el pedido vuelve al estado
+esperado con su token; si solo falla el historial, la transición ya quedó
+hecha y se registra el error sin fallar la acción.
+"""
+import json
+import os
+import time
+import uuid
+from typing import Any, Dict, NamedTuple, Tuple
+
+from botocore.exceptions import ClientError
+
+import fanout
+from common import get_table, stepfunctions, TABLE_ORDERS
+from order_shards import key_candidates, key_status
+
+TABLE_HISTORIAL_ESTADOS = os.environ.get('TABLE_HISTORIAL_ESTADOS')
+
+
+class Transition(NamedTuple):
+    expected: str            # status the order must be in (set by registerToken with its task_token)
+    status: str              # status written by the action (and its history entry)
+    output: Dict[str, Any]   # send_task_success output read by the Choice states
+    conflict: str            # 409 message when the order is in another status
+
+
+TRANSITIONS: Dict[str, Transition] = {
+    'aceptar_cocina': Transition('PENDIENTE_COCINA', 'EN_COCINA', {'decision': 'ACEPTAR'},
+                                 "El pedido no está pendiente de cocina"),
+    'rechazar_cocina': Transition('PENDIENTE_COCINA', 'RECHAZADO_COCINA', {'decision': 'RECHAZAR'},
+                                  "El pedido no está pendiente de cocina"),
+    'terminar_coccion': Transition('COCINANDO', 'LISTO_PARA_ENTREGA', {'status': 'COOKED'},
+                                   "El pedido no está en cocción"),
+    'tomar_pedido': Transition('LISTO_PARA_RECOJO', 'EN_CAMINO', {'decision': 'ACEPTAR', 'status': 'PICKED_UP'},
+                               "Pedido no disponible"),
+    'entregar_pedido': Transition('EN_CAMINO', 'ENTREGADO', {'status': 'DELIVERED'},
+                                  "Pedido no está en camino"),
+}
+
+
+class TransitionError(Exception):
+    """La transición no se aplicó: `status_code` y `message` van tal cual en la respuesta HTTP."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+def _now() -> str:
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+
+
+def claim(action: str, local_id: str, order_id: str) -> Tuple[Dict[str, str], str]:
+    """Aplica la transición de `action` sobre el pedido y retorna (Key del pedido, task_token que tenía)."""
+    transition = TRANSITIONS[action]
+    # With ORDER_SHARDS, orders not migrated yet are still under the plain local_id
+    for key in key_candidates(local_id, order_id):
+        try:
+            result = get_table(TABLE_ORDERS).update_item(
+                Key=key,
+                UpdateExpression="SET #s = :status, local_status = :ls, updated_at = :t REMOVE task_token",
+                ConditionExpression="#s = :expected AND attribute_exists(task_token)",
+                ExpressionAttributeNames={'#s': 'status'},
+                ExpressionAttributeValues={
+                    ':status': transition.status,
+                    ':ls': key_status(key, transition.status),
+                    ':t': _now(),
+                    ':expected': transition.expected,
+                },
+                ReturnValues='UPDATED_OLD',
+                ReturnValuesOnConditionCheckFailure='ALL_OLD',
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            item = e.response.get('Item')
+            if not item:
+                continue
+            if item.get('status', {}).get('S') != transition.expected:
+                raise TransitionError(409, transition.conflict) from None
+            # Right status, but registerToken has not stored the next token yet
+            raise TransitionError(409, "No hay token activo") from None
+        return key, result['Attributes']['task_token']
+    raise TransitionError(404, "Pedido no encontrado")
+
+
+def release(action: str, key: Dict[str, str], token: str) -> None:
+    """Deshace `claim` si nadie tocó el pedido después (p. ej. send_task_success falló)."""
+    transition = TRANSITIONS[action]
+    try:
+        get_table(TABLE_ORDERS).update_item(
+            Key=key,
+            UpdateExpression="SET #s = :expected, local_status = :ls, updated_at = :t, task_token = :token",
+            ConditionExpression="#s = :status AND attribute_not_exists(task_token)",
+            ExpressionAttributeNames={'#s': 'status'},
+            ExpressionAttributeValues={
+                ':expected': transition.expected,
+                ':ls': key_status(key, transition.expected),
+                ':t': _now(),
+                ':token': token,
+                ':status': transition.status,
+            },
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+
+
+def advance(action: str, local_id: str, order_id: str) -> None:
+    """Transición + send_task_success + historial. Lanza TransitionError si el pedido no está en el estado esperado."""
+    transition = TRANSITIONS[action]
+    key, token = claim(action, local_id, order_id)
+    history = {
+        'pedido_id': order_id,
+        'estado_id': str(uuid.uuid4()),
+        'estado': transition.status,
+        'timestamp': _now()
+    }
+    try:
+        fanout.run({
+            'send_task_success': lambda: stepfunctions.send_task_success(
+                taskToken=token, output=json.dumps(transition.output)),
+            'historial': lambda: get_table(TABLE_HISTORIAL_ESTADOS).put_item(Item=history),
+        })
+    except fanout.FanoutError as e:
+        if 'send_task_success' in e.errors:
+            release(action, key, token)
+            raise
+        print(f"⚠️ Historial de {order_id} ({transition.status}) no registrado: {e}")
@@ -50,6 +50,11 @@ check_env() {
   : "${TABLE_PEDIDOS:?Falta TABLE_PEDIDOS en .env}"
   : "${TABLE_HISTORIAL_ESTADOS:?Falta TABLE_HISTORIAL_ESTADOS en .env}"
   : "${TABLE_TOKENS_USUARIOS:?Falta TABLE_TOKENS_USUARIOS en .env}"
+  : "${TABLE_RESERVAS_STOCK:?Falta TABLE_RESERVAS_STOCK en .env}"
+  : "${TABLE_OUTBOX:?Falta TABLE_OUTBOX en .env}"
+  if [[ "${TOKEN_MODE:-opaque}" == "signed" && -z "${JWT_SECRET:-}" ]]; then
+    die "TOKEN_MODE=signed requiere JWT_SECRET en .env"
+  fi
 
   export AWS_REGION="${AWS_REGION:-us-east-1}"
 }
@@ -117,6 +122,7 @@ cleanup_failed_stacks() {
     "burger-delivery-dev"
     "burger-auth-dev"
     "burger-kitchen-dev"
+    "burger-runtime-dev"
   )
   
   for stack in "${stacks[@]}"; do
@@ -148,6 +154,21 @@ deploy_service() {
   cd - > /dev/null
 }
 
+# La capa se despliega desde runtime-layer/build: el código de layer/python
+# más las dependencias de runtime-layer/requirements.txt (Powertools, PyJWT)
+# para el runtime de Lambda (python3.10, x86_64).
+build_layer() {
+  local build_dir="runtime-layer/build/python"
+  echo -e "${YELLOW}📦 Armando la capa burger-runtime...${NC}"
+  rm -rf runtime-layer/build
+  mkdir -p "$build_dir"
+  cp runtime-layer/layer/python/*.py "$build_dir"/
+  pip3 install -q -r runtime-layer/requirements.txt -t "$build_dir" \
+    --platform manylinux2014_x86_64 --python-version 3.10 --implementation cp --only-binary=:all: \
+    || die "No se pudieron instalar las dependencias de la capa (runtime-layer/requirements.txt)."
+  echo -e "${GREEN}✅ Capa lista en runtime-layer/build${NC}\n"
+}
+
 deploy_services() {
   echo -e "\n${BLUE}=========================================${NC}"
   echo -e "${BLUE}🚀 DESPLEGANDO SERVICIOS${NC}"
@@ -162,6 +183,17 @@ deploy_services() {
   # Limpiar stacks fallidos
   cleanup_failed_stacks
   
+  # Stream de la tabla Outbox: relayOutbox (burger-workflow) se suscribe a él
+  if [[ -z "${TABLE_OUTBOX_STREAM_ARN:-}" ]]; then
+    TABLE_OUTBOX_STREAM_ARN=$(aws dynamodb describe-table --table-name "$TABLE_OUTBOX" --region "$AWS_REGION" \
+      --query 'Table.LatestStreamArn' --output text 2>/dev/null || true)
+    [[ -n "$TABLE_OUTBOX_STREAM_ARN" && "$TABLE_OUTBOX_STREAM_ARN" != "None" ]] || \
+      die "La tabla $TABLE_OUTBOX no existe o no tiene stream. Crea las tablas primero (DataPoblator)."
+    export TABLE_OUTBOX_STREAM_ARN
+  fi
+
+  build_layer
+
   # Desplegar todos los servicios usando Serverless Compose
   echo -e "${YELLOW}📦 Desplegando todos los servicios con Serverless Compose...${NC}\n"
   
@@ -201,6 +233,8 @@ delete_tables() {
     "$TABLE_PEDIDOS"
     "$TABLE_HISTORIAL_ESTADOS"
     "$TABLE_TOKENS_USUARIOS"
+    "$TABLE_RESERVAS_STOCK"
+    "$TABLE_OUTBOX"
   )
   
   for table in "${tables[@]}"; do
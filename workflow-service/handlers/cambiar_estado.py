@@ -1,18 +1,18 @@
 import json
 import os
-import boto3
 from datetime import datetime
 import uuid
+from common import get_table
+from instrumentation import instrument, logger
 
-dynamodb = boto3.resource('dynamodb')
-
+@instrument
 def handler(event, context):
-    print(f"Evento recibido: {json.dumps(event)}")
+    logger.debug("Evento recibido", extra={"event": event})
     
     try:
         # Tabla de historial
         table_name = os.environ['TABLE_ORDER_HISTORY']
-        table = dynamodb.Table(table_name)
+        table = get_table(table_name)
         
         # Extraer datos del evento
         source = event.get('source', '')
@@ -44,7 +44,7 @@ def handler(event, context):
         # Insertar en DynamoDB
         table.put_item(Item=item)
         
-        print(f"Estado registrado: {pedido_id} -> {estado_nuevo}")
+        logger.info("Estado registrado", extra={"pedido_id": pedido_id, "estado": estado_nuevo})
         
         return {
             'statusCode': 200,
@@ -57,7 +57,7 @@ def handler(event, context):
         }
         
     except Exception as e:
-        print(f"Error al registrar estado: {str(e)}")
+        logger.exception("Error al registrar estado")
         return {
             'statusCode': 500,
             'body': json.dumps({
@@ -0,0 +1,81 @@
+import os
+from functools import partial
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import ClientError
+from common import stepfunctions, STATE_MACHINE_ARN
+from instrumentation import instrument, logger
+import fanout
+import outbox
+
+# Pending events published per scheduled run
+OUTBOX_RELAY_LIMIT = int(os.environ.get('OUTBOX_RELAY_LIMIT', '200'))
+
+_deserializer = TypeDeserializer()
+
+
+def _start_workflow(event):
+    try:
+        stepfunctions.start_execution(
+            stateMachineArn=STATE_MACHINE_ARN,
+            name=event['evento_id'],  # order_id: a second publish is a no-op
+            input=event['payload']
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ExecutionAlreadyExists':
+            raise
+
+
+_PUBLISHERS = {outbox.START_WORKFLOW: _start_workflow}
+
+
+def _publish_one(event):
+    publisher = _PUBLISHERS.get(event.get('tipo'))
+    if publisher is None:
+        raise ValueError(f"Tipo de evento desconocido: {event.get('tipo')}")
+    publisher(event)
+    outbox.mark_sent(event['evento_id'])
+
+
+def _inserted(records):
+    # Only new events: the relay's own updates (sent / failed) reach the stream too
+    events = []
+    for record in records:
+        if record.get('eventName') != 'INSERT':
+            continue
+        image = record.get('dynamodb', {}).get('NewImage') or {}
+        events.append({name: _deserializer.deserialize(value) for name, value in image.items()})
+    return events
+
+
+def _publish(events):
+    counts = {'sent': 0, 'retry': 0, 'failed': 0}
+    # Chunks of FANOUT_WORKERS: bounded concurrency and one fanout deadline per chunk
+    for start in range(0, len(events), fanout.FANOUT_WORKERS):
+        chunk = {event['evento_id']: event for event in events[start:start + fanout.FANOUT_WORKERS]}
+        try:
+            fanout.run({event_id: partial(_publish_one, event) for event_id, event in chunk.items()})
+            errors = {}
+        except fanout.FanoutError as e:
+            errors = e.errors
+        counts['sent'] += len(chunk) - len(errors)
+        for event_id, error in errors.items():
+            status = outbox.mark_failed(event_id, repr(error), int(chunk[event_id].get('intentos', 0)))
+            logger.warning("No se pudo publicar el evento", extra={"evento_id": event_id, "error": repr(error),
+                                                                  "estado": status})
+            if status == outbox.FAILED:
+                counts['failed'] += 1
+            elif status == outbox.PENDING:
+                counts['retry'] += 1
+    return counts
+
+
+@instrument
+def handler(event, context):
+    # DynamoDB stream of Burger-Outbox (Records) or the scheduled sweep of by_pending
+    if 'Records' in event:
+        source, events = 'stream', _inserted(event['Records'])
+    else:
+        source, events = 'schedule', outbox.due(limit=OUTBOX_RELAY_LIMIT)
+    counts = _publish(events)
+    logger.debug("Outbox publicado", extra={"source": source, **counts})
+    return counts
@@ -1,16 +1,12 @@
 import json
 import os
-import boto3
 from datetime import datetime
+from common import get_table, stepfunctions
+from instrumentation import instrument, logger
 
-stepfunctions = boto3.client('stepfunctions')
-dynamodb = boto3.resource('dynamodb')
-
-def get_table(table_name):
-    return dynamodb.Table(table_name)
-
+@instrument
 def handler(event, context):
-    print(f"Request recibido: {json.dumps(event)}")
+    logger.debug("Request recibido", extra={"event": event})
     
     try:
         # ------- 1. Validación de Token y Rol (RBAC) -------
@@ -31,7 +27,7 @@ def handler(event, context):
             return {'statusCode': 401, 'body': json.dumps({'error': 'Token inválido o expirado'})}
             
         user_role = user_data.get('rol', '').lower()
-        print(f"Usuario autenticado: {user_data.get('user_id')} - Rol: {user_role}")
+        logger.info("Usuario autenticado", extra={"user_id": user_data.get('user_id'), "rol": user_role})
         
         # ------- 2. Parsear Body -------
         body = json.loads(event.get('body', '{}'))
@@ -55,12 +51,12 @@ def handler(event, context):
             if user_role in ['repartidor', 'delivery', 'gerente']:
                 authorized = True
         else:
-            print("No se especificó 'stage', validación laxa de roles")
+            logger.warning("No se especificó 'stage', validación laxa de roles")
             if user_role in ['cocina', 'cocinero', 'repartidor', 'delivery', 'gerente']:
                 authorized = True
         
         if not authorized:
-            print(f"Acceso denegado. Rol '{user_role}' no tiene permiso para stage '{stage}'")
+            logger.warning("Acceso denegado", extra={"rol": user_role, "stage": stage})
             return {
                 'statusCode': 403, 
                 'body': json.dumps({
@@ -82,7 +78,7 @@ def handler(event, context):
             output=json.dumps(output)
         )
         
-        print(f"Callback enviado: decision={decision} por {user_role}")
+        logger.info("Callback enviado", extra={"decision": decision, "rol": user_role})
         
         return {
             'statusCode': 200,
@@ -102,5 +98,5 @@ def handler(event, context):
     except stepfunctions.exceptions.InvalidToken:
         return {'statusCode': 400, 'body': json.dumps({'error': 'Token de tarea inválido'})}
     except Exception as e:
-        print(f"Error al procesar callback: {str(e)}")
+        logger.exception("Error al procesar callback")
         return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
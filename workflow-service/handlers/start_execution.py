@@ -1,12 +1,12 @@
 import json
 import os
-import boto3
 from datetime import datetime
+from common import stepfunctions
+from instrumentation import instrument, logger
 
-stepfunctions = boto3.client('stepfunctions')
-
+@instrument
 def handler(event, context):
-    print(f"Evento recibido: {json.dumps(event)}")
+    logger.debug("Evento recibido", extra={"event": event})
     
     try:
         # Extraer datos del evento de EventBridge
@@ -30,7 +30,7 @@ def handler(event, context):
             input=json.dumps(detail)
         )
         
-        print(f"Step Function iniciado: {response['executionArn']}")
+        logger.info("Step Function iniciado", extra={"execution_arn": response['executionArn']})
         
         return {
             'statusCode': 200,
@@ -42,7 +42,7 @@ def handler(event, context):
         }
         
     except Exception as e:
-        print(f"Error al iniciar Step Function: {str(e)}")
+        logger.exception("Error al iniciar Step Function")
         return {
             'statusCode': 500,
             'body': json.dumps({
@@ -1,11 +1,11 @@
 import json
-import boto3
 from datetime import datetime
+from common import events as eventbridge
+from instrumentation import instrument, logger
 
-eventbridge = boto3.client('events')
-
+@instrument
 def handler(event, context):
-    print(f"Request recibido: {json.dumps(event)}")
+    logger.debug("Request recibido", extra={"event": event})
     
     try:
         # Parsear body
@@ -32,7 +32,7 @@ def handler(event, context):
         if response['FailedEntryCount'] > 0:
             raise Exception(f"Error al publicar evento: {response['Entries']}")
         
-        print(f"Evento publicado: {source} -> {detail_type}")
+        logger.info("Evento publicado", extra={"source": source, "detail_type": detail_type})
         
         return {
             'statusCode': 200,
@@ -57,7 +57,7 @@ def handler(event, context):
         }
         
     except Exception as e:
-        print(f"Error al publicar evento: {str(e)}")
+        logger.exception("Error al publicar evento")
         return {
             'statusCode': 500,
             'body': json.dumps({